@@ -1,12 +1,32 @@
 # agents/__init__.py
-from .collector import PatentCollectorAgent
-from .summarizer import PatentSummarizerAgent
-from .organizer import PatentOrganizerAgent
-from .reporter import ReportGeneratorAgent
-
-__all__ = [
-    "PatentCollectorAgent",
-    "PatentSummarizerAgent",
-    "PatentOrganizerAgent",
-    "ReportGeneratorAgent",
-]
+# 에이전트 모듈은 LLM 클라이언트 등 무거운 모듈을 불러오므로, 이름을 처음 사용할 때 해당 모듈만 import
+import importlib
+from typing import Any
+
+_MODULES = {
+    "PatentCollectorAgent": "collector",
+    "PatentSummarizerAgent": "summarizer",
+    "PatentOrganizerAgent": "organizer",
+    "ReportGeneratorAgent": "reporter",
+    "PatentAnalyzerAgent": "analyzer",
+    "StreamingPipelineAgent": "pipeline",
+    "PatentIndexAgent": "indexer",
+    "BudgetPlannerAgent": "planner",
+    "PatentDedupAgent": "deduplicator",
+    "PatentPreprocessAgent": "preprocessor",
+    "LazySummaryAgent": "lazy_summarizer",
+}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_MODULES[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
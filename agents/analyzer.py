@@ -0,0 +1,208 @@
+import json
+import re
+from typing import Any, Optional, Tuple
+from langchain_openai import ChatOpenAI
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+from state import PatentState
+from config import Config
+from scheduler import AdaptiveScheduler
+from agents.summarizer import PatentSummarizerAgent
+from agents.organizer import PatentOrganizerAgent
+from records import PatentRecord
+from budget import Estimate, TokenCounter
+
+
+class PatentAnalyzerAgent:
+    """요약과 분류를 한 번의 LLM 호출(JSON 응답)로 처리하는 에이전트"""
+
+    def __init__(
+        self,
+        llm: ChatOpenAI,
+        summarizer: PatentSummarizerAgent,
+        organizer: PatentOrganizerAgent,
+        scheduler: Optional[AdaptiveScheduler] = None,
+    ):
+        self.name = "Patent Analyzer"
+        self.llm = llm
+        # ① 파싱 실패 시 기존 2단계(요약 → 분류) 경로로 되돌아가기 위해 보관
+        self.summarizer = summarizer
+        self.organizer = organizer
+        self.scheduler = scheduler or AdaptiveScheduler()
+        self.fused_count = 0
+        self.cached_count = 0
+        self.fallback_count = 0
+
+        system_prompt = f"""당신은 특허 요약 및 분류 전문가입니다.
+        주어진 특허를 핵심만 간결하게 2-3문장으로 요약하고,
+        다음 카테고리 중 하나로 정확히 분류해주세요:
+        {", ".join(Config.PATENT_CATEGORIES)}
+
+        반드시 아래 JSON 형식으로만 응답하세요:
+        {{{{"summary": "요약 내용", "category": "카테고리"}}}}"""
+
+        self.prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system", system_prompt),
+                ("human", "발명명: {title}\n요약: {content}\n\nJSON 응답:"),
+            ]
+        )
+        # ② JSON 응답은 요약 단독 응답보다 길어지므로 출력 토큰 한도를 따로 지정
+        # 요약 에이전트의 캐스케이드 단계 모델마다 체인을 만들어 싼 모델부터 호출
+        self.cascade = summarizer.cascade
+        self.chains = self.cascade.chains(
+            lambda llm: self.prompt
+            | llm.bind(
+                max_tokens=Config.FUSED_MAX_TOKENS,
+                response_format={"type": "json_object"},
+            )
+        )
+
+    @staticmethod
+    def parse_response(content: str) -> Optional[Tuple[str, str]]:
+        """LLM 응답에서 (요약, 카테고리)를 추출 (형식이 맞지 않으면 None)"""
+        # 코드 블록(```json ... ```)으로 감싼 응답도 허용
+        match = re.search(r"\{.*\}", content, re.DOTALL)
+        if not match:
+            return None
+        try:
+            data = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(data, dict):
+            return None
+
+        summary = str(data.get("summary", "")).strip()
+        category = str(data.get("category", "")).strip()
+        if not summary or category not in Config.PATENT_CATEGORIES:
+            return None
+        return summary, category
+
+    def accept(self, response: Any) -> bool:
+        """캐스케이드 검증 (JSON 형식, 목록에 있는 카테고리, 비었거나 지나치게 길지 않은 요약)"""
+        parsed = self.parse_response(response.content)
+        return parsed is not None and self.summarizer.valid_summary(parsed[0])
+
+    def estimate_tokens(self, patent_item: PatentRecord, counter: TokenCounter) -> Estimate:
+        """통합 호출 1건의 (입력, 출력) 토큰 상한 추정 (짧은 초록이나 캐시에 요약이 있으면 단건 분류 호출의 추정치)"""
+        abstract = patent_item.get("Abstract", "")
+        cache = self.summarizer.cache
+        if not self.summarizer.needs_summary(patent_item) or (
+            cache is not None and cache.contains(self.summarizer.cache_key(patent_item))
+        ):
+            return self.organizer.estimate_tokens(patent_item, counter, batch_size=1)
+        messages = self.prompt.format_messages(
+            title=patent_item.get("InventionName", ""),
+            content=self.summarizer.planner.truncate(abstract),
+        )
+        return counter.count_messages(messages), Config.FUSED_MAX_TOKENS
+
+    async def analyze_single_patent(
+        self, patent_item: PatentRecord
+    ) -> Tuple[str, PatentRecord]:
+        """단일 특허 요약 + 분류 (실패 시 2단계 경로 사용)"""
+        abstract = patent_item.get("Abstract", "")
+        invention_name = patent_item.get("InventionName", "")
+
+        # ③ 짧은 초록은 요약 호출이 필요 없으므로 분류 호출 1회만 수행
+        if self.summarizer.needs_summary(patent_item):
+            category: Optional[str] = None
+
+            async def request_fused() -> str:
+                """통합 호출 → 요약 (카테고리는 따로 보관, 파싱에 실패하면 빈 요약이라 캐시에 저장되지 않음)"""
+                nonlocal category
+                response = await self.cascade.call(
+                    self.chains,
+                    {"title": invention_name, "content": self.summarizer.planner.truncate(abstract)},
+                    op="analyze",
+                    accept=self.accept,
+                )
+                if (parsed := self.parse_response(response.content)) is None:
+                    return ""
+                summary, category = parsed
+                return summary
+
+            try:
+                # ④ staged 모드와 같은 캐시 키를 쓰므로 이전 실행(모드 무관)에서 만든 요약은 다시 요청하지 않음
+                cache = self.summarizer.cache
+                if cache is None:
+                    summary = await request_fused()
+                else:
+                    summary = await cache.get_or_compute(
+                        self.summarizer.cache_key(patent_item),
+                        str(patent_item.get("ApplicationNumber", "")),
+                        request_fused,
+                    )
+                if category is not None:
+                    self.fused_count += 1
+                    patent_item.ai_summary = summary
+                    return category, patent_item
+                if summary:
+                    # 캐시에 있던 요약이면 분류 호출만 수행
+                    self.cached_count += 1
+                    patent_item.ai_summary = summary
+                    return await self.organizer.categorize_single_patent(patent_item)
+            except Exception as e:
+                print(
+                    f"  [{self.name}] 통합 호출 오류 (발명명: {invention_name}): {str(e)[:50]}..."
+                )
+
+        # ⑤ 폴백: 기존 요약 → 분류 2단계 호출
+        self.fallback_count += 1
+        summarized = await self.summarizer.summarize_single_patent(patent_item)
+        return await self.organizer.categorize_single_patent(summarized)
+
+    async def analyze_patents(self, state: PatentState) -> PatentState:
+        """모든 특허를 요약 + 분류"""
+        print(f"\n[{self.name}] 특허 요약/분류 시작...")
+
+        patents = state.raw_patents
+        checkpoint = self.summarizer.checkpoint
+        use_checkpoint = checkpoint is not None and bool(state.run_id)
+        # 재개한 실행이면 이미 요약/분류가 끝난 특허는 체크포인트에서 가져옴 (항목 번호 → [요약, 카테고리])
+        done = checkpoint.load(state.run_id, "analyze") if use_checkpoint else {}
+        if done:
+            print(f"  체크포인트에서 요약/분류 {len(done)}건 복원")
+
+        async def analyze_item(index: int) -> Tuple[str, PatentRecord]:
+            patent = patents[index]
+            if index in done:
+                patent.ai_summary, category = done[index]
+                return category, patent
+            category, patent = await self.analyze_single_patent(patent)
+            if use_checkpoint:
+                # 특허 하나가 끝날 때마다 바로 기록 (요약 문자열과 카테고리만 저장)
+                checkpoint.save(state.run_id, "analyze", {index: [patent.ai_summary, category]})
+            return category, patent
+
+        results = await self.scheduler.map(analyze_item, range(len(patents)), label="요약/분류")
+
+        # ⑥ 요약 결과와 분류 결과를 모두 상태에 저장
+        state.summarized_patents = [
+            result[1] for result in results if not isinstance(result, Exception)
+        ]
+        categorized = self.organizer.group_by_category(results)
+        state.categorized_patents = {}
+        state.categorize(patent for patents in categorized.values() for patent in patents)
+        state.messages.append(
+            AIMessage(
+                content=f"{len(state.summarized_patents)}개의 특허 요약 및 분류를 완료했습니다."
+            )
+        )
+
+        print(
+            f"  통합 호출 {self.fused_count}건 / 캐시된 요약으로 분류만 {self.cached_count}건 "
+            f"/ 2단계 폴백 {self.fallback_count}건"
+        )
+        if (cache := self.summarizer.cache) is not None:
+            cache.evict()
+            stats = cache.stats()
+            print(
+                f"  캐시 히트 {stats['hits']}건 / 미스 {stats['misses']}건 "
+                f"(히트율 {stats['hit_rate'] * 100:.1f}%, 저장 {stats['entries']}건)"
+            )
+        if self.cascade.enabled:
+            print(f"  {self.cascade.describe()}")
+        print(f"[{self.name}] 요약/분류 완료\n")
+        return state
@@ -1,116 +1,457 @@
+import asyncio
+import concurrent.futures
+import io
+import math
+import threading
+import time
 import requests
-import pandas as pd
 import xml.etree.ElementTree as ET
 import os
-from typing import Optional
+from requests.adapters import HTTPAdapter
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional, Sequence, Union
 from dotenv import load_dotenv
 
-from state import PatentState
 from config import Config
+from patent_store import PatentStore, RAW_FIELDS, CSV_COLUMNS
+from records import PatentRecord
+from metrics import MetricsRegistry
+from scheduler import TokenBucket
+
+if TYPE_CHECKING:
+    # 수집만 실행할 때 LangGraph를 불러오지 않도록 타입 검사에만 사용
+    from state import PatentState
+
+
+def _as_codes(cpc_numbers: Union[str, Sequence[str]]) -> list[str]:
+    """CPC 코드 1개 또는 목록 → 중복 없는 코드 목록 (순서 유지)"""
+    if isinstance(cpc_numbers, str):
+        cpc_numbers = [cpc_numbers]
+    return list(dict.fromkeys(cpc_numbers))
 
 
 class PatentCollectorAgent:
     """KIPRIS API를 사용하여 특허 데이터를 수집하는 에이전트"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        use_stored: bool = True,
+        store: Optional[PatentStore] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        pending_only: bool = False,
+        cpc_numbers: Optional[Sequence[str]] = None,
+        total_pages: Optional[int] = None,
+        num_of_rows: Optional[int] = None,
+        corpus_path: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+        limits: Optional[tuple[asyncio.Semaphore, TokenBucket]] = None,
+        scoped: bool = False,
+    ):
         self.name = "Patent Collector"
-        self.url = 'http://plus.kipris.or.kr/openapi/rest/patUtiModInfoSearchSevice/cpcSearchInfo'
+        # False이면 저장된 데이터가 있어도 항상 API에서 새로 수집 (증분 수집 모드)
+        self.use_stored = use_stored
+        # True이면 저장소에서 요약/분류 결과가 없는 특허만 로드 (샤드 재시도 시 끝난 특허 제외)
+        self.pending_only = pending_only
+        # 수집 대상 (주지 않으면 Config 값, 서비스 모드에서는 작업마다 지정)
+        self.cpc_numbers = _as_codes(cpc_numbers or Config.CPC_NUMBERS)
+        self.total_pages = total_pages or Config.TOTAL_PAGES
+        self.num_of_rows = num_of_rows or Config.NUM_OF_ROWS
+        # True이면 저장소에서도 cpc_numbers로 검색된 특허만 로드 (서비스 작업이 다른 작업의 특허를 처리하지 않도록)
+        self.scoped = scoped
+        # 주면 API/저장소 대신 이 CSV(patent_data.csv 형식)의 특허를 저장소에 저장하고 처리
+        self.corpus_path = corpus_path
+        self.store = store or PatentStore()
+        self.url = Config.KIPRIS_API_URL
         load_dotenv()
         self.api_key = os.getenv("KIPRIS_API_KEY", "")
+        # 페이지마다 새 연결을 열지 않도록 커넥션 풀을 가진 세션 재사용 (서비스 모드에서는 작업 간에도 공유)
+        self.session = session or self.create_session()
+        # 페이지별 지연 시간/재시도 기록
+        self.page_stats: list[dict] = []
+        self.failed_pages: list[tuple[str, int]] = []
+        self.metrics = metrics or MetricsRegistry()
+        # 모든 CPC 코드가 함께 쓰는 동시 요청 수/초당 요청 수 제한 (수집을 시작할 때 생성)
+        self.page_slots: Optional[asyncio.Semaphore] = None
+        self.page_bucket: Optional[TokenBucket] = None
+        # 주면 수집마다 새로 만들지 않고 이 제한을 사용 (서비스 모드에서 동시에 실행되는 작업이 함께 씀)
+        self.limits = limits
+
+    @staticmethod
+    def create_session() -> requests.Session:
+        """KIPRIS 동시 요청 수만큼 연결을 유지하는 세션"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=Config.KIPRIS_MAX_CONCURRENCY,
+            pool_maxsize=Config.KIPRIS_MAX_CONCURRENCY,
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    @staticmethod
+    def create_limits() -> tuple[asyncio.Semaphore, TokenBucket]:
+        """KIPRIS 동시 요청 수/초당 요청 수 제한"""
+        return (
+            asyncio.Semaphore(Config.KIPRIS_MAX_CONCURRENCY),
+            TokenBucket(Config.KIPRIS_RATE_LIMIT_PER_SECOND, Config.KIPRIS_MAX_CONCURRENCY),
+        )
+
+    def load_from_csv(self, csv_path: str = "patent_data.csv") -> list[PatentRecord]:
+        """CSV 파일에서 특허 데이터를 로드합니다. (열 단위로 한 번에 변환)"""
+        import pandas as pd
 
-    def load_from_csv(self, csv_path: str = "patent_data.csv") -> list[dict[str, Optional[str]]]:
-        """CSV 파일에서 특허 데이터를 로드합니다."""
         try:
-            df = pd.read_csv(csv_path, encoding="utf-8-sig")
-            patent_data = []
-            
-            for _, row in df.iterrows():
-                patent_data.append({
-                    'ApplicationNumber': str(row.get('ApplicationNumber', 'N/A')),
-                    'RegistrationNumber': str(row.get('Registration Number', 'N/A')) if pd.notna(row.get('Registration Number')) else 'N/A',
-                    'InventionName': str(row.get('Invention Name', 'N/A')),
-                    'Abstract': str(row.get('Abstract', 'N/A')),
-                })
-            
-            return patent_data
+            df = pd.read_csv(csv_path, encoding="utf-8-sig", dtype=str)
+            df = df.rename(columns=CSV_COLUMNS).reindex(columns=list(RAW_FIELDS)).fillna('N/A')
+            return [PatentRecord(*row) for row in df.itertuples(index=False, name=None)]
         except Exception as e:
             print(f"CSV 파일 로드 중 오류 발생: {e}")
             return []
 
-    def collect_from_api(self, cpc_number: str = 'G06N', total_pages: int = 1, num_of_rows: int = 30) -> list[dict[str, Optional[str]]]:
-        """KIPRIS API를 사용하여 특허 데이터를 수집합니다."""
+    def load_stored(self) -> list[PatentRecord]:
+        """저장소에서 특허 데이터를 로드합니다. (저장소가 비어 있으면 기존 CSV를 먼저 옮김)"""
+        if self.store.count() == 0 and os.path.exists(Config.CSV_PATH):
+            print(f"{Config.CSV_PATH}를 특허 저장소로 옮깁니다...")
+            migrated = self.store.migrate_csv(Config.CSV_PATH)
+            print(f"  {migrated}건 이전 완료: {self.store.path}")
+        return self.store.read_records(
+            processed=False if self.pending_only else None,
+            cpc_codes=self.cpc_numbers if self.scoped else None,
+        )
+
+    def load_corpus(self) -> list[PatentRecord]:
+        """지정한 CSV 말뭉치의 특허를 저장소에 저장하고 반환 (내용이 바뀐 특허는 이전 요약/분류 결과 폐기)"""
+        raw_patents = self.load_from_csv(self.corpus_path)
+        if not raw_patents:
+            raise ValueError(f"말뭉치에서 특허를 읽지 못했습니다: {self.corpus_path}")
+        self.store.upsert(raw_patents)
+        print(f"{self.corpus_path}에서 {len(raw_patents)}개의 특허 데이터 로드 완료")
+        return raw_patents
+
+    @staticmethod
+    def _item_from_element(item: ET.Element) -> PatentRecord:
+        """PatentUtilityInfo 요소 → 특허 레코드"""
+        application_number = item.find('ApplicationNumber').text if item.find('ApplicationNumber') is not None else 'N/A'
+        abstract = item.find('Abstract').text if item.find('Abstract') is not None else 'N/A'
+        invention_name = item.find('InventionName').text if item.find('InventionName') is not None else 'N/A'
+        registration_number = item.find('RegistrationNumber').text if item.find('RegistrationNumber') is not None else 'N/A'
+
+        return PatentRecord(
+            ApplicationNumber=application_number,
+            RegistrationNumber=registration_number,
+            InventionName=invention_name,
+            Abstract=abstract,
+        )
+
+    def _consume_events(
+        self, events, emit: Callable[[PatentRecord], None]
+    ) -> Optional[int]:
+        """iterparse/XMLPullParser의 end 이벤트를 처리하여 특허마다 emit 호출, totalCount 반환"""
+        total_count = None
+        for _, elem in events:
+            if elem.tag == 'PatentUtilityInfo':
+                emit(self._item_from_element(elem))
+                # 처리한 요소는 비워서 페이지 전체가 메모리에 쌓이지 않도록 함
+                elem.clear()
+            elif elem.tag == 'totalCount' and elem.text and elem.text.strip().isdigit():
+                total_count = int(elem.text)
+        return total_count
+
+    def parse_page(self, content: bytes) -> tuple[list[PatentRecord], Optional[int]]:
+        """KIPRIS XML 응답 → (특허 목록, 전체 건수)"""
         patent_data = []
-        
+        total_count = self._consume_events(
+            ET.iterparse(io.BytesIO(content), events=('end',)), patent_data.append
+        )
+        return patent_data, total_count
+
+    def _get_page(self, params: dict, handle: Callable[[requests.Response], Any]) -> tuple[int, Any]:
+        """(스레드에서 실행) 페이지 요청 후 200이면 handle(response) 결과 반환"""
+        with self.session.get(
+            self.url, params=params, timeout=Config.KIPRIS_TIMEOUT, stream=True
+        ) as response:
+            if response.status_code != 200:
+                return response.status_code, None
+            return 200, handle(response)
+
+    async def _request_page(
+        self, cpc_number: str, page: int, num_of_rows: int, handle: Callable[[requests.Response], Any]
+    ) -> Any:
+        """페이지 1개 요청 (타임아웃, 429/5xx/네트워크 오류 시 지수 백오프 재시도)"""
+        params = {
+            'cpcNumber': cpc_number,
+            'accessKey': self.api_key,
+            'pageNo': page,
+            'numOfRows': num_of_rows
+        }
+
+        for attempt in range(Config.KIPRIS_MAX_RETRIES + 1):
+            if self.page_bucket is not None:
+                await self.page_bucket.acquire()
+            started = time.perf_counter()
+            try:
+                # ① requests는 동기 API이므로 스레드에서 실행 (세션의 커넥션 풀은 공유)
+                status, result = await asyncio.to_thread(self._get_page, params, handle)
+                self.metrics.observe(
+                    "patent_kipris_request_seconds", time.perf_counter() - started, status=status
+                )
+                if status == 200:
+                    self.page_stats.append({
+                        'cpc': cpc_number,
+                        'page': page,
+                        'seconds': time.perf_counter() - started,
+                        'attempts': attempt + 1,
+                    })
+                    return result
+                self.metrics.inc("patent_kipris_errors_total", error=f"HTTP{status}")
+                # ② 4xx(429 제외)는 재시도해도 결과가 같으므로 바로 실패 처리
+                if status != 429 and status < 500:
+                    raise RuntimeError(f"API 요청 실패 (페이지 {page}): {status}")
+                error = f"HTTP {status}"
+            except (requests.RequestException, ET.ParseError) as e:
+                self.metrics.observe(
+                    "patent_kipris_request_seconds", time.perf_counter() - started, status="error"
+                )
+                self.metrics.inc("patent_kipris_errors_total", error=type(e).__name__)
+                error = str(e)
+
+            if attempt < Config.KIPRIS_MAX_RETRIES:
+                self.metrics.inc("patent_kipris_retries_total")
+                delay = min(2 ** attempt, 30) * 0.5
+                print(f"  페이지 {page} 요청 재시도 {attempt + 1}/{Config.KIPRIS_MAX_RETRIES} ({error[:50]})")
+                await asyncio.sleep(delay)
+
+        raise RuntimeError(f"API 요청 실패 (페이지 {page}): {error[:100]}")
+
+    async def fetch_page(
+        self, cpc_number: str, page: int, num_of_rows: int
+    ) -> tuple[list[PatentRecord], Optional[int]]:
+        """페이지 1개를 받아 (특허 목록, 전체 건수) 반환"""
+        return await self._request_page(
+            cpc_number, page, num_of_rows, lambda response: self.parse_page(response.content)
+        )
+
+    def _start_crawl(self) -> None:
+        """수집 1회(모든 CPC 코드)가 공유하는 요청 제한 생성 (공유 제한을 받았으면 그대로 사용)"""
+        self.page_slots, self.page_bucket = self.limits or self.create_limits()
+
+    def _print_page_stats(self) -> None:
+        if self.page_stats:
+            latencies = [stat['seconds'] for stat in self.page_stats]
+            print(
+                f"  페이지 {len(latencies)}개 수집 "
+                f"(평균 {sum(latencies) / len(latencies):.2f}초, 최대 {max(latencies):.2f}초, "
+                f"실패 {len(self.failed_pages)}개)"
+            )
+
+    async def _crawl_pages(
+        self,
+        cpc_number: str,
+        total_pages: int,
+        num_of_rows: int,
+        fetch: Callable[[int], Awaitable[tuple[int, Optional[int]]]],
+    ) -> None:
+        """fetch(page) → (특허 수, 전체 건수)를 필요한 페이지만큼 동시에 호출"""
+        if self.page_slots is None:
+            self._start_crawl()
+        counts: dict[int, int] = {}
+
+        async def run(page: int) -> Optional[int]:
+            # 여러 CPC 코드를 동시에 수집해도 전체 동시 요청 수는 KIPRIS_MAX_CONCURRENCY 이하
+            async with self.page_slots:
+                try:
+                    count, total_count = await fetch(page)
+                except Exception as e:
+                    print(f"API 요청 중 오류 발생 ({cpc_number} 페이지 {page}): {e}")
+                    self.failed_pages.append((cpc_number, page))
+                    return None
+                counts[page] = count
+                return total_count
+
+        # ③ 첫 페이지로 전체 건수를 확인하여 필요한 페이지 수만 요청
+        total_count = await run(1)
+        if total_count is not None:
+            last_page = min(total_pages, max(1, math.ceil(total_count / num_of_rows)))
+            await asyncio.gather(*[run(page) for page in range(2, last_page + 1)])
+        else:
+            # ④ 전체 건수를 알 수 없으면 동시성 크기 단위로 요청하다가 덜 찬 페이지에서 중단
+            page = 2
+            while page <= total_pages and counts.get(page - 1, 0) == num_of_rows:
+                window = range(page, min(page + Config.KIPRIS_MAX_CONCURRENCY, total_pages + 1))
+                await asyncio.gather(*[run(p) for p in window])
+                page = window[-1] + 1
+                if any(counts.get(p, 0) < num_of_rows for p in window):
+                    break
+
+    async def collect_from_api(
+        self,
+        cpc_numbers: Union[str, Sequence[str]] = 'G06N',
+        total_pages: int = 1,
+        num_of_rows: int = 30,
+    ) -> list[PatentRecord]:
+        """KIPRIS API를 사용하여 특허 데이터를 수집합니다. (CPC 코드별, 페이지별 동시 요청)
+
+        total_pages는 CPC 코드별 최대 페이지 수이며, 여러 코드에서 검색된 특허는
+        출원번호로 합쳐 1건만 반환하고 검색된 코드를 모두 CPCCodes에 기록합니다.
+        """
         if not self.api_key:
             print("KIPRIS_API_KEY가 설정되지 않았습니다.")
             return []
 
-        for page in range(1, total_pages + 1):
-            params = {
-                'cpcNumber': cpc_number,
-                'accessKey': self.api_key,
-                'pageNo': page,
-                'numOfRows': num_of_rows
-            }
+        codes = _as_codes(cpc_numbers)
+        self._start_crawl()
+        pages: dict[tuple[int, int], list[PatentRecord]] = {}
 
-            try:
-                response = requests.get(self.url, params=params)
-                
-                if response.status_code == 200:
-                    root = ET.fromstring(response.content)
-                    
-                    for item in root.findall('.//PatentUtilityInfo'):
-                        application_number = item.find('ApplicationNumber').text if item.find('ApplicationNumber') is not None else 'N/A'
-                        abstract = item.find('Abstract').text if item.find('Abstract') is not None else 'N/A'
-                        invention_name = item.find('InventionName').text if item.find('InventionName') is not None else 'N/A'
-                        registration_number = item.find('RegistrationNumber').text if item.find('RegistrationNumber') is not None else 'N/A'
-
-                        patent_data.append({
-                            'ApplicationNumber': application_number,
-                            'RegistrationNumber': registration_number,
-                            'InventionName': invention_name,
-                            'Abstract': abstract,
-                        })
+        async def crawl(order: int, cpc_number: str) -> None:
+            async def fetch(page: int) -> tuple[int, Optional[int]]:
+                items, total_count = await self.fetch_page(cpc_number, page, num_of_rows)
+                pages[order, page] = items
+                return len(items), total_count
+
+            await self._crawl_pages(cpc_number, total_pages, num_of_rows, fetch)
+
+        await asyncio.gather(*[crawl(order, code) for order, code in enumerate(codes)])
+        self._print_page_stats()
+
+        # ⑤ 코드 순서, 페이지 순서대로 출원번호 기준으로 합침 (같은 특허는 처음 나온 레코드 사용)
+        patents: list[PatentRecord] = []
+        merged: dict[str, PatentRecord] = {}
+        for order, page in sorted(pages):
+            for item in pages[order, page]:
+                number = str(item.ApplicationNumber)
+                if item.has_application_number and number in merged:
+                    merged[number].add_codes((codes[order],))
+                    continue
+                item.add_codes((codes[order],))
+                patents.append(item)
+                # 출원번호가 없는 특허는 같은 특허인지 알 수 없으므로 합치지 않고 그대로 둠
+                if item.has_application_number:
+                    merged[number] = item
+        if len(codes) > 1:
+            found = sum(len(items) for items in pages.values())
+            print(f"  CPC 코드 {len(codes)}개에서 {found}건 검색, 중복 제외 {len(patents)}건")
+        return patents
+
+    async def stream_from_api(
+        self,
+        queue: asyncio.Queue,
+        cpc_numbers: Union[str, Sequence[str]] = 'G06N',
+        total_pages: int = 1,
+        num_of_rows: int = 30,
+    ) -> int:
+        """응답을 받는 대로 XML을 점진적으로 파싱하여 특허를 queue에 넣음 (큐가 차면 대기)
+
+        여러 CPC 코드에서 검색된 특허는 처음 도착한 레코드만 넣고, 이후 코드는 그 레코드의 CPCCodes에 추가
+        """
+        if not self.api_key:
+            print("KIPRIS_API_KEY가 설정되지 않았습니다.")
+            return 0
+
+        codes = _as_codes(cpc_numbers)
+        self._start_crawl()
+        loop = asyncio.get_running_loop()
+        stop = threading.Event()
+        # 출원번호 → 큐에 넣은 레코드 (여러 수신 스레드가 함께 사용)
+        queued: dict[str, PatentRecord] = {}
+        unnumbered = 0
+        queued_lock = threading.Lock()
+
+        def put(item: PatentRecord, cpc_number: str) -> None:
+            nonlocal unnumbered
+            with queued_lock:
+                existing = queued.get(str(item.ApplicationNumber)) if item.has_application_number else None
+                if existing is not None:
+                    # ⑥ 다른 코드에서 이미 넣은 특허는 코드만 추가 (같은 레코드를 공유하므로 뒤 단계에도 반영)
+                    existing.add_codes((cpc_number,))
+                    return
+                item.add_codes((cpc_number,))
+                if item.has_application_number:
+                    queued[str(item.ApplicationNumber)] = item
                 else:
-                    print(f"API 요청 실패 (페이지 {page}): {response.status_code}")
-                    
-            except Exception as e:
-                print(f"API 요청 중 오류 발생 (페이지 {page}): {e}")
+                    # 출원번호가 없는 특허는 합치지 않고 그대로 넣음
+                    unnumbered += 1
+
+            # ⑦ 수신 스레드에서 이벤트 루프의 큐에 넣고 자리가 날 때까지 대기 (백프레셔)
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            while True:
+                try:
+                    return future.result(timeout=1)
+                except concurrent.futures.TimeoutError:
+                    if stop.is_set():
+                        future.cancel()
+                        raise RuntimeError("스트리밍 수집이 중단되었습니다.")
+
+        async def fetch(cpc_number: str, page: int) -> tuple[int, Optional[int]]:
+            emitted = 0
 
-        return patent_data
+            def handle(response: requests.Response) -> tuple[int, Optional[int]]:
+                seen = 0
 
-    def collect_patents(self, state: PatentState) -> PatentState:
+                def emit(item: PatentRecord) -> None:
+                    nonlocal emitted, seen
+                    seen += 1
+                    # 재시도 시 이전 시도에서 이미 보낸 특허는 건너뜀
+                    if seen > emitted:
+                        put(item, cpc_number)
+                        emitted += 1
+
+                parser = ET.XMLPullParser(events=('end',))
+                total_count = None
+                for chunk in response.iter_content(chunk_size=16 * 1024):
+                    parser.feed(chunk)
+                    total_count = self._consume_events(parser.read_events(), emit) or total_count
+                parser.close()
+                total_count = self._consume_events(parser.read_events(), emit) or total_count
+                return seen, total_count
+
+            return await self._request_page(cpc_number, page, num_of_rows, handle)
+
+        def crawl(cpc_number: str) -> Awaitable[None]:
+            return self._crawl_pages(
+                cpc_number, total_pages, num_of_rows, lambda page: fetch(cpc_number, page)
+            )
+
+        try:
+            await asyncio.gather(*[crawl(code) for code in codes])
+        finally:
+            stop.set()
+        self._print_page_stats()
+        return len(queued) + unnumbered
+
+    async def collect_patents(self, state: "PatentState") -> "PatentState":
         """특허 데이터를 수집하고 상태를 업데이트합니다."""
         print("--- 특허 데이터 수집 시작 ---")
 
         try:
-            # CSV 파일에서 데이터 로드 시도
-            if os.path.exists("patent_data.csv"):
-                print("CSV 파일에서 특허 데이터를 로드합니다...")
-                raw_patents = self.load_from_csv("patent_data.csv")
-                
+            # 지정한 CSV 말뭉치가 있으면 그 특허만 저장소에 저장하고 처리
+            if self.corpus_path:
+                state.raw_patents = self.load_corpus()
+                return state
+
+            # 저장소(또는 기존 CSV)에서 데이터 로드 시도 (증분 수집 모드에서는 항상 API에서 새로 수집)
+            if self.use_stored:
+                raw_patents = self.load_stored()
+
                 if raw_patents:
                     state.raw_patents = raw_patents
                     print(f"총 {len(raw_patents)}개의 특허 데이터 로드 완료")
                     return state
-            
-            # CSV 파일이 없거나 비어있으면 API에서 수집
+
+            # 저장된 데이터가 없으면 API에서 수집
             print("KIPRIS API에서 특허 데이터를 수집합니다...")
-            raw_patents = self.collect_from_api(
-                cpc_number=Config.CPC_NUMBER,
-                total_pages=Config.TOTAL_PAGES,
-                num_of_rows=Config.NUM_OF_ROWS
+            print(f"  CPC 코드: {', '.join(self.cpc_numbers)}")
+            raw_patents = await self.collect_from_api(
+                cpc_numbers=self.cpc_numbers,
+                total_pages=self.total_pages,
+                num_of_rows=self.num_of_rows
             )
-            
+
             if raw_patents:
                 state.raw_patents = raw_patents
                 print(f"총 {len(raw_patents)}개의 특허 데이터 수집 완료")
-                
-                # 수집한 데이터를 CSV로 저장
-                df = pd.DataFrame(raw_patents)
-                df.columns = ['ApplicationNumber', 'Registration Number', 'Invention Name', 'Abstract']
-                df.to_csv("patent_data.csv", index=False, encoding="utf-8-sig")
-                print("특허 데이터를 patent_data.csv에 저장했습니다.")
+
+                # 수집한 데이터를 저장소에 저장 (내용이 바뀐 특허는 이전 요약/분류 결과 폐기)
+                self.store.upsert(raw_patents)
+                print(f"특허 데이터를 {self.store.path}에 저장했습니다.")
             else:
                 print("수집된 특허 데이터가 없습니다.")
 
@@ -0,0 +1,138 @@
+from typing import Any, Optional
+import numpy as np
+from langchain_core.messages import AIMessage
+
+from state import PatentState
+from config import Config
+from dedup import NearDuplicateIndex, find_duplicates, patent_key
+from patent_store import PatentStore
+from records import PatentRecord
+
+
+class PatentDedupAgent:
+    """초록이 거의 같은 특허를 묶어 대표만 요약/분류하고, 대표의 결과를 나머지 특허에 복사하는 에이전트"""
+
+    def __init__(self, threshold: float = Config.DEDUP_THRESHOLD, store: Optional[PatentStore] = None):
+        self.name = "Patent Deduplicator"
+        self.threshold = threshold
+        self.index = NearDuplicateIndex(threshold)
+        # 저장소가 있으면 MinHash 서명을 저장해 두고 증분 실행에서는 새 특허만 서명 계산
+        self.store = store
+        self.signed = 0
+        self.reused = 0
+
+    def reset(self) -> None:
+        """실행마다 새 색인 사용"""
+        self.index = NearDuplicateIndex(self.threshold)
+
+    def match(self, patent: PatentRecord) -> Any:
+        """(스트리밍 파이프라인용) 이미 본 대표 특허 중 근사 중복이 있으면 그 출원번호, 없으면 None"""
+        representative = self.index.add(
+            patent_key(patent), patent.get("Abstract", ""), patent.content_hash
+        )
+        return None if representative == patent_key(patent) else representative
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "representatives": len(self.index.keys),
+            "duplicates": self.index.duplicates,
+            "signatures_computed": self.signed,
+            "signatures_reused": self.reused,
+        }
+
+    def _stored_signatures(self, patents: list[PatentRecord]) -> Optional[dict[str, np.ndarray]]:
+        """저장소에 있는 서명 (출원번호 → 서명), 저장소가 없으면 None"""
+        if self.store is None:
+            return None
+        stored = self.store.read_signatures(
+            (patent_key(patent) for patent in patents), self.index.hasher.params
+        )
+        return {key: np.frombuffer(signature, dtype=np.uint32) for key, signature in stored.items()}
+
+    async def cluster_patents(self, state: PatentState) -> PatentState:
+        """근사 중복 특허를 raw_patents에서 빼서 duplicate_patents로 옮김"""
+        print(f"\n[{self.name}] 근사 중복 탐지 시작...")
+        self.reset()
+
+        # ① 증분 수집이면 이전 결과가 있는 특허를 먼저 대표로 등록 (그와 같은 신규 특허도 결과 재사용)
+        signatures = self._stored_signatures(state.known_patents + state.raw_patents)
+        stored = set(signatures or ())
+        if state.known_patents:
+            find_duplicates(state.known_patents, self.index, signatures)
+        duplicate_of = find_duplicates(state.raw_patents, self.index, signatures)
+
+        # ② 새로 계산한 서명은 저장하여 다음 증분 실행에서 이전 특허를 다시 서명하지 않음
+        if signatures is not None:
+            computed = {key: signature.tobytes() for key, signature in signatures.items() if key not in stored}
+            self.store.record_signatures(computed, self.index.hasher.params)
+            self.signed, self.reused = len(computed), len(stored)
+
+        state.duplicate_patents = [
+            patent for patent in state.raw_patents if patent_key(patent) in duplicate_of
+        ]
+        state.raw_patents = [
+            patent for patent in state.raw_patents if patent_key(patent) not in duplicate_of
+        ]
+        state.duplicate_of = duplicate_of
+        state.messages.append(
+            AIMessage(
+                content=f"대표 특허 {len(state.raw_patents)}건, 근사 중복 {len(duplicate_of)}건"
+            )
+        )
+
+        print(
+            f"  대표 특허 {len(state.raw_patents)}건 / 근사 중복 {len(duplicate_of)}건 "
+            f"(유사도 {self.threshold} 이상, LLM 호출 생략)"
+        )
+        if self.store is not None:
+            print(f"  서명 계산 {self.signed}건, 저장된 서명 재사용 {self.reused}건")
+        print(f"[{self.name}] 근사 중복 탐지 완료\n")
+        return state
+
+    def copy_results(self, state: PatentState) -> int:
+        """대표 특허의 요약/분류 결과를 중복 특허에 복사하여 summarized/categorized에 추가
+
+        다시 호출하면 이미 복사한 특허는 요약만 새로 채움 (lazy 모드는 분류 후 대표를 요약하고 다시 호출)
+        """
+        # 결과는 summarized_patents의 레코드에서 가져옴 (체크포인트에서 이어서 실행하면 raw_patents와 다른 객체)
+        representatives = {
+            patent_key(patent): patent
+            for patent in state.raw_patents + state.known_patents + state.summarized_patents
+        }
+        deferred = {patent_key(patent) for patent in state.deferred_patents}
+        # 이미 복사한 특허는 결과 목록에 있음 (저장소에서 불러온 특허는 이전 분류가 있으므로 category로 판단하지 않음)
+        listed = {patent_key(patent) for patent in state.summarized_patents}
+
+        copied = 0
+        copied_patents = []
+        duplicates = []
+        for patent in state.duplicate_patents:
+            key = state.duplicate_of.get(patent_key(patent))
+            representative = representatives.get(key)
+            if representative is not None and representative.category:
+                # ② 대표와 같은 요약/분류 결과 사용 (레코드는 복사하지 않고 필드만 채움)
+                patent.ai_summary = representative.ai_summary
+                patent.category = representative.category
+                if patent_key(patent) not in listed:
+                    copied_patents.append(patent)
+                    state.summarized_patents.append(patent)
+                    copied += 1
+            elif key in deferred:
+                # 대표가 예산 초과로 보류되었으면 중복 특허도 보류 목록으로 옮김
+                state.deferred_patents.append(patent)
+                continue
+            duplicates.append(patent)
+        state.duplicate_patents = duplicates
+        state.categorize(copied_patents)
+        return copied
+
+    async def expand_duplicates(self, state: PatentState) -> PatentState:
+        """요약/분류가 끝난 뒤 근사 중복 특허에 대표 특허의 결과를 채움"""
+        print(f"\n[{self.name}] 중복 특허 결과 채우기 시작...")
+        copied = self.copy_results(state)
+        state.messages.append(
+            AIMessage(content=f"근사 중복 특허 {copied}건에 대표 특허의 결과를 재사용했습니다.")
+        )
+        print(f"  중복 특허 {len(state.duplicate_patents)}건 중 {copied}건에 대표 결과 재사용")
+        print(f"[{self.name}] 중복 특허 결과 채우기 완료\n")
+        return state
@@ -0,0 +1,68 @@
+from typing import Optional
+from langchain_core.messages import AIMessage
+
+from state import PatentState
+from patent_store import PatentStore
+
+
+class PatentIndexAgent:
+    """수집 결과를 저장소와 비교하여 신규/변경 특허만 처리 대상으로 남기고, 결과를 저장·병합하는 에이전트"""
+
+    def __init__(self, store: Optional[PatentStore] = None, scoped: bool = False):
+        self.name = "Patent Indexer"
+        self.store = store or PatentStore()
+        # True이면 이번에 수집한 특허의 이전 결과만 재사용 (서비스 작업의 보고서에 다른 작업의 특허가 섞이지 않도록)
+        self.scoped = scoped
+
+    async def select_delta(self, state: PatentState) -> PatentState:
+        """신규 또는 내용이 바뀐 특허만 raw_patents에 남김"""
+        print(f"\n[{self.name}] 변경분 확인 시작...")
+
+        collected = state.raw_patents
+        # ① 수집 단계에서 저장소에 반영되면서 내용이 바뀐 특허는 이전 결과가 폐기됨
+        pending = self.store.pending_numbers(
+            str(patent.get("ApplicationNumber")) for patent in collected
+        )
+
+        # ② 처리 대상: 신규/변경 특허, 재사용 대상: 저장소에 결과가 있는 모든 특허 (scoped이면 이번에 수집한 특허 중)
+        state.raw_patents = [
+            patent for patent in collected if str(patent.get("ApplicationNumber")) in pending
+        ]
+        state.known_patents = self.store.read_records(
+            application_numbers=(
+                [str(patent.get("ApplicationNumber")) for patent in collected] if self.scoped else None
+            ),
+            processed=True,
+        )
+        state.messages.append(
+            AIMessage(
+                content=f"신규/변경 특허 {len(state.raw_patents)}건, 이전 결과 재사용 {len(state.known_patents)}건"
+            )
+        )
+
+        print(
+            f"  수집 {len(collected)}건 중 신규/변경 {len(state.raw_patents)}건, "
+            f"이전 결과 재사용 {len(state.known_patents)}건"
+        )
+        print(f"[{self.name}] 변경분 확인 완료\n")
+        return state
+
+    async def save_results(self, state: PatentState) -> PatentState:
+        """이번 실행의 요약/분류 결과를 저장소에 저장"""
+        recorded = self.store.record_results(state.categorized_records())
+        print(f"[{self.name}] 요약/분류 결과 {recorded}건 저장\n")
+        return state
+
+    async def merge_results(self, state: PatentState) -> PatentState:
+        """이번 실행 결과를 저장소에 저장하고 이전 결과와 합쳐 보고서에 전달"""
+        print(f"\n[{self.name}] 결과 병합 시작...")
+
+        # ③ 새로 처리한 특허의 요약/분류 결과 저장
+        recorded = self.store.record_results(state.categorized_records())
+
+        state.categorize(state.known_patents)
+        state.summarized_patents.extend(state.known_patents)
+
+        print(f"  새 결과 {recorded}건 저장, 이전 결과 {len(state.known_patents)}건 병합")
+        print(f"[{self.name}] 결과 병합 완료\n")
+        return state
@@ -0,0 +1,103 @@
+from itertools import islice
+from typing import TYPE_CHECKING, Iterable, Mapping, Optional
+from langchain_core.messages import AIMessage
+
+from state import PatentState
+from config import Config
+from budget import TokenBudgetPlanner
+from dedup import patent_key
+from patent_store import PatentStore
+from records import PatentRecord
+from agents.summarizer import PatentSummarizerAgent
+
+if TYPE_CHECKING:
+    from agents.deduplicator import PatentDedupAgent
+
+
+class LazySummaryAgent:
+    """분류가 끝난 뒤 보고서에 표시될 특허만 요약하는 에이전트 (lazy 모드: 분류 → 표시 특허 선택 → 요약)
+
+    보고서는 카테고리마다 per_category건만 표시하므로, 나머지 특허는 요약하지 않고 분류 결과만 저장합니다.
+    요약이 없는 특허는 보고서에 초록이 표시되며, 필요하면 cli.py summarize --displayed로 나중에 요약할 수 있습니다.
+    근사 중복 특허는 요약하지 않고 대표 특허를 요약한 뒤 dedup 에이전트로 대표의 요약을 채웁니다.
+    """
+
+    def __init__(
+        self,
+        summarizer: PatentSummarizerAgent,
+        planner: TokenBudgetPlanner,
+        store: Optional[PatentStore] = None,
+        per_category: Optional[int] = Config.PATENT_PER_CATEGORY,
+        dedup: Optional["PatentDedupAgent"] = None,
+    ):
+        self.name = "Lazy Summarizer"
+        self.summarizer = summarizer
+        self.planner = planner
+        self.store = store
+        # None이면 (분할 보고서) 모든 특허를 표시하므로 모두 요약
+        self.per_category = per_category
+        self.dedup = dedup
+
+    @staticmethod
+    def displayed(
+        categorized: Mapping[str, Iterable[PatentRecord]], per_category: Optional[int]
+    ) -> list[PatentRecord]:
+        """보고서 작성기와 같은 카테고리 순서/개수로 표시될 특허 선택"""
+        return [
+            patent
+            for category in Config.PATENT_CATEGORIES
+            for patent in islice(categorized.get(category, ()), per_category)
+        ]
+
+    @staticmethod
+    def targets(state: PatentState, patents: Iterable[PatentRecord]) -> list[PatentRecord]:
+        """표시 특허 중 요약할 특허 (근사 중복 특허 대신 그 대표 특허, 같은 대표는 한 번만)"""
+        representatives = {patent_key(patent): patent for patent in state.raw_patents + state.known_patents}
+        targets, seen = [], set()
+        for patent in patents:
+            if patent_key(patent) in state.duplicate_of:
+                patent = representatives.get(state.duplicate_of[patent_key(patent)])
+            if patent is None or patent.ai_summary is not None or id(patent) in seen:
+                continue
+            seen.add(id(patent))
+            targets.append(patent)
+        return targets
+
+    async def summarize_displayed(self, state: PatentState) -> PatentState:
+        """보고서에 표시될 특허 중 요약이 없는 것만 요약하고 저장소에 기록"""
+        print(f"\n[{self.name}] 표시 특허 요약 시작...")
+
+        # ① 증분 수집이면 이전 결과도 합쳐진 뒤이므로 보고서와 같은 목록에서 선택
+        categorized_records = state.categorized_records()
+        patents = self.displayed(categorized_records, self.per_category)
+        targets = self.targets(state, patents)
+
+        # ② 분류 단계까지만 예산을 예약했으므로 요약은 표시 특허만 추가로 예약 (넘으면 초록 표시)
+        admitted = [
+            patent
+            for patent in targets
+            if self.planner.admit(self.summarizer.estimate_tokens(patent, self.planner.counter))
+        ]
+
+        # ③ 표시 특허 수가 적고 중단 후에도 요약 캐시로 이어지므로 항목 단위 체크포인트는 쓰지 않음
+        await self.summarizer.summarize_records(admitted)
+        if self.dedup is not None:
+            # ④ 대표 특허의 요약을 근사 중복 특허에 채워 함께 저장 (중복 특허는 요약 호출 없음)
+            self.dedup.copy_results(state)
+            categorized_records = state.categorized_records()
+        if self.store is not None:
+            self.store.record_summaries(admitted + state.duplicate_patents)
+
+        categorized = [patent for group in categorized_records.values() for patent in group]
+        state.summarized_patents = [patent for patent in categorized if patent.ai_summary is not None]
+        state.messages.append(
+            AIMessage(content=f"보고서에 표시될 특허 {len(admitted)}건을 요약했습니다.")
+        )
+
+        print(
+            f"  표시 특허 {len(patents)}건, 요약 {len(admitted)}건 "
+            f"(예산 초과 {len(targets) - len(admitted)}건, 근사 중복 {len(state.duplicate_patents)}건은 대표 요약 사용), "
+            f"요약 생략 {len(categorized) - len(patents)}건"
+        )
+        print(f"[{self.name}] 표시 특허 요약 완료\n")
+        return state
@@ -1,22 +1,46 @@
 import asyncio
-from typing import Dict, Any, Tuple
-from collections import defaultdict
+import json
+import re
+from typing import Any, Optional, Tuple
+from collections import Counter, defaultdict
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 
 from state import PatentState
 from config import Config
+from scheduler import AdaptiveScheduler
+from preclassifier import PatentPreClassifier
+from checkpoint import ItemCheckpoint
+from records import PatentRecord
+from budget import Estimate, TokenBudgetPlanner, TokenCounter
+from cascade import ModelCascade, is_confident
 
 
 class PatentOrganizerAgent:
     """특허를 카테고리별로 정리하는 에이전트"""
 
-    def __init__(self, llm: ChatOpenAI):
+    def __init__(
+        self,
+        llm: ChatOpenAI,
+        scheduler: Optional[AdaptiveScheduler] = None,
+        preclassifier: Optional[PatentPreClassifier] = None,
+        checkpoint: Optional[ItemCheckpoint] = None,
+        planner: Optional[TokenBudgetPlanner] = None,
+        cascade: Optional[ModelCascade] = None,
+    ):
         self.name = "Patent Organizer"
         self.llm = llm
+        self.scheduler = scheduler or AdaptiveScheduler()
+        # 싼 모델로 먼저 분류하고 목록에 없는 카테고리나 확신도가 낮은 응답만 다음 모델로 다시 분류
+        self.cascade = cascade or ModelCascade(llm, scheduler=self.scheduler)
+        self.unknown_count = 0
+        self.preclassifier = preclassifier
+        self.checkpoint = checkpoint
+        # 요약 전에 분류(lazy 모드)하면 초록을 요약 입력과 같은 토큰 한도로 잘라서 사용
+        self.planner = planner or TokenBudgetPlanner()
         # '기타' 카테고리를 추가하여 예상치 못한 응답에 대비합니다.
-        self.categories = Config.PATENT_CATEGORIES + ["기타"]
+        self.categories = list(dict.fromkeys(Config.PATENT_CATEGORIES + ["기타"]))
 
         system_prompt = f"""당신은 특허 분류 전문가입니다.
         주어진 특허를 다음 카테고리 중 하나로 정확히 분류해주세요:
@@ -30,58 +54,189 @@ class PatentOrganizerAgent:
                 ("human", "발명명: {title}\n요약: {summary}\n\n이 특허의 카테고리:"),
             ]
         )
-        self.chain = self.categorize_prompt | self.llm
+        # 확신도 하한이 있으면 첫 토큰의 상위 2개 logprob도 받아 1·2순위 차이로 상승 여부를 판단
+        self.chains = self.cascade.chains(
+            lambda llm: self.categorize_prompt
+            | (llm.bind(logprobs=True, top_logprobs=2) if Config.CASCADE_MIN_MARGIN > 0 else llm)
+        )
+
+        # 여러 특허를 한 프롬프트에 묶어 번호별 카테고리를 JSON으로 받는 배치 프롬프트
+        batch_system_prompt = f"""당신은 특허 분류 전문가입니다.
+        주어진 각 특허를 다음 카테고리 중 하나로 정확히 분류해주세요:
+        {", ".join(Config.PATENT_CATEGORIES)}
+
+        반드시 특허 번호를 키로, 카테고리 값을 값으로 하는 JSON 객체로만 응답하세요.
+        예: {{{{"1": "{Config.PATENT_CATEGORIES[0]}", "2": "{Config.PATENT_CATEGORIES[-1]}"}}}}"""
+
+        self.batch_prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system", batch_system_prompt),
+                ("human", "{patents}\n\n각 특허의 카테고리(JSON):"),
+            ]
+        )
+        # 응답 길이가 묶은 특허 수에 비례하므로 출력 토큰 한도를 늘려서 호출
+        self.batch_chains = self.cascade.chains(
+            lambda llm: self.batch_prompt
+            | llm.bind(
+                max_tokens=Config.MAX_TOKENS + 20 * Config.CLASSIFY_BATCH_SIZE,
+                response_format={"type": "json_object"},
+            )
+        )
+        # 특허 내용을 뺀 프롬프트 토큰 수 (단건, 배치) - 추정 시 한 번만 계산
+        self._prompt_tokens: Optional[tuple[int, int]] = None
+
+    def content(self, patent_item: PatentRecord) -> str:
+        """분류 프롬프트에 넣는 내용 (요약, 요약 전에 분류하면 토큰 한도로 자른 초록)"""
+        summary = patent_item.get("ai_summary")
+        if summary is not None:
+            return summary
+        return self.planner.truncate(patent_item.get("Abstract") or "")
+
+    def estimate_tokens(
+        self,
+        patent_item: PatentRecord,
+        counter: TokenCounter,
+        batch_size: int = Config.CLASSIFY_BATCH_SIZE,
+        summarized: bool = True,
+    ) -> Estimate:
+        """분류 호출의 특허 1건당 (입력, 출력) 토큰 상한 추정
+
+        요약은 아직 없으므로 요약 출력 한도만큼 길다고 가정하고(summarized=False이면 자른 초록 길이),
+        배치 프롬프트와 배치 출력 한도는 묶은 특허 수로 나눔
+        """
+        if self._prompt_tokens is None:
+            self._prompt_tokens = (
+                counter.count_messages(self.categorize_prompt.format_messages(title="", summary="")),
+                counter.count_messages(self.batch_prompt.format_messages(patents="")),
+            )
+        single_tokens, batch_tokens = self._prompt_tokens
+        content_tokens = Config.MAX_TOKENS if summarized else counter.count(self.content(patent_item))
+        patent_tokens = counter.count(str(patent_item.get("InventionName", ""))) + content_tokens
+        if batch_size > 1:
+            return (
+                batch_tokens // batch_size + patent_tokens + 10,  # 번호/구분자 포함
+                (Config.MAX_TOKENS + 20 * batch_size) // batch_size,
+            )
+        return single_tokens + patent_tokens, Config.MAX_TOKENS
+
+    @staticmethod
+    def accept(response: Any) -> bool:
+        """캐스케이드 검증 (목록에 있는 카테고리이고 확신도가 충분하면 통과)"""
+        return response.content.strip() in Config.PATENT_CATEGORIES and is_confident(response)
 
     async def categorize_single_patent(
-        self, patent_item: Dict[str, Any]
-    ) -> Tuple[str, Dict[str, Any]]:
-        """단일 특허의 카테고리 판단"""
-        # ① LLM 비동기 호출로 특허 분류
-        response = await self.chain.ainvoke(
+        self, patent_item: PatentRecord, start_tier: int = 0
+    ) -> Tuple[str, PatentRecord]:
+        """단일 특허의 카테고리 판단 (start_tier는 캐스케이드의 시작 단계)"""
+        # ① 싼 모델부터 LLM 비동기 호출로 특허 분류 (검증에 실패하면 다음 모델로)
+        response = await self.cascade.call(
+            self.chains,
             {
                 "title": patent_item.get("InventionName", ""),
-                "summary": patent_item.get("ai_summary", patent_item.get("Abstract", "")),
-            }
+                "summary": self.content(patent_item),
+            },
+            op="classify",
+            accept=self.accept,
+            start=start_tier,
         )
         # ② LLM 응답에서 카테고리 추출
         category = response.content.strip()
         return category, patent_item
 
-    async def organize_patents(self, state: PatentState) -> PatentState:
-        """특허를 카테고리별로 정리"""
-        print(f"\n[{self.name}] 특허 분류 시작...")
+    async def categorize_batch(
+        self, patent_items: list[PatentRecord]
+    ) -> list[Tuple[str, PatentRecord]]:
+        """여러 특허를 한 번의 호출로 분류 (누락/잘못된 항목은 건별로 재시도)"""
+        patents_text = "\n\n".join(
+            f"[{i}] 발명명: {patent.get('InventionName', '')}\n"
+            f"요약: {self.content(patent)}"
+            for i, patent in enumerate(patent_items, 1)
+        )
 
-        summarized_patents = state.summarized_patents
-        total_patents = len(summarized_patents)
-        batch_size = Config.BATCH_SIZE
-        # ③ 분류된 특허 저장을 위한 dict
-        categorized = defaultdict(list)
+        categories: dict[str, Any] = {}
+        try:
+            # 배치는 첫 단계 모델로만 호출하고, 검증에 실패한 특허만 다음 단계 모델로 건별 분류
+            response = await self.cascade.call(
+                self.batch_chains[:1],
+                {"patents": patents_text},
+                op="classify_batch",
+                accept=bool,
+                items=len(patent_items),
+            )
+            # 코드 블록으로 감싼 응답도 허용
+            if match := re.search(r"\{.*\}", response.content, re.DOTALL):
+                parsed = json.loads(match.group(0))
+                if isinstance(parsed, dict):
+                    categories = parsed
+        except Exception as e:
+            print(f"    배치 분류 실패, 건별 재시도: {str(e)[:50]}...")
 
-        # ④ 배치 처리를 위한 루프
-        for i in range(0, total_patents, batch_size):
-            batch = summarized_patents[i : i + batch_size]
-            batch_num = i // batch_size + 1
-            total_batches = (total_patents + batch_size - 1) // batch_size
+        results = []
+        retry_items = []
+        for i, patent in enumerate(patent_items, 1):
+            category = str(categories.get(str(i), "")).strip()
+            if category in Config.PATENT_CATEGORIES:
+                results.append((category, patent))
+            else:
+                retry_items.append(patent)
 
-            print(f"  배치 {batch_num}/{total_batches} 분류 중...")
+        # 응답에서 빠졌거나 목록에 없는 카테고리는 다음 단계 모델(단계가 하나면 같은 모델)로 건별 재시도
+        start_tier = 1 if self.cascade.enabled else 0
+        if retry_items and self.cascade.enabled:
+            self.cascade.escalate("classify_batch", len(retry_items))
+        retried = await asyncio.gather(
+            *[self.categorize_single_patent(patent, start_tier) for patent in retry_items],
+            return_exceptions=True,
+        )
+        return results + list(retried)
 
-            # ⑤ 비동기 분류 작업 생성
-            tasks = [self.categorize_single_patent(patent) for patent in batch]
-            # ⑥ 모든 분류 작업 병렬 실행
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+    async def classify_chunk(self, patent_items: list[PatentRecord]) -> list:
+        """특허 묶음 분류 (사전 분류기 → 배치 프롬프트 또는 단건 호출) - 스트리밍 파이프라인용"""
+        local_results = []
+        if self.preclassifier is not None:
+            local_results, patent_items = self.preclassifier.split(patent_items)
+        if not patent_items:
+            return local_results
 
-            for result in results:
-                if isinstance(result, Exception):
-                    print(f"    분류 작업 실패: {result}")
-                    continue
+        if Config.CLASSIFY_BATCH_SIZE > 1:
+            results = await self.categorize_batch(patent_items)
+        else:
+            results = await asyncio.gather(
+                *[self.categorize_single_patent(patent) for patent in patent_items],
+                return_exceptions=True,
+            )
 
-                category, patent_item = result
-                # ⑦ 반환된 카테고리 유효성 검사
-                if category in Config.PATENT_CATEGORIES:
-                    categorized[category].append(patent_item)
-                else:
-                    # ⑧ 정의되지 않은 카테고리는 '기타'로 처리
-                    categorized["기타"].append(patent_item)
+        if self.preclassifier is not None:
+            self.preclassifier.learn(
+                [result for result in results if not isinstance(result, Exception)]
+            )
+        return local_results + list(results)
+
+    def group_by_category(self, results: list) -> dict[str, list[PatentRecord]]:
+        """(카테고리, 특허) 결과 목록을 카테고리별 dict로 정리"""
+        categorized = defaultdict(list)
+        unknown: Counter = Counter()
+
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"    분류 작업 실패: {result}")
+                continue
+
+            category, patent_item = result
+            # 반환된 카테고리 유효성 검사 (가장 강한 모델도 목록에 없는 카테고리를 주면 응답을 남기고 '기타'로 처리)
+            if category not in Config.PATENT_CATEGORIES:
+                unknown[category[:30]] += 1
+                category = "기타"
+            # 레코드에 카테고리를 기록하고, 카테고리별 목록에는 같은 레코드의 참조만 보관
+            patent_item.category = category
+            categorized[category].append(patent_item)
+
+        if unknown:
+            self.unknown_count += sum(unknown.values())
+            print(
+                f"    정의되지 않은 카테고리 응답 {sum(unknown.values())}건 → '기타': "
+                + ", ".join(f"{value!r} {count}건" for value, count in unknown.most_common(5))
+            )
 
         print("\n  카테고리별 분포:")
         for category in self.categories:
@@ -89,8 +244,94 @@ class PatentOrganizerAgent:
             if count > 0:
                 print(f"    {category}: {count}건")
 
-        # ⑨ 상태 객체에 분류 결과 저장
-        state.categorized_patents = dict(categorized)
+        return dict(categorized)
+
+    async def organize_patents(self, state: PatentState) -> PatentState:
+        """특허를 카테고리별로 정리"""
+        print(f"\n[{self.name}] 특허 분류 시작...")
+
+        # lazy 모드는 요약 전에 분류하므로 발명명 + 원본 초록으로 분류
+        patents = state.summarized_patents or state.raw_patents
+        index_of = {id(patent): i for i, patent in enumerate(patents)}
+        use_checkpoint = self.checkpoint is not None and bool(state.run_id)
+
+        def record(results: list) -> list:
+            # 분류가 끝난 특허의 카테고리를 바로 체크포인트에 기록
+            if use_checkpoint:
+                self.checkpoint.save(
+                    state.run_id,
+                    "organize",
+                    {
+                        index_of[id(result[1])]: result[0]
+                        for result in results
+                        if not isinstance(result, Exception)
+                    },
+                )
+            return results
+
+        # 재개한 실행이면 이미 분류가 끝난 특허는 체크포인트에서 가져옴
+        restored = []
+        if use_checkpoint and (done := self.checkpoint.load(state.run_id, "organize")):
+            restored = [(category, patents[i]) for i, category in done.items() if i < len(patents)]
+            patents = [patent for i, patent in enumerate(patents) if i not in done]
+            print(f"  체크포인트에서 분류 {len(restored)}건 복원")
+
+        local_results = []
+        if self.preclassifier is not None:
+            # 로컬 사전 분류기로 확신도가 높은 특허를 먼저 분류하고 나머지만 LLM으로 전달
+            local_results, patents = self.preclassifier.split(patents)
+            record(local_results)
+            print(
+                f"  로컬 사전 분류 {len(local_results)}건 / LLM 분류 대상 {len(patents)}건"
+            )
+
+        async def classify_batch(batch: list[PatentRecord]) -> list:
+            return record(await self.categorize_batch(batch))
+
+        async def classify_single(patent: PatentRecord) -> Tuple[str, PatentRecord]:
+            return record([await self.categorize_single_patent(patent)])[0]
+
+        # ③ 공유 스케줄러로 모든 분류 작업을 슬라이딩 윈도우 방식으로 실행
+        batch_size = Config.CLASSIFY_BATCH_SIZE
+        if batch_size > 1:
+            # K건씩 묶어 한 프롬프트로 분류 → 요청 수와 반복되는 시스템 프롬프트 토큰 1/K
+            batches = [patents[i : i + batch_size] for i in range(0, len(patents), batch_size)]
+            batch_results = await self.scheduler.map(
+                classify_batch, batches, label="분류 배치"
+            )
+            results = []
+            for batch_result in batch_results:
+                if isinstance(batch_result, Exception):
+                    results.append(batch_result)
+                else:
+                    results.extend(batch_result)
+        else:
+            results = await self.scheduler.map(classify_single, patents, label="분류")
+        if self.preclassifier is not None:
+            # LLM 분류 결과로 사전 분류기를 증분 학습하여 다음 실행의 생략 비율을 높임
+            self.preclassifier.learn(
+                [result for result in results if not isinstance(result, Exception)]
+            )
+            self.preclassifier.save()
+            stats = self.preclassifier.stats()
+            print(
+                f"  LLM 분류 생략 {stats['decided']}건 "
+                f"(생략률 {stats['skip_rate'] * 100:.1f}%, 학습 데이터 {stats['trained_docs']}건)"
+            )
+        if self.cascade.enabled:
+            print(f"  {self.cascade.describe()}")
+
+        # ④ 카테고리별로 정리 (정의되지 않은 카테고리는 응답을 출력하고 '기타')
+        # 로컬/LLM/복원 결과를 원래 입력 순서로 되돌려 보고서 순서를 일정하게 유지
+        combined = sorted(
+            restored + local_results + list(results),
+            key=lambda r: -1 if isinstance(r, Exception) else index_of[id(r[1])],
+        )
+        categorized = self.group_by_category(combined)
+
+        # ⑤ 상태 객체에 분류 결과 저장 (카테고리별 출원번호)
+        state.categorized_patents = {}
+        state.categorize(patent for patents in categorized.values() for patent in patents)
         state.messages.append(
             AIMessage(content=f"특허를 {len(categorized)}개 카테고리로 분류했습니다.")
         )
@@ -0,0 +1,242 @@
+import asyncio
+import hashlib
+import time
+from typing import Optional
+from langchain_core.messages import AIMessage
+
+from state import PatentState
+from config import Config
+from agents.collector import PatentCollectorAgent
+from agents.summarizer import PatentSummarizerAgent
+from agents.organizer import PatentOrganizerAgent
+from agents.planner import BudgetPlannerAgent
+from agents.deduplicator import PatentDedupAgent
+from agents.preprocessor import PatentPreprocessAgent
+from dedup import patent_key
+from preprocess import content_hashes
+from records import PatentRecord
+
+
+def item_key(patent: PatentRecord) -> int:
+    """항목 단위 체크포인트 번호 (도착 순서는 실행마다 다르므로 출원번호의 64비트 해시를 사용)
+
+    출원번호가 없는 특허는 서로 같은 번호가 되지 않도록 내용 해시를 사용
+    """
+    if patent.has_application_number:
+        source = patent_key(patent)
+    else:
+        source = "content:" + (patent.content_hash or content_hashes([patent])[0])
+    digest = hashlib.blake2b(source.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class StreamingPipelineAgent:
+    """수집 → 요약 → 분류를 제한된 크기의 큐로 연결하여 동시에 진행하는 에이전트"""
+
+    def __init__(
+        self,
+        collector: PatentCollectorAgent,
+        summarizer: PatentSummarizerAgent,
+        organizer: PatentOrganizerAgent,
+        budget: Optional[BudgetPlannerAgent] = None,
+        dedup: Optional[PatentDedupAgent] = None,
+        preprocessor: Optional[PatentPreprocessAgent] = None,
+    ):
+        self.name = "Streaming Pipeline"
+        self.collector = collector
+        self.summarizer = summarizer
+        self.organizer = organizer
+        # 전체 목록을 미리 알 수 없으므로 도착하는 순서대로 예산을 예약
+        self.budget = budget
+        # 근사 중복은 도착한 순서대로 이미 본 대표와 비교하여 요약/분류를 건너뜀
+        self.dedup = dedup
+        # 특허가 하나씩 도착하므로 열 단위가 아닌 도착한 특허마다 정리
+        self.preprocessor = preprocessor
+
+    async def _produce(self, raw_queue: asyncio.Queue) -> None:
+        """CSV 말뭉치, 저장소 또는 KIPRIS API에서 특허를 읽는 대로 raw_queue에 넣음"""
+        if self.collector.corpus_path:
+            for patent in self.collector.load_corpus():
+                await raw_queue.put(patent)
+            return
+        if stored := self.collector.load_stored():
+            print("저장소에서 특허 데이터를 읽습니다...")
+            for patent in stored:
+                await raw_queue.put(patent)
+            return
+
+        print("KIPRIS API에서 특허 데이터를 스트리밍으로 수집합니다...")
+        await self.collector.stream_from_api(
+            raw_queue,
+            cpc_numbers=self.collector.cpc_numbers,
+            total_pages=self.collector.total_pages,
+            num_of_rows=self.collector.num_of_rows,
+        )
+
+    async def run_pipeline(self, state: PatentState) -> PatentState:
+        """수집/요약/분류 단계를 겹쳐서 실행"""
+        print(f"\n[{self.name}] 스트리밍 처리 시작...")
+        started = time.perf_counter()
+
+        # ① 큐 크기를 제한하여 느린 단계가 앞 단계를 멈추게 함 (메모리 일정 유지)
+        raw_queue: asyncio.Queue = asyncio.Queue(maxsize=Config.STREAM_QUEUE_SIZE)
+        summarized_queue: asyncio.Queue = asyncio.Queue(maxsize=Config.STREAM_QUEUE_SIZE)
+        n_summarizers = Config.MAX_CONCURRENCY
+        raw_patents: list[PatentRecord] = []
+        deferred_patents: list[PatentRecord] = []
+        duplicate_patents: list[PatentRecord] = []
+        duplicate_of: dict[str, str] = {}
+        if self.dedup is not None:
+            self.dedup.reset()
+        if self.preprocessor is not None:
+            self.preprocessor.reset()
+        summarized_patents: list[PatentRecord] = []
+        results: list = []
+        classify_slots = asyncio.Semaphore(Config.MAX_CONCURRENCY)
+        classify_tasks: list[asyncio.Task] = []
+        # 재개한 실행이면 이미 요약/분류가 끝난 특허는 체크포인트에서 가져옴 (출원번호 해시 → 결과)
+        checkpoint = self.summarizer.checkpoint
+        use_checkpoint = checkpoint is not None and bool(state.run_id)
+        done_summaries = checkpoint.load(state.run_id, "stream_summarize") if use_checkpoint else {}
+        done_categories = checkpoint.load(state.run_id, "stream_classify") if use_checkpoint else {}
+        if done_summaries or done_categories:
+            print(f"  체크포인트에서 요약 {len(done_summaries)}건 / 분류 {len(done_categories)}건 복원")
+
+        async def produce() -> None:
+            try:
+                await self._produce(raw_queue)
+            finally:
+                # 요약 워커 수만큼 종료 신호 전달
+                for _ in range(n_summarizers):
+                    await raw_queue.put(None)
+
+        async def summarize_worker() -> None:
+            while (patent := await raw_queue.get()) is not None:
+                if self.preprocessor is not None:
+                    self.preprocessor.preprocess([patent])
+                if self.dedup is not None and (representative := self.dedup.match(patent)) is not None:
+                    duplicate_patents.append(patent)
+                    duplicate_of[patent_key(patent)] = representative
+                    continue
+                if self.budget is not None and not self.budget.admit(patent):
+                    deferred_patents.append(patent)
+                    continue
+                raw_patents.append(patent)
+                key = item_key(patent)
+                if key in done_summaries:
+                    patent.ai_summary = done_summaries[key]
+                    summarized = patent
+                else:
+                    summarized = await self.summarizer.summarize_single_patent(patent)
+                    if use_checkpoint:
+                        # 특허 하나가 끝날 때마다 바로 기록 (요약 문자열만 저장)
+                        checkpoint.save(state.run_id, "stream_summarize", {key: summarized.ai_summary})
+                summarized_patents.append(summarized)
+                await summarized_queue.put(summarized)
+
+        async def classify(batch: list[PatentRecord]) -> None:
+            try:
+                restored = [(done_categories[item_key(p)], p) for p in batch if item_key(p) in done_categories]
+                pending = [p for p in batch if item_key(p) not in done_categories]
+                classified = await self.organizer.classify_chunk(pending) if pending else []
+                if use_checkpoint:
+                    checkpoint.save(
+                        state.run_id,
+                        "stream_classify",
+                        {
+                            item_key(result[1]): result[0]
+                            for result in classified
+                            if not isinstance(result, Exception)
+                        },
+                    )
+                results.extend(restored + list(classified))
+            finally:
+                classify_slots.release()
+
+        async def flush(batch: list[PatentRecord]) -> None:
+            # ② 동시에 진행 중인 분류 묶음 수를 제한
+            await classify_slots.acquire()
+            classify_tasks.append(asyncio.create_task(classify(batch)))
+
+        async def classify_dispatcher() -> None:
+            batch: list[PatentRecord] = []
+            batch_size = max(1, Config.CLASSIFY_BATCH_SIZE)
+            while True:
+                try:
+                    item = await asyncio.wait_for(
+                        summarized_queue.get(), timeout=Config.STREAM_FLUSH_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # ③ 묶음이 다 차지 않아도 일정 시간 입력이 없으면 바로 분류
+                    if batch:
+                        await flush(batch)
+                        batch = []
+                    continue
+                if item is None:
+                    break
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    await flush(batch)
+                    batch = []
+            if batch:
+                await flush(batch)
+            await asyncio.gather(*classify_tasks)
+
+        async def summarize_stage() -> None:
+            await asyncio.gather(*[summarize_worker() for _ in range(n_summarizers)])
+            await summarized_queue.put(None)
+
+        tasks = [
+            asyncio.create_task(produce()),
+            asyncio.create_task(summarize_stage()),
+            asyncio.create_task(classify_dispatcher()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except Exception as e:
+            print(f"스트리밍 처리 중 오류 발생: {e}")
+            state.error_log.append(f"StreamingPipelineAgent: {str(e)}")
+            for task in tasks + classify_tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, *classify_tasks, return_exceptions=True)
+
+        if self.organizer.preclassifier is not None:
+            self.organizer.preclassifier.save()
+        if self.organizer.cascade.enabled:
+            print(f"  {self.organizer.cascade.describe()}")
+
+        # ④ 기존 단계별 워크플로우와 같은 형태로 상태 저장 (보고서 노드 재사용)
+        state.raw_patents = raw_patents
+        state.deferred_patents = deferred_patents
+        state.summarized_patents = summarized_patents
+        categorized = self.organizer.group_by_category(results)
+        state.categorized_patents = {}
+        state.categorize(patent for patents in categorized.values() for patent in patents)
+        state.duplicate_patents = duplicate_patents
+        state.duplicate_of = duplicate_of
+        if self.dedup is not None:
+            copied = self.dedup.copy_results(state)
+            print(f"  근사 중복 {len(duplicate_patents)}건 중 {copied}건에 대표 결과 재사용")
+
+        # ⑤ 수집한 특허와 요약/분류 결과를 저장소에 반영
+        self.collector.store.upsert(
+            state.raw_patents + state.deferred_patents + state.duplicate_patents
+        )
+        self.collector.store.record_results(state.categorized_records())
+        state.messages.append(
+            AIMessage(
+                content=f"{len(summarized_patents)}개의 특허를 스트리밍으로 요약 및 분류했습니다."
+            )
+        )
+
+        elapsed = time.perf_counter() - started
+        print(
+            f"  수집 {len(raw_patents)}건 / 요약 {len(summarized_patents)}건 / "
+            f"분류 {len(results)}건 ({elapsed:.1f}초, {len(results) / max(elapsed, 1e-9):.1f}건/초)"
+        )
+        if self.preprocessor is not None:
+            self.preprocessor.print_stats()
+        if self.budget is not None:
+            self.budget.print_estimate()
+        print(f"[{self.name}] 스트리밍 처리 완료\n")
+        return state
@@ -0,0 +1,61 @@
+from typing import Callable, Sequence
+from langchain_core.messages import AIMessage
+
+from state import PatentState
+from budget import Estimate, TokenBudgetPlanner, TokenCounter
+from records import PatentRecord
+
+
+class BudgetPlannerAgent:
+    """LLM 호출 전에 실행 전체의 토큰/비용을 추정하고, 예산을 넘는 특허는 이번 실행에서 보류하는 에이전트"""
+
+    def __init__(
+        self,
+        planner: TokenBudgetPlanner,
+        estimators: Sequence[Callable[[PatentRecord, TokenCounter], Estimate]],
+    ):
+        self.name = "Budget Planner"
+        self.planner = planner
+        # 특허 1건이 거치는 LLM 호출 단계별 추정 함수 (staged: 요약 + 분류, fused: 통합 호출)
+        self.estimators = list(estimators)
+
+    def estimate(self, patent: PatentRecord) -> Estimate:
+        """특허 1건의 (입력, 출력) 토큰 상한 추정"""
+        input_tokens = output_tokens = 0
+        for estimator in self.estimators:
+            step_input, step_output = estimator(patent, self.planner.counter)
+            input_tokens += step_input
+            output_tokens += step_output
+        return input_tokens, output_tokens
+
+    def admit(self, patent: PatentRecord) -> bool:
+        """(스트리밍 파이프라인용) 도착한 특허를 예산 안에서 처리할지 결정"""
+        return self.planner.admit(self.estimate(patent))
+
+    def print_estimate(self) -> None:
+        stats = self.planner.stats()
+        print(
+            f"  예상 토큰 입력 {stats['estimated_input_tokens']:,} / 출력 {stats['estimated_output_tokens']:,} (상한), "
+            f"예상 비용 ${stats['estimated_cost_usd']:.4f} (예산 {self.planner.describe_budget()})"
+        )
+        if stats["deferred"]:
+            print(
+                f"  예산 초과로 {stats['deferred']}건 보류 "
+                "(저장소에 미처리로 남아 증분 수집 시 다음 실행에서 처리)"
+            )
+
+    async def plan_patents(self, state: PatentState) -> PatentState:
+        """우선순위가 높은 특허부터 예산 안에 드는 만큼만 raw_patents에 남김"""
+        print(f"\n[{self.name}] 토큰 예산 확인 시작...")
+
+        # ① 등록 특허, 최근 출원 순으로 추정 토큰을 예약하고 예산을 넘는 특허는 보류
+        selected, deferred = self.planner.plan(state.raw_patents, self.estimate)
+        state.raw_patents = selected
+        state.deferred_patents = deferred
+        state.messages.append(
+            AIMessage(content=f"처리 대상 {len(selected)}건, 예산 초과로 보류 {len(deferred)}건")
+        )
+
+        self.print_estimate()
+        print(f"[{self.name}] 토큰 예산 확인 완료\n")
+        return state
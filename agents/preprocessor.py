@@ -0,0 +1,83 @@
+import time
+from typing import Sequence
+from langchain_core.messages import AIMessage
+
+from state import PatentState
+from config import Config
+from preprocess import clean_texts, hash_columns, text_length
+from records import PatentRecord
+
+
+class PatentPreprocessAgent:
+    """LLM 단계 전에 발명명/초록 열 전체를 한 번에 정리하고, 이후 단계가 쓰는 내용 해시를 계산하는 에이전트"""
+
+    def __init__(self, min_abstract_length: int = Config.MIN_ABSTRACT_LENGTH):
+        self.name = "Patent Preprocessor"
+        self.min_abstract_length = min_abstract_length
+        self.reset()
+
+    def reset(self) -> None:
+        """실행마다 처리량 집계를 새로 시작"""
+        self.counts = {
+            "patents": 0,
+            "chars_before": 0,
+            "chars_after": 0,
+            "empty_abstracts": 0,
+            "short_abstracts": 0,
+        }
+        self.seconds = 0.0
+
+    def stats(self) -> dict[str, float]:
+        return {**self.counts, "seconds": round(self.seconds, 4)}
+
+    def preprocess(self, patents: Sequence[PatentRecord]) -> None:
+        """특허 목록의 발명명/초록을 열 단위로 정리하고 content_hash를 채움 (같은 레코드를 수정)"""
+        if not patents:
+            return
+        started = time.perf_counter()
+        names = [patent.InventionName for patent in patents]
+        abstracts = [patent.Abstract for patent in patents]
+        self.counts["chars_before"] += text_length(names) + text_length(abstracts)
+
+        # ① 열마다 한 번에 정리 (발명명의 'N/A'는 보고서 제목으로 쓰이므로 그대로 둠)
+        names = clean_texts(names, blank_placeholders=False)
+        abstracts = clean_texts(abstracts)
+        registrations = clean_texts([patent.RegistrationNumber for patent in patents])
+        hashes = hash_columns(registrations, names, abstracts)
+        for patent, name, abstract, content_hash in zip(patents, names, abstracts, hashes):
+            patent.InventionName = name
+            patent.Abstract = abstract
+            patent.content_hash = content_hash
+
+        # ② 빈/자리표시 초록과 짧은 초록 집계 (요약 단계가 호출 없이 처리)
+        lengths = [len(abstract) for abstract in abstracts]
+        self.counts["patents"] += len(patents)
+        self.counts["chars_after"] += text_length(names) + sum(lengths)
+        self.counts["empty_abstracts"] += lengths.count(0)
+        self.counts["short_abstracts"] += sum(0 < length < self.min_abstract_length for length in lengths)
+        self.seconds += time.perf_counter() - started
+
+    def print_stats(self) -> None:
+        counts = self.counts
+        elapsed = max(self.seconds, 1e-9)
+        removed = counts["chars_before"] - counts["chars_after"]
+        print(
+            f"  {counts['patents']}건 정리 ({self.seconds:.3f}초, {counts['patents'] / elapsed:,.0f}건/초, "
+            f"{counts['chars_before'] / elapsed / 1e6:.1f}M자/초), "
+            f"글자 수 {counts['chars_before']:,} → {counts['chars_after']:,} "
+            f"(-{removed / max(counts['chars_before'], 1):.1%})"
+        )
+        print(
+            f"  빈/자리표시 초록 {counts['empty_abstracts']}건, "
+            f"{self.min_abstract_length}자 미만 초록 {counts['short_abstracts']}건 (요약 호출 없이 처리)"
+        )
+
+    async def preprocess_patents(self, state: PatentState) -> PatentState:
+        """요약/분류할 특허를 LLM 단계 전에 정리 (증분 수집이면 신규/변경 특허만)"""
+        print(f"\n[{self.name}] 전처리 시작...")
+        self.reset()
+        self.preprocess(state.raw_patents)
+        state.messages.append(AIMessage(content=f"특허 {len(state.raw_patents)}건을 전처리했습니다."))
+        self.print_stats()
+        print(f"[{self.name}] 전처리 완료\n")
+        return state
@@ -1,97 +1,88 @@
 from datetime import datetime
-from langchain_core.messages import AIMessage
+from typing import TYPE_CHECKING, Optional, Sequence
 
-from state import PatentState
 from config import Config
+from patent_store import PatentStore
+from report_writer import ReportWriter
+
+if TYPE_CHECKING:
+    # 저장소 결과로 보고서만 다시 만들 때 LangChain/LangGraph를 불러오지 않도록 타입 검사에만 사용
+    from state import PatentState
 
 
 class ReportGeneratorAgent:
     """최종 보고서를 생성하는 에이전트"""
 
-    def __init__(self):
+    def __init__(self, writer: Optional[ReportWriter] = None, cpc_numbers: Optional[Sequence[str]] = None):
         self.name = "Report Generator"
+        # 보고서에 표시할 검색 CPC 코드 (서비스 모드에서는 작업마다 지정)
+        self.cpc_numbers = list(cpc_numbers or Config.CPC_NUMBERS)
+        # 보고서 전체를 문자열로 만들지 않고 섹션을 파일에 바로 기록하는 작성기
+        self.writer = writer or ReportWriter()
 
-    async def generate_report(self, state: PatentState) -> PatentState:
+    async def generate_report(self, state: "PatentState") -> "PatentState":
         """최종 보고서 생성"""
+        from langchain_core.messages import AIMessage
+
         print(f"\n[{self.name}] 보고서 생성 시작...")
-        report_parts = []
 
         current_time = datetime.now().strftime("%Y년 %m월 %d일 %H:%M:%S")
         # ① 모든 카테고리의 특허 개수를 합산하여 처리된 총 특허 수 계산
         total_processed = sum(len(v) for v in state.categorized_patents.values())
-        header = f"""# KIPRIS 특허 AI 요약 리포트
-
-## 기본 정보
-- **수집 시간**: {current_time}
-- **데이터 소스**: KIPRIS API / patent_data.csv
-- **수집 특허**: {len(state.raw_patents)}건
-- **처리 완료**: {total_processed}건"""
-        report_parts.append(header)
+        info = [
+            ("수집 시간", current_time),
+            ("데이터 소스", "KIPRIS API / patent_data.csv"),
+            ("검색 CPC 코드", ", ".join(self.cpc_numbers)),
+            (
+                "수집 특허",
+                f"{len(state.raw_patents) + len(state.deferred_patents) + len(state.duplicate_patents)}건",
+            ),
+            ("처리 완료", f"{total_processed}건"),
+        ]
+        if state.duplicate_patents:
+            info.append(("근사 중복 (대표 결과 재사용)", f"{len(state.duplicate_patents)}건"))
+        if state.deferred_patents:
+            info.append(("예산 초과로 보류", f"{len(state.deferred_patents)}건"))
+        if state.known_patents:
+            info.append(("이전 결과 재사용", f"{len(state.known_patents)}건"))
 
-        # 통계 섹션
         # ② 딕셔너리 컴프리헨션으로 각 카테고리별 특허 개수 집계
         category_stats = {
             cat: len(patents) for cat, patents in state.categorized_patents.items()
         }
-        total_patents = sum(category_stats.values())
-        if total_patents > 0:
-            # ③ 마크다운 테이블 헤더 생성 (파이프 문자로 열 구분)
-            table_header = (
-                "| 카테고리 | 특허 수 | 비율 |\n|---------|--------|------|\n"
-            )
-            # ④ 특허 수가 많은 순으로 정렬하여 테이블 행 생성
-            table_rows = [
-                f"| {cat} | {count}건 | {(count / total_patents) * 100:.1f}% |"
-                for cat, count in sorted(
-                    category_stats.items(), key=lambda x: x[1], reverse=True
-                )
-                if count > 0
-            ]
-            stats_table = table_header + "\n".join(table_rows)
-            stats_section = f"## 카테고리별 특허 분포\n\n{stats_table}"
-            report_parts.append(stats_section)
-
-        # 카테고리별 특허 섹션 생성
-        patent_sections = []
-        for category in Config.PATENT_CATEGORIES:
-            # ⑤ Walrus 연산자(:=)로 할당과 조건 검사를 동시에 수행
-            if patent_list := state.categorized_patents.get(category):
-                section_header = f"### {category} ({len(patent_list)}건)\n"
-                # ⑥ 카테고리별 표시 개수 제한 (Config.PATENT_PER_CATEGORY = 30)
-                display_count = min(len(patent_list), Config.PATENT_PER_CATEGORY)
-
-                # ⑦ enumerate로 순번 매기며 특허 항목 문자열 생성
-                patent_items_str = "\n".join(
-                    f"""#### {i}. {patent.get("InventionName", "N/A")}
-- **출원번호**: {patent.get("ApplicationNumber", "N/A")}
-- **등록번호**: {patent.get("RegistrationNumber", "N/A")}
-- **요약**: {patent.get("ai_summary", patent.get("Abstract", ""))}"""
-                    for i, patent in enumerate(patent_list[:display_count], 1)
-                )
-
-                patent_sections.append(f"{section_header}\n{patent_items_str}")
 
-        if patent_sections:
-            # ⑧ 각 카테고리 섹션을 구분선(---)으로 연결
-            report_parts.append(
-                "## 카테고리별 주요 특허\n\n" + "\n\n---\n\n".join(patent_sections)
-            )
-
-        if state.error_log:
-            errors = "\n".join([f"- {error}" for error in state.error_log])
-            report_parts.append(f"## 처리 중 발생한 오류\n\n{errors}")
-
-        # 푸터 생성
-        footer = """## 참고사항
-- 이 보고서는 AI(LangGraph + LangChain)를 활용하여 자동으로 생성되었습니다.
-- 특허 요약은 OpenAI GPT 모델을 사용하여 작성되었습니다.
-- 카테고리 분류는 AI가 발명명과 요약을 분석하여 자동으로 수행했습니다.
-- 상세한 내용은 KIPRIS 웹사이트에서 출원번호로 검색하시기 바랍니다."""
-        report_parts.append(footer)
-
-        # 최종 보고서 조합
-        state.final_report = "\n\n---\n\n".join(report_parts)
+        # ③ 카테고리별 특허를 순회하며 형식별 파일에 바로 기록
+        categorized = state.categorized_records()
+        state.report_files = self.writer.write(
+            info,
+            category_stats,
+            lambda category: categorized.get(category, []),
+            state.error_log,
+        )
         state.messages.append(AIMessage(content="최종 보고서가 생성되었습니다."))
 
         print(f"[{self.name}] 보고서 생성 완료")
         return state
+
+    def generate_from_store(self, store: PatentStore) -> list[str]:
+        """저장소에 기록된 요약/분류 결과로 보고서만 다시 생성 (LLM 호출 없음)"""
+        print(f"\n[{self.name}] 저장된 결과로 보고서 생성 시작...")
+
+        # ④ 카테고리별 개수는 색인으로 집계하고, 특허는 카테고리별로 커서에서 하나씩 읽음
+        category_stats = store.category_counts()
+        info = [
+            ("생성 시간", datetime.now().strftime("%Y년 %m월 %d일 %H:%M:%S")),
+            ("데이터 소스", f"특허 저장소 ({store.path})"),
+            ("저장 특허", f"{store.count()}건"),
+            ("처리 완료", f"{sum(category_stats.values())}건"),
+        ]
+        report_files = self.writer.write(
+            info,
+            category_stats,
+            lambda category: store.iter_records(
+                categories=[category], processed=True, limit=self.writer.per_category
+            ),
+        )
+
+        print(f"[{self.name}] 보고서 생성 완료")
+        return report_files
@@ -1,88 +1,198 @@
-import asyncio
-from typing import Dict, Any
+import hashlib
+from typing import Any, Optional
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 
 from state import PatentState
 from config import Config
+from cache import SummaryCache
+from scheduler import AdaptiveScheduler
+from checkpoint import ItemCheckpoint
+from records import PatentRecord
+from budget import Estimate, TokenBudgetPlanner, TokenCounter
+from cascade import ModelCascade
 
 
 class PatentSummarizerAgent:
     """특허를 요약하는 에이전트"""
 
-    def __init__(self, llm: ChatOpenAI):
+    def __init__(
+        self,
+        llm: ChatOpenAI,
+        cache: Optional[SummaryCache] = None,
+        scheduler: Optional[AdaptiveScheduler] = None,
+        checkpoint: Optional[ItemCheckpoint] = None,
+        planner: Optional[TokenBudgetPlanner] = None,
+        cascade: Optional[ModelCascade] = None,
+    ):
         self.name = "Patent Summarizer"
         self.llm = llm
-        # ① 튜플 형식의 메시지로 간결하게 프롬프트 템플릿 구성
-        self.prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",  # ② 시스템 역할 메시지로 AI의 행동 지침 설정
-                    """당신은 전문 특허 요약 전문가입니다. 
+        self.cache = cache
+        self.scheduler = scheduler or AdaptiveScheduler()
+        # 싼 모델로 먼저 요약하고 비었거나 지나치게 긴 요약만 다음 모델로 다시 요약
+        self.cascade = cascade or ModelCascade(llm, scheduler=self.scheduler)
+        self.checkpoint = checkpoint
+        # 초록을 글자 수가 아닌 토큰 수 기준으로 문장 경계에서 자르는 데 사용
+        self.planner = planner or TokenBudgetPlanner()
+        system_prompt = """당신은 전문 특허 요약 전문가입니다. 
                     주어진 특허를 핵심만 간결하게 2-3문장으로 요약해주세요.
                     - 발명의 핵심 기술과 목적을 명확히 전달하세요
                     - 중요한 기술적 특징을 포함하세요
-                    - 명확하고 이해하기 쉽게 작성하세요""",
-                ),
-                (
-                    "human",  # ③ 사용자 메시지 템플릿에 변수 플레이스홀더 포함
-                    "발명명: {title}\n요약: {content}\n\n위 특허를 2-3문장으로 요약해주세요:",
-                ),
+                    - 명확하고 이해하기 쉽게 작성하세요"""
+        human_prompt = "발명명: {title}\n요약: {content}\n\n위 특허를 2-3문장으로 요약해주세요:"
+        # ① 튜플 형식의 메시지로 간결하게 프롬프트 템플릿 구성
+        self.prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system", system_prompt),  # ② 시스템 역할 메시지로 AI의 행동 지침 설정
+                ("human", human_prompt),  # ③ 사용자 메시지 템플릿에 변수 플레이스홀더 포함
             ]
         )
+        # LCEL(LangChain Expression Language) 체인을 캐스케이드 단계 모델마다 구성
+        self.chains = self.cascade.chains(lambda llm: self.prompt | llm)
+        # 프롬프트(또는 초록 토큰 한도)가 바뀌면 캐시 키도 바뀌도록 해시를 보관
+        self.prompt_fingerprint = hashlib.sha256(
+            (system_prompt + human_prompt + str(self.planner.max_input_tokens)).encode("utf-8")
+        ).hexdigest()
+
+    def cache_key(self, patent_item: PatentRecord) -> str:
+        # 캐시 키 = 출원번호 + (초록, 프롬프트, 캐스케이드 단계 모델) 해시
+        return self.cache.make_key(
+            str(patent_item.get("ApplicationNumber", "")),
+            patent_item.get("Abstract", ""),
+            self.prompt_fingerprint,
+            self.cascade.fingerprint,
+        )
 
-    async def summarize_single_patent(self, patent_item: Dict[str, Any]) -> Dict[str, Any]:
-        """단일 특허 요약 (오류 발생 시 원본 내용 반환)"""
+    @staticmethod
+    def needs_summary(patent_item: PatentRecord) -> bool:
+        """요약 호출이 필요한 특허인지 (빈 초록이나 짧은 초록은 그대로 요약으로 사용)"""
+        return len(patent_item.get("Abstract") or "") >= Config.MIN_ABSTRACT_LENGTH
+
+    @staticmethod
+    def fallback_summary(patent_item: PatentRecord) -> str:
+        """요약 호출 없이 쓰는 요약 (초록, 초록이 비었으면 발명명)"""
+        return patent_item.get("Abstract") or patent_item.get("InventionName") or ""
+
+    def estimate_tokens(self, patent_item: PatentRecord, counter: TokenCounter) -> Estimate:
+        """요약 호출 1건의 (입력, 출력) 토큰 상한 추정 (짧은 초록이나 캐시에 있는 요약은 호출하지 않으므로 0)"""
+        abstract = patent_item.get("Abstract", "")
+        if not self.needs_summary(patent_item):
+            return 0, 0
+        if self.cache is not None and self.cache.contains(self.cache_key(patent_item)):
+            return 0, 0
+        messages = self.prompt.format_messages(
+            title=patent_item.get("InventionName", ""), content=self.planner.truncate(abstract)
+        )
+        return counter.count_messages(messages), Config.MAX_TOKENS
+
+    @staticmethod
+    def valid_summary(summary: str) -> bool:
+        """캐스케이드 검증 (비어 있지 않고 CASCADE_MAX_SUMMARY_CHARS 이하인 요약만 통과)"""
+        return 0 < len(summary.strip()) <= Config.CASCADE_MAX_SUMMARY_CHARS
+
+    @classmethod
+    def accept(cls, response: Any) -> bool:
+        return cls.valid_summary(response.content)
+
+    async def _request_summary(self, invention_name: str, abstract: str) -> str:
+        """LLM에 요약을 요청하고 응답 문자열을 반환 (싼 모델부터, 검증에 실패하면 다음 모델로)"""
+        summary_response = await self.cascade.call(
+            self.chains,
+            {
+                "title": invention_name,
+                "content": self.planner.truncate(abstract),  # 토큰 한도에 맞춰 문장 경계에서 자름
+            },
+            op="summarize",
+            accept=self.accept,
+        )
+        return summary_response.content.strip()
+
+    async def summarize_single_patent(self, patent_item: PatentRecord) -> PatentRecord:
+        """단일 특허 요약 - 같은 레코드에 ai_summary를 채워 반환 (오류 발생 시 원본 내용 사용)"""
         abstract = patent_item.get("Abstract", "")
         invention_name = patent_item.get("InventionName", "")
         
         try:
             # ④ 최소 콘텐츠 길이 검증으로 불필요한 API 호출 방지
-            if not abstract or len(abstract) < 50:
-                return {**patent_item, "ai_summary": abstract}
-
-            # ⑤ LCEL(LangChain Expression Language) 체인 구성
-            chain = self.prompt | self.llm
-            summary_response = await chain.ainvoke(
-                {
-                    "title": invention_name,
-                    "content": abstract[:1000],  # 특허 요약은 더 긴 텍스트 처리
-                }
-            )
-            summary = summary_response.content.strip()
+            if not self.needs_summary(patent_item):
+                patent_item.ai_summary = self.fallback_summary(patent_item)
+                return patent_item
+
+            if self.cache is None:
+                summary = await self._request_summary(invention_name, abstract)
+            else:
+                # ⑤ 캐시 키 = 출원번호 + (초록, 프롬프트, 모델) 해시
+                summary = await self.cache.get_or_compute(
+                    self.cache_key(patent_item),
+                    str(patent_item.get("ApplicationNumber", "")),
+                    lambda: self._request_summary(invention_name, abstract),
+                )
             # ⑥ 요약 결과 검증 및 폴백 처리
-            return {**patent_item, "ai_summary": summary or abstract}
+            patent_item.ai_summary = summary or abstract
+            return patent_item
 
         except Exception as e:
             # ⑦ 간결한 오류 로깅과 원본 반환으로 서비스 연속성 보장
             print(
                 f"  [{self.name}] 요약 오류 (발명명: {invention_name}): {str(e)[:50]}..."
             )
-            return {**patent_item, "ai_summary": abstract}  # 오류 시 원본 사용
+            patent_item.ai_summary = abstract  # 오류 시 원본 사용
+            return patent_item
 
-    async def summarize_patents(self, state: PatentState) -> PatentState:
-        """모든 특허를 비동기로 요약"""
-        print(f"\n[{self.name}] 특허 요약 시작...")
+    async def summarize_records(
+        self, patents: list[PatentRecord], run_id: str = "", stage: str = "summarize"
+    ) -> None:
+        """특허 목록을 요약하여 같은 레코드에 ai_summary를 채움 (stage는 항목 단위 체크포인트 이름)"""
+        # 재개한 실행이면 이미 요약이 끝난 특허는 체크포인트에서 가져옴
+        use_checkpoint = self.checkpoint is not None and bool(run_id)
+        done = self.checkpoint.load(run_id, stage) if use_checkpoint else {}
+        if done:
+            print(f"  체크포인트에서 요약 {len(done)}건 복원")
 
-        batch_size = Config.BATCH_SIZE
-        summarized_patents = []
-        raw_patents = state.raw_patents
-        total_patents = len(raw_patents)
+        async def summarize_item(item: tuple[int, PatentRecord]) -> PatentRecord:
+            index, patent = item
+            if index in done:
+                patent.ai_summary = done[index]
+                return patent
+            result = await self.summarize_single_patent(patent)
+            if use_checkpoint:
+                # 특허 하나가 끝날 때마다 바로 기록 (요약 문자열만 저장)
+                self.checkpoint.save(run_id, stage, {index: result.ai_summary})
+            return result
 
-        # ⑧ 배치 단위 순차 처리로 API 부하 분산
-        for i in range(0, total_patents, batch_size):
-            batch = raw_patents[i : i + batch_size]
-            batch_num = i // batch_size + 1
-            total_batches = (total_patents + batch_size - 1) // batch_size
+        # ⑧ 빈/짧은 초록은 스케줄러에 넣지 않고 바로 채움 (전처리 후 길이 기준)
+        pending = []
+        for index, patent in enumerate(patents):
+            if self.needs_summary(patent):
+                pending.append((index, patent))
+            else:
+                patent.ai_summary = self.fallback_summary(patent)
+        if skipped := len(patents) - len(pending):
+            print(f"  짧은/빈 초록 {skipped}건은 요약 호출 없이 처리")
 
-            print(f"  배치 {batch_num}/{total_batches} 처리 중...")
+        # ⑨ 스케줄러가 작업 큐에서 꺼내 항상 N개의 호출을 유지 (배치 경계 대기 없음)
+        await self.scheduler.map(summarize_item, pending, label="요약")
+
+        if self.cache is not None:
+            self.cache.evict()
+            stats = self.cache.stats()
+            print(
+                f"  캐시 히트 {stats['hits']}건 / 미스 {stats['misses']}건 "
+                f"(히트율 {stats['hit_rate'] * 100:.1f}%, 저장 {stats['entries']}건)"
+            )
+        if self.cascade.enabled:
+            print(f"  {self.cascade.describe()}")
+
+    async def summarize_patents(self, state: PatentState) -> PatentState:
+        """모든 특허를 비동기로 요약"""
+        print(f"\n[{self.name}] 특허 요약 시작...")
 
-            tasks = [self.summarize_single_patent(patent) for patent in batch]
-            batch_results = await asyncio.gather(*tasks)
-            summarized_patents.extend(batch_results)
+        # 요약 결과는 같은 레코드에 채워지므로 상태에는 입력 순서 그대로의 목록을 저장
+        await self.summarize_records(state.raw_patents, state.run_id)
+        summarized_patents = list(state.raw_patents)
 
-        # ⑨ LangGraph 워크플로우 상태 업데이트
+        # ⑩ LangGraph 워크플로우 상태 업데이트
         state.summarized_patents = summarized_patents
         state.messages.append(
             AIMessage(content=f"{len(summarized_patents)}개의 특허 요약을 완료했습니다.")
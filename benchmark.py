@@ -0,0 +1,387 @@
+"""
+오프라인 벤치마크 - 가짜 LLM과 로컬 KIPRIS 스텁 서버로 워크플로우 성능 측정 (API 비용/네트워크 없음)
+
+시나리오(모드 × 특허 수)마다 새 프로세스에서 create_patent_workflow를 실행하고
+단계별 소요 시간, 처리량, 최대 메모리, LLM 호출 수를 JSON으로 저장합니다.
+
+사용 예:
+    python benchmark.py --sizes 100,1000 --modes staged,fused,stream,lazy
+    python benchmark.py --sizes 10000 --llm-latency 0.2 --llm-error-rate 0.02 --llm-rate-limit-rate 0.05
+    python benchmark.py --compare outputs/benchmarks/이전.json outputs/benchmarks/이후.json
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Any, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+from config import Config
+from kipris_stub import start_stub_server
+
+
+class FakeRateLimitError(Exception):
+    """가짜 429 오류 (스케줄러가 요청 한도 초과로 인식)"""
+
+    status_code = 429
+
+
+class FakeLLMError(Exception):
+    """가짜 서버 오류"""
+
+
+class FakeChatModel(BaseChatModel):
+    """프롬프트 종류(요약/단건 분류/배치 분류/통합)에 맞는 응답을 결정적으로 만드는 가짜 채팅 모델
+
+    지연 시간은 중앙값 latency, 로그정규 분산 jitter를 따르며, error_rate/rate_limit_rate 비율로
+    오류와 429를 발생시킵니다. 같은 프롬프트의 n번째 시도는 항상 같은 결과를 냅니다.
+    """
+
+    latency: float = 0.05
+    jitter: float = 0.5
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    seed: int = 0
+
+    _attempts: dict[str, int] = PrivateAttr(default_factory=dict)
+    _stats: dict[str, int] = PrivateAttr(default_factory=dict)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return dict(self._stats)
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        self._stats[key] = self._stats.get(key, 0) + amount
+
+    @staticmethod
+    def _category(text: str) -> str:
+        """발명명 키워드로 카테고리 결정 (없으면 내용 해시로 선택)"""
+        for category, keywords in Config.CATEGORY_KEYWORDS.items():
+            if any(keyword in text for keyword in keywords):
+                return category
+        digest = int(hashlib.md5(text.encode("utf-8")).hexdigest(), 16)
+        return Config.PATENT_CATEGORIES[digest % len(Config.PATENT_CATEGORIES)]
+
+    def _respond(self, system: str, human: str) -> tuple[str, str]:
+        """(프롬프트 종류, 응답 내용)"""
+        if "JSON" in system and "summary" in system:
+            title = human.split("\n", 1)[0]
+            content = {"summary": f"요약: {human[:80]}", "category": self._category(title)}
+            return "fused", json.dumps(content, ensure_ascii=False)
+        if "JSON" in system:
+            items = human.split("\n\n[")
+            content = {
+                str(i): self._category(item.split("\n", 1)[0]) for i, item in enumerate(items, 1)
+            }
+            return "classify_batch", json.dumps(content, ensure_ascii=False)
+        if "분류" in system:
+            return "classify", self._category(human.split("\n", 1)[0])
+        return "summarize", f"요약: {human[:120]}"
+
+    def _generate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        raise NotImplementedError("벤치마크용 가짜 모델은 비동기 호출만 지원합니다.")
+
+    async def _agenerate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        system, human = messages[0].content, messages[-1].content
+        key = hashlib.md5((system + human).encode("utf-8")).hexdigest()
+        attempt = self._attempts.get(key, 0)
+        self._attempts[key] = attempt + 1
+        rng = random.Random(f"{self.seed}:{key}:{attempt}")
+
+        kind, content = self._respond(system, human)
+        self._count("calls")
+        self._count(f"calls_{kind}")
+        await asyncio.sleep(self.latency * math.exp(rng.gauss(0, self.jitter)) if self.latency else 0)
+
+        roll = rng.random()
+        if roll < self.rate_limit_rate:
+            self._count("rate_limited")
+            raise FakeRateLimitError("429 Too Many Requests (fake)")
+        if roll < self.rate_limit_rate + self.error_rate:
+            self._count("errors")
+            raise FakeLLMError("500 Internal Server Error (fake)")
+
+        # 토큰 수는 문자 수 기반 추정치
+        input_tokens = (len(system) + len(human)) // 2
+        output_tokens = len(content) // 2
+        self._count("input_tokens", input_tokens)
+        self._count("output_tokens", output_tokens)
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _peak_rss_mb() -> float:
+    # Linux는 KB, macOS는 바이트 단위
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_scenario(scenario: dict[str, Any]) -> dict[str, Any]:
+    """(새 프로세스에서 실행) 시나리오 1개를 실행하고 측정값 반환"""
+    workdir = tempfile.mkdtemp(prefix="patent_bench_")
+
+    # ① 실제 캐시/저장소/보고서 대신 임시 디렉토리 사용 (모듈 기본값이 정해지기 전에 설정)
+    os.environ["KIPRIS_API_KEY"] = "benchmark"
+    Config.KIPRIS_API_URL = scenario["kipris_url"]
+    Config.NUM_OF_ROWS = scenario["rows_per_page"]
+    Config.TOTAL_PAGES = math.ceil(scenario["size"] / scenario["rows_per_page"])
+    Config.CPC_NUMBERS = scenario["cpc_codes"]
+    Config.RATE_LIMIT_PER_SECOND = scenario["rate_limit"]
+    Config.HEDGE_MAX_RATIO = scenario["hedge_max_ratio"]
+    Config.RUN_TOKEN_BUDGET = scenario["token_budget"]
+    Config.CSV_PATH = os.path.join(workdir, "patent_data.csv")
+    Config.STORE_PATH = os.path.join(workdir, "patents.sqlite3")
+    Config.CACHE_PATH = os.path.join(workdir, "summary_cache.sqlite3")
+    Config.PRECLASSIFIER_MODEL_PATH = os.path.join(workdir, "preclassifier.npz")
+    Config.CHECKPOINT_PATH = os.path.join(workdir, "checkpoints.sqlite3")
+    Config.ITEM_CHECKPOINT_PATH = os.path.join(workdir, "item_checkpoints.sqlite3")
+    Config.OUTPUT_DIR = os.path.join(workdir, "outputs")
+
+    from checkpoint import open_checkpointer
+    from metrics import MetricsRegistry
+    from state import PatentState
+    from workflow import create_patent_workflow
+
+    llm = FakeChatModel(
+        latency=scenario["llm_latency"],
+        jitter=scenario["llm_jitter"],
+        error_rate=scenario["llm_error_rate"],
+        rate_limit_rate=scenario["llm_rate_limit_rate"],
+        seed=scenario["seed"],
+    )
+    metrics = MetricsRegistry()
+
+    async def run() -> tuple[dict[str, float], dict[str, Any], float]:
+        stages: dict[str, float] = {}
+        final: dict[str, Any] = {}
+        # ② main.py와 같이 노드 경계 체크포인터와 실행 ID를 사용
+        async with open_checkpointer() as checkpointer:
+            app = create_patent_workflow(
+                llm, mode=scenario["mode"], checkpointer=checkpointer, metrics=metrics
+            )
+            config = {"configurable": {"thread_id": "benchmark"}}
+            started = previous = time.perf_counter()
+            async for kind, chunk in app.astream(
+                PatentState(run_id="benchmark"), config, stream_mode=["updates", "values"]
+            ):
+                if kind == "values":
+                    final = chunk
+                    continue
+                # ③ 노드는 순서대로 실행되므로 직전 노드 완료 시각과의 차이가 노드 소요 시간
+                now = time.perf_counter()
+                for node in chunk:
+                    stages[node] = round(now - previous, 4)
+                previous = now
+            return stages, final, time.perf_counter() - started
+
+    baseline_mb = _peak_rss_mb()
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        stages, final, elapsed = asyncio.run(run())
+
+    processed = sum(len(patents) for patents in final.get("categorized_patents", {}).values())
+    return {
+        "mode": scenario["mode"],
+        "size": scenario["size"],
+        "collected": sum(
+            len(final.get(field, []))
+            for field in ("raw_patents", "deferred_patents", "duplicate_patents")
+        ),
+        "summarized": len(final.get("summarized_patents", [])),
+        "categorized": processed,
+        "deferred": len(final.get("deferred_patents", [])),
+        "duplicates": len(final.get("duplicate_patents", [])),
+        "errors": len(final.get("error_log", [])),
+        "wall_seconds": round(elapsed, 4),
+        "throughput_per_second": round(processed / elapsed, 2) if elapsed else 0.0,
+        "stages": stages,
+        "stage_throughput_per_second": {
+            node: round(processed / seconds, 2) for node, seconds in stages.items() if seconds
+        },
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "peak_rss_delta_mb": round(_peak_rss_mb() - baseline_mb, 1),
+        "llm": llm.stats,
+        # 호출 종류별 지연 시간 백분위, 토큰/재시도/오류 수 (main.py의 실행 지표와 같은 형식)
+        "metrics": {
+            key: value for key, value in metrics.summary().items() if key in ("histograms", "counters", "sources")
+        },
+    }
+
+
+def _git_revision() -> dict[str, Any]:
+    """결과 비교용 커밋 정보 (git 저장소가 아니면 빈 값)"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(
+            subprocess.run(
+                ["git", "status", "--porcelain", "--untracked-files=no"],
+                cwd=root, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        )
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": "", "dirty": False}
+
+
+def run_benchmarks(args: argparse.Namespace) -> dict[str, Any]:
+    """모든 시나리오 실행 (특허 수별로 스텁 서버 1개, 시나리오별로 새 프로세스)"""
+    sizes = [int(size) for size in args.sizes.split(",")]
+    modes = [mode.strip() for mode in args.modes.split(",")]
+    results = []
+
+    for size in sizes:
+        # ① 스텁 서버는 측정 대상 프로세스와 GIL을 나누지 않도록 현재 프로세스에서 실행
+        server, _ = start_stub_server(
+            total=size,
+            latency=args.kipris_latency,
+            error_rate=args.kipris_error_rate,
+            rate_limit_rate=args.kipris_rate_limit_rate,
+            seed=args.seed,
+            overlap=args.cpc_overlap,
+            noise=args.kipris_noise,
+        )
+        try:
+            for mode in modes:
+                scenario = {
+                    "mode": mode,
+                    "size": size,
+                    "kipris_url": server.url,
+                    "rows_per_page": args.rows_per_page,
+                    "cpc_codes": [code.strip() for code in args.cpc_codes.split(",")],
+                    "rate_limit": args.rate_limit,
+                    "hedge_max_ratio": args.hedge_max_ratio,
+                    "token_budget": args.token_budget,
+                    "llm_latency": args.llm_latency,
+                    "llm_jitter": args.llm_jitter,
+                    "llm_error_rate": args.llm_error_rate,
+                    "llm_rate_limit_rate": args.llm_rate_limit_rate,
+                    "seed": args.seed,
+                }
+                print(f"[{mode} / {size}건] 실행 중...", flush=True)
+                requests_before = server.requests
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                    result = executor.submit(run_scenario, scenario).result()
+                result["kipris_requests"] = server.requests - requests_before
+                results.append(result)
+                print(
+                    f"  {result['wall_seconds']:.2f}초, {result['throughput_per_second']:.1f}건/초, "
+                    f"최대 메모리 {result['peak_rss_mb']:.0f}MB, LLM 호출 {result['llm'].get('calls', 0)}회"
+                )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    return {
+        "meta": {
+            **_git_revision(),
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "options": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "results": results,
+    }
+
+
+def compare(old_path: str, new_path: str) -> None:
+    """두 결과 파일의 같은 시나리오(모드, 특허 수)를 비교하여 변화율 출력"""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    old_results = {(r["mode"], r["size"]): r for r in old["results"]}
+
+    def change(before: float, after: float) -> str:
+        return f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+
+    print(f"{old['meta'].get('commit') or old_path} → {new['meta'].get('commit') or new_path}")
+    print(f"{'모드':<8}{'특허 수':>8}{'시간':>12}{'처리량':>12}{'최대 메모리':>12}{'LLM 호출':>12}")
+    for result in new["results"]:
+        before = old_results.get((result["mode"], result["size"]))
+        if before is None:
+            continue
+        print(
+            f"{result['mode']:<8}{result['size']:>8}"
+            f"{change(before['wall_seconds'], result['wall_seconds']):>12}"
+            f"{change(before['throughput_per_second'], result['throughput_per_second']):>12}"
+            f"{change(before['peak_rss_mb'], result['peak_rss_mb']):>12}"
+            f"{change(before['llm'].get('calls', 0), result['llm'].get('calls', 0)):>12}"
+        )
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="오프라인 워크플로우 벤치마크")
+    parser.add_argument("--sizes", default="100,1000", help="특허 수 목록 (예: 100,1000,10000,100000)")
+    parser.add_argument("--modes", default="staged,fused,stream", help="워크플로우 모드 목록")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="가짜 LLM 응답 지연 중앙값(초)")
+    parser.add_argument("--llm-jitter", type=float, default=0.5, help="응답 지연의 로그정규 표준편차")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="가짜 LLM 오류 비율")
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0, help="가짜 LLM 429 비율")
+    parser.add_argument(
+        "--hedge-max-ratio", type=float, default=Config.HEDGE_MAX_RATIO,
+        help="전체 호출 대비 헤지 요청 상한 (0이면 헤지 안 함)",
+    )
+    parser.add_argument("--kipris-latency", type=float, default=0.0, help="스텁 서버 응답 지연(초)")
+    parser.add_argument("--kipris-error-rate", type=float, default=0.0, help="스텁 서버 500 비율")
+    parser.add_argument("--kipris-rate-limit-rate", type=float, default=0.0, help="스텁 서버 429 비율")
+    parser.add_argument("--cpc-codes", default="G06N", help="수집할 CPC 코드 목록 (특허 수는 코드별)")
+    parser.add_argument("--cpc-overlap", type=float, default=0.0, help="모든 코드에 공통으로 검색되는 특허 비율")
+    parser.add_argument("--kipris-noise", type=float, default=0.0, help="태그/줄바꿈/자리표시 값이 섞인 초록 비율")
+    parser.add_argument("--rows-per-page", type=int, default=100, help="KIPRIS 페이지당 특허 수")
+    parser.add_argument(
+        "--rate-limit", type=float, default=0.0, help="초당 LLM 호출 한도 (0이면 제한 없음)"
+    )
+    parser.add_argument("--token-budget", type=int, default=0, help="실행당 토큰 예산 (0이면 제한 없음)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: outputs/benchmarks/bench_<시각>_<커밋>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="두 결과 파일 비교")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run_benchmarks(args)
+    output = args.output or os.path.join(
+        Config.OUTPUT_DIR,
+        "benchmarks",
+        f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{report['meta']['commit'] or 'nogit'}.json",
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n벤치마크 결과를 저장했습니다: {output}")
+
+
+if __name__ == "__main__":
+    main()
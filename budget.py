@@ -0,0 +1,199 @@
+"""
+토큰 예산 - 로컬 토크나이저로 토큰 수를 세어 문장 경계에서 입력을 자르고,
+호출 전에 실행 전체의 토큰/비용을 추정하여 예산을 넘는 특허는 이번 실행에서 보류
+"""
+import functools
+import re
+from typing import Any, Callable, Iterable, Mapping, Optional, Sequence
+
+from config import Config
+from metrics import MetricsRegistry
+
+# 문장 끝(마침표/물음표/느낌표 뒤 공백)에서 분리
+_SENTENCE_END = re.compile(r"(?<=[.!?。])\s+")
+# 토크나이저를 쓸 수 없을 때의 추정: 한글/한자 등은 글자당 1토큰, 그 밖의 문자는 4글자당 1토큰
+_WIDE_CHAR = re.compile(r"[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u4e00-\u9fff\uac00-\ud7af]")
+# 채팅 메시지 1개당 역할/구분자 토큰과 응답 시작 토큰
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_OVERHEAD_TOKENS = 3
+
+Estimate = tuple[int, int]  # (입력 토큰, 출력 토큰)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_encoding(model_name: str) -> Any:
+    """모델의 tiktoken 인코더 (프로세스당 한 번만 불러오며, 실패하면 None)"""
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            return tiktoken.get_encoding(Config.TOKENIZER_ENCODING)
+    except Exception as e:
+        print(f"  토크나이저를 불러오지 못해 문자 수로 토큰을 추정합니다: {str(e)[:50]}")
+        return None
+
+
+class TokenCounter:
+    """tiktoken 인코더로 토큰 수 계산 (설치되지 않았거나 인코딩 파일을 받을 수 없으면 문자 종류로 추정)"""
+
+    def __init__(self, model_name: str = Config.MODEL_NAME):
+        self.encoding = _load_encoding(model_name)
+
+    def count(self, text: str) -> int:
+        """텍스트의 토큰 수"""
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        wide = len(_WIDE_CHAR.findall(text))
+        return wide + (len(text) - wide + 3) // 4
+
+    def count_messages(self, messages: Iterable[Any]) -> int:
+        """채팅 메시지 목록(프롬프트)의 입력 토큰 수"""
+        return REPLY_OVERHEAD_TOKENS + sum(
+            self.count(str(message.content)) + MESSAGE_OVERHEAD_TOKENS for message in messages
+        )
+
+    def _cut(self, text: str, max_tokens: int) -> str:
+        """문장 하나가 한도를 넘을 때 토큰 단위로 자름"""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text, disallowed_special=())[:max_tokens]
+            # 잘린 멀티바이트 문자는 대체 문자로 디코딩되므로 제거
+            return self.encoding.decode(tokens).rstrip("\ufffd")
+        used = 0
+        for end, char in enumerate(text):
+            used += 4 if _WIDE_CHAR.match(char) else 1
+            if used > max_tokens * 4:
+                return text[:end]
+        return text
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """max_tokens 이하가 되도록 문장 경계에서 자름 (첫 문장부터 넘치면 토큰 단위로 자름)"""
+        if not text or max_tokens <= 0 or self.count(text) <= max_tokens:
+            return text
+        kept: list[str] = []
+        used = 0
+        for sentence in _SENTENCE_END.split(text):
+            # 문장 사이 공백 1토큰 포함
+            tokens = self.count(sentence) + (1 if kept else 0)
+            if used + tokens > max_tokens:
+                break
+            kept.append(sentence)
+            used += tokens
+        if not kept:
+            return self._cut(text, max_tokens)
+        return " ".join(kept)
+
+
+def patent_priority(patent: Mapping[str, Any]) -> tuple:
+    """예산이 부족할 때 먼저 처리할 순서 (등록 특허 우선, 그다음 최근 출원 우선)"""
+    registered = patent.get("RegistrationNumber") not in (None, "", "N/A")
+    return (not registered, _negated(str(patent.get("ApplicationNumber") or "")))
+
+
+def _negated(number: str) -> tuple[int, ...]:
+    # 출원번호 문자열의 내림차순 정렬용 키
+    return tuple(-ord(char) for char in number)
+
+
+class TokenBudgetPlanner:
+    """호출 전 토큰/비용 추정과 실행 단위 예산 적용 (추정치는 출력 토큰 한도를 모두 쓰는 상한값)"""
+
+    def __init__(
+        self,
+        counter: Optional[TokenCounter] = None,
+        max_input_tokens: int = Config.SUMMARY_INPUT_TOKENS,
+        token_budget: int = Config.RUN_TOKEN_BUDGET,
+        cost_budget: float = Config.RUN_COST_BUDGET,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.counter = counter or TokenCounter()
+        self.max_input_tokens = max_input_tokens
+        self.token_budget = token_budget
+        self.cost_budget = cost_budget
+        self.metrics = metrics
+        self.estimated_input = 0
+        self.estimated_output = 0
+        self.admitted = 0
+        self.deferred = 0
+
+    def truncate(self, text: str) -> str:
+        """LLM에 보낼 초록을 입력 토큰 한도에 맞춤"""
+        return self.counter.truncate(text, self.max_input_tokens)
+
+    @staticmethod
+    def cost(input_tokens: float, output_tokens: float) -> float:
+        """토큰 수 → 예상 비용(USD)"""
+        return (
+            input_tokens * Config.PRICE_PER_1M_INPUT_TOKENS
+            + output_tokens * Config.PRICE_PER_1M_OUTPUT_TOKENS
+        ) / 1_000_000
+
+    def _fits(self, input_tokens: int, output_tokens: int) -> bool:
+        total_input = self.estimated_input + input_tokens
+        total_output = self.estimated_output + output_tokens
+        if self.token_budget > 0 and total_input + total_output > self.token_budget:
+            return False
+        if self.cost_budget > 0 and self.cost(total_input, total_output) > self.cost_budget:
+            return False
+        return True
+
+    def admit(self, estimate: Estimate) -> bool:
+        """추정 토큰을 예산에서 예약 (예산을 넘으면 예약하지 않고 False)"""
+        if not self._fits(*estimate):
+            self.deferred += 1
+            return False
+        self.estimated_input += estimate[0]
+        self.estimated_output += estimate[1]
+        self.admitted += 1
+        return True
+
+    def plan(
+        self,
+        patents: Sequence[Any],
+        estimate: Callable[[Any], Estimate],
+        priority: Callable[[Any], Any] = patent_priority,
+    ) -> tuple[list[Any], list[Any]]:
+        """우선순위 순서로 예산 안에 드는 특허를 고르고 (처리 대상, 보류) 반환 (둘 다 원래 순서 유지)"""
+        admitted = set()
+        for index in sorted(range(len(patents)), key=lambda i: priority(patents[i])):
+            if self.admit(estimate(patents[index])):
+                admitted.add(index)
+        selected = [patent for i, patent in enumerate(patents) if i in admitted]
+        deferred = [patent for i, patent in enumerate(patents) if i not in admitted]
+        return selected, deferred
+
+    def actual_usage(self) -> Estimate:
+        """지표에 기록된 실제 입력/출력 토큰 수"""
+        usage = {"prompt": 0, "completion": 0}
+        if self.metrics is not None:
+            for (name, labels), value in self.metrics.counters.items():
+                if name == "patent_llm_tokens_total":
+                    usage[dict(labels)["kind"]] += int(value)
+        return usage["prompt"], usage["completion"]
+
+    def stats(self) -> dict[str, float]:
+        """추정치와 실제 사용량 비교"""
+        actual_input, actual_output = self.actual_usage()
+        return {
+            "estimated_input_tokens": self.estimated_input,
+            "estimated_output_tokens": self.estimated_output,
+            "estimated_cost_usd": round(self.cost(self.estimated_input, self.estimated_output), 6),
+            "actual_input_tokens": actual_input,
+            "actual_output_tokens": actual_output,
+            "actual_cost_usd": round(self.cost(actual_input, actual_output), 6),
+            "token_budget": self.token_budget,
+            "cost_budget_usd": self.cost_budget,
+            "admitted": self.admitted,
+            "deferred": self.deferred,
+        }
+
+    def describe_budget(self) -> str:
+        limits = []
+        if self.token_budget > 0:
+            limits.append(f"{self.token_budget:,}토큰")
+        if self.cost_budget > 0:
+            limits.append(f"${self.cost_budget:.2f}")
+        return " / ".join(limits) if limits else "제한 없음"
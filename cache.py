@@ -0,0 +1,178 @@
+"""
+요약 캐시 - 특허 요약 결과를 SQLite 파일에 저장하여 재실행 시 LLM 호출을 줄임
+"""
+import asyncio
+import hashlib
+import os
+import sqlite3
+import time
+from typing import Awaitable, Callable, Optional
+
+from config import Config
+
+
+class _OwnerCancelled(Exception):
+    """같은 키를 계산하던 코루틴이 취소됨 (기다리던 코루틴 중 하나가 이어서 계산)"""
+
+
+class SummaryCache:
+    """출원번호 + 초록/프롬프트/모델 해시를 키로 사용하는 영속 요약 캐시"""
+
+    def __init__(
+        self,
+        path: str = Config.CACHE_PATH,
+        max_entries: int = Config.CACHE_MAX_ENTRIES,
+        max_age_days: int = Config.CACHE_MAX_AGE_DAYS,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self.hits = 0
+        self.misses = 0
+        # ① 같은 실행 안에서 동일 키에 대한 중복 LLM 호출을 막기 위한 진행 중 작업 목록
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS summaries (
+                cache_key TEXT PRIMARY KEY,
+                application_number TEXT,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_summaries_accessed ON summaries (accessed_at)"
+        )
+        self.conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(
+        application_number: str, abstract: str, prompt_fingerprint: str, model_name: str
+    ) -> str:
+        """캐시 키 생성 - 초록, 프롬프트, 모델 중 하나라도 바뀌면 다른 키가 됨"""
+        content_hash = hashlib.sha256(
+            "\x1f".join([abstract or "", prompt_fingerprint, model_name]).encode("utf-8")
+        ).hexdigest()
+        return f"{application_number}:{content_hash}"
+
+    def get(self, key: str) -> Optional[str]:
+        """캐시 조회 (만료된 항목은 없는 것으로 처리)"""
+        now = time.time()
+        row = self.conn.execute(
+            "SELECT summary, created_at FROM summaries WHERE cache_key = ?", (key,)
+        ).fetchone()
+
+        if row is None or (self.max_age_seconds and now - row[1] > self.max_age_seconds):
+            self.misses += 1
+            return None
+
+        self.conn.execute(
+            "UPDATE summaries SET accessed_at = ? WHERE cache_key = ?", (now, key)
+        )
+        self.conn.commit()
+        self.hits += 1
+        return row[0]
+
+    def contains(self, key: str) -> bool:
+        """만료되지 않은 항목이 있는지 확인 (히트/미스 통계와 사용 시각은 바꾸지 않음)"""
+        row = self.conn.execute(
+            "SELECT created_at FROM summaries WHERE cache_key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return key in self._in_flight
+        return not (self.max_age_seconds and time.time() - row[0] > self.max_age_seconds)
+
+    def set(self, key: str, application_number: str, summary: str) -> None:
+        """요약 결과 저장"""
+        now = time.time()
+        self.conn.execute(
+            """INSERT OR REPLACE INTO summaries
+               (cache_key, application_number, summary, created_at, accessed_at)
+               VALUES (?, ?, ?, ?, ?)""",
+            (key, application_number, summary, now, now),
+        )
+        self.conn.commit()
+
+    async def get_or_compute(
+        self,
+        key: str,
+        application_number: str,
+        compute: Callable[[], Awaitable[str]],
+    ) -> str:
+        """캐시에 있으면 반환하고, 없으면 compute()로 생성 후 저장"""
+        # ② 다른 코루틴이 이미 같은 키를 계산 중이면 그 결과를 함께 기다림
+        # (기다리는 쪽이 취소되어도 공유 결과는 취소되지 않도록 shield)
+        while (in_flight := self._in_flight.get(key)) is not None:
+            try:
+                summary = await asyncio.shield(in_flight)
+            except _OwnerCancelled:
+                continue  # 계산하던 코루틴(다른 작업일 수 있음)이 취소되면 다시 확인하여 이어서 계산
+            self.hits += 1
+            return summary
+
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            summary = await compute()
+            # ③ 빈 응답은 저장하지 않아 다음 실행에서 다시 시도하도록 함
+            if summary:
+                self.set(key, application_number, summary)
+            future.set_result(summary)
+            return summary
+        except asyncio.CancelledError:
+            # 공유 결과를 취소하면 다른 작업의 대기자까지 취소되므로 예외로 알리고 다시 계산하게 함
+            future.set_exception(_OwnerCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 기다리는 코루틴이 없을 때 "Future exception was never retrieved" 경고 방지
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def evict(self) -> int:
+        """오래된 항목과 최대 개수를 넘는 항목(가장 오래 사용되지 않은 순) 삭제"""
+        deleted = 0
+        if self.max_age_seconds:
+            cursor = self.conn.execute(
+                "DELETE FROM summaries WHERE created_at < ?",
+                (time.time() - self.max_age_seconds,),
+            )
+            deleted += cursor.rowcount
+
+        if self.max_entries:
+            cursor = self.conn.execute(
+                """DELETE FROM summaries WHERE cache_key IN (
+                       SELECT cache_key FROM summaries
+                       ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,),
+            )
+            deleted += cursor.rowcount
+
+        self.conn.commit()
+        return deleted
+
+    def stats(self) -> dict[str, float]:
+        """히트/미스 통계"""
+        total = self.hits + self.misses
+        entries = self.conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+        }
+
+    def close(self) -> None:
+        self.conn.close()
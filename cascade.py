@@ -0,0 +1,128 @@
+"""
+모델 캐스케이드 - 작은(싼) 모델로 먼저 호출하고, 응답이 검증에 실패하거나 확신도가 낮은 특허만 다음 모델로 다시 호출
+
+대부분의 특허는 작은 모델로 충분하므로 큰 모델의 지연 시간과 비용은 어려운 특허에만 씁니다.
+단계 모델은 Config.MODEL_CASCADE 순서(싼 모델 → 강한 모델)이고, 마지막 단계의 응답은 검증 결과와 관계없이 사용합니다.
+단계별 호출 수와 다음 단계로 올린 호출 수는 지표(patent_llm_cascade_*)로, 상승 비율은 stats()로 기록합니다.
+"""
+from collections import Counter
+from typing import Any, Callable, Optional, Sequence
+
+from config import Config
+from metrics import MetricsRegistry
+from scheduler import AdaptiveScheduler
+
+
+def logprob_margin(response: Any) -> Optional[float]:
+    """응답 첫 토큰의 1순위와 2순위 logprob 차이 (logprobs를 받지 않은 응답이면 None)"""
+    logprobs = (getattr(response, "response_metadata", None) or {}).get("logprobs") or {}
+    content = logprobs.get("content") or []
+    if not content:
+        return None
+    top = sorted((item["logprob"] for item in content[0].get("top_logprobs") or []), reverse=True)
+    if len(top) < 2:
+        return None
+    return top[0] - top[1]
+
+
+def is_confident(response: Any, min_margin: float = Config.CASCADE_MIN_MARGIN) -> bool:
+    """확신도 검사 (min_margin이 0이거나 모델이 logprobs를 주지 않으면 통과)"""
+    margin = logprob_margin(response)
+    return min_margin <= 0 or margin is None or margin >= min_margin
+
+
+class ModelCascade:
+    """단계별 LLM 클라이언트와 단계를 올려 가며 호출하는 스케줄러 래퍼"""
+
+    def __init__(
+        self,
+        llm: Any,
+        tiers: Optional[Sequence[str]] = None,
+        scheduler: Optional[AdaptiveScheduler] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.tiers = list(tiers or Config.MODEL_CASCADE or [Config.MODEL_NAME])
+        self.scheduler = scheduler or AdaptiveScheduler()
+        self.metrics = metrics or self.scheduler.metrics
+        # ① 단계 모델은 주어진 클라이언트의 모델 이름만 바꾼 얕은 복사본 (HTTP 연결 풀을 함께 씀)
+        # 모델 이름이 없는 클라이언트(벤치마크용 가짜 모델)는 모든 단계에서 그대로 사용
+        model_name = getattr(llm, "model_name", None)
+        self.llms = [
+            llm if model_name in (None, tier) else llm.model_copy(update={"model_name": tier})
+            for tier in self.tiers
+        ]
+        self.calls: Counter = Counter()
+        self.requests = 0  # 캐스케이드에 들어온 항목 수 (배치 호출은 묶은 특허 수)
+        self.escalations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.tiers) > 1
+
+    @property
+    def fingerprint(self) -> str:
+        """캐시 키에 넣는 단계 모델 목록 (단계 구성이 바뀌면 캐시된 요약을 다시 만듦)"""
+        return ",".join(self.tiers)
+
+    def chains(self, build: Callable[[Any], Any]) -> list[Any]:
+        """단계 모델마다 체인 구성 (build는 LLM 클라이언트 → 체인)"""
+        return [build(llm) for llm in self.llms]
+
+    def _inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """실행 지표에 기록 (작업 서비스에서는 스케줄러를 공유하는 서비스 지표에도 기록)"""
+        self.metrics.inc(name, value, **labels)
+        if self.scheduler.metrics is not self.metrics:
+            self.scheduler.metrics.inc(name, value, **labels)
+
+    def escalate(self, op: str, count: int = 1) -> None:
+        """검증에 실패하여 다음 단계로 올린 호출 수 기록"""
+        self.escalations += count
+        self._inc("patent_llm_cascade_escalations_total", count, op=op)
+
+    async def call(
+        self,
+        chains: Sequence[Any],
+        inputs: dict[str, Any],
+        op: str,
+        accept: Callable[[Any], bool],
+        start: int = 0,
+        items: int = 1,
+    ) -> Any:
+        """start 단계부터 호출하여 accept를 통과한 첫 응답 반환 (마지막 단계는 그대로 반환)
+
+        items는 호출 1건에 담긴 특허 수, start가 0이 아니면 이미 집계된 항목을 올려 보낸 것으로 봄
+        마지막이 아닌 단계의 호출 오류도 다음 단계로 올림 (마지막 단계의 오류는 호출한 쪽으로 전달)
+        """
+        if start == 0:
+            self.requests += items
+        last = len(chains) - 1
+        for tier in range(min(start, last), last + 1):
+            chain = chains[tier]
+            self.calls[self.tiers[tier]] += 1
+            self._inc("patent_llm_cascade_calls_total", op=op, tier=self.tiers[tier])
+            # ② 재시도/헤지/기한은 단계마다 공유 스케줄러가 처리
+            try:
+                response = await self.scheduler.call(lambda: chain.ainvoke(inputs), op=op)
+            except Exception:
+                if tier == last:
+                    raise
+                self.escalate(op)
+                continue
+            if tier == last or accept(response):
+                return response
+            self.escalate(op)
+
+    def stats(self) -> dict[str, Any]:
+        """단계별 호출 수와 상승 비율 (캐스케이드에 들어온 항목 대비 다음 단계로 올린 횟수)"""
+        return {
+            "tiers": len(self.tiers),
+            **{f"calls_{i}": self.calls[tier] for i, tier in enumerate(self.tiers)},
+            "requests": self.requests,
+            "escalations": self.escalations,
+            "escalation_rate": self.escalations / self.requests if self.requests else 0.0,
+        }
+
+    def describe(self) -> str:
+        calls = " / ".join(f"{tier} {self.calls[tier]}건" for tier in self.tiers)
+        stats = self.stats()
+        return f"모델 단계별 호출 {calls} (상승 {stats['escalations']}건, {stats['escalation_rate'] * 100:.1f}%)"
@@ -0,0 +1,75 @@
+"""
+항목 단위 체크포인트 - 요약/분류 단계에서 끝난 특허를 하나씩 SQLite에 기록하여
+중단된 실행을 이어서 진행할 때 이미 비용을 들인 LLM 호출을 다시 하지 않도록 함
+"""
+import json
+import os
+import sqlite3
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+import aiosqlite
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from config import Config
+from records import PatentRecord
+
+
+@asynccontextmanager
+async def open_checkpointer(path: str = Config.CHECKPOINT_PATH) -> AsyncIterator[AsyncSqliteSaver]:
+    """노드 경계 체크포인터 (상태에 담긴 PatentRecord를 역직렬화 허용 목록에 등록)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    async with aiosqlite.connect(path) as conn:
+        yield AsyncSqliteSaver(
+            conn, serde=JsonPlusSerializer(allowed_msgpack_modules=[PatentRecord])
+        )
+
+
+class ItemCheckpoint:
+    """(실행 ID, 단계, 항목 번호) → 결과를 저장하는 체크포인트"""
+
+    def __init__(self, path: str = Config.ITEM_CHECKPOINT_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS item_checkpoints (
+                run_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                item_key INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (run_id, stage, item_key)
+            )"""
+        )
+        self.conn.commit()
+
+    def load(self, run_id: str, stage: str) -> dict[int, Any]:
+        """해당 실행/단계에서 이미 끝난 항목 (항목 번호 → 결과)"""
+        rows = self.conn.execute(
+            "SELECT item_key, payload FROM item_checkpoints WHERE run_id = ? AND stage = ?",
+            (run_id, stage),
+        )
+        return {key: json.loads(payload) for key, payload in rows}
+
+    def save(self, run_id: str, stage: str, items: dict[int, Any]) -> None:
+        """끝난 항목 기록 (항목이 끝날 때마다 호출되므로 바로 커밋)"""
+        if not items:
+            return
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO item_checkpoints VALUES (?, ?, ?, ?)",
+            [
+                (run_id, stage, key, json.dumps(payload, ensure_ascii=False))
+                for key, payload in items.items()
+            ],
+        )
+        self.conn.commit()
+
+    def clear(self, run_id: str) -> None:
+        """완료된 실행의 항목 기록 삭제"""
+        self.conn.execute("DELETE FROM item_checkpoints WHERE run_id = ?", (run_id,))
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
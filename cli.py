@@ -0,0 +1,322 @@
+"""
+단계별 CLI - 수집/요약/분류/보고서를 따로 실행하고, 각 명령은 그 단계에 필요한 모듈만 불러옴
+
+단계 사이의 결과는 특허 저장소에 기록되므로 collect → summarize → classify → report 순으로 나눠 실행할 수 있습니다.
+보고서 재생성(report)과 수집(collect)은 LLM 클라이언트, LangGraph, pandas를 불러오지 않아 바로 시작합니다.
+
+사용 예:
+    python cli.py collect --cpc-codes G06N,G06T --pages 5
+    python cli.py summarize --limit 200
+    python cli.py classify
+    python cli.py report --formats md,html
+    python cli.py search 영상 인식 --category 이미지처리/비전 --limit 20   # 저장소 전문 검색 (BM25)
+    python cli.py classify --unsummarized && python cli.py summarize --displayed   # 먼저 분류하고 표시될 특허만 요약
+    python cli.py run --resume 20250101_120000      # main.py와 같은 전체 워크플로우
+    python cli.py --import-times report             # 모듈별 import 시간 출력
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+
+from config import Config
+
+if TYPE_CHECKING:
+    from workflow import PatentAgents
+
+
+def _create_agents(args: argparse.Namespace, use_llm: bool) -> "PatentAgents":
+    """명령에 필요한 에이전트 모음 생성 (LLM 클라이언트는 요약/분류 명령에서만 불러옴)"""
+    from metrics import MetricsRegistry
+    from workflow import PatentAgents
+
+    llm = None
+    if use_llm and args.fake_llm:
+        from benchmark import FakeChatModel
+
+        llm = FakeChatModel(latency=args.fake_llm)
+    elif use_llm:
+        if not Config.validate():
+            raise ValueError("API 키가 설정되지 않았습니다. .env 파일을 확인해주세요.")
+        from langchain_openai import ChatOpenAI
+
+        llm = ChatOpenAI(
+            model=Config.MODEL_NAME,
+            max_tokens=Config.MAX_TOKENS,
+            api_key=Config.OPENAI_API_KEY,
+        )
+    metrics = MetricsRegistry() if Config.METRICS_ENABLED and use_llm else None
+    return PatentAgents(llm, metrics)
+
+
+def _write_metrics(agents: "PatentAgents", command: str) -> None:
+    if Config.METRICS_ENABLED and (agents.metrics.histograms or agents.metrics.counters):
+        agents.metrics.print_summary()
+        metric_files = agents.metrics.write(f"{command}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        print(f"실행 지표가 저장되었습니다: {', '.join(metric_files)}")
+
+
+def _preprocess(agents: "PatentAgents", patents: list) -> None:
+    """저장소에는 수집한 원문이 있으므로 LLM 단계 전에 열 단위로 정리"""
+    if agents.preprocessor is not None:
+        agents.preprocessor.preprocess(patents)
+        agents.preprocessor.print_stats()
+
+
+async def collect(args: argparse.Namespace) -> None:
+    """KIPRIS API에서 수집하여 저장소에 저장 (내용이 바뀐 특허는 이전 요약/분류 결과 폐기)"""
+    codes = args.cpc_codes.split(",") if args.cpc_codes else Config.CPC_NUMBERS
+    agents = _create_agents(args, use_llm=False)
+    print(f"KIPRIS API에서 특허 데이터를 수집합니다... (CPC 코드: {', '.join(codes)})")
+    patents = await agents.collector.collect_from_api(
+        cpc_numbers=codes, total_pages=args.pages, num_of_rows=args.rows
+    )
+    if not patents:
+        print("수집된 특허 데이터가 없습니다.")
+        return
+    agents.store.upsert(patents)
+    pending = agents.store.pending_numbers(str(patent.ApplicationNumber) for patent in patents)
+    print(
+        f"총 {len(patents)}개의 특허를 {agents.store.path}에 저장했습니다. "
+        f"(요약/분류 대기 {len(pending)}건)"
+    )
+
+
+async def summarize(args: argparse.Namespace) -> None:
+    """저장소에서 아직 요약이 없는 특허를 요약하여 요약 결과만 기록"""
+    from agents.lazy_summarizer import LazySummaryAgent
+    from agents.planner import BudgetPlannerAgent
+    from state import PatentState
+
+    agents = _create_agents(args, use_llm=True)
+    if args.displayed:
+        # 먼저 분류한 특허 중 보고서(report 명령)에 표시될 특허만 요약
+        per_category = agents.reporter.writer.per_category
+        patents = [
+            patent
+            for patent in LazySummaryAgent.displayed(
+                {
+                    category: agents.store.iter_records(categories=[category], processed=True, limit=per_category)
+                    for category in Config.PATENT_CATEGORIES
+                },
+                per_category,
+            )
+            if patent.ai_summary is None
+        ][: args.limit]
+    else:
+        patents = agents.store.read_records(processed=False, summarized=False)[: args.limit]
+    if not patents:
+        print("요약할 특허가 없습니다. 먼저 collect(--displayed이면 classify)를 실행해주세요.")
+        return
+    _preprocess(agents, patents)
+
+    # ① 요약 단계의 토큰만 추정하여 예산을 넘는 특허는 보류 (분류 토큰은 classify 명령에서 따로 확인)
+    # run_id를 비워 항목 단위 체크포인트는 쓰지 않음 (중단 후 다시 실행하면 요약 캐시로 빠르게 이어짐)
+    state = PatentState(raw_patents=patents)
+    state = await BudgetPlannerAgent(agents.planner, [agents.summarizer.estimate_tokens]).plan_patents(state)
+    state = await agents.summarizer.summarize_patents(state)
+    recorded = agents.store.record_summaries(state.summarized_patents)
+    print(f"요약 결과 {recorded}건을 {agents.store.path}에 저장했습니다.")
+    if state.error_log:
+        print(f"오류 {len(state.error_log)}건: {state.error_log[-1]}")
+    _write_metrics(agents, "summarize")
+
+
+async def classify(args: argparse.Namespace) -> None:
+    """저장소에서 요약은 있고 분류가 없는 특허를 분류하여 결과 기록 (--unsummarized이면 요약 없이 원본 초록으로)"""
+    from state import PatentState
+
+    agents = _create_agents(args, use_llm=True)
+    summarized = None if args.unsummarized else True
+    patents = agents.store.read_records(processed=False, summarized=summarized)[: args.limit]
+    if not patents:
+        print("분류할 특허가 없습니다. 먼저 summarize(--unsummarized이면 collect)를 실행해주세요.")
+        return
+    _preprocess(agents, patents)
+
+    state = await agents.organizer.organize_patents(PatentState(summarized_patents=patents))
+    recorded = agents.store.record_results(state.categorized_records())
+    print(f"분류 결과 {recorded}건을 {agents.store.path}에 저장했습니다.")
+    if state.error_log:
+        print(f"오류 {len(state.error_log)}건: {state.error_log[-1]}")
+    _write_metrics(agents, "classify")
+
+
+async def report(args: argparse.Namespace) -> None:
+    """저장소의 요약/분류 결과로 보고서만 다시 생성 (LLM 호출 없음)"""
+    from main import print_report_files
+
+    if args.formats:
+        Config.REPORT_FORMATS = args.formats.split(",")
+    if args.shard:
+        Config.REPORT_SHARDED = True
+    agents = _create_agents(args, use_llm=False)
+    if not agents.store.category_counts():
+        print("저장소에 요약/분류 결과가 없습니다. 먼저 classify 또는 run을 실행해주세요.")
+        return
+    report_files = agents.reporter.generate_from_store(agents.store)
+    print_report_files(report_files)
+
+
+async def search(args: argparse.Namespace) -> None:
+    """저장소의 전문 검색 색인으로 특허 검색 (저장소 모듈만 불러오므로 LLM/워크플로우 없이 바로 시작)"""
+    from patent_store import PatentStore
+
+    store = PatentStore()
+    if args.rebuild:
+        started = time.perf_counter()
+        indexed = store.rebuild_search_index()
+        print(f"검색 색인을 다시 만들었습니다: 특허 {indexed:,}건 ({time.perf_counter() - started:.2f}초)")
+        if not args.query:
+            return
+    if not args.query:
+        raise ValueError("검색어를 입력해주세요.")
+    categories = args.category.split(",") if args.category else None
+    started = time.perf_counter()
+    results = store.search(" ".join(args.query), categories=categories, limit=args.limit)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"검색 결과 {len(results)}건 ({elapsed:.1f}ms)")
+    for rank, result in enumerate(results, 1):
+        print(f"{rank:3d}. [{result['category'] or '미분류'}] {result['InventionName']} "
+              f"({result['ApplicationNumber']}, 점수 {result['score']:.3f})")
+        if args.summaries and result["ai_summary"]:
+            print(f"     {result['ai_summary']}")
+
+
+async def run(args: argparse.Namespace) -> None:
+    """main.py와 같은 전체 워크플로우 실행 (인자는 main.py에 그대로 전달)"""
+    from main import main
+
+    await main(args.main_args)
+
+
+COMMANDS = {
+    "collect": collect,
+    "summarize": summarize,
+    "classify": classify,
+    "report": report,
+    "search": search,
+    "run": run,
+}
+
+
+def print_import_times(lines: list[str], top: int = 15) -> None:
+    """-X importtime 출력을 최상위 패키지별 자체 import 시간으로 집계하여 출력"""
+    packages: dict[str, float] = defaultdict(float)
+    for line in lines:
+        # 형식: "import time: self [us] | cumulative | imported package"
+        fields = line.split(":", 1)[1].split("|")
+        if not fields[0].strip().isdigit():
+            continue  # 머리글 줄
+        packages[fields[2].strip().split(".")[0]] += int(fields[0]) / 1e6
+
+    total = sum(packages.values())
+    print("\n" + "=" * 60)
+    print(f"import 시간: 총 {total:.3f}초 (모듈 {len(lines) - 1}개)")
+    print("=" * 60)
+    for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {package:30s} {seconds:7.3f}초  {seconds / total:6.1%}")
+
+
+def run_with_import_times(argv: list[str]) -> int:
+    """같은 명령을 -X importtime으로 다시 실행하고, 명령 출력은 그대로 보여준 뒤 import 시간 요약 출력"""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), *argv],
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    lines = []
+    for line in process.stderr:
+        if line.startswith("import time:"):
+            lines.append(line)
+        else:
+            sys.stderr.write(line)
+    returncode = process.wait()
+    print_import_times(lines)
+    print(f"  전체 실행 시간 {time.perf_counter() - started:.3f}초 (인터프리터 시작 포함)")
+    return returncode
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="KIPRIS 특허 AI 멀티에이전트 시스템 - 단계별 실행")
+    parser.add_argument(
+        "--import-times", action="store_true", help="명령 실행 후 최상위 패키지별 import 시간 출력"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    collect_parser = commands.add_parser("collect", help="KIPRIS API에서 수집하여 저장소에 저장")
+    collect_parser.add_argument("--cpc-codes", help="수집할 CPC 코드 (쉼표로 구분, 기본은 Config.CPC_NUMBERS)")
+    collect_parser.add_argument("--pages", type=int, default=Config.TOTAL_PAGES, help="CPC 코드별 최대 페이지 수")
+    collect_parser.add_argument("--rows", type=int, default=Config.NUM_OF_ROWS, help="페이지당 특허 수")
+
+    for name, description in (
+        ("summarize", "저장소에서 요약이 없는 특허를 요약"),
+        ("classify", "저장소에서 요약된 미분류 특허를 분류"),
+    ):
+        stage_parser = commands.add_parser(name, help=description)
+        stage_parser.add_argument("--limit", type=int, help="이번에 처리할 최대 특허 수")
+        stage_parser.add_argument(
+            "--fake-llm", type=float, default=0.0, metavar="LATENCY",
+            help="OpenAI 대신 벤치마크용 가짜 LLM 사용 (응답 지연 초, 오프라인 시험용)",
+        )
+        if name == "summarize":
+            stage_parser.add_argument(
+                "--displayed", action="store_true",
+                help="분류된 특허 중 보고서에 표시될(카테고리별 PATENT_PER_CATEGORY건) 특허만 요약",
+            )
+        else:
+            stage_parser.add_argument(
+                "--unsummarized", action="store_true",
+                help="요약이 없는 특허도 발명명 + 원본 초록으로 분류 (요약은 summarize --displayed로 표시 특허만)",
+            )
+
+    report_parser = commands.add_parser("report", help="저장소의 결과로 보고서만 다시 생성")
+    report_parser.add_argument("--formats", metavar="FORMATS", help="보고서 형식 (예: md,json,html)")
+    report_parser.add_argument("--shard", action="store_true", help="카테고리별 파일 + 목차 페이지로 보고서 분할")
+
+    search_parser = commands.add_parser("search", help="저장소의 발명명/초록/요약을 BM25 전문 검색")
+    search_parser.add_argument("query", nargs="*", help="검색어 (여러 단어는 모두 포함하는 특허만)")
+    search_parser.add_argument("--category", help="분류 결과로 필터 (쉼표로 구분)")
+    search_parser.add_argument("--limit", type=int, default=10, help="출력할 최대 특허 수")
+    search_parser.add_argument("--summaries", action="store_true", help="AI 요약도 함께 출력")
+    search_parser.add_argument("--rebuild", action="store_true", help="검색 색인을 저장소 전체로 다시 생성")
+
+    run_parser = commands.add_parser("run", help="전체 워크플로우 실행 (main.py와 같은 인자)")
+    run_parser.add_argument("main_args", nargs=argparse.REMAINDER, help="main.py 인자 (예: --resume RUN_ID)")
+
+    # argparse.REMAINDER는 옵션으로 시작하는 인자(run --resume ...)를 받지 못하므로 run 뒤의 인자는 그대로 떼어 전달
+    argv = sys.argv[1:] if argv is None else argv
+    position = next((i for i, arg in enumerate(argv) if not arg.startswith("-")), None)
+    main_args = None
+    if position is not None and argv[position] == "run":
+        argv, main_args = argv[: position + 1], argv[position + 1:]
+    args = parser.parse_args(argv)
+    if main_args is not None:
+        args.main_args = main_args
+    args.fake_llm = getattr(args, "fake_llm", 0.0)
+    return args
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    args = parse_args(argv)
+    if args.import_times:
+        # import 시간은 인터프리터 시작부터 재야 하므로 자식 프로세스에서 측정
+        sys.exit(run_with_import_times([arg for arg in argv if arg != "--import-times"]))
+    try:
+        asyncio.run(COMMANDS[args.command](args))
+    except KeyboardInterrupt:
+        print("\n\n사용자에 의해 중단되었습니다. 저장소에 기록된 단계까지는 다시 실행하지 않습니다.")
+    except ValueError as e:
+        print(f"오류: {e}")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,21 +13,101 @@ class Config:
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     MODEL_NAME: str = "gpt-5-mini"
     MAX_TOKENS: int = 150
+    FUSED_MAX_TOKENS: int = 400  # 요약+분류 통합 호출(JSON 응답)의 출력 토큰 한도
+
+    # 모델 캐스케이드 (싼 모델로 먼저 호출하고, 검증에 실패하거나 확신도가 낮은 응답만 다음 모델로 다시 호출)
+    # 쉼표로 구분한 모델 이름 (싼 모델 → 강한 모델, 기본은 MODEL_NAME 한 단계이며 LLM_MODEL_CASCADE로 켬)
+    MODEL_CASCADE: list[str] = [
+        name.strip() for name in os.getenv("LLM_MODEL_CASCADE", MODEL_NAME).split(",") if name.strip()
+    ]
+    CASCADE_MIN_MARGIN: float = float(os.getenv("LLM_CASCADE_MIN_MARGIN", "0"))  # 분류 응답 첫 토큰의 1·2순위 logprob 차이 하한 (0이면 확인 안 함, logprobs를 주는 모델에서만 사용)
+    CASCADE_MAX_SUMMARY_CHARS: int = 600  # 이보다 긴 요약은 검증 실패로 보고 다음 모델로 다시 요약
+
+    # 토큰 예산 설정 (호출 전에 실행 전체 토큰/비용을 추정하고, 예산을 넘는 특허는 다음 실행으로 보류)
+    SUMMARY_INPUT_TOKENS: int = 500  # LLM에 보낼 초록의 최대 토큰 수 (문장 경계에서 자름)
+    TOKENIZER_ENCODING: str = "o200k_base"  # tiktoken이 모델 이름을 모를 때 사용할 인코딩
+    RUN_TOKEN_BUDGET: int = int(os.getenv("RUN_TOKEN_BUDGET", "0"))  # 실행당 입력+출력 토큰 한도 (0이면 제한 없음)
+    RUN_COST_BUDGET: float = float(os.getenv("RUN_COST_BUDGET", "0"))  # 실행당 비용 한도(USD, 0이면 제한 없음)
+    PRICE_PER_1M_INPUT_TOKENS: float = 0.25  # MODEL_NAME의 입력 토큰 100만 개당 가격(USD)
+    PRICE_PER_1M_OUTPUT_TOKENS: float = 2.0  # MODEL_NAME의 출력 토큰 100만 개당 가격(USD)
+
+    # 워크플로우 모드: "staged"(요약 → 분류 2회 호출), "fused"(요약+분류 1회 호출),
+    # "stream"(수집/요약/분류를 큐로 연결하여 동시에 진행), "lazy"(먼저 분류하고 보고서에 표시될 특허만 요약)
+    WORKFLOW_MODE: str = os.getenv("WORKFLOW_MODE", "staged")
+    STREAM_QUEUE_SIZE: int = 100  # 스트리밍 단계 사이 큐의 최대 크기 (백프레셔)
+    STREAM_FLUSH_SECONDS: float = 0.5  # 분류 묶음이 덜 차도 이 시간 동안 입력이 없으면 분류 시작
 
     # ② 현재 파일의 위치를 기준으로 프로젝트 루트 디렉토리를 설정
     ROOT_DIR: str = os.path.dirname(os.path.abspath(__file__))
 
     # KIPRIS API 설정
     KIPRIS_API_KEY: str = os.getenv("KIPRIS_API_KEY", "")
-    KIPRIS_API_URL: str = "http://plus.kipris.or.kr/openapi/rest/patUtiModInfoSearchSevice/cpcSearchInfo"
-    CPC_NUMBER: str = "G06N"  # CPC 번호 (AI/머신러닝 관련)
-    TOTAL_PAGES: int = 1  # 수집할 총 페이지 수
+    # 로컬 스텁 서버(kipris_stub.py) 등으로 바꿀 수 있도록 환경변수 우선 사용
+    KIPRIS_API_URL: str = os.getenv(
+        "KIPRIS_API_URL",
+        "http://plus.kipris.or.kr/openapi/rest/patUtiModInfoSearchSevice/cpcSearchInfo",
+    )
+    # 수집할 CPC 코드 목록 (쉼표로 구분, 예: CPC_NUMBERS=G06N,G06T,G06F40,H04L)
+    # 코드별로 동시에 수집하고, 여러 코드에서 검색된 특허는 출원번호로 합쳐 한 번만 처리
+    CPC_NUMBERS: list[str] = [
+        code.strip() for code in os.getenv("CPC_NUMBERS", "G06N").split(",") if code.strip()
+    ]
+    TOTAL_PAGES: int = 1  # 수집할 최대 페이지 수 (응답의 totalCount에 도달하면 자동 중단)
     NUM_OF_ROWS: int = 30  # 한 페이지에 요청할 데이터 수
-    CSV_PATH: str = "patent_data.csv"  # CSV 파일 경로
+    KIPRIS_MAX_CONCURRENCY: int = 4  # 동시에 요청할 페이지 수 (모든 CPC 코드 합산, 커넥션 풀 크기)
+    KIPRIS_RATE_LIMIT_PER_SECOND: float = 0.0  # 모든 CPC 코드 합산 초당 페이지 요청 수 (0 이하면 제한 없음)
+    KIPRIS_TIMEOUT: float = 10.0  # 페이지 요청 타임아웃(초)
+    KIPRIS_MAX_RETRIES: int = 3  # 실패한 페이지 재시도 횟수 (지수 백오프)
+    CSV_PATH: str = "patent_data.csv"  # 이전 버전의 CSV 파일 경로 (저장소가 비어 있으면 한 번 이전)
+    # 특허 저장소 (원본 필드 + 요약/분류 결과, 출원번호/카테고리 색인)
+    STORE_PATH: str = f"{ROOT_DIR}/data/patents.sqlite3"
+
+    # 체크포인트 설정 (노드 경계 + 요약/분류 항목 단위로 저장, main.py --resume <run-id>로 재개)
+    CHECKPOINT_ENABLED: bool = True
+    CHECKPOINT_PATH: str = f"{ROOT_DIR}/data/checkpoints.sqlite3"
+    # 항목 단위 기록은 별도 파일 사용 (이벤트 루프를 막는 동기 연결과 aiosqlite 연결이 같은 파일의 쓰기 잠금을 다투지 않도록)
+    ITEM_CHECKPOINT_PATH: str = f"{ROOT_DIR}/data/item_checkpoints.sqlite3"
+
+    # 전문 검색 색인 설정 (발명명/초록/요약의 BM25 역색인, 특허를 저장할 때 저장소 파일 안에서 함께 갱신)
+    SEARCH_INDEX_ENABLED: bool = os.getenv("SEARCH_INDEX_ENABLED", "1") == "1"
+    SEARCH_FIELD_WEIGHTS: tuple[float, float, float] = (3.0, 1.0, 1.5)  # 발명명, 초록, 요약 BM25 가중치
+    SEARCH_MMAP_BYTES: int = 1 << 30  # 검색 색인을 메모리 매핑으로 읽을 최대 크기(바이트)
+
+    # 근사 중복 제거 설정 (초록이 거의 같은 분할/계속 출원은 대표 1건만 요약/분류하고 결과 재사용)
+    DEDUP_ENABLED: bool = os.getenv("DEDUP_ENABLED", "1") == "1"
+    DEDUP_THRESHOLD: float = 0.85  # 초록 문자 n-gram 집합의 추정 자카드 유사도가 이 값 이상이면 중복
+    DEDUP_NUM_PERM: int = 64  # MinHash 해시 함수 수 (많을수록 추정이 정확하지만 느림)
+    DEDUP_SHINGLE_SIZE: int = 4  # 비교 단위 문자 n-gram 길이 (공백/문장부호 제거 후)
+    DEDUP_MIN_CHARS: int = 50  # 이보다 짧은 초록은 비교하지 않음
 
-    # ③ API 호출을 효율적으로 하기 위한 배치 크기를 설정
+    # 전처리 설정 (요약/분류 전에 발명명/초록 열 전체의 HTML 태그, 공백, 유니코드를 한 번에 정리)
+    PREPROCESS_ENABLED: bool = os.getenv("PREPROCESS_ENABLED", "1") == "1"
+    # 정리 후 이보다 짧은 초록은 요약 호출 없이 초록(없으면 발명명)을 요약으로 사용
+    MIN_ABSTRACT_LENGTH: int = 50
+    # 내용이 없다는 뜻의 자리표시 값 (대소문자 무시, 정리 후 빈 문자열로 바꿈)
+    TEXT_PLACEHOLDERS: list[str] = ["N/A", "NA", "NONE", "NULL", "-", "없음", "내용 없음", "해당 없음"]
+
+    # 증분 수집 설정 (매번 API에서 새로 수집하되, 신규/변경 특허만 요약·분류)
+    INCREMENTAL_ENABLED: bool = os.getenv("INCREMENTAL_COLLECT", "0") == "1"
+
+    # ③ API 호출을 효율적으로 하기 위한 배치 크기를 설정 (진행 상황 출력 간격으로도 사용)
     BATCH_SIZE: int = 10
 
+    # 적응형 동시성 스케줄러 설정 (성공 시 증가, 429/타임아웃 시 감소)
+    INITIAL_CONCURRENCY: int = BATCH_SIZE  # 시작 동시 호출 수
+    MIN_CONCURRENCY: int = 1
+    MAX_CONCURRENCY: int = 32
+    RATE_LIMIT_PER_SECOND: float = 5.0  # 토큰 버킷 초당 요청 수 (0 이하면 제한 없음)
+    RATE_LIMIT_BURST: int = 10  # 토큰 버킷 최대 누적량
+    LLM_MAX_RETRIES: int = 3  # 429/타임아웃 시 재시도 횟수
+    LLM_CALL_TIMEOUT: float = float(os.getenv("LLM_CALL_TIMEOUT", "60"))  # 호출 1회 기한(초, 0 이하면 없음), 넘으면 타임아웃으로 재시도
+
+    # 헤지 요청 설정 (관측된 p95까지 응답이 없는 호출만 한 번 더 보내고 먼저 도착한 응답 사용)
+    HEDGE_MAX_RATIO: float = float(os.getenv("LLM_HEDGE_MAX_RATIO", "0.05"))  # 전체 호출 대비 헤지 요청 상한 (0이면 사용 안 함)
+    HEDGE_QUANTILE: float = 0.95  # 이 백분위 지연을 넘긴 호출을 헤지
+    HEDGE_MIN_SAMPLES: int = 20  # 호출 종류별로 이만큼 관측하기 전에는 헤지하지 않음
+    HEDGE_WINDOW: int = 500  # 백분위 계산에 쓰는 최근 지연 시간 표본 수
+
     # ④ 특허를 분류할 카테고리 목록을 정의
     PATENT_CATEGORIES: list[str] = [
         "인공지능/머신러닝",
@@ -41,9 +121,65 @@ class Config:
     ]
 
     PATENT_PER_CATEGORY: int = 30  # 카테고리별 표시할 특허 수
+    CLASSIFY_BATCH_SIZE: int = 8  # 한 번의 분류 프롬프트에 묶을 특허 수 (1이면 건별 호출)
+
+    # 로컬 사전 분류기 설정 (확신도가 높은 특허는 LLM 분류 호출 생략)
+    PRECLASSIFY_ENABLED: bool = True
+    PRECLASSIFY_THRESHOLD: float = 0.5  # 1위-2위 점수 차이가 이 값 이상이면 로컬 분류 결과 사용
+    PRECLASSIFIER_MODEL_PATH: str = f"{ROOT_DIR}/.cache/preclassifier.npz"
+    PRECLASSIFIER_FEATURES: int = 2**14  # 문자 n-gram 해시 공간 크기
+    PRECLASSIFIER_MIN_EXAMPLES: int = 5  # 중심 벡터를 사용하기 위한 카테고리별 최소 학습 건수
+    KEYWORD_TITLE_WEIGHT: float = 0.6
+    KEYWORD_ABSTRACT_WEIGHT: float = 0.15
+    CPC_RULE_WEIGHT: float = 0.5
+    CATEGORY_KEYWORDS: dict[str, list[str]] = {
+        "인공지능/머신러닝": ["인공지능", "머신러닝", "기계학습", "딥러닝", "신경망", "강화학습"],
+        "자율주행/로보틱스": ["자율주행", "자율 주행", "로봇", "드론", "무인"],
+        "의료/건강": ["의료", "진단", "질병", "환자", "헬스케어", "건강"],
+        "이미지처리/비전": ["영상", "이미지", "비전", "카메라", "객체 검출"],
+        "자연어처리": ["자연어", "언어 모델", "텍스트", "음성 인식", "번역", "챗봇"],
+        "네트워크/보안": ["네트워크", "보안", "암호", "인증", "통신"],
+        "하드웨어/센서": ["센서", "반도체", "프로세서", "회로", "메모리 장치"],
+    }
+    # 특허가 검색된 CPC 코드(CPCCodes) 접두어 → 카테고리 (여러 코드를 수집할 때 분류 단서로 사용)
+    CPC_CATEGORY_RULES: dict[str, str] = {
+        "G06T": "이미지처리/비전",
+        "G06V": "이미지처리/비전",
+        "G06F40": "자연어처리",
+        "G10L": "자연어처리",
+        "H04L": "네트워크/보안",
+        "H04W": "네트워크/보안",
+        "A61B": "의료/건강",
+        "G16H": "의료/건강",
+        "B60W": "자율주행/로보틱스",
+        "B25J": "자율주행/로보틱스",
+        "G05D": "자율주행/로보틱스",
+        "G01S": "하드웨어/센서",
+    }
+
+    # 요약 캐시 설정 (재실행 시 동일한 특허의 LLM 요약 호출 생략)
+    CACHE_ENABLED: bool = True
+    CACHE_PATH: str = f"{ROOT_DIR}/.cache/summary_cache.sqlite3"
+    CACHE_MAX_ENTRIES: int = 100_000  # 초과 시 가장 오래 사용되지 않은 항목부터 삭제
+    CACHE_MAX_AGE_DAYS: int = 30  # 생성 후 이 기간이 지난 항목은 만료
 
     # ⑤ 출력 파일들을 저장할 디렉토리 설정
     OUTPUT_DIR: str = f"{ROOT_DIR}/outputs"
+    # 보고서 형식 (md, json, html 중 쉼표로 여러 개 지정 가능, 한 번의 순회로 함께 작성)
+    REPORT_FORMATS: list[str] = os.getenv("REPORT_FORMATS", "md").split(",")
+    # 카테고리별 파일 + 목차 페이지로 분할 (분할 시 카테고리의 모든 특허를 기록)
+    REPORT_SHARDED: bool = os.getenv("REPORT_SHARDED", "0") == "1"
+    # 실행 지표 기록 (OUTPUT_DIR/metrics에 JSON 요약 + Prometheus 텍스트 파일)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "1") == "1"
+    METRICS_RESERVOIR: int = 4096  # 히스토그램마다 백분위 계산용으로 보관할 최대 표본 수
+
+    # 작업 서비스 설정 (service.py: 워크플로우 모듈과 LLM 클라이언트를 띄워 둔 채 HTTP로 작업을 받아 실행)
+    SERVICE_HOST: str = os.getenv("SERVICE_HOST", "127.0.0.1")
+    SERVICE_PORT: int = int(os.getenv("SERVICE_PORT", "8765"))
+    SERVICE_SOCKET: str = os.getenv("SERVICE_SOCKET", "")  # 지정하면 TCP 대신 이 Unix 소켓에서 대기
+    SERVICE_MAX_JOBS: int = int(os.getenv("SERVICE_MAX_JOBS", "4"))  # 동시에 실행할 작업 수 (LLM 호출 제한은 공유)
+    SERVICE_JOB_HISTORY: int = 200  # 상태 조회를 위해 보관할 끝난 작업 수
+    SERVICE_LOG_LINES: int = 2000  # 작업마다 보관할 진행 로그 줄 수
 
     # ⑥ 설정의 유효성을 검사하는 클래스 메서드
     @classmethod
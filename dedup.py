@@ -0,0 +1,215 @@
+"""
+근사 중복 탐지 - 분할/계속 출원처럼 초록이 거의 같은 특허를 MinHash + LSH로 묶어
+대표 특허만 LLM으로 처리하고 나머지는 대표의 요약/분류 결과를 재사용
+"""
+import re
+from itertools import islice
+from typing import Any, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+
+from config import Config
+
+# 공백/문장부호를 지우고 비교 (줄바꿈, 괄호 차이 등은 무시)
+_NON_WORD = re.compile(r"[\W_]+")
+# 빈 구간 표시값 (n-gram이 하나도 배정되지 않은 구간)
+_EMPTY = np.uint32(0xFFFFFFFF)
+# 서명을 한 번에 계산할 초록 수 (numpy 호출 횟수를 줄이기 위해 묶어서 계산)
+SIGNATURE_CHUNK = 1024
+
+
+def normalize(text: Optional[str]) -> str:
+    return _NON_WORD.sub("", (text or "").lower())
+
+
+def lsh_params(threshold: float, num_perm: int) -> tuple[int, int]:
+    """(밴드 수, 밴드당 행 수) - 후보가 되는 유사도 경계 (1/b)^(1/r)가 threshold에 가장 가까운 조합"""
+    best = (num_perm, 1)
+    best_gap = float("inf")
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        gap = abs((1 / bands) ** (1 / rows) - threshold)
+        if gap < best_gap:
+            best, best_gap = (bands, rows), gap
+    return best
+
+
+class MinHasher:
+    """문자 n-gram 집합의 MinHash 서명
+
+    n-gram마다 해시를 한 번만 계산하여 num_perm개 구간에 나누고 구간별 최솟값을 쓰는
+    one-permutation hashing 방식 (해시 함수 num_perm개를 쓰는 방식보다 num_perm배 적은 연산)
+    """
+
+    def __init__(
+        self,
+        num_perm: int = Config.DEDUP_NUM_PERM,
+        shingle_size: int = Config.DEDUP_SHINGLE_SIZE,
+    ):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+    @property
+    def params(self) -> str:
+        """서명 계산 설정 (저장해 둔 서명을 그대로 쓸 수 있는지 확인용)"""
+        return f"minhash:{self.num_perm}:{self.shingle_size}"
+
+    def signatures(self, texts: Sequence[str]) -> np.ndarray:
+        """정규화된 초록 목록 → (초록 수 x num_perm) uint32 서명 행렬"""
+        k = self.shingle_size
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        signatures = np.full((len(texts), self.num_perm), _EMPTY, dtype=np.uint32)
+        if len(texts) == 0 or lengths.sum() < k:
+            return signatures
+
+        # ① 모든 초록을 이어 붙인 문자 코드 배열에서 n-gram 해시를 한 번에 계산
+        codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+        n = len(codes) - k + 1
+        hashes = np.zeros(n, dtype=np.uint64)
+        for offset in range(k):
+            hashes = hashes * np.uint64(1_000_003) + codes[offset : offset + n]
+
+        # ② 초록 경계를 넘는 n-gram 제외
+        doc = np.repeat(np.arange(len(texts)), lengths)[:n]
+        position = np.arange(n) - np.repeat(np.cumsum(lengths) - lengths, lengths)[:n]
+        valid = position <= lengths[doc] - k
+        hashes, doc = hashes[valid], doc[valid]
+
+        # ③ 해시를 섞은 뒤 하위 비트로 구간, 상위 32비트를 값으로 사용하여 구간별 최솟값
+        hashes ^= hashes >> np.uint64(31)
+        hashes *= np.uint64(0xBF58476D1CE4E5B9)
+        hashes ^= hashes >> np.uint64(29)
+        slots = doc * self.num_perm + (hashes % np.uint64(self.num_perm)).astype(np.int64)
+        np.minimum.at(signatures.reshape(-1), slots, (hashes >> np.uint64(32)).astype(np.uint32))
+        return signatures
+
+    @staticmethod
+    def similarity(left: np.ndarray, right: np.ndarray) -> float:
+        """추정 자카드 유사도 (양쪽 모두 빈 구간은 제외)"""
+        both_empty = (left == _EMPTY) & (right == _EMPTY)
+        compared = len(left) - int(np.count_nonzero(both_empty))
+        if compared == 0:
+            return 0.0
+        return int(np.count_nonzero((left == right) & ~both_empty)) / compared
+
+
+class NearDuplicateIndex:
+    """LSH 밴드 버킷으로 이미 본 대표 특허 중 근사 중복을 찾는 증분 색인 (입력 순서대로 대표가 정해짐)"""
+
+    def __init__(
+        self,
+        threshold: float = Config.DEDUP_THRESHOLD,
+        num_perm: int = Config.DEDUP_NUM_PERM,
+        min_chars: int = Config.DEDUP_MIN_CHARS,
+    ):
+        self.threshold = threshold
+        self.min_chars = min_chars
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        # ④ 밴드별 {밴드 해시: 대표 번호}, 대표 서명은 후보 검증용으로만 보관
+        self.buckets: list[dict[int, int]] = [{} for _ in range(self.bands)]
+        self.signatures: list[np.ndarray] = []
+        self.keys: list[Any] = []
+        # 전처리 내용 해시 → 대표 key (내용이 완전히 같은 특허는 서명 계산 없이 바로 연결)
+        self.exact: dict[str, Any] = {}
+        self.duplicates = 0
+
+    def _add_signature(self, key: Any, signature: np.ndarray) -> Optional[Any]:
+        bands = signature[: self.bands * self.rows].reshape(self.bands, self.rows)
+        band_hashes = [hash(band.tobytes()) for band in bands]
+
+        # ⑤ 같은 버킷에 들어간 대표만 서명으로 검증 (전체 쌍 비교 없이 거의 선형)
+        checked = set()
+        for bucket, band_hash in zip(self.buckets, band_hashes):
+            candidate = bucket.get(band_hash)
+            if candidate is None or candidate in checked:
+                continue
+            checked.add(candidate)
+            if self.hasher.similarity(self.signatures[candidate], signature) >= self.threshold:
+                self.duplicates += 1
+                return self.keys[candidate]
+
+        number = len(self.keys)
+        self.keys.append(key)
+        self.signatures.append(signature)
+        for bucket, band_hash in zip(self.buckets, band_hashes):
+            bucket.setdefault(band_hash, number)
+        return None
+
+    def add_many(
+        self,
+        keys: Sequence[Any],
+        texts: Sequence[str],
+        hashes: Optional[Sequence[Optional[str]]] = None,
+        signatures: Optional[dict[Any, np.ndarray]] = None,
+    ) -> list[Optional[Any]]:
+        """초록마다 근사 중복인 대표의 key (없으면 새 대표로 등록하고 None)
+
+        hashes(전처리 내용 해시)를 주면 해시가 같은 특허는 서명을 계산하지 않고 먼저 본 특허의 대표에 연결
+        signatures(key → 서명)를 주면 그 안에 있는 서명은 다시 계산하지 않고, 새로 계산한 서명을 채워 넣음
+        """
+        texts = [normalize(text) for text in texts]
+        comparable = [i for i, text in enumerate(texts) if len(text) >= self.min_chars]
+        results: list[Optional[Any]] = [None] * len(texts)
+        first: dict[str, int] = {}
+        repeated: list[tuple[int, str]] = []
+        if hashes is not None:
+            unique = []
+            for i in comparable:
+                digest = hashes[i]
+                if digest is None:
+                    unique.append(i)
+                elif digest in self.exact or digest in first:
+                    repeated.append((i, digest))
+                else:
+                    first[digest] = i
+                    unique.append(i)
+            comparable = unique
+
+        missing = [i for i in comparable if signatures is None or keys[i] not in signatures]
+        computed = dict(zip(missing, self.hasher.signatures([texts[i] for i in missing])))
+        if signatures is not None:
+            signatures.update((keys[i], signature) for i, signature in computed.items())
+        for i in comparable:
+            signature = computed[i] if i in computed else signatures[keys[i]]
+            results[i] = self._add_signature(keys[i], signature)
+        for digest, i in first.items():
+            self.exact[digest] = results[i] if results[i] is not None else keys[i]
+        for i, digest in repeated:
+            results[i] = self.exact[digest]
+            self.duplicates += 1
+        return results
+
+    def add(self, key: Any, text: str, content_hash: Optional[str] = None) -> Optional[Any]:
+        """(스트리밍용) 초록 1건 추가"""
+        return self.add_many([key], [text], [content_hash])[0]
+
+
+def patent_key(patent: Mapping[str, Any]) -> str:
+    return str(patent.get("ApplicationNumber"))
+
+
+def find_duplicates(
+    patents: Iterable[Mapping[str, Any]],
+    index: Optional[NearDuplicateIndex] = None,
+    signatures: Optional[dict[str, np.ndarray]] = None,
+) -> dict[str, str]:
+    """{중복 특허 출원번호: 대표 특허 출원번호} (먼저 나온 특허가 대표)
+
+    signatures(출원번호 → 서명)에 있는 특허는 서명을 다시 계산하지 않음 (새로 계산한 서명은 채워 넣음)
+    """
+    index = index or NearDuplicateIndex()
+    duplicate_of = {}
+    patents = iter(patents)
+    while chunk := list(islice(patents, SIGNATURE_CHUNK)):
+        keys = [patent_key(patent) for patent in chunk]
+        representatives = index.add_many(
+            keys,
+            [patent.get("Abstract", "") for patent in chunk],
+            [getattr(patent, "content_hash", None) for patent in chunk],
+            signatures,
+        )
+        for key, representative in zip(keys, representatives):
+            if representative is not None and representative != key:
+                duplicate_of[key] = representative
+    return duplicate_of
@@ -0,0 +1,204 @@
+"""
+로컬 KIPRIS 스텁 서버 - 실제 API 키/네트워크 없이 수집기를 시험하기 위한 가짜 cpcSearchInfo 엔드포인트
+
+사용 예:
+    python kipris_stub.py --port 8089 --total 500 --latency 0.05 --error-rate 0.1
+    KIPRIS_API_URL=http://127.0.0.1:8089/cpcSearchInfo KIPRIS_API_KEY=stub python main.py
+"""
+import argparse
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+TOPICS = [
+    "자율주행 차량의 경로 계획",
+    "의료 영상 기반 질병 진단",
+    "영상 처리를 이용한 객체 검출",
+    "신경망 모델 경량화",
+    "자연어 질의 응답",
+    "네트워크 침입 탐지",
+    "센서 데이터 융합",
+    "강화학습 기반 로봇 제어",
+]
+
+
+def add_noise(abstract: str, rng: random.Random) -> str:
+    """실제 KIPRIS 초록처럼 태그, 엔티티, 줄바꿈, 전각 문자가 섞인 초록 (일부는 자리표시 값)"""
+    if rng.random() < 0.1:
+        return "N/A"
+    sentences = abstract.split(". ")
+    return (
+        "<p>"
+        + ".<br/>\n\t  ".join(f"<b>{sentence}</b>" if rng.random() < 0.3 else sentence for sentence in sentences)
+        + "</p>\n\n"
+    ).replace("단계", "단계（&amp;）", 1)
+
+
+def make_patent(cpc_number: str, index: int, overlap: float = 0.0, noise: float = 0.0) -> dict[str, str]:
+    """번호로부터 항상 같은 가짜 특허를 생성
+
+    overlap 비율만큼의 번호는 모든 CPC 코드에서 같은 특허(같은 출원번호)를 반환하고,
+    noise 비율만큼의 초록에는 태그/줄바꿈 등을 섞음
+    """
+    shared = overlap > 0 and random.Random(f"shared:{index}").random() < overlap
+    label = "공통" if shared else cpc_number
+    rng = random.Random(f"{label}:{index}")
+    topic = rng.choice(TOPICS)
+    # 코드마다 다른 출원번호 앞자리를 사용하여 서로 다른 특허의 번호가 겹치지 않게 함
+    prefix = 10 if shared else 100 + zlib.crc32(cpc_number.encode()) % 900
+    patent = {
+        "ApplicationNumber": f"{prefix}{rng.randint(2015, 2024)}{index:07d}",
+        "RegistrationNumber": f"10{index:07d}" if rng.random() < 0.6 else "",
+        "InventionName": f"{topic} 장치 및 방법 ({label}-{index})",
+        "Abstract": (
+            f"본 발명은 {topic}에 관한 것으로, "
+            + " ".join(rng.choice(TOPICS) + "을 수행하는 단계를 포함한다." for _ in range(4))
+        ),
+    }
+    if noise > 0 and rng.random() < noise:
+        patent["Abstract"] = add_noise(patent["Abstract"], rng)
+    return patent
+
+
+def render_page(
+    cpc_number: str,
+    page: int,
+    num_of_rows: int,
+    total: int,
+    overlap: float = 0.0,
+    noise: float = 0.0,
+) -> bytes:
+    """KIPRIS 응답과 같은 구조의 XML 페이지 생성"""
+    start = (page - 1) * num_of_rows
+    items = []
+    for index in range(start, min(start + num_of_rows, total)):
+        fields = "".join(
+            f"<{key}>{escape(value)}</{key}>" for key, value in make_patent(cpc_number, index, overlap, noise).items()
+        )
+        items.append(f"<PatentUtilityInfo>{fields}</PatentUtilityInfo>")
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        "<response><header><resultCode>00</resultCode><resultMsg>NORMAL SERVICE.</resultMsg></header>"
+        f"<body><items>{''.join(items)}</items></body>"
+        f"<count><numOfRows>{num_of_rows}</numOfRows><pageNo>{page}</pageNo>"
+        f"<totalCount>{total}</totalCount></count></response>"
+    ).encode("utf-8")
+
+
+class StubKiprisServer(ThreadingHTTPServer):
+    """지연 시간, 오류율, 429 비율을 설정할 수 있는 스텁 서버"""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        total: int = 300,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: int = 0,
+        overlap: float = 0.0,
+        noise: float = 0.0,
+    ):
+        super().__init__(address, StubKiprisHandler)
+        self.total = total
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.overlap = overlap
+        self.noise = noise
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/cpcSearchInfo"
+
+
+class StubKiprisHandler(BaseHTTPRequestHandler):
+    server: StubKiprisServer
+
+    def do_GET(self) -> None:
+        query = parse_qs(urlparse(self.path).query)
+        cpc_number = query.get("cpcNumber", ["G06N"])[0]
+        page = int(query.get("pageNo", ["1"])[0])
+        num_of_rows = int(query.get("numOfRows", ["30"])[0])
+
+        with self.server._lock:
+            self.server.requests += 1
+            roll = self.server.rng.random()
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if roll < self.server.rate_limit_rate:
+            self.send_response(429)
+            self.end_headers()
+            return
+        if roll < self.server.rate_limit_rate + self.server.error_rate:
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        body = render_page(
+            cpc_number, page, num_of_rows, self.server.total, self.server.overlap, self.server.noise
+        )
+        self.send_response(200)
+        self.send_header("Content-Type", "application/xml; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def start_stub_server(
+    port: int = 0, host: str = "127.0.0.1", **options
+) -> tuple[StubKiprisServer, threading.Thread]:
+    """백그라운드 스레드에서 스텁 서버 시작 (port=0이면 빈 포트 자동 선택)"""
+    server = StubKiprisServer((host, port), **options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="로컬 KIPRIS 스텁 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--total", type=int, default=300, help="CPC 코드별 전체 특허 수")
+    parser.add_argument("--latency", type=float, default=0.0, help="응답 지연(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 응답 비율")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="429 응답 비율")
+    parser.add_argument("--overlap", type=float, default=0.0, help="모든 CPC 코드에 공통으로 검색되는 특허 비율")
+    parser.add_argument("--noise", type=float, default=0.0, help="태그/줄바꿈/자리표시 값이 섞인 초록 비율")
+    args = parser.parse_args(argv)
+
+    server = StubKiprisServer(
+        (args.host, args.port),
+        total=args.total,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        overlap=args.overlap,
+        noise=args.noise,
+    )
+    print(f"KIPRIS 스텁 서버 실행 중: {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
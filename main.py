@@ -1,13 +1,12 @@
 import os
 import logging
 import asyncio
+import argparse
 from datetime import datetime
-from langchain_core.messages import HumanMessage
-from langchain_openai import ChatOpenAI
+from typing import Optional
 
-from workflow import create_patent_workflow
 from config import Config
-from state import PatentState
+from metrics import MetricsRegistry
 
 # ① 로거 설정 - 시스템 실행 중 발생하는 이벤트와 오류를 추적
 logging.basicConfig(
@@ -16,66 +15,148 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def main():
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="KIPRIS 특허 AI 멀티에이전트 시스템")
+    parser.add_argument(
+        "--resume", metavar="RUN_ID", help="중단된 실행을 체크포인트에서 이어서 진행"
+    )
+    parser.add_argument(
+        "--report-only",
+        action="store_true",
+        help="LLM 호출 없이 저장소의 요약/분류 결과로 보고서만 다시 생성",
+    )
+    parser.add_argument(
+        "--formats", metavar="FORMATS", help="보고서 형식 (예: md,json,html)"
+    )
+    parser.add_argument(
+        "--shard", action="store_true", help="카테고리별 파일 + 목차 페이지로 보고서 분할"
+    )
+    return parser.parse_args(argv)
+
+
+def print_report_files(report_files: list[str]) -> None:
+    """저장된 보고서 경로와 첫 파일의 앞부분 출력 (보고서 전체를 메모리에 올리지 않음)"""
+    print(f"\n보고서가 저장되었습니다: {report_files[0]}")
+    if len(report_files) > 1:
+        print(f"  외 {len(report_files) - 1}개 파일 ({os.path.dirname(report_files[-1])})")
+    print("\n보고서 미리보기:")
+    print("-" * 60)
+    with open(report_files[0], encoding="utf-8") as f:
+        print(f.read(500) + "...")
+
+
+async def main(argv: Optional[list[str]] = None):
     """KIPRIS 특허 AI 멀티에이전트 시스템의 메인 실행 함수"""
+    args = parse_args(argv)
     print(
         """
 KIPRIS 특허 AI 멀티에이전트 시스템
 특허 수집 → AI 요약 → 카테고리 분류 → 리포트 생성
 """
     )
+    # 보고서 출력 옵션은 Config 값을 덮어써서 워크플로우의 보고서 노드에도 적용
+    if args.formats:
+        Config.REPORT_FORMATS = args.formats.split(",")
+    if args.shard:
+        Config.REPORT_SHARDED = True
+
+    # 실행 ID는 체크포인트의 thread_id로 사용 (재개 시 같은 ID 지정)
+    run_id = args.resume or datetime.now().strftime("%Y%m%d_%H%M%S")
+    metrics = MetricsRegistry() if Config.METRICS_ENABLED and not args.report_only else None
     try:
+        if args.report_only:
+            # 저장소에 기록된 결과만 사용하므로 API 키 검증과 LLM 초기화 생략 (LLM/LangGraph 모듈도 불러오지 않음)
+            from patent_store import PatentStore
+            from agents.reporter import ReportGeneratorAgent
+
+            store = PatentStore()
+            if not store.category_counts():
+                print("저장소에 요약/분류 결과가 없습니다. 먼저 전체 처리를 실행해주세요.")
+                return
+            report_files = ReportGeneratorAgent().generate_from_store(store)
+            store.close()
+            print_report_files(report_files)
+            return
+
         # ② 설정 유효성 검사 - API 키 존재 여부 확인
         if not Config.validate():
             raise ValueError("API 키가 설정되지 않았습니다. .env 파일을 확인해주세요.")
 
         print("\n" + "=" * 60)
-        print("특허 처리 시작")
+        print(f"특허 처리 {'재개' if args.resume else '시작'} (실행 ID: {run_id})")
         print("=" * 60)
 
         # ③ LLM 및 워크플로우 초기화 - AI 모델과 처리 파이프라인 생성
+        from langchain_core.messages import HumanMessage
+        from langchain_openai import ChatOpenAI
+        from workflow import create_patent_workflow
+        from state import PatentState
+        from checkpoint import ItemCheckpoint, open_checkpointer
+
         llm = ChatOpenAI(
             model=Config.MODEL_NAME,
             max_tokens=Config.MAX_TOKENS,
             api_key=Config.OPENAI_API_KEY,
         )
-        app = create_patent_workflow(llm)
+        async with open_checkpointer() as checkpointer:
+            app = create_patent_workflow(llm, checkpointer=checkpointer, metrics=metrics)
+            config = {"configurable": {"thread_id": run_id}}
 
-        # ④ 워크플로우 실행 - 초기 상태 설정 후 비동기로 전체 파이프라인 실행
-        initial_state = PatentState(
-            messages=[HumanMessage(content="KIPRIS 특허 처리를 시작합니다.")]
-        )
-        final_state = await app.ainvoke(initial_state)
+            # ④ 워크플로우 실행 - 새 실행은 초기 상태로, 재개는 마지막 노드 경계부터 실행
+            if args.resume:
+                snapshot = await app.aget_state(config)
+                if not snapshot.values:
+                    raise ValueError(f"체크포인트를 찾을 수 없습니다: {run_id}")
+                if snapshot.next:
+                    print(f"다음 단계부터 재개합니다: {', '.join(snapshot.next)}")
+                    final_state = await app.ainvoke(None, config)
+                else:
+                    print("이미 완료된 실행입니다. 저장된 결과를 사용합니다.")
+                    final_state = snapshot.values
+            else:
+                initial_state = PatentState(
+                    run_id=run_id,
+                    messages=[HumanMessage(content="KIPRIS 특허 처리를 시작합니다.")],
+                )
+                final_state = await app.ainvoke(initial_state, config)
+
+        # 완료된 실행의 항목 단위 기록은 더 이상 필요 없으므로 정리
+        if Config.CHECKPOINT_ENABLED:
+            item_checkpoint = ItemCheckpoint()
+            item_checkpoint.clear(run_id)
+            item_checkpoint.close()
 
-        # ⑤ 최종 보고서 저장 및 출력 - 처리 결과를 파일로 저장하고 요약 정보 표시
-        if not final_state.get("final_report"):
+        # ⑤ 결과 출력 - 보고서 노드가 파일에 바로 기록한 보고서 경로와 요약 정보 표시
+        report_files = final_state.get("report_files")
+        if not report_files:
             print("\n생성된 보고서가 없습니다.")
             return
 
-        os.makedirs(Config.OUTPUT_DIR, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = os.path.join(Config.OUTPUT_DIR, f"patent_report_{timestamp}.md")
-
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(final_state["final_report"])
-
         print("\n" + "=" * 60)
         print("처리 완료")
         print("=" * 60)
-        print(f"\n보고서가 저장되었습니다: {filename}")
         print(f"처리된 특허: {len(final_state.get('summarized_patents', []))}건")
-        print("\n보고서 미리보기:")
-        print("-" * 60)
-        print(final_state["final_report"][:500] + "...")
+        print_report_files(report_files)
 
     # ⑥ 예외 처리 - 사용자 중단과 일반 오류를 구분하여 처리
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, asyncio.CancelledError):
         print("\n\n사용자에 의해 중단되었습니다.")
+        print(f"이어서 진행하려면: python main.py --resume {run_id}")
     except Exception as e:
         logger.exception("실행 중 오류 발생")
         print(f"\n오류 발생: {e}")
+        print(f"이어서 진행하려면: python main.py --resume {run_id}")
+    finally:
+        # ⑦ 중단/오류로 끝난 실행도 그때까지의 지표를 기록 (재개 실행은 원래 실행의 파일을 덮어쓰지 않음)
+        if metrics is not None and (metrics.histograms or metrics.counters):
+            metrics.print_summary()
+            metrics_id = run_id
+            if args.resume:
+                metrics_id += f"_resume_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            metric_files = metrics.write(metrics_id)
+            print(f"실행 지표가 저장되었습니다: {', '.join(metric_files)}")
 
 
-# ⑦ 프로그램 진입점 - 비동기 메인 함수를 실행
+# ⑧ 프로그램 진입점 - 비동기 메인 함수를 실행
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,299 @@
+"""
+실행 지표 - 노드별 소요 시간, 호출별 지연 시간 히스토그램, 토큰 사용량, 재시도/오류 집계
+(실행이 끝나면 JSON 요약과 Prometheus 텍스트 형식 파일로 기록)
+"""
+import functools
+import json
+import math
+import os
+import random
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from itertools import accumulate
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+from config import Config
+
+# Prometheus 히스토그램 버킷 상한(초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_HELP = {
+    "patent_node_seconds": "워크플로우 노드 실행 시간",
+    "patent_llm_call_seconds": "LLM 호출 1회(시도 단위)의 지연 시간",
+    "patent_llm_tokens_total": "LLM 입력(prompt)/출력(completion) 토큰 수",
+    "patent_llm_retries_total": "429/타임아웃으로 재시도한 LLM 호출 수",
+    "patent_llm_errors_total": "오류 종류별 LLM 호출 실패 수",
+    "patent_llm_hedges_total": "관측된 p95까지 응답이 없어 한 번 더 보낸 LLM 요청 수",
+    "patent_llm_hedge_wins_total": "헤지 요청의 응답이 먼저 도착하여 사용된 LLM 호출 수",
+    "patent_llm_cascade_calls_total": "모델 캐스케이드 단계별 LLM 호출 수",
+    "patent_llm_cascade_escalations_total": "검증 실패/낮은 확신도로 다음 모델 단계에 다시 보낸 LLM 호출 수",
+    "patent_kipris_request_seconds": "KIPRIS 페이지 요청 1회(시도 단위)의 지연 시간",
+    "patent_kipris_retries_total": "재시도한 KIPRIS 페이지 요청 수",
+    "patent_kipris_errors_total": "오류 종류별 KIPRIS 페이지 요청 실패 수",
+    "patent_node_errors_total": "예외로 끝난 워크플로우 노드 수",
+    "patent_service_jobs_total": "작업 서비스에서 상태별로 끝난 작업 수",
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+# 지금 실행 중인 작업의 지표 (여러 작업이 공유하는 스케줄러가 토큰 사용량을 호출한 작업의 지표에도 기록)
+RUN_METRICS: ContextVar[Optional["MetricsRegistry"]] = ContextVar("run_metrics", default=None)
+
+
+class Histogram:
+    """버킷별 개수는 정확히 세고, 백분위는 크기가 정해진 표본(저수지 표집)으로 계산하는 히스토그램
+
+    표본 수가 METRICS_RESERVOIR 이하인 동안에는 모든 관측값을 보관하므로 백분위가 정확하고,
+    서비스처럼 오래 실행되어도 메모리와 기록(스크레이프) 비용이 호출 수에 따라 늘지 않습니다.
+    """
+
+    __slots__ = ("counts", "count", "total", "max", "samples", "capacity")
+
+    def __init__(self, capacity: int = Config.METRICS_RESERVOIR):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # 마지막 칸은 최대 상한 초과
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # float 객체 대신 8바이트 배열에 보관
+        self.samples = array("d")
+        self.capacity = capacity
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        # 알고리즘 R: 표본이 가득 차면 n번째 관측값을 capacity/n 확률로 임의의 표본과 교체
+        if len(self.samples) < self.capacity:
+            self.samples.append(value)
+        else:
+            slot = random.randrange(self.count)
+            if slot < self.capacity:
+                self.samples[slot] = value
+
+    @staticmethod
+    def _percentile(ordered: list[float], q: float) -> float:
+        # 최근접 순위(nearest-rank) 방식
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+    def summary(self) -> dict[str, float]:
+        """개수, 합계, 평균, p50/p95/p99, 최댓값"""
+        if not self.count:
+            return {"count": 0, "sum": 0.0}
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "mean": round(self.total / self.count, 6),
+            "p50": round(self._percentile(ordered, 0.50), 6),
+            "p95": round(self._percentile(ordered, 0.95), 6),
+            "p99": round(self._percentile(ordered, 0.99), 6),
+            "max": round(self.max, 6),
+        }
+
+    def buckets(self) -> list[tuple[float, int]]:
+        """(상한, 누적 개수) 목록 (LATENCY_BUCKETS 상한별)"""
+        return list(zip(LATENCY_BUCKETS, accumulate(self.counts[:-1])))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    # 토큰 수처럼 큰 정수 값도 지수 표기로 잘리지 않도록 정수는 그대로 출력
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """한 번의 실행 동안 히스토그램/카운터를 모으고, 다른 구성 요소의 통계를 함께 기록"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.histograms: dict[tuple[str, Labels], Histogram] = {}
+        self.counters: dict[tuple[str, Labels], float] = defaultdict(float)
+        # 캐시/스케줄러/사전 분류기처럼 자체 통계를 가진 구성 요소는 기록 시점에 stats()를 읽음
+        self.sources: dict[str, Callable[[], dict[str, Any]]] = {}
+
+    @staticmethod
+    def _key(name: str, labels: dict[str, Any]) -> tuple[str, Labels]:
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """히스토그램에 관측값 1개 추가"""
+        key = self._key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """카운터 증가"""
+        self.counters[self._key(name, labels)] += value
+
+    def record_usage(self, op: str, response: Any) -> None:
+        """LLM 응답의 usage_metadata에서 입력/출력 토큰 수 기록 (없으면 무시)"""
+        usage = getattr(response, "usage_metadata", None)
+        if not usage:
+            return
+        self.inc("patent_llm_tokens_total", usage.get("input_tokens", 0), op=op, kind="prompt")
+        self.inc("patent_llm_tokens_total", usage.get("output_tokens", 0), op=op, kind="completion")
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        """with 블록의 실행 시간을 기록 (예외로 끝나도 기록)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def wrap_node(
+        self, node: str, func: Callable[[Any], Awaitable[Any]]
+    ) -> Callable[[Any], Awaitable[Any]]:
+        """워크플로우 노드 함수의 실행 시간을 기록하도록 감쌈 (시그니처는 그대로 유지)"""
+
+        @functools.wraps(func)
+        async def wrapper(state):
+            try:
+                with self.timer("patent_node_seconds", node=node):
+                    return await func(state)
+            except Exception as e:
+                self.inc("patent_node_errors_total", node=node, error=type(e).__name__)
+                raise
+
+        return wrapper
+
+    def add_source(self, name: str, stats: Callable[[], dict[str, Any]]) -> None:
+        """기록 시점에 숫자 값만 게이지로 내보낼 통계 함수 등록"""
+        self.sources[name] = stats
+
+    def _source_values(self) -> dict[str, dict[str, float]]:
+        values = {}
+        for name, stats in self.sources.items():
+            try:
+                values[name] = {
+                    key: value
+                    for key, value in stats().items()
+                    if isinstance(value, (int, float)) and not isinstance(value, bool)
+                }
+            except Exception as e:
+                print(f"  지표 수집 실패 ({name}): {e}")
+        return values
+
+    def summary(self, run_id: str = "") -> dict[str, Any]:
+        """JSON 실행 요약"""
+        return {
+            "run_id": run_id,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "elapsed_seconds": round(time.time() - self.started_at, 3),
+            "histograms": [
+                {"name": name, "labels": dict(labels), **histogram.summary()}
+                for (name, labels), histogram in sorted(self.histograms.items())
+            ],
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ],
+            "sources": self._source_values(),
+        }
+
+    def to_prometheus(self) -> str:
+        """Prometheus 텍스트 노출 형식 (node_exporter textfile collector 등에서 읽을 수 있음)"""
+        lines: list[str] = []
+        described: set[str] = set()
+
+        def describe(name: str, kind: str) -> None:
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            describe(name, "histogram")
+            for bound, count in histogram.buckets():
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', repr(bound)),))} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+        for (name, labels), value in sorted(self.counters.items()):
+            describe(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for source, values in self._source_values().items():
+            for key, value in values.items():
+                name = f"patent_{source}_{key}"
+                describe(name, "gauge")
+                lines.append(f"{name} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, run_id: str, output_dir: Optional[str] = None) -> list[str]:
+        """JSON 요약(metrics_<run-id>.json)과 Prometheus 파일(metrics_<run-id>.prom) 저장"""
+        output_dir = output_dir or os.path.join(Config.OUTPUT_DIR, "metrics")
+        os.makedirs(output_dir, exist_ok=True)
+        json_path = os.path.join(output_dir, f"metrics_{run_id}.json")
+        prom_path = os.path.join(output_dir, f"metrics_{run_id}.prom")
+
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(run_id), f, ensure_ascii=False, indent=2)
+        # 수집기가 쓰는 중인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+        with open(prom_path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(prom_path + ".tmp", prom_path)
+        return [json_path, prom_path]
+
+    def print_summary(self) -> None:
+        """노드 소요 시간과 호출 종류별 지연 시간/토큰 수를 간단히 출력"""
+        tokens: dict[str, dict[str, float]] = defaultdict(dict)
+        for (name, labels), value in self.counters.items():
+            if name == "patent_llm_tokens_total":
+                label = dict(labels)
+                tokens[label["op"]][label["kind"]] = value
+
+        print("\n실행 지표:")
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            stats = histogram.summary()
+            label = ", ".join(value for _, value in labels)
+            line = f"  {name.removeprefix('patent_')} [{label}] {stats['count']}회"
+            if name == "patent_node_seconds":
+                line += f" {stats['sum']:.2f}초"
+            else:
+                line += f" p50 {stats['p50']:.3f}초 / p95 {stats['p95']:.3f}초 / p99 {stats['p99']:.3f}초"
+            op = dict(labels).get("op")
+            if name == "patent_llm_call_seconds" and op in tokens:
+                line += (
+                    f", 토큰 입력 {tokens[op].get('prompt', 0):,.0f} / 출력 {tokens[op].get('completion', 0):,.0f}"
+                )
+            print(line)
+
+        # 헤지 요청이 있었으면 추가 요청 비율과 헤지 응답 사용 수 (꼬리 지연은 위의 p95/p99)
+        scheduler = self._source_values().get("scheduler")
+        if scheduler and scheduler.get("hedged"):
+            print(
+                f"  헤지 요청 {scheduler['hedged']}건 (호출 {scheduler['calls']}건의 {scheduler['hedge_rate']:.1%}), "
+                f"헤지 응답 사용 {scheduler['hedge_wins']}건, 타임아웃 {scheduler['timeouts']}건"
+            )
+
+        # 토큰 예산을 사용한 실행이면 호출 전 추정치와 실제 사용량 비교
+        budget = self._source_values().get("budget")
+        if budget:
+            print(
+                f"  토큰 예산 [{budget['admitted']}건 처리 / {budget['deferred']}건 보류] "
+                f"추정 입력 {budget['estimated_input_tokens']:,} / 출력 {budget['estimated_output_tokens']:,} "
+                f"(${budget['estimated_cost_usd']:.4f}) → 실제 입력 {budget['actual_input_tokens']:,} / "
+                f"출력 {budget['actual_output_tokens']:,} (${budget['actual_cost_usd']:.4f})"
+            )
@@ -0,0 +1,390 @@
+"""
+특허 저장소 - 원본 필드, 요약, 분류 결과를 색인된 SQLite 테이블 하나에 보관
+(CSV + iterrows 로딩을 대체하며, 열 선택과 출원번호/카테고리 조건 조회를 지원)
+"""
+import os
+import sqlite3
+import time
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Mapping, Optional, Sequence
+
+from config import Config
+from preprocess import HASH_FIELDS, content_hashes
+from records import PatentRecord, RECORD_FIELDS
+from search_index import PatentSearchIndex
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+RAW_FIELDS = ("ApplicationNumber", "RegistrationNumber", "InventionName", "Abstract")
+RESULT_FIELDS = ("ai_summary", "category")
+# 검색된 CPC 코드 (쉼표로 이어 저장, 요약/분류 결과에 영향을 주지 않으므로 content_hash에서 제외)
+CODE_FIELDS = ("CPCCodes",)
+META_FIELDS = ("content_hash", "first_seen", "last_seen", "processed_at")
+ALL_FIELDS = RAW_FIELDS + RESULT_FIELDS + CODE_FIELDS + META_FIELDS
+
+# 기존 patent_data.csv의 열 이름 → 저장소 열 이름
+CSV_COLUMNS = {
+    "Registration Number": "RegistrationNumber",
+    "Invention Name": "InventionName",
+}
+
+# content_hash 계산 방식 버전 (PRAGMA user_version) - 1: 전처리(태그/공백/자리표시 값 정리) 후 텍스트의 해시
+HASH_VERSION = 1
+# 해시를 열 단위로 한 번에 계산할 특허 수
+HASH_CHUNK = 1024
+
+
+def _merge_codes(stored: Optional[str], collected: Optional[str]) -> Optional[str]:
+    """저장된 CPC 코드 목록에 이번에 검색된 코드를 더함 (다른 코드로 다시 수집해도 이전 코드가 남도록)"""
+    if not stored or not collected:
+        return collected or stored
+    return ",".join(dict.fromkeys(stored.split(",") + collected.split(",")))
+
+
+class PatentStore:
+    """출원번호를 기본 키로 하는 특허 저장소"""
+
+    def __init__(self, path: str = Config.STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.create_function("merge_codes", 2, _merge_codes, deterministic=True)
+        # ① 대량 적재 속도를 위해 WAL 모드 사용
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS patents (
+                ApplicationNumber TEXT PRIMARY KEY,
+                RegistrationNumber TEXT,
+                InventionName TEXT,
+                Abstract TEXT,
+                ai_summary TEXT,
+                category TEXT,
+                content_hash TEXT NOT NULL,
+                first_seen REAL NOT NULL,
+                last_seen REAL NOT NULL,
+                processed_at REAL,
+                CPCCodes TEXT
+            )"""
+        )
+        # 이전 버전에서 만든 저장소에는 CPCCodes 열 추가
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(patents)")}
+        if "CPCCodes" not in columns:
+            self.conn.execute("ALTER TABLE patents ADD COLUMN CPCCodes TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_patents_category ON patents (category)")
+        # 근사 중복 탐지용 MinHash 서명 (계산할 때의 content_hash와 함께 저장하여 내용이 바뀌면 다시 계산)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS dedup_signatures (
+                ApplicationNumber TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                params TEXT NOT NULL,
+                signature BLOB NOT NULL
+            )"""
+        )
+        # 이전 방식(원문 그대로)의 해시로 저장된 특허는 해시만 다시 계산 (요약/분류 결과 유지)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < HASH_VERSION:
+            self._rehash()
+        self.conn.commit()
+        # 발명명/초록/요약 전문 검색 색인 (처음 열면 저장된 특허 전체를 색인하고, 이후에는 바뀐 특허만 갱신)
+        self.search_index = PatentSearchIndex(self.conn) if Config.SEARCH_INDEX_ENABLED else None
+        if self.search_index is None:
+            # 색인 없이 저장한 특허가 빠지지 않도록 다시 켜면 새로 만들게 함
+            self.conn.execute("DROP TABLE IF EXISTS search_index_info")
+            self.conn.commit()
+
+    def _rehash(self) -> None:
+        rows = self.conn.execute(f"SELECT ApplicationNumber, {', '.join(HASH_FIELDS)} FROM patents")
+        while chunk := rows.fetchmany(HASH_CHUNK):
+            patents = [dict(zip(("ApplicationNumber",) + HASH_FIELDS, row)) for row in chunk]
+            self.conn.executemany(
+                "UPDATE patents SET content_hash = ? WHERE ApplicationNumber = ?",
+                zip(content_hashes(patents), (row[0] for row in chunk)),
+            )
+        self.conn.execute(f"PRAGMA user_version = {HASH_VERSION}")
+
+    @staticmethod
+    def content_hash(patent: Mapping[str, Any]) -> str:
+        """요약/분류 결과에 영향을 주는 필드의 해시 (전처리 후 텍스트 기준)"""
+        return content_hashes([patent])[0]
+
+    @staticmethod
+    def _content_hashes(patents: Sequence[Mapping[str, Any]]) -> list[str]:
+        # 전처리 노드를 거친 레코드는 이미 계산된 해시를 사용하고, 나머지만 열 단위로 한 번에 계산
+        hashes = [getattr(patent, "content_hash", None) for patent in patents]
+        missing = [i for i, digest in enumerate(hashes) if digest is None]
+        for i, digest in zip(missing, content_hashes([patents[i] for i in missing])):
+            hashes[i] = digest
+        return hashes
+
+    @staticmethod
+    def _join_codes(patent: Mapping[str, Any]) -> Optional[str]:
+        codes = patent.get("CPCCodes")
+        return ",".join(codes) if codes else None
+
+    @staticmethod
+    def _record(row: Sequence[Any]) -> PatentRecord:
+        # CPCCodes는 RECORD_FIELDS의 마지막 필드
+        *fields, codes = row
+        return PatentRecord(*fields, tuple(codes.split(",")) if codes else None)
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM patents").fetchone()[0]
+
+    def upsert(self, patents: Iterable[Mapping[str, Any]]) -> None:
+        """수집된 특허 저장 (최근 수집 시각 갱신, 내용이 바뀐 특허는 이전 요약/분류 결과 폐기)
+
+        CPCCodes가 없는 특허(저장소/CSV에서 읽은 특허)는 저장된 코드를 유지
+        """
+        now = time.time()
+        patents = iter(patents)
+        while chunk := list(islice(patents, HASH_CHUNK)):
+            self._upsert_chunk(chunk, now)
+        self.conn.commit()
+
+    def _snapshot(self, patents: Sequence[Mapping[str, Any]]) -> Optional[dict[str, tuple]]:
+        """검색 색인 갱신용으로 저장 전후의 색인 대상 값 조회 (색인을 쓰지 않으면 None)"""
+        if self.search_index is None:
+            return None
+        return self.search_index.snapshot(str(patent.get("ApplicationNumber")) for patent in patents)
+
+    def _reindex(self, patents: Sequence[Mapping[str, Any]], before: Optional[dict[str, tuple]]) -> None:
+        if before is not None:
+            self.search_index.update(before, self._snapshot(patents))
+
+    def _upsert_chunk(self, patents: Sequence[Mapping[str, Any]], now: float) -> None:
+        before = self._snapshot(patents)
+        self.conn.executemany(
+            """INSERT INTO patents (
+                   ApplicationNumber, RegistrationNumber, InventionName, Abstract,
+                   content_hash, first_seen, last_seen, CPCCodes
+               ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(ApplicationNumber) DO UPDATE SET
+                   ai_summary = CASE WHEN content_hash = excluded.content_hash THEN ai_summary END,
+                   category = CASE WHEN content_hash = excluded.content_hash THEN category END,
+                   processed_at = CASE WHEN content_hash = excluded.content_hash THEN processed_at END,
+                   content_hash = excluded.content_hash,
+                   RegistrationNumber = excluded.RegistrationNumber,
+                   InventionName = excluded.InventionName,
+                   Abstract = excluded.Abstract,
+                   last_seen = excluded.last_seen,
+                   CPCCodes = merge_codes(CPCCodes, excluded.CPCCodes)""",
+            (
+                (
+                    str(patent.get("ApplicationNumber")),
+                    patent.get("RegistrationNumber"),
+                    patent.get("InventionName"),
+                    patent.get("Abstract"),
+                    content_hash,
+                    now,
+                    now,
+                    self._join_codes(patent),
+                )
+                for patent, content_hash in zip(patents, self._content_hashes(patents))
+            ),
+        )
+        self._reindex(patents, before)
+
+    def _fill_wanted(self, application_numbers: Iterable[str]) -> None:
+        # SQLite 변수 개수 제한을 피하기 위해 임시 테이블로 조인
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (n TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM wanted")
+        self.conn.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", ((n,) for n in application_numbers))
+
+    def _select(
+        self,
+        columns: Optional[Sequence[str]],
+        application_numbers: Optional[Iterable[str]],
+        categories: Optional[Iterable[str]],
+        processed: Optional[bool],
+        limit: Optional[int] = None,
+        summarized: Optional[bool] = None,
+        cpc_codes: Optional[Iterable[str]] = None,
+    ) -> tuple[str, list[Any], list[str]]:
+        columns = list(columns or RAW_FIELDS + RESULT_FIELDS)
+        unknown = set(columns) - set(ALL_FIELDS)
+        if unknown:
+            raise ValueError(f"알 수 없는 열입니다: {sorted(unknown)}")
+
+        conditions, params = [], []
+        if application_numbers is not None:
+            self._fill_wanted(application_numbers)
+            conditions.append("ApplicationNumber IN (SELECT n FROM wanted)")
+        if categories is not None:
+            categories = list(categories)
+            conditions.append(f"category IN ({','.join('?' * len(categories))})")
+            params.extend(categories)
+        if processed is not None:
+            conditions.append("category IS NOT NULL" if processed else "category IS NULL")
+        if summarized is not None:
+            conditions.append("ai_summary IS NOT NULL" if summarized else "ai_summary IS NULL")
+        if cpc_codes is not None:
+            # 검색된 CPC 코드 중 하나라도 포함된 특허 (CPCCodes는 쉼표로 이은 목록)
+            codes = list(cpc_codes)
+            matches = ["instr(',' || CPCCodes || ',', ',' || ? || ',') > 0"] * len(codes)
+            conditions.append(f"({' OR '.join(matches) or '0'})")
+            params.extend(codes)
+
+        sql = f"SELECT {', '.join(columns)} FROM patents"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        # rowid 순서 = 최초 저장 순서 (정렬용 색인 없이 수집 순서 유지)
+        sql += " ORDER BY rowid"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params, columns
+
+    def read(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        application_numbers: Optional[Iterable[str]] = None,
+        categories: Optional[Iterable[str]] = None,
+        processed: Optional[bool] = None,
+    ) -> list[dict[str, Any]]:
+        """조건에 맞는 특허를 dict 목록으로 조회 (columns로 필요한 열만 선택)"""
+        sql, params, columns = self._select(columns, application_numbers, categories, processed)
+        cursor = self.conn.execute(sql, params)
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def iter_records(
+        self,
+        application_numbers: Optional[Iterable[str]] = None,
+        categories: Optional[Iterable[str]] = None,
+        processed: Optional[bool] = None,
+        limit: Optional[int] = None,
+        summarized: Optional[bool] = None,
+        cpc_codes: Optional[Iterable[str]] = None,
+    ) -> Iterator[PatentRecord]:
+        """조건에 맞는 특허를 커서에서 하나씩 PatentRecord로 생성 (전체를 메모리에 올리지 않음)
+
+        cpc_codes를 주면 그 코드 중 하나로 검색된 특허만 (서비스 작업이 다른 작업의 특허를 처리하지 않도록)
+        """
+        sql, params, _ = self._select(
+            RECORD_FIELDS, application_numbers, categories, processed, limit, summarized, cpc_codes
+        )
+        for row in self.conn.execute(sql, params):
+            yield self._record(row)
+
+    def read_records(
+        self,
+        application_numbers: Optional[Iterable[str]] = None,
+        categories: Optional[Iterable[str]] = None,
+        processed: Optional[bool] = None,
+        summarized: Optional[bool] = None,
+        cpc_codes: Optional[Iterable[str]] = None,
+    ) -> list[PatentRecord]:
+        """조건에 맞는 특허를 PatentRecord 목록으로 조회 (행 튜플에서 바로 생성)"""
+        return list(
+            self.iter_records(
+                application_numbers, categories, processed, summarized=summarized, cpc_codes=cpc_codes
+            )
+        )
+
+    def category_counts(self) -> dict[str, int]:
+        """카테고리별 분류 완료 특허 수 (카테고리 색인만 사용)"""
+        rows = self.conn.execute(
+            "SELECT category, COUNT(*) FROM patents WHERE category IS NOT NULL GROUP BY category"
+        )
+        return dict(rows.fetchall())
+
+    def read_frame(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        application_numbers: Optional[Iterable[str]] = None,
+        categories: Optional[Iterable[str]] = None,
+        processed: Optional[bool] = None,
+    ) -> "pd.DataFrame":
+        """조건에 맞는 특허를 DataFrame으로 조회 (열 단위 분석용)"""
+        # pandas는 불러오는 데 오래 걸리므로 DataFrame이 필요할 때만 import
+        import pandas as pd
+
+        sql, params, _ = self._select(columns, application_numbers, categories, processed)
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def pending_numbers(self, application_numbers: Iterable[str]) -> set[str]:
+        """주어진 출원번호 중 아직 요약/분류 결과가 없는 것 (신규 또는 내용 변경)"""
+        rows = self.read(["ApplicationNumber"], application_numbers=application_numbers, processed=False)
+        return {row["ApplicationNumber"] for row in rows}
+
+    def record_summaries(self, patents: Iterable[Mapping[str, Any]]) -> int:
+        """요약 결과만 저장 (분류는 나중에 classify 단계에서 기록)"""
+        patents = [patent for patent in patents if patent.get("ai_summary")]
+        before = self._snapshot(patents)
+        rows = [(patent.get("ai_summary"), str(patent.get("ApplicationNumber"))) for patent in patents]
+        self.conn.executemany(
+            "UPDATE patents SET ai_summary = ? WHERE ApplicationNumber = ?", rows
+        )
+        self._reindex(patents, before)
+        self.conn.commit()
+        return len(rows)
+
+    def record_results(self, categorized: Mapping[str, Iterable[Mapping[str, Any]]]) -> int:
+        """요약/분류 결과 저장"""
+        now = time.time()
+        patents = [patent for group in categorized.values() for patent in group]
+        before = self._snapshot(patents)
+        rows = [
+            (patent.get("ai_summary"), category, now, str(patent.get("ApplicationNumber")))
+            for category, group in categorized.items()
+            for patent in group
+        ]
+        self.conn.executemany(
+            "UPDATE patents SET ai_summary = ?, category = ?, processed_at = ? WHERE ApplicationNumber = ?",
+            rows,
+        )
+        # 분류는 색인 대상이 아니므로 요약이 바뀐 특허만 다시 색인
+        self._reindex(patents, before)
+        self.conn.commit()
+        return len(rows)
+
+    def read_signatures(self, application_numbers: Iterable[str], params: str) -> dict[str, bytes]:
+        """저장된 근사 중복 서명 (출원번호 → 서명 바이트)
+
+        서명을 계산한 뒤 내용이 바뀐 특허와 다른 설정(params)으로 계산한 서명은 제외
+        """
+        self._fill_wanted(application_numbers)
+        rows = self.conn.execute(
+            """SELECT s.ApplicationNumber, s.signature
+               FROM dedup_signatures s JOIN patents p ON p.ApplicationNumber = s.ApplicationNumber
+               WHERE s.ApplicationNumber IN (SELECT n FROM wanted)
+                 AND s.content_hash = p.content_hash AND s.params = ?""",
+            (params,),
+        )
+        return dict(rows.fetchall())
+
+    def record_signatures(self, signatures: Mapping[str, bytes], params: str) -> int:
+        """근사 중복 서명 저장 (저장소에 있는 특허만, 현재 content_hash와 함께 기록)"""
+        cursor = self.conn.executemany(
+            """INSERT OR REPLACE INTO dedup_signatures
+               SELECT ApplicationNumber, content_hash, ?, ? FROM patents WHERE ApplicationNumber = ?""",
+            ((params, signature, number) for number, signature in signatures.items()),
+        )
+        self.conn.commit()
+        return cursor.rowcount
+
+    def migrate_csv(self, csv_path: str) -> int:
+        """기존 patent_data.csv를 저장소로 한 번에 옮김 (열 이름 통일)"""
+        import pandas as pd
+
+        df = pd.read_csv(csv_path, encoding="utf-8-sig", dtype=str)
+        df = df.rename(columns=CSV_COLUMNS).reindex(columns=list(RAW_FIELDS)).fillna("N/A")
+        self.upsert(df.to_dict("records"))
+        return len(df)
+
+    def search(
+        self, query: str, categories: Optional[Iterable[str]] = None, limit: int = 10
+    ) -> list[dict[str, Any]]:
+        """발명명/초록/요약 전문 검색 (BM25 점수 순, categories로 분류 결과 필터)"""
+        if self.search_index is None:
+            raise ValueError("검색 색인을 사용하지 않도록 설정되어 있습니다. (SEARCH_INDEX_ENABLED=0)")
+        return self.search_index.search(query, categories, limit)
+
+    def rebuild_search_index(self) -> int:
+        """검색 색인을 저장소 전체로 다시 생성 (색인 파일이 손상되었거나 가중치 외 설정을 바꿨을 때)"""
+        if self.search_index is None:
+            raise ValueError("검색 색인을 사용하지 않도록 설정되어 있습니다. (SEARCH_INDEX_ENABLED=0)")
+        return self.search_index.rebuild()
+
+    def close(self) -> None:
+        self.conn.close()
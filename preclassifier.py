@@ -0,0 +1,183 @@
+"""
+로컬 사전 분류기 - 키워드/CPC 규칙 + TF-IDF 최근접 중심(nearest centroid)으로
+확신도가 높은 특허는 LLM 호출 없이 분류
+"""
+import os
+import zlib
+from typing import Any
+
+import numpy as np
+
+from config import Config
+
+
+class PatentPreClassifier:
+    """규칙 점수와 과거 LLM 분류 결과로 학습한 중심 벡터 유사도를 합산하는 분류기"""
+
+    def __init__(
+        self,
+        model_path: str = Config.PRECLASSIFIER_MODEL_PATH,
+        threshold: float = Config.PRECLASSIFY_THRESHOLD,
+        n_features: int = Config.PRECLASSIFIER_FEATURES,
+    ):
+        self.model_path = model_path
+        self.threshold = threshold
+        self.n_features = n_features
+        self.categories = list(Config.PATENT_CATEGORIES)
+        self.category_index = {cat: i for i, cat in enumerate(self.categories)}
+        self._feature_cache: dict[str, int] = {}
+
+        # ① 증분 학습을 위해 클래스별 TF 합계와 문서 빈도를 누적 저장
+        self.class_sums = np.zeros((len(self.categories), n_features), dtype=np.float64)
+        self.class_counts = np.zeros(len(self.categories), dtype=np.int64)
+        self.doc_freq = np.zeros(n_features, dtype=np.int64)
+        self.n_docs = 0
+
+        self.decided = 0
+        self.deferred = 0
+        self.load()
+
+    @staticmethod
+    def _text(patent: dict[str, Any]) -> str:
+        return f"{patent.get('InventionName', '')} {patent.get('Abstract', '')}"
+
+    def _features(self, text: str) -> list[int]:
+        """문자 2-gram/3-gram을 고정 크기 해시 공간의 인덱스로 변환 (한국어 형태소 분석 불필요)"""
+        text = " ".join(text.split())
+        indices = []
+        for n in (2, 3):
+            for i in range(len(text) - n + 1):
+                gram = text[i : i + n]
+                index = self._feature_cache.get(gram)
+                if index is None:
+                    index = zlib.crc32(gram.encode("utf-8")) % self.n_features
+                    self._feature_cache[gram] = index
+                indices.append(index)
+        return indices
+
+    def _term_matrix(self, patents: list[dict[str, Any]]) -> np.ndarray:
+        """특허 목록 → (특허 수 x 특성 수) 로그 TF 행렬"""
+        matrix = np.zeros((len(patents), self.n_features), dtype=np.float32)
+        for row, patent in enumerate(patents):
+            np.add.at(matrix[row], self._features(self._text(patent)), 1.0)
+        return np.log1p(matrix, out=matrix)
+
+    def _rule_scores(self, patents: list[dict[str, Any]]) -> np.ndarray:
+        """키워드(발명명/초록)와 특허별 CPC 코드 규칙 점수"""
+        scores = np.zeros((len(patents), len(self.categories)), dtype=np.float32)
+        for row, patent in enumerate(patents):
+            title = patent.get("InventionName", "") or ""
+            abstract = patent.get("Abstract", "") or ""
+            for category, keywords in Config.CATEGORY_KEYWORDS.items():
+                col = self.category_index.get(category)
+                if col is None:
+                    continue
+                if any(keyword in title for keyword in keywords):
+                    scores[row, col] += Config.KEYWORD_TITLE_WEIGHT
+                hits = sum(1 for keyword in keywords if keyword in abstract)
+                scores[row, col] += min(hits, 3) * Config.KEYWORD_ABSTRACT_WEIGHT
+
+            for code in patent.get("CPCCodes", []) or []:
+                for prefix, category in Config.CPC_CATEGORY_RULES.items():
+                    if str(code).replace(" ", "").startswith(prefix):
+                        scores[row, self.category_index[category]] += Config.CPC_RULE_WEIGHT
+        return scores
+
+    def _centroid_scores(self, patents: list[dict[str, Any]]) -> np.ndarray:
+        """TF-IDF 벡터와 카테고리별 중심 벡터의 코사인 유사도 (학습 데이터가 부족한 클래스는 0)"""
+        scores = np.zeros((len(patents), len(self.categories)), dtype=np.float32)
+        trained = self.class_counts >= Config.PRECLASSIFIER_MIN_EXAMPLES
+        if not trained.any():
+            return scores
+
+        idf = np.log((1 + self.n_docs) / (1 + self.doc_freq)) + 1.0
+        centroids = (self.class_sums[trained] * idf).astype(np.float32)
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-12
+
+        # ② 메모리를 일정하게 유지하기 위해 청크 단위로 행렬 곱 수행
+        chunk = 512
+        idf32 = idf.astype(np.float32)
+        for start in range(0, len(patents), chunk):
+            tf_idf = self._term_matrix(patents[start : start + chunk]) * idf32
+            tf_idf /= np.linalg.norm(tf_idf, axis=1, keepdims=True) + 1e-12
+            scores[start : start + chunk, trained] = tf_idf @ centroids.T
+        return scores
+
+    def predict(self, patents: list[dict[str, Any]]) -> tuple[list[str], np.ndarray]:
+        """카테고리와 확신도(1위와 2위 합산 점수 차이)를 일괄 계산"""
+        if not patents:
+            return [], np.zeros(0, dtype=np.float32)
+
+        scores = self._rule_scores(patents) + self._centroid_scores(patents)
+        top2 = np.sort(scores, axis=1)[:, -2:]
+        confidence = np.clip(top2[:, 1] - top2[:, 0], 0.0, 1.0)
+        labels = [self.categories[i] for i in scores.argmax(axis=1)]
+        return labels, confidence
+
+    def split(
+        self, patents: list[dict[str, Any]]
+    ) -> tuple[list[tuple[str, dict[str, Any]]], list[dict[str, Any]]]:
+        """(확신도가 임계값 이상인 (카테고리, 특허) 목록, LLM으로 보낼 특허 목록)"""
+        labels, confidence = self.predict(patents)
+        decided, remaining = [], []
+        for patent, label, conf in zip(patents, labels, confidence):
+            if conf >= self.threshold:
+                decided.append((label, patent))
+            else:
+                remaining.append(patent)
+        self.decided += len(decided)
+        self.deferred += len(remaining)
+        return decided, remaining
+
+    def learn(self, results: list[tuple[str, dict[str, Any]]]) -> None:
+        """LLM이 분류한 (카테고리, 특허) 결과로 중심 벡터를 증분 학습"""
+        labeled = [(cat, p) for cat, p in results if cat in self.category_index]
+        if not labeled:
+            return
+        # 예측과 같이 청크 단위로 누적 (전체 결과의 밀집 행렬을 한 번에 만들지 않음)
+        chunk = 512
+        for start in range(0, len(labeled), chunk):
+            part = labeled[start : start + chunk]
+            matrix = self._term_matrix([patent for _, patent in part])
+            rows = np.array([self.category_index[cat] for cat, _ in part])
+            np.add.at(self.class_sums, rows, matrix)
+            np.add.at(self.class_counts, rows, 1)
+            self.doc_freq += (matrix > 0).sum(axis=0)
+        self.n_docs += len(labeled)
+
+    def load(self) -> None:
+        """저장된 모델 로드 (카테고리 목록이나 특성 수가 바뀌었으면 무시)"""
+        if not os.path.exists(self.model_path):
+            return
+        try:
+            data = np.load(self.model_path, allow_pickle=False)
+            if list(data["categories"]) != self.categories or data["class_sums"].shape[1] != self.n_features:
+                return
+            self.class_sums = data["class_sums"]
+            self.class_counts = data["class_counts"]
+            self.doc_freq = data["doc_freq"]
+            self.n_docs = int(data["n_docs"])
+        except Exception as e:
+            print(f"사전 분류 모델 로드 중 오류 발생: {e}")
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.model_path)), exist_ok=True)
+        # np.savez는 확장자가 없으면 .npz를 붙이므로 파일 객체로 저장
+        with open(self.model_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                categories=np.array(self.categories),
+                class_sums=self.class_sums,
+                class_counts=self.class_counts,
+                doc_freq=self.doc_freq,
+                n_docs=np.array(self.n_docs),
+            )
+
+    def stats(self) -> dict[str, Any]:
+        total = self.decided + self.deferred
+        return {
+            "decided": self.decided,
+            "deferred": self.deferred,
+            "skip_rate": self.decided / total if total else 0.0,
+            "trained_docs": self.n_docs,
+        }
@@ -0,0 +1,79 @@
+"""
+전처리 - 발명명/초록 열 전체를 한 번에 정리 (HTML 태그/엔티티, 제어 문자, 유니코드, 연속 공백, 자리표시 값)하고
+요약/분류 결과에 영향을 주는 내용의 해시를 계산
+
+열의 문자열을 구분자로 이어 붙여 엔티티/태그 치환, 전각 문자 변환, 유니코드 정규화를 열마다 한 번씩만 실행하고
+(해당 문자가 열에 하나도 없으면 그 단계는 건너뜀), 공백 정리처럼 문자열 메서드가 더 빠른 단계만 특허별로 실행합니다.
+"""
+import hashlib
+import html
+import re
+import unicodedata
+from typing import Any, Iterable, Mapping, Optional, Sequence
+
+from config import Config
+from utils import HTML_TAG
+
+# 내용 해시에 포함하는 필드 (요약/분류 결과에 영향을 주는 원본 필드)
+HASH_FIELDS = ("RegistrationNumber", "InventionName", "Abstract")
+
+# ① 열을 이어 붙이는 구분자 (XML 본문에 나올 수 없고 \s에도 포함되지 않음)
+_SEPARATOR = "\x00"
+# 줄바꿈 역할을 하는 태그는 공백으로, 나머지(<sub>, <b> 등)는 빈 문자열로 바꿈
+_BREAK_TAG = re.compile(r"</?(?:br|p|div|li|tr|td)\b[^<>\x00]*>", re.IGNORECASE)
+# 공백이 아닌 제어 문자와 폭 없는 문자
+_CONTROL = re.compile(r"[\x00-\x08\x0e-\x1f\x7f\u200b-\u200d\u2060\ufeff]")
+# 전각 ASCII → 반각 (NFKC는 한글 호환 자모까지 바꾸므로 NFC + 이 변환만 사용, 전각 공백은 split()이 처리)
+_FULLWIDTH = re.compile(r"[\uff01-\uff5e]")
+_PLACEHOLDERS = frozenset(value.upper() for value in Config.TEXT_PLACEHOLDERS)
+_PLACEHOLDER_MAX = max(map(len, _PLACEHOLDERS), default=0)
+
+
+def clean_texts(texts: Sequence[Optional[str]], blank_placeholders: bool = True) -> list[str]:
+    """문자열 열 → 정리된 문자열 목록 (None은 빈 문자열, blank_placeholders이면 'N/A' 같은 값도 빈 문자열)"""
+    if not texts:
+        return []
+    joined = _SEPARATOR.join(text or "" for text in texts)
+    if joined.count(_SEPARATOR) != len(texts) - 1:
+        # 구분자 문자가 본문에 들어 있으면 (CSV 등) 먼저 제거
+        joined = _SEPARATOR.join((text or "").replace(_SEPARATOR, "") for text in texts)
+
+    # ② 엔티티를 먼저 풀어야 &lt;sub&gt;처럼 이스케이프된 태그도 지워짐
+    if "&" in joined:
+        joined = html.unescape(joined)
+    if "<" in joined:
+        joined = HTML_TAG.sub("", _BREAK_TAG.sub(" ", joined))
+    # ③ 전각 ASCII를 반각으로, 조합형 한글 등을 완성형으로
+    joined = _FULLWIDTH.sub(lambda match: chr(ord(match.group()) - 0xFEE0), joined)
+    joined = unicodedata.normalize("NFC", joined)
+
+    # ④ 특허별: 연속 공백을 하나로 줄이고 앞뒤 공백 제거, 출력할 수 없는 문자가 있을 때만 제어 문자 제거
+    parts = [" ".join(part.split()) for part in joined.split(_SEPARATOR)]
+    parts = [part if part.isprintable() else _CONTROL.sub("", part) for part in parts]
+    if not blank_placeholders:
+        return parts
+    return [
+        "" if len(part) <= _PLACEHOLDER_MAX and part.upper() in _PLACEHOLDERS else part
+        for part in parts
+    ]
+
+
+def hash_columns(*columns: Sequence[str]) -> list[str]:
+    """정리된 열들(HASH_FIELDS 순서) → 특허별 내용 해시"""
+    return [
+        hashlib.sha256("\x1f".join(values).encode("utf-8")).hexdigest() for values in zip(*columns)
+    ]
+
+
+def content_hashes(patents: Sequence[Mapping[str, Any]]) -> list[str]:
+    """특허 목록의 내용 해시 (태그, 공백, 자리표시 값만 다른 내용은 같은 해시)"""
+    return hash_columns(
+        *(
+            clean_texts([patent.get(field) for patent in patents], blank_placeholders=field != "InventionName")
+            for field in HASH_FIELDS
+        )
+    )
+
+
+def text_length(texts: Iterable[Optional[str]]) -> int:
+    return sum(len(text) for text in texts if text)
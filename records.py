@@ -0,0 +1,78 @@
+"""
+특허 레코드 - 수집/요약/분류 단계가 같은 객체를 공유하는 고정 필드 레코드
+(단계마다 dict를 복사하지 않고, 요약/분류 단계는 같은 레코드의 필드만 채움)
+"""
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
+from typing import Any, Iterable, Iterator, Optional
+
+# 원본 필드는 항상 키로 노출, 결과 필드는 값이 채워졌을 때만 노출
+_RAW_KEYS = ("ApplicationNumber", "RegistrationNumber", "InventionName", "Abstract")
+
+
+@dataclass(slots=True, eq=False)
+class PatentRecord(Mapping):
+    """__slots__ 기반 특허 레코드 (인스턴스 dict 없음, 기존 dict 접근 방식 그대로 사용 가능)"""
+
+    ApplicationNumber: Optional[str] = None
+    RegistrationNumber: Optional[str] = None
+    InventionName: Optional[str] = None
+    Abstract: Optional[str] = None
+    ai_summary: Optional[str] = None
+    category: Optional[str] = None
+    # 이 특허가 검색된 수집 CPC 코드 (여러 코드에서 검색되면 모두 보관)
+    CPCCodes: Optional[tuple[str, ...]] = None
+    # 전처리 노드가 계산한 내용 해시 (저장소에서 읽지 않고 dict로도 노출하지 않는 파생 값)
+    content_hash: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "PatentRecord":
+        """dict(또는 다른 매핑) → 레코드 (모르는 키는 무시)"""
+        record = cls(*(data.get(name) for name in RECORD_FIELDS))
+        # JSON 체크포인트에서 읽으면 목록이므로 튜플로 통일
+        if record.CPCCodes is not None:
+            record.CPCCodes = tuple(record.CPCCodes)
+        return record
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(self)
+
+    # ① Mapping 인터페이스 - patent.get("Abstract"), {**patent} 등 기존 코드 호환
+    def __getitem__(self, key: str) -> Any:
+        if key in _RAW_KEYS:
+            return getattr(self, key)
+        if key in RECORD_FIELDS and (value := getattr(self, key)) is not None:
+            return value
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from _RAW_KEYS
+        if self.ai_summary is not None:
+            yield "ai_summary"
+        if self.category is not None:
+            yield "category"
+        if self.CPCCodes is not None:
+            yield "CPCCodes"
+
+    def __len__(self) -> int:
+        return (
+            len(_RAW_KEYS)
+            + (self.ai_summary is not None)
+            + (self.category is not None)
+            + (self.CPCCodes is not None)
+        )
+
+    @property
+    def has_application_number(self) -> bool:
+        """출원번호가 있는지 (없는 특허는 'N/A'나 빈 값으로 수집됨)"""
+        return self.ApplicationNumber not in (None, "", "N/A")
+
+    def add_codes(self, codes: Iterable[str]) -> None:
+        """검색된 CPC 코드 추가 (순서 유지, 중복 제외)"""
+        merged = dict.fromkeys(self.CPCCodes or ())
+        merged.update(dict.fromkeys(codes))
+        self.CPCCodes = tuple(merged)
+
+
+# 저장소/체크포인트에 기록하는 필드 (파생 값인 content_hash 제외)
+RECORD_FIELDS = tuple(field.name for field in fields(PatentRecord) if field.name != "content_hash")
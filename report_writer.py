@@ -0,0 +1,345 @@
+"""
+스트리밍 보고서 작성기 - 보고서 전체를 문자열로 만들지 않고 섹션을 파일에 바로 기록
+(한 번의 순회로 Markdown/JSON/HTML을 함께 작성하며, 카테고리별 파일 + 목차 페이지로 분할 가능)
+"""
+import html
+import json
+import os
+import re
+from contextlib import ExitStack
+from datetime import datetime
+from itertools import islice
+from typing import Any, Callable, Iterable, Mapping, Optional, Sequence, TextIO
+
+from config import Config
+
+REPORT_TITLE = "KIPRIS 특허 AI 요약 리포트"
+REPORT_NOTES = [
+    "이 보고서는 AI(LangGraph + LangChain)를 활용하여 자동으로 생성되었습니다.",
+    "특허 요약은 OpenAI GPT 모델을 사용하여 작성되었습니다.",
+    "카테고리 분류는 AI가 발명명과 요약을 분석하여 자동으로 수행했습니다.",
+    "상세한 내용은 KIPRIS 웹사이트에서 출원번호로 검색하시기 바랍니다.",
+]
+
+
+def patent_fields(patent: Mapping[str, Any]) -> dict[str, Any]:
+    """보고서에 표시할 특허 필드 (요약이 없으면 초록 사용)"""
+    return {
+        "InventionName": patent.get("InventionName", "N/A"),
+        "ApplicationNumber": patent.get("ApplicationNumber", "N/A"),
+        "RegistrationNumber": patent.get("RegistrationNumber", "N/A"),
+        "ai_summary": patent.get("ai_summary", patent.get("Abstract", "")),
+    }
+
+
+class MarkdownReportSink:
+    """Markdown 출력 (섹션 사이는 구분선 ---)"""
+
+    extension = "md"
+
+    def __init__(self, fh: TextIO):
+        self.fh = fh
+        self._parts = 0
+        self._sections = 0
+        self._items = 0
+
+    def _part(self, text: str) -> None:
+        if self._parts:
+            self.fh.write("\n\n---\n\n")
+        self.fh.write(text)
+        self._parts += 1
+
+    def begin(self, title: str, info: Sequence[tuple[str, str]], index_link: Optional[str] = None) -> None:
+        text = f"# {title}"
+        if index_link:
+            text += f"\n\n[← 목차]({index_link})"
+        if info:
+            text += "\n\n## 기본 정보\n" + "\n".join(f"- **{key}**: {value}" for key, value in info)
+        self._part(text)
+
+    def stats(self, rows: Sequence[tuple[str, int, float]]) -> None:
+        if not rows:
+            return
+        table = "| 카테고리 | 특허 수 | 비율 |\n|---------|--------|------|\n" + "\n".join(
+            f"| {category} | {count}건 | {ratio:.1f}% |" for category, count, ratio in rows
+        )
+        self._part(f"## 카테고리별 특허 분포\n\n{table}")
+
+    def category_start(self, category: str, count: int, link: Optional[str] = None) -> None:
+        if not self._sections:
+            self._part("## 카테고리별 주요 특허\n\n")
+        else:
+            self.fh.write("\n" if link else "\n\n---\n\n")
+        if link:
+            self.fh.write(f"- [{category} ({count}건)]({link})")
+        else:
+            self.fh.write(f"### {category} ({count}건)\n\n")
+        self._sections += 1
+        self._items = 0
+
+    def patent(self, number: int, fields: dict[str, Any]) -> None:
+        if self._items:
+            self.fh.write("\n")
+        self.fh.write(
+            f"""#### {number}. {fields["InventionName"]}
+- **출원번호**: {fields["ApplicationNumber"]}
+- **등록번호**: {fields["RegistrationNumber"]}
+- **요약**: {fields["ai_summary"]}"""
+        )
+        self._items += 1
+
+    def category_end(self) -> None:
+        pass
+
+    def errors(self, errors: Sequence[str]) -> None:
+        if errors:
+            self._part("## 처리 중 발생한 오류\n\n" + "\n".join(f"- {error}" for error in errors))
+
+    def end(self, notes: Sequence[str]) -> None:
+        if notes:
+            self._part("## 참고사항\n" + "\n".join(f"- {note}" for note in notes))
+
+
+class JsonReportSink:
+    """JSON 출력 (특허 하나씩 배열에 이어 씀)"""
+
+    extension = "json"
+
+    def __init__(self, fh: TextIO):
+        self.fh = fh
+        self._sections = 0
+        self._items = 0
+        self._link: Optional[str] = None
+
+    def _dump(self, value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False)
+
+    def begin(self, title: str, info: Sequence[tuple[str, str]], index_link: Optional[str] = None) -> None:
+        self.fh.write(f'{{"title": {self._dump(title)}, "info": {self._dump(dict(info))}')
+        if index_link:
+            self.fh.write(f', "index": {self._dump(index_link)}')
+
+    def stats(self, rows: Sequence[tuple[str, int, float]]) -> None:
+        stats = [
+            {"category": category, "count": count, "ratio": round(ratio, 1)}
+            for category, count, ratio in rows
+        ]
+        self.fh.write(f', "stats": {self._dump(stats)}')
+
+    def category_start(self, category: str, count: int, link: Optional[str] = None) -> None:
+        self.fh.write(', "categories": [' if not self._sections else ", ")
+        self.fh.write(f'{{"category": {self._dump(category)}, "count": {count}')
+        if link:
+            self.fh.write(f', "file": {self._dump(link)}')
+        else:
+            self.fh.write(', "patents": [')
+        self._link = link
+        self._sections += 1
+        self._items = 0
+
+    def patent(self, number: int, fields: dict[str, Any]) -> None:
+        if self._items:
+            self.fh.write(", ")
+        self.fh.write(self._dump({"number": number, **fields}))
+        self._items += 1
+
+    def category_end(self) -> None:
+        self.fh.write("}" if self._link else "]}")
+
+    def errors(self, errors: Sequence[str]) -> None:
+        self.fh.write("]" if self._sections else ', "categories": []')
+        self.fh.write(f', "errors": {self._dump(list(errors))}')
+
+    def end(self, notes: Sequence[str]) -> None:
+        self.fh.write(f', "notes": {self._dump(list(notes))}}}\n')
+
+
+class HtmlReportSink:
+    """HTML 출력 (단일 파일, 외부 리소스 없음)"""
+
+    extension = "html"
+    STYLE = (
+        "body{font-family:sans-serif;max-width:960px;margin:2em auto;line-height:1.5}"
+        "table{border-collapse:collapse}td,th{border:1px solid #ccc;padding:4px 8px}"
+        "dt{font-weight:bold;float:left;margin-right:.5em}dd{margin:0}"
+    )
+
+    def __init__(self, fh: TextIO):
+        self.fh = fh
+        self._sections = 0
+        self._link: Optional[str] = None
+
+    def begin(self, title: str, info: Sequence[tuple[str, str]], index_link: Optional[str] = None) -> None:
+        self.fh.write(
+            f'<!DOCTYPE html>\n<html lang="ko">\n<head><meta charset="utf-8">'
+            f"<title>{html.escape(title)}</title><style>{self.STYLE}</style></head>\n<body>\n"
+            f"<h1>{html.escape(title)}</h1>\n"
+        )
+        if index_link:
+            self.fh.write(f'<p><a href="{html.escape(index_link)}">← 목차</a></p>\n')
+        if info:
+            self.fh.write("<h2>기본 정보</h2>\n<ul>\n")
+            for key, value in info:
+                self.fh.write(f"<li><strong>{html.escape(key)}</strong>: {html.escape(str(value))}</li>\n")
+            self.fh.write("</ul>\n")
+
+    def stats(self, rows: Sequence[tuple[str, int, float]]) -> None:
+        if not rows:
+            return
+        self.fh.write("<h2>카테고리별 특허 분포</h2>\n<table>\n<tr><th>카테고리</th><th>특허 수</th><th>비율</th></tr>\n")
+        for category, count, ratio in rows:
+            self.fh.write(f"<tr><td>{html.escape(category)}</td><td>{count}건</td><td>{ratio:.1f}%</td></tr>\n")
+        self.fh.write("</table>\n")
+
+    def category_start(self, category: str, count: int, link: Optional[str] = None) -> None:
+        if not self._sections:
+            self.fh.write("<h2>카테고리별 주요 특허</h2>\n")
+            if link:
+                self.fh.write("<ul>\n")
+        title = html.escape(f"{category} ({count}건)")
+        if link:
+            self.fh.write(f'<li><a href="{html.escape(link)}">{title}</a></li>\n')
+        else:
+            self.fh.write(f"<section>\n<h3>{title}</h3>\n<ol>\n")
+        self._link = link
+        self._sections += 1
+
+    def patent(self, number: int, fields: dict[str, Any]) -> None:
+        escaped = {key: html.escape(str(value)) for key, value in fields.items()}
+        self.fh.write(
+            f'<li value="{number}"><h4>{escaped["InventionName"]}</h4><dl>'
+            f'<dt>출원번호</dt><dd>{escaped["ApplicationNumber"]}</dd>'
+            f'<dt>등록번호</dt><dd>{escaped["RegistrationNumber"]}</dd>'
+            f'<dt>요약</dt><dd>{escaped["ai_summary"]}</dd></dl></li>\n'
+        )
+
+    def category_end(self) -> None:
+        if not self._link:
+            self.fh.write("</ol>\n</section>\n")
+
+    def errors(self, errors: Sequence[str]) -> None:
+        if self._sections and self._link:
+            self.fh.write("</ul>\n")
+        if errors:
+            self.fh.write("<h2>처리 중 발생한 오류</h2>\n<ul>\n")
+            for error in errors:
+                self.fh.write(f"<li>{html.escape(error)}</li>\n")
+            self.fh.write("</ul>\n")
+
+    def end(self, notes: Sequence[str]) -> None:
+        if notes:
+            self.fh.write("<h2>참고사항</h2>\n<ul>\n")
+            for note in notes:
+                self.fh.write(f"<li>{html.escape(note)}</li>\n")
+            self.fh.write("</ul>\n")
+        self.fh.write("</body>\n</html>\n")
+
+
+REPORT_SINKS = {sink.extension: sink for sink in (MarkdownReportSink, JsonReportSink, HtmlReportSink)}
+
+
+class ReportWriter:
+    """카테고리별 특허를 순회하며 모든 형식의 보고서 파일에 바로 기록"""
+
+    def __init__(
+        self,
+        output_dir: Optional[str] = None,
+        formats: Optional[Sequence[str]] = None,
+        sharded: Optional[bool] = None,
+        per_category: Optional[int] = None,
+    ):
+        self.output_dir = output_dir or Config.OUTPUT_DIR
+        self.formats = [fmt.strip().lower() for fmt in (formats or Config.REPORT_FORMATS) if fmt.strip()]
+        unknown = set(self.formats) - set(REPORT_SINKS)
+        if unknown or not self.formats:
+            raise ValueError(f"지원하지 않는 보고서 형식입니다: {sorted(unknown) or self.formats}")
+        self.sharded = Config.REPORT_SHARDED if sharded is None else sharded
+        # 분할하지 않으면 카테고리별 표시 개수 제한, 분할하면 모든 특허 기록
+        self.per_category = per_category or (None if self.sharded else Config.PATENT_PER_CATEGORY)
+
+    @staticmethod
+    def shard_name(number: int, category: str) -> str:
+        """카테고리 → 파일 이름 (예: 01_인공지능_머신러닝)"""
+        slug = re.sub(r"[^\w]+", "_", category).strip("_")
+        return f"{number:02d}_{slug}"
+
+    def write(
+        self,
+        info: Sequence[tuple[str, str]],
+        category_counts: Mapping[str, int],
+        patents_of: Callable[[str], Iterable[Mapping[str, Any]]],
+        errors: Sequence[str] = (),
+    ) -> list[str]:
+        """보고서 작성 후 파일 경로 목록 반환 (형식별 본문/목차 파일이 앞쪽)"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if self.sharded:
+            base_dir = os.path.join(self.output_dir, f"patent_report_{timestamp}")
+            main_paths = [os.path.join(base_dir, f"index.{fmt}") for fmt in self.formats]
+        else:
+            base_dir = self.output_dir
+            main_paths = [os.path.join(base_dir, f"patent_report_{timestamp}.{fmt}") for fmt in self.formats]
+        os.makedirs(base_dir, exist_ok=True)
+        written = list(main_paths)
+
+        # ① 통계 행 (특허 수가 많은 순)
+        total = sum(category_counts.values())
+        rows = [
+            (category, count, count / total * 100)
+            for category, count in sorted(category_counts.items(), key=lambda x: x[1], reverse=True)
+            if count > 0
+        ]
+
+        with ExitStack() as stack:
+            sinks = [
+                REPORT_SINKS[fmt](stack.enter_context(open(path, "w", encoding="utf-8")))
+                for fmt, path in zip(self.formats, main_paths)
+            ]
+            for sink in sinks:
+                sink.begin(REPORT_TITLE, info)
+                sink.stats(rows)
+
+            # ② 카테고리별 특허를 한 번만 순회하며 모든 형식에 기록
+            for number, category in enumerate(Config.PATENT_CATEGORIES, 1):
+                count = category_counts.get(category, 0)
+                if not count:
+                    continue
+                patents = islice(patents_of(category), self.per_category)
+                if not self.sharded:
+                    self._write_category(sinks, category, count, patents)
+                    continue
+
+                # ③ 분할: 목차에는 링크만, 특허는 카테고리별 파일에 기록
+                name = self.shard_name(number, category)
+                for sink, fmt in zip(sinks, self.formats):
+                    sink.category_start(category, count, link=f"{name}.{fmt}")
+                    sink.category_end()
+                shard_paths = [os.path.join(base_dir, f"{name}.{fmt}") for fmt in self.formats]
+                with ExitStack() as shard_stack:
+                    shard_sinks = [
+                        REPORT_SINKS[fmt](shard_stack.enter_context(open(path, "w", encoding="utf-8")))
+                        for fmt, path in zip(self.formats, shard_paths)
+                    ]
+                    for sink, fmt in zip(shard_sinks, self.formats):
+                        sink.begin(f"{REPORT_TITLE} - {category}", [], index_link=f"index.{fmt}")
+                    self._write_category(shard_sinks, category, count, patents)
+                    for sink in shard_sinks:
+                        sink.errors([])
+                        sink.end([])
+                written.extend(shard_paths)
+
+            for sink in sinks:
+                sink.errors(errors)
+                sink.end(REPORT_NOTES)
+
+        return written
+
+    @staticmethod
+    def _write_category(sinks: list, category: str, count: int, patents: Iterable[Mapping[str, Any]]) -> None:
+        for sink in sinks:
+            sink.category_start(category, count)
+        for number, patent in enumerate(patents, 1):
+            fields = patent_fields(patent)
+            for sink in sinks:
+                sink.patent(number, fields)
+        for sink in sinks:
+            sink.category_end()
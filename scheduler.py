@@ -0,0 +1,282 @@
+"""
+적응형 동시성 스케줄러 - 작업 큐 + 토큰 버킷으로 LLM 호출을 항상 N개씩 유지
+(호출마다 기한을 두고, 관측된 p95보다 늦어지는 호출은 한 번 더 보내(헤지) 꼬리 지연을 줄임)
+"""
+import asyncio
+import math
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from config import Config
+from metrics import RUN_METRICS, MetricsRegistry
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """429(요청 한도 초과) 오류인지 판단"""
+    if getattr(error, "status_code", None) == 429:
+        return True
+    return "RateLimit" in type(error).__name__
+
+
+def is_timeout_error(error: BaseException) -> bool:
+    """타임아웃 오류인지 판단"""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    return "Timeout" in type(error).__name__
+
+
+class TokenBucket:
+    """초당 rate개의 토큰이 채워지는 토큰 버킷 레이트 리미터"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """토큰 1개를 얻을 때까지 대기"""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveScheduler:
+    """성공 시 동시성을 늘리고 429/타임아웃 시 줄이는(AIMD) 슬라이딩 윈도우 스케줄러"""
+
+    def __init__(
+        self,
+        initial_concurrency: int = Config.INITIAL_CONCURRENCY,
+        min_concurrency: int = Config.MIN_CONCURRENCY,
+        max_concurrency: int = Config.MAX_CONCURRENCY,
+        rate_limit: float = Config.RATE_LIMIT_PER_SECOND,
+        burst: int = Config.RATE_LIMIT_BURST,
+        max_retries: int = Config.LLM_MAX_RETRIES,
+        call_timeout: float = Config.LLM_CALL_TIMEOUT,
+        hedge_max_ratio: float = Config.HEDGE_MAX_RATIO,
+        hedge_quantile: float = Config.HEDGE_QUANTILE,
+        hedge_min_samples: int = Config.HEDGE_MIN_SAMPLES,
+        hedge_window: int = Config.HEDGE_WINDOW,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.limit = float(min(max(initial_concurrency, min_concurrency), max_concurrency))
+        self.max_retries = max_retries
+        self.call_timeout = call_timeout
+        self.hedge_max_ratio = hedge_max_ratio
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.bucket = TokenBucket(rate_limit, burst)
+        self.metrics = metrics or MetricsRegistry()
+
+        self.active = 0
+        self.queue_depth = 0
+        self.completed = 0
+        self.rate_limited = 0
+        self.timeouts = 0
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        # 호출 종류별 최근 성공 지연 시간과, 그 분포에서 계산한 헤지 시점(초)
+        self._latencies: dict[str, deque] = defaultdict(lambda: deque(maxlen=hedge_window))
+        self._observed: dict[str, int] = defaultdict(int)
+        self.hedge_delays: dict[str, float] = {}
+        self.started_at: Optional[float] = None
+        self._cond = asyncio.Condition()
+
+    async def _acquire_slot(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+
+    async def _release_slot(self) -> None:
+        async with self._cond:
+            self.active -= 1
+            self._cond.notify_all()
+
+    def _on_success(self) -> None:
+        # ① 가산 증가: 현재 동시성 수만큼 성공하면 1 증가
+        self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+
+    def _on_overload(self) -> None:
+        # ② 승산 감소: 429/타임아웃 발생 시 절반으로 축소
+        self.limit = max(self.min_concurrency, self.limit / 2)
+
+    def _observe(self, op: str, seconds: float) -> None:
+        """성공한 호출의 지연 시간을 기록하고, 일정 간격마다 헤지 시점(HEDGE_QUANTILE 백분위)을 다시 계산"""
+        latencies = self._latencies[op]
+        latencies.append(seconds)
+        self._observed[op] += 1
+        # 매번 정렬하지 않도록 표본이 16개 늘 때마다 갱신
+        if len(latencies) >= self.hedge_min_samples and self._observed[op] % 16 == 0:
+            ordered = sorted(latencies)
+            self.hedge_delays[op] = ordered[max(0, math.ceil(self.hedge_quantile * len(ordered)) - 1)]
+
+    def _may_hedge(self) -> bool:
+        # 추가 비용 상한: 헤지 요청은 전체 호출의 HEDGE_MAX_RATIO를 넘지 않음
+        return self.hedged < self.hedge_max_ratio * self.calls
+
+    async def _request(self, request: Callable[[], Awaitable[Any]], hedge: bool = False) -> Any:
+        """요청 1회를 기한 안에서 실행 (헤지 요청은 슬롯 없이 토큰 버킷만 거침)"""
+        if hedge:
+            await self.bucket.acquire()
+        if self.call_timeout > 0:
+            return await asyncio.wait_for(request(), self.call_timeout)
+        return await request()
+
+    async def _hedged_request(self, request: Callable[[], Awaitable[Any]], op: str) -> Any:
+        """헤지 시점까지 응답이 없으면 같은 요청을 한 번 더 보내고, 먼저 성공한 응답을 쓰고 나머지는 취소"""
+        self.calls += 1
+        delay = self.hedge_delays.get(op)
+        if delay is None or not self._may_hedge():
+            return await self._request(request)
+
+        pending = {asyncio.ensure_future(self._request(request))}
+        hedge = None
+        error: Optional[BaseException] = None
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done and self._may_hedge():
+                self.hedged += 1
+                self.metrics.inc("patent_llm_hedges_total", op=op)
+                hedge = asyncio.ensure_future(self._request(request, hedge=True))
+                pending.add(hedge)
+            # 한쪽이 실패하면 다른 쪽을 기다리고, 둘 다 실패하면 먼저 난 오류를 전달
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                            self.metrics.inc("patent_llm_hedge_wins_total", op=op)
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def call(self, request: Callable[[], Awaitable[Any]], op: str = "llm") -> Any:
+        """LLM 호출 1건을 동시성 슬롯과 토큰 버킷 아래에서 실행 (429/타임아웃/기한 초과는 재시도)
+
+        op는 지표의 호출 종류 라벨 (슬롯/토큰 대기를 제외한 호출 시간, 토큰 수, 재시도, 오류, 헤지를 기록)
+        """
+        for attempt in range(self.max_retries + 1):
+            await self._acquire_slot()
+            try:
+                await self.bucket.acquire()
+                started = time.perf_counter()
+                with self.metrics.timer("patent_llm_call_seconds", op=op):
+                    result = await self._hedged_request(request, op)
+            except Exception as e:
+                self.metrics.inc("patent_llm_errors_total", op=op, error=type(e).__name__)
+                overloaded = is_rate_limit_error(e) or is_timeout_error(e)
+                if not overloaded:
+                    raise
+                if is_rate_limit_error(e):
+                    self.rate_limited += 1
+                else:
+                    self.timeouts += 1
+                async with self._cond:
+                    self._on_overload()
+                if attempt == self.max_retries:
+                    raise
+            else:
+                async with self._cond:
+                    self._on_success()
+                    self._cond.notify_all()
+                self._observe(op, time.perf_counter() - started)
+                self.metrics.record_usage(op, result)
+                # 작업 서비스에서 공유할 때는 호출한 작업의 지표에도 기록 (작업별 토큰 예산/비용 집계)
+                run_metrics = RUN_METRICS.get()
+                if run_metrics is not None and run_metrics is not self.metrics:
+                    run_metrics.record_usage(op, result)
+                return result
+            finally:
+                await self._release_slot()
+            self.metrics.inc("patent_llm_retries_total", op=op)
+            # ③ 지수 백오프 후 재시도
+            await asyncio.sleep(min(2**attempt, 30))
+
+    async def map(
+        self,
+        func: Callable[[Any], Awaitable[Any]],
+        items: Iterable[Any],
+        label: str = "처리",
+    ) -> list[Any]:
+        """모든 항목에 func를 적용 (입력 순서대로 결과 반환, 예외는 결과로 반환)"""
+        items = list(items)
+        results: list[Any] = [None] * len(items)
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, item in enumerate(items):
+            queue.put_nowait((index, item))
+
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        done = 0
+        report_every = max(1, Config.BATCH_SIZE)
+
+        async def worker() -> None:
+            nonlocal done
+            while True:
+                try:
+                    index, item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                self.queue_depth = queue.qsize()
+                try:
+                    results[index] = await func(item)
+                except Exception as e:
+                    results[index] = e
+                done += 1
+                self.completed += 1
+                if done % report_every == 0 or done == len(items):
+                    stats = self.stats()
+                    print(
+                        f"  {label} {done}/{len(items)} "
+                        f"(동시 실행 {stats['concurrency']}, 대기열 {stats['queue_depth']}, "
+                        f"{stats['throughput']:.1f}건/초)"
+                    )
+
+        # ④ 워커는 최대 동시성만큼 띄우고, 실제 LLM 호출 수는 call()의 슬롯이 제한
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(min(self.max_concurrency, len(items)))
+        ]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+        self.queue_depth = 0
+        return results
+
+    def stats(self) -> dict[str, Any]:
+        """처리량, 대기열 길이, 동시성, 헤지 통계"""
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            "concurrency": int(self.limit),
+            "active": self.active,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "throughput": self.completed / elapsed if elapsed > 0 else 0.0,
+            "rate_limited": self.rate_limited,
+            "timeouts": self.timeouts,
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": round(self.hedged / self.calls, 4) if self.calls else 0.0,
+        }
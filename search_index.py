@@ -0,0 +1,166 @@
+"""
+전문 검색 색인 - 저장소의 발명명/초록/요약을 SQLite FTS5 BM25 역색인으로 검색
+
+한국어는 띄어쓰기 단위가 조사/어미를 포함하므로 한글/한자 연속 구간은 문자 2-gram으로, 영문/숫자는 단어 그대로
+토큰화하여 색인합니다 (예: "영상인식 CNN" → "영상 상인 인식 cnn"). 색인은 저장소 파일 안의 내용 없는(contentless)
+FTS5 테이블이라 본문을 다시 저장하지 않고, 특허를 저장/요약/분류할 때 바뀐 행만 갱신합니다.
+검색은 메모리 매핑된 색인 페이지에서 일치하는 특허의 점수만 계산하므로 전체 특허를 메모리에 올리지 않습니다.
+"""
+import re
+import sqlite3
+from typing import Any, Iterable, Mapping, Optional, Sequence
+
+from config import Config
+from preprocess import clean_texts
+
+# 토큰화 방식이나 자리표시 값 목록이 바뀌면 기존 색인과 토큰이 달라지므로 색인을 다시 만듦
+TOKENIZER_VERSION = 1
+INDEX_VERSION = f"{TOKENIZER_VERSION}:{','.join(Config.TEXT_PLACEHOLDERS)}"
+# 한글 자모/음절, 한자 (2-gram으로 색인하는 문자)
+_CJK = r"\u3131-\u318e\uac00-\ud7a3\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+# 뒤에 한글/한자가 이어지는 글자(2-gram) | 앞뒤에 한글/한자가 없는 한 글자 | 영문/숫자 단어
+_TOKEN = re.compile(
+    rf"([{_CJK}])(?=([{_CJK}]))|(?<![{_CJK}])([{_CJK}])(?![{_CJK}])|([^\W_{_CJK}]+)"
+)
+_CJK_CHAR = re.compile(rf"[{_CJK}]")
+# 색인 열 (BM25 가중치는 Config.SEARCH_FIELD_WEIGHTS 순서)
+INDEX_FIELDS = ("InventionName", "Abstract", "ai_summary")
+# 색인을 한 번에 갱신할 특허 수
+INDEX_CHUNK = 1024
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    """텍스트 → 색인 토큰 (한글/한자 구간은 2-gram, 한 글자 구간은 그 글자, 영문/숫자는 소문자 단어)"""
+    # 일치마다 그룹 중 하나(2-gram은 두 그룹)만 채워지므로 이어 붙이면 토큰 (정규식 한 번으로 처리)
+    return list(map("".join, _TOKEN.findall((text or "").lower())))
+
+
+def match_expression(query: str) -> Optional[str]:
+    """검색어 → FTS5 MATCH 식 (단어마다 2-gram을 연속 구문으로 묶고 모든 단어를 AND로 연결)
+
+    한 글자 한글/한자 단어는 그 글자로 시작하는 토큰의 접두어 검색으로 바꿈
+    """
+    terms = []
+    for word in query.split():
+        tokens = tokenize(word)
+        if len(tokens) == 1 and len(tokens[0]) == 1 and _CJK_CHAR.match(tokens[0]):
+            terms.append(f'"{tokens[0]}"*')
+        elif tokens:
+            terms.append('"' + " ".join(tokens) + '"')
+    return " ".join(terms) or None
+
+
+class PatentSearchIndex:
+    """저장소 연결을 함께 쓰는 BM25 전문 검색 색인 (patents 테이블의 rowid로 연결)"""
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        weights: Sequence[float] = Config.SEARCH_FIELD_WEIGHTS,
+        mmap_bytes: int = Config.SEARCH_MMAP_BYTES,
+    ):
+        self.conn = conn
+        self.weights = tuple(weights)
+        # ① 색인 페이지는 읽기 버퍼로 복사하지 않고 메모리 매핑으로 읽음 (처음 여는 검색도 필요한 페이지만 읽음)
+        self.conn.execute(f"PRAGMA mmap_size = {int(mmap_bytes)}")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS search_index_info (version TEXT NOT NULL)")
+        row = self.conn.execute("SELECT version FROM search_index_info").fetchone()
+        if row is None or row[0] != INDEX_VERSION:
+            self.rebuild()
+
+    def rebuild(self) -> int:
+        """색인을 새로 만들고 저장소의 모든 특허를 색인 (처음 사용할 때와 토큰화 방식이 바뀌었을 때)"""
+        self.conn.execute("DROP TABLE IF EXISTS patents_fts")
+        # 내용 없는 테이블: 토큰 위치만 보관하고, 삭제할 때는 색인했던 값을 다시 토큰화하여 전달
+        self.conn.execute(
+            "CREATE VIRTUAL TABLE patents_fts USING fts5("
+            "title, abstract, summary, content='', tokenize='unicode61 remove_diacritics 0')"
+        )
+        rows = self.conn.execute(f"SELECT rowid, {', '.join(INDEX_FIELDS)} FROM patents")
+        indexed = 0
+        while chunk := rows.fetchmany(INDEX_CHUNK):
+            self._insert(chunk)
+            indexed += len(chunk)
+        self.conn.execute("DELETE FROM search_index_info")
+        self.conn.execute("INSERT INTO search_index_info VALUES (?)", (INDEX_VERSION,))
+        self.conn.commit()
+        if indexed:
+            print(f"  검색 색인 생성: 특허 {indexed:,}건")
+        return indexed
+
+    @staticmethod
+    def _documents(rows: Sequence[Sequence[Any]]) -> list[tuple]:
+        """(rowid, 발명명, 초록, 요약) 행 → 색인할 (rowid, 토큰 문자열 ×3) (열 단위로 한 번에 정리)"""
+        columns = [
+            clean_texts([row[i] for row in rows], blank_placeholders=i != 1) for i in range(1, 4)
+        ]
+        return [
+            (row[0], *(" ".join(tokenize(column[i])) for column in columns))
+            for i, row in enumerate(rows)
+        ]
+
+    def _insert(self, rows: Sequence[Sequence[Any]]) -> None:
+        self.conn.executemany(
+            "INSERT INTO patents_fts (rowid, title, abstract, summary) VALUES (?, ?, ?, ?)",
+            self._documents(rows),
+        )
+
+    def _delete(self, rows: Sequence[Sequence[Any]]) -> None:
+        self.conn.executemany(
+            "INSERT INTO patents_fts (patents_fts, rowid, title, abstract, summary) "
+            "VALUES ('delete', ?, ?, ?, ?)",
+            self._documents(rows),
+        )
+
+    def snapshot(self, application_numbers: Iterable[str]) -> dict[str, tuple]:
+        """출원번호 → 현재 색인 대상 값 (rowid, 발명명, 초록, 요약) - 저장소를 갱신하기 전후에 호출"""
+        numbers = list(dict.fromkeys(application_numbers))
+        rows = {}
+        for start in range(0, len(numbers), INDEX_CHUNK):
+            chunk = numbers[start : start + INDEX_CHUNK]
+            cursor = self.conn.execute(
+                f"SELECT ApplicationNumber, rowid, {', '.join(INDEX_FIELDS)} FROM patents "
+                f"WHERE ApplicationNumber IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            rows.update((row[0], row[1:]) for row in cursor)
+        return rows
+
+    def update(self, before: Mapping[str, tuple], after: Mapping[str, tuple]) -> int:
+        """저장소 갱신 전후 값을 비교하여 바뀐 특허만 다시 색인 (커밋은 저장소가 함께 함)"""
+        changed = [number for number, row in after.items() if before.get(number) != row]
+        removed = [before[number] for number in changed if number in before]
+        if removed:
+            self._delete(removed)
+        if changed:
+            self._insert([after[number] for number in changed])
+        return len(changed)
+
+    def search(
+        self,
+        query: str,
+        categories: Optional[Iterable[str]] = None,
+        limit: int = 10,
+    ) -> list[dict[str, Any]]:
+        """BM25 점수가 높은 순으로 특허 검색 (categories로 분류 결과 필터)"""
+        expression = match_expression(query)
+        if expression is None:
+            return []
+        score = f"bm25(patents_fts, {', '.join(map(str, self.weights))})"
+        sql = (
+            f"SELECT p.ApplicationNumber, p.InventionName, p.category, p.ai_summary, -{score} "
+            "FROM patents_fts JOIN patents p ON p.rowid = patents_fts.rowid WHERE patents_fts MATCH ?"
+        )
+        params: list[Any] = [expression]
+        if categories is not None:
+            categories = list(categories)
+            sql += f" AND p.category IN ({','.join('?' * len(categories))})"
+            params.extend(categories)
+        sql += f" ORDER BY {score} LIMIT ?"
+        params.append(limit)
+        columns = ("ApplicationNumber", "InventionName", "category", "ai_summary", "score")
+        return [dict(zip(columns, row)) for row in self.conn.execute(sql, params)]
+
+    def count(self) -> int:
+        """색인된 특허 수"""
+        return self.conn.execute("SELECT COUNT(*) FROM patents_fts").fetchone()[0]
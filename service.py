@@ -0,0 +1,553 @@
+"""
+작업 서비스 - 워크플로우 모듈, LLM 클라이언트, 스케줄러를 띄워 둔 채 로컬 HTTP(또는 Unix 소켓)로 작업을 받아 실행
+
+main.py를 실행할 때마다 드는 인터프리터 시작과 LangChain/LangGraph import, LLM 클라이언트 생성, 토크나이저 로드를
+서비스 시작 시 한 번만 하고, 작업은 큐에 넣어 SERVICE_MAX_JOBS개까지 동시에 실행합니다. 동시에 실행되는 작업은
+하나의 스케줄러(LLM 동시성/초당 요청 제한)와 KIPRIS 요청 제한, 요약 캐시, 특허 저장소, 체크포인터를 함께 씁니다.
+작업마다 바뀌는 설정(CPC 코드, 말뭉치, 모드, 보고서 형식)과 실행 단위 예산은 작업별 에이전트 모음이 가집니다.
+
+API (요청/응답 본문은 JSON):
+    POST   /jobs                 작업 등록 {"cpc_codes": ["G06N"], "pages": 2, "corpus": "a.csv", "mode": "lazy",
+                                 "incremental": true, "formats": ["md"], "shard_report": false, "resume": "RUN_ID"}
+    GET    /jobs                 작업 목록
+    GET    /jobs/<id>            작업 상태 (진행한 노드, 보고서 경로, 오류)
+    GET    /jobs/<id>/events     진행 이벤트를 줄 단위 JSON으로 스트리밍 (?after=N이면 N번 이후부터, 작업이 끝나면 닫힘)
+    DELETE /jobs/<id>            대기 중인 작업 취소 또는 실행 중인 작업 중단 (resume으로 이어서 실행 가능)
+    GET    /metrics              공유 스케줄러/캐시와 작업 수의 Prometheus 지표
+    GET    /health               서비스 상태
+
+사용 예:
+    python service.py --port 8765 --max-jobs 4
+    python service.py --socket /tmp/patent.sock --fake-llm 0.05       # 오프라인 시험
+    curl -X POST localhost:8765/jobs -d '{"cpc_codes": ["G06N", "G06T"], "incremental": true}'
+    curl -N localhost:8765/jobs/<id>/events
+"""
+import argparse
+import asyncio
+import contextvars
+import io
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from functools import partial
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any, Optional, TextIO
+from urllib.parse import parse_qs, urlparse
+
+from config import Config
+from metrics import RUN_METRICS, MetricsRegistry
+
+if TYPE_CHECKING:
+    from workflow import PatentAgents
+
+JOB_STATES = ("queued", "running", "done", "failed", "cancelled")
+FINISHED = ("done", "failed", "cancelled")
+# 지금 실행 중인 작업 (작업 태스크와 그 안에서 만든 태스크/스레드에 전달되어 print 출력을 작업 로그로 보냄)
+CURRENT_JOB: contextvars.ContextVar[Optional["ServiceJob"]] = contextvars.ContextVar("current_job", default=None)
+
+
+class JobOutput(io.TextIOBase):
+    """print 출력을 실행 중인 작업의 진행 로그로 보내고, 서비스 콘솔에는 작업 ID를 붙여 출력하는 stdout"""
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        job = CURRENT_JOB.get()
+        if job is None:
+            return self.stream.write(text)
+        for line in job.feed(text):
+            self.stream.write(f"[{job.id}] {line}\n")
+        return len(text)
+
+    @property
+    def encoding(self) -> str:
+        return self.stream.encoding
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+class ServiceJob:
+    """등록된 작업 1건 (옵션, 상태, 진행 이벤트)"""
+
+    def __init__(self, job_id: str, options: dict[str, Any], loop: asyncio.AbstractEventLoop):
+        self.id = job_id
+        self.options = options
+        # 노드 경계 체크포인트의 thread_id (resume이면 이어서 실행할 실행 ID)
+        self.run_id = options.get("resume") or f"job_{job_id}"
+        self.state = "queued"
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.nodes: list[dict[str, Any]] = []
+        self.report_files: list[str] = []
+        self.metric_files: list[str] = []
+        self.processed = 0
+        self.errors: list[str] = []
+        self.error: Optional[str] = None
+        self.app: Any = None
+        self.metrics: Optional[MetricsRegistry] = None  # 작업의 노드 실행 시간, KIPRIS 요청, 예산 지표
+        self.task: Optional[asyncio.Task] = None
+        # 진행 이벤트 (최근 SERVICE_LOG_LINES개만 보관, seq는 계속 증가)
+        self.events: deque = deque(maxlen=Config.SERVICE_LOG_LINES)
+        self.seq = 0
+        self._partial = ""
+        self._changed = asyncio.Event()
+        self._loop = loop
+        self._thread = threading.get_ident()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED
+
+    def emit(self, kind: str, **data: Any) -> None:
+        """진행 이벤트 추가 (수집 스레드의 출력은 이벤트 루프 스레드로 넘겨서 추가)"""
+        if threading.get_ident() != self._thread:
+            self._loop.call_soon_threadsafe(partial(self.emit, kind, **data))
+            return
+        self.seq += 1
+        self.events.append({"seq": self.seq, "time": round(time.time(), 3), "type": kind, **data})
+        # 기다리던 스트림을 모두 깨우고 다음 이벤트용으로 새로 만듦
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def feed(self, text: str) -> list[str]:
+        """print 출력 조각 → 완성된 줄 (빈 줄은 로그 이벤트로 남기지 않음)"""
+        *lines, self._partial = (self._partial + text).split("\n")
+        for line in lines:
+            if line.strip():
+                self.emit("log", line=line)
+        return lines
+
+    def set_state(self, state: str, **data: Any) -> None:
+        self.state = state
+        if state == "running":
+            self.started_at = time.time()
+        elif state in FINISHED:
+            self.finished_at = time.time()
+        self.emit("state", state=state, **data)
+
+    def events_after(self, seq: int) -> list[dict[str, Any]]:
+        return [event for event in self.events if event["seq"] > seq]
+
+    async def wait(self, seq: int) -> None:
+        """seq 이후 이벤트가 생길 때까지 대기"""
+        if self.seq <= seq:
+            await self._changed.wait()
+
+    def to_dict(self, detail: bool = False) -> dict[str, Any]:
+        data = {
+            "id": self.id,
+            "run_id": self.run_id,
+            "state": self.state,
+            "submitted_at": datetime.fromtimestamp(self.submitted_at).isoformat(timespec="seconds"),
+            "elapsed_seconds": round(
+                (self.finished_at or time.time()) - (self.started_at or self.submitted_at), 3
+            ) if self.started_at else 0.0,
+            "node": self.nodes[-1]["node"] if self.nodes else None,
+            "processed": self.processed,
+            "report_files": self.report_files,
+            "error": self.error,
+        }
+        if detail:
+            data.update(
+                options=self.options,
+                nodes=self.nodes,
+                errors=self.errors,
+                metric_files=self.metric_files,
+                events=self.seq,
+            )
+        return data
+
+
+class PatentService:
+    """작업 큐와 작업 간에 공유하는 구성 요소 (LLM 클라이언트, 스케줄러, 캐시, 저장소, 체크포인터)"""
+
+    def __init__(self, llm: Any, max_jobs: int = Config.SERVICE_MAX_JOBS):
+        from agents.collector import PatentCollectorAgent
+        from workflow import PatentAgents
+
+        self.llm = llm
+        self.max_jobs = max_jobs
+        self.metrics = MetricsRegistry()  # 공유 구성 요소(LLM 호출 지연 시간/토큰, 캐시)와 작업 수 지표
+        self.started_at = time.time()
+        self.jobs: dict[str, ServiceJob] = {}
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.checkpointer: Any = None
+        self._next_id = 0
+        # ① 작업 간에 공유하는 구성 요소는 서비스용 에이전트 모음에서 한 번만 만듦
+        self.shared = PatentAgents(llm, self.metrics)
+        self.kipris_session = PatentCollectorAgent.create_session()
+        self.kipris_limits = PatentCollectorAgent.create_limits()
+        self.metrics.add_source("service", self.stats)
+
+    def stats(self) -> dict[str, Any]:
+        counts = {state: 0 for state in JOB_STATES}
+        for job in self.jobs.values():
+            counts[job.state] += 1
+        return {f"jobs_{state}": count for state, count in counts.items()}
+
+    def agents(self, options: dict[str, Any], output_dir: Optional[str] = None) -> "PatentAgents":
+        """작업용 에이전트 모음 (작업별 설정과 예산은 새로 만들고, 공유 구성 요소는 서비스의 것을 사용)"""
+        from agents.collector import PatentCollectorAgent
+        from agents.indexer import PatentIndexAgent
+        from agents.reporter import ReportGeneratorAgent
+        from report_writer import ReportWriter
+        from workflow import PatentAgents
+
+        shared = self.shared
+        agents = PatentAgents(self.llm, MetricsRegistry(), options["incremental"])
+        # ② cached_property는 인스턴스 속성이 있으면 새로 만들지 않으므로 공유 구성 요소를 미리 넣어 둠
+        agents.store = shared.store
+        agents.cache = shared.cache
+        agents.scheduler = shared.scheduler
+        agents.item_checkpoint = shared.item_checkpoint
+        agents.preclassifier = shared.preclassifier
+        agents.collector = PatentCollectorAgent(
+            use_stored=not options["incremental"],
+            store=shared.store,
+            metrics=agents.metrics,
+            cpc_numbers=options["cpc_codes"],
+            total_pages=options["pages"],
+            num_of_rows=options["rows"],
+            corpus_path=options["corpus"],
+            session=self.kipris_session,
+            limits=self.kipris_limits,
+            scoped=True,
+        )
+        agents.indexer = PatentIndexAgent(shared.store, scoped=True)
+        agents.reporter = ReportGeneratorAgent(
+            ReportWriter(output_dir, formats=options["formats"], sharded=options["shard_report"]),
+            cpc_numbers=options["cpc_codes"],
+        )
+        return agents
+
+    @staticmethod
+    def parse_options(body: dict[str, Any]) -> dict[str, Any]:
+        """요청 본문 → 작업 옵션 (값을 주지 않은 항목은 Config 값)"""
+        def as_list(value: Any) -> Optional[list[str]]:
+            if value is None:
+                return None
+            if isinstance(value, str):
+                value = value.split(",")
+            return [str(item).strip() for item in value if str(item).strip()] or None
+
+        unknown = set(body) - {
+            "cpc_codes", "pages", "rows", "corpus", "mode", "incremental", "formats", "shard_report", "resume",
+        }
+        if unknown:
+            raise ValueError(f"알 수 없는 작업 옵션입니다: {sorted(unknown)}")
+        corpus = body.get("corpus")
+        if corpus and not os.path.exists(corpus):
+            raise ValueError(f"말뭉치 파일을 찾을 수 없습니다: {corpus}")
+        return {
+            "cpc_codes": as_list(body.get("cpc_codes")) or list(Config.CPC_NUMBERS),
+            "pages": int(body.get("pages") or Config.TOTAL_PAGES),
+            "rows": int(body.get("rows") or Config.NUM_OF_ROWS),
+            "corpus": corpus or None,
+            "mode": body.get("mode") or Config.WORKFLOW_MODE,
+            "incremental": bool(body.get("incremental", Config.INCREMENTAL_ENABLED)),
+            "formats": as_list(body.get("formats")) or list(Config.REPORT_FORMATS),
+            "shard_report": bool(body.get("shard_report", Config.REPORT_SHARDED)),
+            "resume": body.get("resume") or None,
+        }
+
+    def submit(self, body: dict[str, Any]) -> ServiceJob:
+        """작업 등록 (옵션이 잘못되었으면 그래프를 만들 때 ValueError로 바로 거절)"""
+        from workflow import create_patent_workflow
+
+        # resume이면 기록에 남은 원래 작업의 옵션을 기본값으로 씀 (같은 CPC 코드/모드로 이어서 실행)
+        if body.get("resume"):
+            previous = next((job for job in self.jobs.values() if job.run_id == body["resume"]), None)
+            if previous is not None:
+                body = {**{k: v for k, v in previous.options.items() if k != "resume"}, **body}
+        options = self.parse_options(body)
+        self._next_id += 1
+        job = ServiceJob(
+            f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{self._next_id:04d}",
+            options,
+            asyncio.get_running_loop(),
+        )
+        # ③ 모듈은 이미 불러왔으므로 그래프 컴파일만 작업마다 함 (작업별 에이전트와 예산이 노드에 묶이므로)
+        # 같은 초에 끝난 작업의 보고서 파일 이름이 겹치지 않도록 보고서는 작업별 디렉토리에 저장
+        agents = self.agents(options, os.path.join(Config.OUTPUT_DIR, "jobs", job.id))
+        job.app = create_patent_workflow(
+            self.llm,
+            mode=options["mode"],
+            incremental=options["incremental"],
+            checkpointer=self.checkpointer,
+            agents=agents,
+        )
+        job.metrics = agents.metrics
+        self.jobs[job.id] = job
+        self._forget_finished()
+        self.queue.put_nowait(job)
+        job.set_state("queued", position=self.queue.qsize())
+        return job
+
+    def cancel(self, job: ServiceJob) -> None:
+        if job.state == "queued":
+            job.set_state("cancelled")
+        elif job.state == "running" and job.task is not None:
+            job.task.cancel()
+
+    def _forget_finished(self) -> None:
+        """끝난 작업은 최근 SERVICE_JOB_HISTORY개만 보관"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[: max(0, len(finished) - Config.SERVICE_JOB_HISTORY)]:
+            del self.jobs[job_id]
+
+    async def _run(self, job: ServiceJob) -> None:
+        """작업 1건 실행 (노드가 끝날 때마다 진행 이벤트 기록)"""
+        from langchain_core.messages import HumanMessage
+        from state import PatentState
+
+        CURRENT_JOB.set(job)
+        RUN_METRICS.set(job.metrics)
+        job.set_state("running")
+        config = {"configurable": {"thread_id": job.run_id}}
+        metrics = job.metrics
+        try:
+            # ④ resume이면 체크포인트의 마지막 노드 경계부터, 아니면 초기 상태로 실행
+            inputs: Optional[PatentState] = PatentState(
+                run_id=job.run_id, messages=[HumanMessage(content="KIPRIS 특허 처리를 시작합니다.")]
+            )
+            final_state: Any = None
+            if job.options["resume"]:
+                snapshot = await job.app.aget_state(config)
+                if not snapshot.values:
+                    raise ValueError(f"체크포인트를 찾을 수 없습니다: {job.run_id}")
+                inputs = None
+                if not snapshot.next:
+                    final_state = snapshot.values
+            if final_state is None:
+                last = time.perf_counter()
+                async for mode, chunk in job.app.astream(inputs, config, stream_mode=["updates", "values"]):
+                    if mode == "values":
+                        final_state = chunk
+                        continue
+                    now = time.perf_counter()
+                    for node in chunk:
+                        job.nodes.append({"node": node, "seconds": round(now - last, 3)})
+                        job.emit("node", node=node, seconds=round(now - last, 3))
+                    last = now
+
+            # 작업은 서비스의 항목 체크포인트를 함께 쓰므로 같은 연결로 이 실행의 기록만 지움
+            if self.shared.item_checkpoint is not None:
+                self.shared.item_checkpoint.clear(job.run_id)
+            job.report_files = list(final_state.get("report_files") or [])
+            job.processed = len(final_state.get("summarized_patents") or [])
+            job.errors = list(final_state.get("error_log") or [])
+            job.set_state("done", report_files=job.report_files, processed=job.processed)
+        except asyncio.CancelledError:
+            job.set_state("cancelled", resume=job.run_id)
+        except Exception as e:
+            traceback.print_exc(file=sys.stdout)
+            job.error = f"{type(e).__name__}: {e}"[:500]
+            job.set_state("failed", error=job.error, resume=job.run_id)
+        finally:
+            self.metrics.inc("patent_service_jobs_total", state=job.state)
+            if Config.METRICS_ENABLED and (metrics.histograms or metrics.counters):
+                job.metric_files = metrics.write(job.id)
+
+    async def worker(self) -> None:
+        while True:
+            job = await self.queue.get()
+            if job.state == "queued":
+                # 작업 태스크가 CURRENT_JOB을 따로 가지도록 새 태스크에서 실행 (취소도 이 태스크만)
+                job.task = asyncio.create_task(self._run(job))
+                try:
+                    await asyncio.shield(job.task)
+                except asyncio.CancelledError:
+                    if not job.task.done():
+                        raise  # 서비스 종료
+            self.queue.task_done()
+
+    def warm_up(self) -> None:
+        """모든 모드의 그래프를 한 번씩 만들어 에이전트 모듈과 토크나이저를 미리 불러옴"""
+        from workflow import create_patent_workflow
+
+        started = time.perf_counter()
+        options = self.parse_options({})
+        for mode in ("staged", "fused", "stream", "lazy"):
+            create_patent_workflow(self.llm, mode=mode, incremental=False, agents=self.agents(options))
+        self.shared.planner.counter.count("")
+        print(f"워크플로우 준비 완료 ({time.perf_counter() - started:.2f}초)")
+
+    # ---- HTTP ----
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """HTTP/1.1 요청 1건 처리 (연결마다 요청 1건, 응답 후 연결 종료)"""
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length") or 0))
+            url = urlparse(target)
+            await self.route(method.upper(), url.path.rstrip("/") or "/", parse_qs(url.query), body, writer)
+        except ValueError as e:
+            await self.respond(writer, HTTPStatus.BAD_REQUEST, {"error": str(e)})
+        except LookupError as e:
+            await self.respond(writer, HTTPStatus.NOT_FOUND, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # 클라이언트가 먼저 연결을 닫음 (이벤트 스트림을 보다가 중단 등)
+        finally:
+            writer.close()
+
+    async def route(
+        self,
+        method: str,
+        path: str,
+        query: dict[str, list[str]],
+        body: bytes,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        parts = path.strip("/").split("/")
+        if (method, path) == ("GET", "/health"):
+            await self.respond(writer, HTTPStatus.OK, {
+                "status": "ok",
+                "uptime_seconds": round(time.time() - self.started_at, 1),
+                "max_jobs": self.max_jobs,
+                **self.stats(),
+                "scheduler": self.shared.scheduler.stats(),
+            })
+        elif (method, path) == ("GET", "/metrics"):
+            await self.respond(writer, HTTPStatus.OK, self.metrics.to_prometheus(), "text/plain; version=0.0.4")
+        elif (method, path) == ("GET", "/jobs"):
+            await self.respond(writer, HTTPStatus.OK, [job.to_dict() for job in self.jobs.values()])
+        elif (method, path) == ("POST", "/jobs"):
+            try:
+                request = json.loads(body or b"{}")
+            except json.JSONDecodeError as e:
+                raise ValueError(f"JSON 본문을 읽을 수 없습니다: {e}") from None
+            if not isinstance(request, dict):
+                raise ValueError("요청 본문은 JSON 객체여야 합니다.")
+            job = self.submit(request)
+            await self.respond(writer, HTTPStatus.ACCEPTED, job.to_dict(detail=True))
+        elif parts[0] == "jobs" and len(parts) in (2, 3):
+            job = self.jobs.get(parts[1])
+            if job is None:
+                raise LookupError(f"작업을 찾을 수 없습니다: {parts[1]}")
+            if len(parts) == 3 and parts[2] == "events" and method == "GET":
+                await self.stream_events(writer, job, int(query.get("after", ["0"])[0]))
+            elif len(parts) == 2 and method == "GET":
+                await self.respond(writer, HTTPStatus.OK, job.to_dict(detail=True))
+            elif len(parts) == 2 and method == "DELETE":
+                self.cancel(job)
+                await self.respond(writer, HTTPStatus.OK, job.to_dict())
+            else:
+                raise LookupError(f"지원하지 않는 요청입니다: {method} {path}")
+        else:
+            raise LookupError(f"지원하지 않는 요청입니다: {method} {path}")
+
+    @staticmethod
+    async def respond(
+        writer: asyncio.StreamWriter,
+        status: HTTPStatus,
+        payload: Any,
+        content_type: str = "application/json",
+    ) -> None:
+        if isinstance(payload, str):
+            body = payload.encode("utf-8")
+        else:
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    @staticmethod
+    async def stream_events(writer: asyncio.StreamWriter, job: ServiceJob, after: int) -> None:
+        """진행 이벤트를 줄 단위 JSON으로 보내고, 작업이 끝나면 연결을 닫음 (끊긴 뒤에는 ?after=마지막 seq로 이어 받음)"""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson; charset=utf-8\r\n"
+            b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+        )
+        while True:
+            for event in job.events_after(after):
+                writer.write(json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n")
+                after = event["seq"]
+            await writer.drain()
+            if job.finished and job.seq <= after:
+                return
+            await job.wait(after)
+
+    async def serve(self, host: str, port: int, socket_path: str = "") -> None:
+        from checkpoint import open_checkpointer
+
+        self.warm_up()
+        async with open_checkpointer() as checkpointer:
+            self.checkpointer = checkpointer
+            if socket_path:
+                if os.path.exists(socket_path):
+                    os.remove(socket_path)
+                server = await asyncio.start_unix_server(self.handle, path=socket_path)
+                address = socket_path
+            else:
+                server = await asyncio.start_server(self.handle, host, port)
+                address = f"http://{host}:{port}"
+            workers = [asyncio.create_task(self.worker()) for _ in range(self.max_jobs)]
+            print(f"작업 서비스 시작: {address} (동시 작업 {self.max_jobs}개)")
+            try:
+                async with server:
+                    await server.serve_forever()
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+
+def create_llm(fake_latency: float = 0.0) -> Any:
+    """작업이 함께 쓰는 LLM 클라이언트 (연결 풀을 유지하도록 서비스에서 한 번만 생성)"""
+    if fake_latency:
+        from benchmark import FakeChatModel
+
+        return FakeChatModel(latency=fake_latency)
+    if not Config.validate():
+        raise ValueError("API 키가 설정되지 않았습니다. .env 파일을 확인해주세요.")
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model=Config.MODEL_NAME, max_tokens=Config.MAX_TOKENS, api_key=Config.OPENAI_API_KEY)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="KIPRIS 특허 AI 멀티에이전트 시스템 - 작업 서비스")
+    parser.add_argument("--host", default=Config.SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=Config.SERVICE_PORT)
+    parser.add_argument("--socket", default=Config.SERVICE_SOCKET, help="TCP 대신 이 Unix 소켓에서 대기")
+    parser.add_argument("--max-jobs", type=int, default=Config.SERVICE_MAX_JOBS, help="동시에 실행할 작업 수")
+    parser.add_argument(
+        "--fake-llm", type=float, default=0.0, metavar="LATENCY",
+        help="OpenAI 대신 벤치마크용 가짜 LLM 사용 (응답 지연 초, 오프라인 시험용)",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        service = PatentService(create_llm(args.fake_llm), max(1, args.max_jobs))
+    except ValueError as e:
+        print(f"오류: {e}")
+        sys.exit(2)
+    # 작업 태스크의 print 출력을 작업별 진행 로그로 모음
+    sys.stdout = JobOutput(sys.stdout)
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        print("\n\n작업 서비스를 종료합니다. 중단된 작업은 resume 옵션으로 이어서 실행할 수 있습니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+"""
+샤드 실행 - 저장소의 특허를 출원번호 해시로 N개 샤드로 나누어 샤드마다 별도 워커 프로세스(또는 다른 호스트)에서
+수집(샤드 저장소 로드) → 요약 → 분류를 실행하고, reduce 단계에서 결과를 원래 저장소에 합쳐 보고서를 한 번 생성
+
+샤드 디렉토리는 공유 디렉토리(NFS 등)에 둘 수 있으며, 각 워커는 샤드 디렉토리의 lock 파일을 만들어 샤드를 가져가므로
+여러 호스트에서 같은 디렉토리로 run을 실행하면 샤드가 나뉘어 처리됩니다. 실패한 샤드는 run을 다시 실행하면 그 샤드만
+(노드/항목 단위 체크포인트에서 이어서) 다시 처리됩니다.
+
+사용 예:
+    python shards.py split --dir data/shards --shards 8
+    python shards.py run --dir data/shards --workers 4          # 호스트마다 실행 가능
+    python shards.py status --dir data/shards
+    python shards.py reduce --dir data/shards --formats md,html
+    python shards.py reset --dir data/shards --shard 3           # 워커가 비정상 종료되어 남은 lock 제거
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import shutil
+import socket
+import sys
+import time
+import traceback
+import zlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Any, Optional
+
+from config import Config
+
+MANIFEST = "manifest.json"
+STATUS = "status.json"
+LOCK = "lock"
+
+
+def shard_of(application_number: Any, shards: int) -> int:
+    """출원번호 → 샤드 번호 (프로세스/호스트가 달라도 항상 같은 값)"""
+    return zlib.crc32(str(application_number).encode("utf-8")) % shards
+
+
+def shard_dir(root: str, index: int) -> str:
+    return os.path.join(root, f"shard_{index:04d}")
+
+
+def _write_json(path: str, data: dict[str, Any]) -> None:
+    # 다른 호스트가 쓰는 중인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _read_json(path: str) -> dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def read_manifest(root: str) -> dict[str, Any]:
+    manifest = _read_json(os.path.join(root, MANIFEST))
+    if not manifest:
+        raise ValueError(f"샤드 목록이 없습니다. 먼저 split을 실행해주세요: {root}")
+    return manifest
+
+
+def read_status(root: str, index: int) -> dict[str, Any]:
+    return _read_json(os.path.join(shard_dir(root, index), STATUS))
+
+
+def split(root: str, shards: int, store_path: str = Config.STORE_PATH, include_processed: bool = False) -> dict[str, Any]:
+    """저장소의 특허를 샤드별 저장소로 나눔 (기본은 요약/분류 결과가 없는 특허만)"""
+    from patent_store import PatentStore
+
+    if os.path.exists(os.path.join(root, MANIFEST)):
+        raise ValueError(f"이미 나눈 샤드가 있습니다: {root} (다른 디렉토리를 지정하거나 삭제 후 실행)")
+
+    source = PatentStore(store_path)
+    buckets: dict[int, list] = defaultdict(list)
+    # ① 저장 순서대로 커서에서 읽어 출원번호 해시로 분배
+    for patent in source.iter_records(processed=None if include_processed else False):
+        buckets[shard_of(patent.ApplicationNumber, shards)].append(patent)
+    source.close()
+
+    counts = []
+    for index in range(shards):
+        directory = shard_dir(root, index)
+        os.makedirs(directory, exist_ok=True)
+        store = PatentStore(os.path.join(directory, "patents.sqlite3"))
+        store.upsert(buckets.get(index, []))
+        store.close()
+        counts.append(len(buckets.get(index, [])))
+
+    manifest = {
+        "shards": shards,
+        "source_store": os.path.abspath(store_path),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "patents": counts,
+    }
+    _write_json(os.path.join(root, MANIFEST), manifest)
+    print(f"특허 {sum(counts)}건을 샤드 {shards}개로 나눴습니다: {root}")
+    print(f"  샤드별 {min(counts)}~{max(counts)}건")
+    return manifest
+
+
+def claim(root: str, index: int) -> bool:
+    """샤드의 lock 파일을 만들어 처리 권한을 얻음 (이미 있으면 다른 워커가 처리 중)"""
+    try:
+        fd = os.open(os.path.join(shard_dir(root, index), LOCK), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as f:
+        json.dump({"host": socket.gethostname(), "pid": os.getpid(), "claimed_at": time.time()}, f)
+    return True
+
+
+def release(root: str, index: int) -> None:
+    try:
+        os.remove(os.path.join(shard_dir(root, index), LOCK))
+    except FileNotFoundError:
+        pass
+
+
+def run_shard(root: str, index: int, options: dict[str, Any]) -> dict[str, Any]:
+    """(새 프로세스에서 실행) 샤드 1개의 요약/분류를 실행하고 상태 파일 기록"""
+    directory = shard_dir(root, index)
+    status_path = os.path.join(directory, STATUS)
+    status = {
+        "state": "running",
+        "host": socket.gethostname(),
+        "pid": os.getpid(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "attempts": read_status(root, index).get("attempts", 0) + 1,
+    }
+    _write_json(status_path, status)
+
+    # ② 모듈 기본값이 정해지기 전에 샤드 디렉토리의 저장소/캐시/체크포인트를 사용하도록 설정
+    shared_model = Config.PRECLASSIFIER_MODEL_PATH
+    Config.STORE_PATH = os.path.join(directory, "patents.sqlite3")
+    Config.CACHE_PATH = os.path.join(directory, "summary_cache.sqlite3")
+    Config.PRECLASSIFIER_MODEL_PATH = os.path.join(directory, "preclassifier.npz")
+    Config.CHECKPOINT_PATH = os.path.join(directory, "checkpoints.sqlite3")
+    Config.ITEM_CHECKPOINT_PATH = os.path.join(directory, "item_checkpoints.sqlite3")
+    Config.OUTPUT_DIR = os.path.join(directory, "outputs")
+    Config.RATE_LIMIT_PER_SECOND = options["rate_limit"]
+    Config.RUN_TOKEN_BUDGET = options["token_budget"]
+    Config.RUN_COST_BUDGET = options["cost_budget"]
+    if options["api_key"]:
+        Config.OPENAI_API_KEY = options["api_key"]
+    # 사전 분류기는 원래 모델에서 시작 (샤드마다 따로 학습하므로 같은 파일을 동시에 쓰지 않음)
+    if not os.path.exists(Config.PRECLASSIFIER_MODEL_PATH) and os.path.exists(shared_model):
+        shutil.copy(shared_model, Config.PRECLASSIFIER_MODEL_PATH)
+
+    from checkpoint import ItemCheckpoint, open_checkpointer
+    from metrics import MetricsRegistry
+    from patent_store import PatentStore
+    from state import PatentState
+    from workflow import create_patent_workflow
+
+    store = PatentStore()
+    pending = len(store.read(["ApplicationNumber"], processed=False))
+    run_id = f"shard_{index:04d}"
+    metrics = MetricsRegistry() if Config.METRICS_ENABLED else None
+
+    async def run() -> list[str]:
+        if options["fake_llm"]:
+            from benchmark import FakeChatModel
+
+            llm = FakeChatModel(latency=options["fake_llm"])
+        else:
+            from langchain_openai import ChatOpenAI
+
+            llm = ChatOpenAI(
+                model=Config.MODEL_NAME, max_tokens=Config.MAX_TOKENS, api_key=Config.OPENAI_API_KEY
+            )
+        async with open_checkpointer() as checkpointer:
+            app = create_patent_workflow(
+                llm, mode=options["mode"], incremental=False, checkpointer=checkpointer,
+                metrics=metrics, shard=True,
+            )
+            config = {"configurable": {"thread_id": run_id}}
+            # ③ 이전 시도가 중간에 끝났으면 마지막 노드 경계부터 재개, 아니면 남은 미처리 특허로 새로 실행
+            snapshot = await app.aget_state(config)
+            if snapshot.values and snapshot.next:
+                final_state = await app.ainvoke(None, config)
+            else:
+                # 새로 실행하면 처리 대상 목록(항목 번호)이 달라지므로 이전 시도의 항목 단위 기록은 버림
+                if Config.CHECKPOINT_ENABLED:
+                    item_checkpoint = ItemCheckpoint()
+                    item_checkpoint.clear(run_id)
+                    item_checkpoint.close()
+                final_state = await app.ainvoke(PatentState(run_id=run_id), config)
+        return final_state.get("error_log", [])
+
+    started = time.perf_counter()
+    try:
+        with open(os.path.join(directory, "worker.log"), "a", encoding="utf-8") as log, \
+                redirect_stdout(log), redirect_stderr(log):
+            print(f"\n=== {status['started_at']} {status['host']} (시도 {status['attempts']}) ===")
+            errors = asyncio.run(run()) if pending else []
+            if metrics is not None and (metrics.histograms or metrics.counters):
+                metrics.write(f"{run_id}_{status['attempts']}", os.path.join(directory, "metrics"))
+    except BaseException as e:
+        status.update(state="failed", error=f"{type(e).__name__}: {e}"[:500])
+        with open(os.path.join(directory, "worker.log"), "a", encoding="utf-8") as log:
+            traceback.print_exc(file=log)
+    else:
+        remaining = len(store.read(["ApplicationNumber"], processed=False))
+        # ④ 오류나 예산 초과로 남은 특허가 있으면 partial (다시 run하면 남은 특허만 처리)
+        status.update(
+            state="done" if remaining == 0 else "partial",
+            processed=store.count() - remaining,
+            remaining=remaining,
+            errors=len(errors),
+        )
+        if remaining == 0 and Config.CHECKPOINT_ENABLED:
+            item_checkpoint = ItemCheckpoint()
+            item_checkpoint.clear(run_id)
+            item_checkpoint.close()
+    finally:
+        store.close()
+        status["finished_at"] = datetime.now().isoformat(timespec="seconds")
+        status["seconds"] = round(time.perf_counter() - started, 3)
+        _write_json(status_path, status)
+        release(root, index)
+    return {"shard": index, **status}
+
+
+def run(
+    root: str,
+    workers: int = 1,
+    only: Optional[list[int]] = None,
+    mode: str = "staged",
+    fake_llm: float = 0.0,
+) -> list[dict[str, Any]]:
+    """끝나지 않은 샤드를 가져가며 워커 프로세스에서 실행 (다른 호스트가 처리 중인 샤드는 건너뜀)"""
+    manifest = read_manifest(root)
+    shards = manifest["shards"]
+    indices = [i for i in (only if only is not None else range(shards)) if 0 <= i < shards]
+    todo = [i for i in indices if read_status(root, i).get("state") != "done"]
+    if not todo:
+        print("처리할 샤드가 없습니다.")
+        return []
+
+    # ⑤ 워커마다 다른 OpenAI 키를 쓸 수 있음 (같은 키를 나눠 쓰는 워커는 초당 요청 수도 나눔)
+    keys = [key.strip() for key in os.getenv("OPENAI_API_KEYS", "").split(",") if key.strip()]
+    workers = max(1, min(workers, len(todo)))
+    per_key = math.ceil(workers / max(1, len(keys)))
+    options = {
+        "mode": mode,
+        "fake_llm": fake_llm,
+        "rate_limit": Config.RATE_LIMIT_PER_SECOND / per_key,
+        # 실행 단위 예산은 샤드 수로 나눔
+        "token_budget": Config.RUN_TOKEN_BUDGET // shards,
+        "cost_budget": Config.RUN_COST_BUDGET / shards,
+    }
+    print(f"샤드 {len(todo)}개를 워커 {workers}개로 처리합니다 (워커당 초당 {options['rate_limit']:.2f}회 요청)")
+
+    results = []
+    # ⑥ 모듈 기본값(저장소 경로 등)이 샤드마다 다르므로 워커 프로세스는 샤드 1개만 처리하고 교체
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=get_context("spawn"), max_tasks_per_child=1
+    ) as executor:
+        futures = {}
+        for slot, index in enumerate(todo):
+            if not claim(root, index):
+                print(f"  샤드 {index}: 다른 워커가 처리 중이므로 건너뜀")
+                continue
+            shard_options = {**options, "api_key": keys[slot % len(keys)] if keys else ""}
+            futures[executor.submit(run_shard, root, index, shard_options)] = index
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # 워커 프로세스 자체가 죽은 경우 (상태 파일은 running으로 남으므로 실패로 기록)
+                release(root, index)
+                result = {"shard": index, "state": "failed", "error": f"{type(e).__name__}: {e}"}
+                _write_json(os.path.join(shard_dir(root, index), STATUS), result)
+            results.append(result)
+            detail = result.get("error") or f"처리 {result.get('processed', 0)}건, 남음 {result.get('remaining', 0)}건"
+            print(f"  샤드 {index}: {result['state']} ({detail})")
+    return results
+
+
+def print_status(root: str) -> dict[str, int]:
+    manifest = read_manifest(root)
+    counts: dict[str, int] = defaultdict(int)
+    print(f"{'샤드':>6}{'특허':>8}{'상태':>10}{'처리':>8}{'남음':>8}{'시도':>6}  호스트")
+    for index in range(manifest["shards"]):
+        status = read_status(root, index)
+        state = status.get("state", "pending")
+        if state == "running" and not os.path.exists(os.path.join(shard_dir(root, index), LOCK)):
+            state = "failed"  # lock 없이 running으로 남은 샤드는 워커가 비정상 종료된 것
+        counts[state] += 1
+        print(
+            f"{index:>6}{manifest['patents'][index]:>8}{state:>10}"
+            f"{status.get('processed', '-'):>8}{status.get('remaining', '-'):>8}"
+            f"{status.get('attempts', 0):>6}  {status.get('host', '')}"
+        )
+    print(", ".join(f"{state} {count}개" for state, count in sorted(counts.items())))
+    return dict(counts)
+
+
+def reduce(root: str, store_path: Optional[str] = None, partial: bool = False) -> list[str]:
+    """샤드의 요약/분류 결과를 원래 저장소에 합치고 보고서를 한 번 생성"""
+    from patent_store import PatentStore
+    from agents.reporter import ReportGeneratorAgent
+
+    manifest = read_manifest(root)
+    unfinished = [
+        index for index in range(manifest["shards"]) if read_status(root, index).get("state") != "done"
+    ]
+    if unfinished and not partial:
+        raise ValueError(
+            f"끝나지 않은 샤드가 있습니다: {unfinished} (run을 다시 실행하거나 --partial로 끝난 결과만 합침)"
+        )
+
+    target = PatentStore(store_path or manifest["source_store"])
+    merged = 0
+    for index in range(manifest["shards"]):
+        path = os.path.join(shard_dir(root, index), "patents.sqlite3")
+        if not os.path.exists(path):
+            continue
+        shard_store = PatentStore(path)
+        # ⑦ 샤드별 결과를 카테고리별로 묶어 원래 저장소에 기록 (출원번호 기준 갱신)
+        categorized: dict[str, list] = defaultdict(list)
+        for patent in shard_store.iter_records(processed=True):
+            categorized[patent.category].append(patent)
+        merged += target.record_results(categorized)
+        shard_store.close()
+    print(f"샤드 {manifest['shards']}개의 요약/분류 결과 {merged}건을 {target.path}에 합쳤습니다.")
+
+    report_files = ReportGeneratorAgent().generate_from_store(target)
+    target.close()
+    print(f"보고서가 저장되었습니다: {report_files[0]}")
+    return report_files
+
+
+def reset(root: str, indices: list[int]) -> None:
+    """비정상 종료된 워커가 남긴 lock/상태 제거 (체크포인트는 남겨 다음 run에서 이어서 처리)"""
+    for index in indices:
+        release(root, index)
+        status_path = os.path.join(shard_dir(root, index), STATUS)
+        status = _read_json(status_path)
+        if status.get("state") == "running":
+            status["state"] = "failed"
+            status["error"] = "reset"
+            _write_json(status_path, status)
+        print(f"샤드 {index}의 lock을 제거했습니다.")
+
+
+def _indices(value: Optional[str]) -> Optional[list[int]]:
+    return [int(index) for index in value.split(",")] if value else None
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="샤드 단위 map-reduce 실행")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    split_parser = commands.add_parser("split", help="저장소의 특허를 샤드별 저장소로 나눔")
+    split_parser.add_argument("--dir", required=True, help="샤드 디렉토리 (여러 호스트가 함께 쓰려면 공유 디렉토리)")
+    split_parser.add_argument("--shards", type=int, required=True)
+    split_parser.add_argument("--store", default=Config.STORE_PATH, help="나눌 특허 저장소")
+    split_parser.add_argument("--all", action="store_true", help="이미 요약/분류된 특허도 다시 처리")
+
+    run_parser = commands.add_parser("run", help="끝나지 않은 샤드를 워커 프로세스에서 처리")
+    run_parser.add_argument("--dir", required=True)
+    run_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    run_parser.add_argument("--shard", help="처리할 샤드 번호 (쉼표로 구분, 기본은 끝나지 않은 모든 샤드)")
+    run_parser.add_argument("--mode", default=Config.WORKFLOW_MODE, choices=["staged", "fused", "stream"])
+    run_parser.add_argument(
+        "--fake-llm", type=float, default=0.0, metavar="LATENCY",
+        help="OpenAI 대신 벤치마크용 가짜 LLM 사용 (응답 지연 초, 오프라인 시험용)",
+    )
+
+    status_parser = commands.add_parser("status", help="샤드별 진행 상태 출력")
+    status_parser.add_argument("--dir", required=True)
+
+    reduce_parser = commands.add_parser("reduce", help="샤드 결과를 합쳐 보고서 생성")
+    reduce_parser.add_argument("--dir", required=True)
+    reduce_parser.add_argument("--store", help="결과를 합칠 저장소 (기본은 split한 원래 저장소)")
+    reduce_parser.add_argument("--partial", action="store_true", help="끝난 샤드의 결과만 합침")
+    reduce_parser.add_argument("--formats", metavar="FORMATS", help="보고서 형식 (예: md,json,html)")
+    reduce_parser.add_argument("--shard-report", action="store_true", help="카테고리별 파일로 보고서 분할")
+
+    reset_parser = commands.add_parser("reset", help="비정상 종료된 워커가 남긴 lock 제거")
+    reset_parser.add_argument("--dir", required=True)
+    reset_parser.add_argument("--shard", required=True, help="샤드 번호 (쉼표로 구분)")
+
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "split":
+            split(args.dir, args.shards, args.store, args.all)
+        elif args.command == "run":
+            if not args.fake_llm and not Config.OPENAI_API_KEY and not os.getenv("OPENAI_API_KEYS"):
+                raise ValueError("API 키가 설정되지 않았습니다. .env 파일을 확인해주세요.")
+            results = run(args.dir, args.workers, _indices(args.shard), args.mode, args.fake_llm)
+            if any(result["state"] != "done" for result in results):
+                print(f"끝나지 않은 샤드는 다시 실행하면 이어서 처리합니다: python shards.py run --dir {args.dir}")
+                sys.exit(1)
+        elif args.command == "status":
+            print_status(args.dir)
+        elif args.command == "reduce":
+            if args.formats:
+                Config.REPORT_FORMATS = args.formats.split(",")
+            if args.shard_report:
+                Config.REPORT_SHARDED = True
+            reduce(args.dir, args.store, args.partial)
+        elif args.command == "reset":
+            reset(args.dir, _indices(args.shard))
+    except ValueError as e:
+        print(f"오류: {e}")
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,77 @@
 """
 데이터 모델 정의하기 - 시스템에서 사용할 데이터 구조 정의
 """
-from typing import Annotated, Any
+from collections import defaultdict, deque
+from typing import Annotated, Iterable
 from pydantic import BaseModel, ConfigDict
 from langchain_core.messages import BaseMessage
 from langgraph.graph.message import add_messages
 
+from records import PatentRecord
+
 
 class PatentState(BaseModel):
     """특허 처리 상태를 관리하는 BaseModel"""
 
     model_config = ConfigDict(arbitrary_types_allowed=True) # pydantic이 모르는 타입을 허용
+    # 실행 ID (항목 단위 체크포인트와 --resume 재개에 사용)
+    run_id: str = ""
     # 대화의 히스토리 저장을 위한 필드
     messages: Annotated[list[BaseMessage], add_messages] = []
     # KIPRIS API가 수집한 특허 데이터 저장
-    raw_patents: list[dict[str, Any]] = []
-    # AI가 요약한 특허 데이터 저장
-    summarized_patents: list[dict[str, Any]] = []
-    # 카테고리별로 분류된 특허 데이터 저장
-    categorized_patents: dict[str, list[dict[str, Any]]] = {}
-    # 리포트 문자열로 저장
-    final_report: str = ""
+    # (아래 특허 목록은 모두 같은 PatentRecord 객체를 공유하며, 단계마다 복사하지 않음)
+    raw_patents: list[PatentRecord] = []
+    # 증분 수집 시 이전 실행에서 요약/분류가 끝나 다시 처리하지 않는 특허 (category 포함)
+    known_patents: list[PatentRecord] = []
+    # 토큰/비용 예산을 넘어 이번 실행에서 요약/분류하지 않은 특허 (저장소에는 미처리로 남음)
+    deferred_patents: list[PatentRecord] = []
+    # 초록이 대표 특허와 거의 같아 LLM 호출 없이 대표의 결과를 재사용하는 특허
+    duplicate_patents: list[PatentRecord] = []
+    # 근사 중복 특허 출원번호 → 대표 특허 출원번호
+    duplicate_of: dict[str, str] = {}
+    # AI가 요약한 특허 데이터 저장 (ai_summary가 채워진 레코드)
+    summarized_patents: list[PatentRecord] = []
+    # 카테고리별로 분류된 특허의 출원번호 목록 (레코드는 위 특허 목록에 있으므로 노드 경계 체크포인트에 다시 저장하지 않음)
+    categorized_patents: dict[str, list[str]] = {}
+    # 생성된 보고서 파일 경로 (형식별 본문/목차 파일이 앞쪽)
+    report_files: list[str] = []
     # 에러 로그 저장
     error_log: list[str] = []
+
+    def categorize(self, patents: Iterable[PatentRecord]) -> None:
+        """분류가 끝난 특허(category가 채워진 레코드)의 출원번호를 categorized_patents에 추가"""
+        categorized = {category: list(numbers) for category, numbers in self.categorized_patents.items()}
+        for patent in patents:
+            categorized.setdefault(patent.category, []).append(str(patent.ApplicationNumber))
+        self.categorized_patents = categorized
+
+    def categorized_records(self) -> dict[str, list[PatentRecord]]:
+        """카테고리 → 분류된 특허 레코드 (카테고리별 출원번호 순서대로 상태의 특허 목록에서 찾음)
+
+        출원번호가 없는('N/A') 특허처럼 번호가 겹치면 같은 번호·카테고리의 레코드를 목록 순서대로 하나씩 사용하고,
+        레코드를 찾지 못한 번호(다시 읽지 않은 특허 등)는 건너뛰고 error_log에 기록
+        """
+        # ① 요약이 채워진 목록부터 (체크포인트에서 복원하면 같은 특허가 목록마다 다른 객체가 됨)
+        candidates: dict[tuple[str, str], deque] = defaultdict(deque)
+        seen = set()
+        for patents in (self.summarized_patents, self.raw_patents, self.known_patents, self.duplicate_patents):
+            for patent in patents:
+                if id(patent) not in seen:
+                    seen.add(id(patent))
+                    candidates[(str(patent.ApplicationNumber), patent.category)].append(patent)
+
+        categorized: dict[str, list[PatentRecord]] = {}
+        missing: list[str] = []
+        for category, numbers in self.categorized_patents.items():
+            records = categorized[category] = []
+            for number in numbers:
+                queue = candidates.get((number, category))
+                if queue:
+                    records.append(queue.popleft())
+                else:
+                    missing.append(number)
+        if missing:
+            self.error_log.append(
+                f"분류 결과 {len(missing)}건의 특허 레코드를 찾지 못해 제외했습니다: {', '.join(missing[:5])}"
+            )
+        return categorized
@@ -0,0 +1,83 @@
+import os
+import sys
+
+import pytest
+
+# 저장소 최상위 모듈(config, scheduler, agents 등)을 테스트에서 바로 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+
+
+@pytest.fixture
+def store_path(tmp_path) -> str:
+    """테스트마다 새로 만드는 특허 저장소 경로"""
+    return str(tmp_path / "data" / "patents.sqlite3")
+
+
+@pytest.fixture(autouse=True)
+def isolated_paths(tmp_path, monkeypatch):
+    """테스트가 저장소의 data/, .cache/, outputs/를 건드리지 않도록 파일 경로를 임시 디렉토리로 변경"""
+    monkeypatch.setattr(Config, "STORE_PATH", str(tmp_path / "data" / "patents.sqlite3"))
+    monkeypatch.setattr(Config, "CACHE_PATH", str(tmp_path / ".cache" / "summaries.sqlite3"))
+    monkeypatch.setattr(Config, "ITEM_CHECKPOINT_PATH", str(tmp_path / "data" / "items.sqlite3"))
+    monkeypatch.setattr(Config, "OUTPUT_DIR", str(tmp_path / "outputs"))
+
+
+@pytest.fixture
+def kipris(monkeypatch):
+    """로컬 KIPRIS 스텁 서버 (CPC 코드 G06N에 특허 200건)로 수집하도록 설정"""
+    from kipris_stub import start_stub_server
+
+    server, _ = start_stub_server(total=200)
+    monkeypatch.setenv("KIPRIS_API_KEY", "stub")
+    monkeypatch.setattr(Config, "KIPRIS_API_URL", server.url)
+    monkeypatch.setattr(Config, "CPC_NUMBERS", ["G06N"])
+    monkeypatch.setattr(Config, "NUM_OF_ROWS", 50)
+    monkeypatch.setattr(Config, "TOTAL_PAGES", 4)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fake_llm():
+    """벤치마크의 결정적 가짜 채팅 모델 (지연 없음, 호출 종류별 횟수는 stats)"""
+    from benchmark import FakeChatModel
+
+    return FakeChatModel(latency=0)
+
+
+@pytest.fixture
+def make_agents(tmp_path, kipris):
+    """임시 디렉토리의 저장소/캐시/체크포인트를 쓰는 에이전트 모음 생성
+
+    구성 요소의 기본 경로는 모듈을 불러올 때 정해지므로 경로를 직접 지정하여 만들어 넣음
+    (name마다 다른 디렉토리라 같은 테스트에서 여러 번 실행해도 캐시/저장소를 공유하지 않음)
+    """
+    from cache import SummaryCache
+    from checkpoint import ItemCheckpoint
+    from patent_store import PatentStore
+    from preclassifier import PatentPreClassifier
+    from scheduler import AdaptiveScheduler
+    from workflow import PatentAgents
+
+    opened = []
+
+    def make(llm, name: str = "run", **options) -> PatentAgents:
+        directory = tmp_path / name
+        agents = PatentAgents(llm, **options)
+        agents.store = PatentStore(str(directory / "patents.sqlite3"))
+        agents.cache = SummaryCache(str(directory / "summaries.sqlite3"))
+        agents.item_checkpoint = ItemCheckpoint(str(directory / "items.sqlite3"))
+        agents.preclassifier = PatentPreClassifier(model_path=str(directory / "preclassifier.npz"))
+        # 헤징 호출은 호출 수를 바꾸므로 끔
+        agents.scheduler = AdaptiveScheduler(rate_limit=0, hedge_min_samples=10**6, metrics=agents.metrics)
+        opened.append(agents)
+        return agents
+
+    yield make
+    for agents in opened:
+        agents.store.close()
+        agents.cache.close()
+        agents.item_checkpoint.close()
@@ -0,0 +1,78 @@
+import asyncio
+from typing import Optional
+
+import pytest
+
+from agents.analyzer import PatentAnalyzerAgent
+from benchmark import FakeChatModel
+from records import PatentRecord
+
+
+class FusedReply(FakeChatModel):
+    """통합 호출에는 정해진 응답(None이면 기본 응답)을, 나머지 호출에는 기본 응답을 돌려주는 가짜 모델"""
+
+    reply: Optional[str] = None
+
+    def _respond(self, system: str, human: str) -> tuple[str, str]:
+        kind, content = super()._respond(system, human)
+        return (kind, self.reply) if kind == "fused" and self.reply is not None else (kind, content)
+
+
+def patent() -> PatentRecord:
+    return PatentRecord(
+        ApplicationNumber="1",
+        InventionName="질병 진단 장치",
+        Abstract="본 발명은 심전도 신호를 분석하여 부정맥 여부를 판별하는 진단 장치에 관한 것으로, " * 3,
+    )
+
+
+def analyze(make_agents, reply: Optional[str], name: str = "run"):
+    llm = FusedReply(latency=0, reply=reply)
+    analyzer = make_agents(llm, name).analyzer
+    category, result = asyncio.run(analyzer.analyze_single_patent(patent()))
+    return category, result, analyzer, llm
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        ('{"summary": "요약", "category": "의료/건강"}', ("요약", "의료/건강")),
+        ('```json\n{"summary": " 요약 ", "category": "의료/건강"}\n```', ("요약", "의료/건강")),
+        ('{"summary": "요약", "category": "컴퓨터 비전"}', None),
+        ('{"summary": "", "category": "의료/건강"}', None),
+        ('{"summary": "요약", "category": ', None),
+        ("요약할 수 없습니다", None),
+    ],
+)
+def test_parse_response(content, expected):
+    assert PatentAnalyzerAgent.parse_response(content) == expected
+
+
+def test_fused_reply_sets_summary_and_category(make_agents):
+    category, result, analyzer, llm = analyze(make_agents, None)
+
+    assert category == "의료/건강"
+    assert result.ai_summary.startswith("요약:")
+    assert (analyzer.fused_count, analyzer.fallback_count) == (1, 0)
+    assert llm.stats["calls"] == llm.stats["calls_fused"] == 1
+
+
+def test_unparseable_reply_falls_back_to_two_calls(make_agents):
+    category, result, analyzer, llm = analyze(make_agents, '{"summary": "요약", "category": "컴퓨터 비전"}')
+
+    # 요약 호출 → 분류 호출로 다시 처리하고, 파싱에 실패한 응답은 요약으로 쓰지 않음
+    assert category == "의료/건강"
+    assert result.ai_summary.startswith("요약:")
+    assert analyzer.fallback_count == 1
+    assert (llm.stats["calls_fused"], llm.stats["calls_summarize"], llm.stats["calls_classify"]) == (1, 1, 1)
+
+
+def test_cached_summary_needs_only_classification(make_agents):
+    analyze(make_agents, '{"summary": "통합 요약", "category": "의료/건강"}')
+
+    # 같은 저장 경로(요약 캐시)를 쓰는 다음 실행은 분류 호출만 수행
+    category, result, analyzer, llm = analyze(make_agents, None)
+
+    assert (category, result.ai_summary) == ("의료/건강", "통합 요약")
+    assert analyzer.cached_count == 1
+    assert llm.stats["calls"] == llm.stats["calls_classify"] == 1
@@ -0,0 +1,123 @@
+from types import SimpleNamespace
+
+import pytest
+
+from budget import TokenBudgetPlanner, TokenCounter, patent_priority
+from config import Config
+from metrics import MetricsRegistry
+from records import PatentRecord
+
+
+class ByteEncoding:
+    """UTF-8 바이트 1개를 토큰 1개로 보는 인코더 (멀티바이트 문자가 토큰 중간에서 잘리는 경우 확인용)"""
+
+    def encode(self, text: str, disallowed_special=()) -> list[int]:
+        return list(text.encode("utf-8"))
+
+    def decode(self, tokens: list[int]) -> str:
+        return bytes(tokens).decode("utf-8", errors="replace")
+
+
+@pytest.fixture
+def counter() -> TokenCounter:
+    """토크나이저 없이 문자 종류로 추정하는 카운터 (인코딩 파일을 받을 수 있는지와 무관하게 같은 결과)"""
+    counter = TokenCounter()
+    counter.encoding = None
+    return counter
+
+
+def test_fallback_counts_wide_chars_individually(counter):
+    assert counter.count("") == 0
+    assert counter.count("가나다") == 3
+    assert counter.count("abcd efgh") == 3
+    assert counter.count("가나 ab") == 3
+
+
+def test_count_messages_adds_chat_overhead(counter):
+    messages = [SimpleNamespace(content="가나"), SimpleNamespace(content="abcd")]
+
+    assert counter.count_messages(messages) == 3 + (2 + 4) + (1 + 4)
+
+
+def test_short_text_is_not_truncated(counter):
+    assert counter.truncate("가나다. 라마바.", 100) == "가나다. 라마바."
+    assert counter.truncate("가나다. 라마바.", 0) == "가나다. 라마바."
+
+
+def test_truncates_at_sentence_boundary(counter):
+    text = "가나다. 라마바. 사아자."
+
+    truncated = counter.truncate(text, 9)
+
+    assert truncated == "가나다. 라마바."
+    assert counter.count(truncated) <= 9
+
+
+def test_long_first_sentence_is_cut_by_tokens(counter):
+    truncated = counter.truncate("가" * 20 + ". 나다.", 5)
+
+    assert truncated == "가" * 5
+
+
+def test_token_cut_drops_partial_multibyte_char():
+    counter = TokenCounter()
+    counter.encoding = ByteEncoding()
+
+    # "가"(3바이트) 다음 "나"의 첫 바이트까지만 남으면 대체 문자를 지움
+    assert counter.truncate("가나다", 4) == "가"
+
+
+def test_planner_truncates_to_input_limit(counter):
+    planner = TokenBudgetPlanner(counter=counter, max_input_tokens=9)
+
+    assert planner.truncate("가나다. 라마바. 사아자.") == "가나다. 라마바."
+
+
+def test_token_budget_defers_overflow(counter):
+    planner = TokenBudgetPlanner(counter=counter, token_budget=100, cost_budget=0)
+
+    assert [planner.admit((30, 10)) for _ in range(3)] == [True, True, False]
+    assert (planner.estimated_input, planner.estimated_output) == (60, 20)
+    assert (planner.admitted, planner.deferred) == (2, 1)
+
+
+def test_cost_budget_defers_overflow(counter, monkeypatch):
+    monkeypatch.setattr(Config, "PRICE_PER_1M_INPUT_TOKENS", 1.0)
+    monkeypatch.setattr(Config, "PRICE_PER_1M_OUTPUT_TOKENS", 4.0)
+    planner = TokenBudgetPlanner(counter=counter, token_budget=0, cost_budget=2.5)
+
+    assert planner.cost(1_000_000, 250_000) == 2.0
+    assert [planner.admit((500_000, 0)) for _ in range(6)] == [True] * 5 + [False]
+    assert planner.admit((0, 0))
+
+
+def test_plan_prefers_registered_then_recent(counter):
+    patents = [
+        PatentRecord(ApplicationNumber="1020190000001"),
+        PatentRecord(ApplicationNumber="1020210000001"),
+        PatentRecord(ApplicationNumber="1020180000001", RegistrationNumber="1020000001"),
+        PatentRecord(ApplicationNumber="1020200000001", RegistrationNumber="N/A"),
+    ]
+    planner = TokenBudgetPlanner(counter=counter, token_budget=20, cost_budget=0)
+
+    selected, deferred = planner.plan(patents, lambda patent: (5, 5))
+
+    # 등록 특허 → 최근 출원 순으로 예산을 배정하고, 결과는 원래 순서 유지
+    assert sorted(patents, key=patent_priority)[0] is patents[2]
+    assert selected == [patents[1], patents[2]]
+    assert deferred == [patents[0], patents[3]]
+
+
+def test_stats_compare_estimate_with_actual_usage(counter):
+    metrics = MetricsRegistry()
+    metrics.record_usage("summarize", SimpleNamespace(usage_metadata={"input_tokens": 40, "output_tokens": 7}))
+    planner = TokenBudgetPlanner(counter=counter, token_budget=0, cost_budget=0, metrics=metrics)
+    planner.admit((50, 10))
+
+    stats = planner.stats()
+
+    assert stats["estimated_input_tokens"] == 50
+    assert stats["actual_input_tokens"] == 40
+    assert stats["actual_output_tokens"] == 7
+    assert stats["actual_cost_usd"] == round(planner.cost(40, 7), 6)
+    assert planner.describe_budget() == "제한 없음"
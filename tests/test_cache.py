@@ -0,0 +1,166 @@
+import asyncio
+import time
+from typing import Optional
+
+import pytest
+
+from cache import SummaryCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SummaryCache(str(tmp_path / "summaries.sqlite3"), max_entries=0, max_age_days=0)
+    yield cache
+    cache.close()
+
+
+def counting(summary: str = "요약", gate: Optional[asyncio.Event] = None):
+    """호출 횟수를 세는 compute (gate가 있으면 열릴 때까지 대기)"""
+    calls: list[int] = []
+
+    async def compute() -> str:
+        calls.append(1)
+        if gate is not None:
+            await gate.wait()
+        return summary
+
+    return compute, calls
+
+
+def test_make_key_changes_with_inputs():
+    key = SummaryCache.make_key("1020200000001", "초록", "prompt", "model")
+
+    assert key.startswith("1020200000001:")
+    assert key == SummaryCache.make_key("1020200000001", "초록", "prompt", "model")
+    assert key != SummaryCache.make_key("1020200000001", "다른 초록", "prompt", "model")
+    assert key != SummaryCache.make_key("1020200000001", "초록", "prompt2", "model")
+    assert key != SummaryCache.make_key("1020200000001", "초록", "prompt", "model2")
+
+
+def test_computes_once_and_persists(cache):
+    compute, calls = counting()
+
+    async def run():
+        first = await cache.get_or_compute("k", "1", compute)
+        second = await cache.get_or_compute("k", "1", compute)
+        return first, second
+
+    assert asyncio.run(run()) == ("요약", "요약")
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    reopened = SummaryCache(cache.path, max_entries=0, max_age_days=0)
+    assert reopened.get("k") == "요약"
+    reopened.close()
+
+
+def test_empty_summary_is_not_stored(cache):
+    compute, calls = counting("")
+
+    async def run():
+        await cache.get_or_compute("k", "1", compute)
+        await cache.get_or_compute("k", "1", compute)
+
+    asyncio.run(run())
+
+    assert len(calls) == 2
+    assert not cache.contains("k")
+
+
+def test_concurrent_requests_share_in_flight_result(cache):
+    async def run():
+        gate = asyncio.Event()
+        compute, calls = counting(gate=gate)
+        tasks = [asyncio.create_task(cache.get_or_compute("k", "1", compute)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert cache.contains("k")  # 계산 중인 키도 있는 것으로 봄
+        gate.set()
+        return await asyncio.gather(*tasks), calls
+
+    results, calls = asyncio.run(run())
+
+    assert results == ["요약"] * 5
+    assert len(calls) == 1
+    assert cache.hits == 4
+
+
+def test_errors_propagate_to_waiters(cache):
+    async def run():
+        gate = asyncio.Event()
+
+        async def failing() -> str:
+            await gate.wait()
+            raise ValueError("LLM 오류")
+
+        owner = asyncio.create_task(cache.get_or_compute("k", "1", failing))
+        waiter = asyncio.create_task(cache.get_or_compute("k", "1", failing))
+        await asyncio.sleep(0)
+        gate.set()
+        return await asyncio.gather(owner, waiter, return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert cache._in_flight == {}
+
+
+def test_cancelled_waiter_does_not_cancel_owner(cache):
+    async def run():
+        gate = asyncio.Event()
+        compute, calls = counting(gate=gate)
+        owner = asyncio.create_task(cache.get_or_compute("k", "1", compute))
+        waiter = asyncio.create_task(cache.get_or_compute("k", "1", compute))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+        return await owner, waiter.cancelled(), calls
+
+    summary, waiter_cancelled, calls = asyncio.run(run())
+
+    assert summary == "요약"
+    assert waiter_cancelled
+    assert len(calls) == 1
+
+
+def test_cancelled_owner_hands_over_to_waiter(cache):
+    async def run():
+        gate = asyncio.Event()
+        compute, calls = counting(gate=gate)
+        owner = asyncio.create_task(cache.get_or_compute("k", "1", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_compute("k", "1", compute))
+        await asyncio.sleep(0)
+        # 계산하던 작업이 취소되면 기다리던 작업이 이어서 계산
+        owner.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+        return await waiter, owner.cancelled(), calls
+
+    summary, owner_cancelled, calls = asyncio.run(run())
+
+    assert summary == "요약"
+    assert owner_cancelled
+    assert len(calls) == 2
+    assert cache.get("k") == "요약"
+
+
+def test_evicts_expired_and_least_recently_used(tmp_path):
+    path = str(tmp_path / "summaries.sqlite3")
+    cache = SummaryCache(path, max_entries=0, max_age_days=0)
+    for index in range(4):
+        cache.set(f"k{index}", str(index), f"요약{index}")
+    # k0은 오래전에 만들어져 만료, k1은 가장 오래 사용되지 않음
+    old = time.time() - 10 * 24 * 60 * 60
+    cache.conn.execute("UPDATE summaries SET created_at = ? WHERE cache_key = 'k0'", (old,))
+    cache.conn.execute("UPDATE summaries SET accessed_at = 0 WHERE cache_key = 'k1'")
+    cache.conn.commit()
+    cache.close()
+
+    cache = SummaryCache(path, max_entries=2, max_age_days=7)
+
+    assert cache.stats()["entries"] == 2
+    assert cache.get("k0") is None
+    assert cache.get("k1") is None
+    assert cache.get("k2") == "요약2"
+    cache.close()
@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel
+
+from cascade import ModelCascade, is_confident, logprob_margin
+from config import Config
+from scheduler import AdaptiveScheduler
+
+
+class NamedModel(BaseModel):
+    """모델 이름만 가진 LLM 클라이언트 대용 (단계마다 model_copy로 이름만 바꿈)"""
+
+    model_name: str
+
+
+class ScriptedChain:
+    """호출마다 outcomes를 순서대로 돌려주는 체인 (예외면 발생시킴)"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+def response(content: str, *top: float) -> AIMessage:
+    """첫 토큰의 상위 logprob이 top인 응답 (top이 없으면 logprobs 없는 응답)"""
+    metadata = {"logprobs": {"content": [{"top_logprobs": [{"logprob": value} for value in top]}]}} if top else {}
+    return AIMessage(content=content, response_metadata=metadata)
+
+
+@pytest.fixture
+def cascade() -> ModelCascade:
+    scheduler = AdaptiveScheduler(rate_limit=0, max_retries=0, call_timeout=0, hedge_min_samples=10**6)
+    return ModelCascade(NamedModel(model_name="large"), tiers=["small", "large"], scheduler=scheduler)
+
+
+def valid(result) -> bool:
+    return result.content in Config.PATENT_CATEGORIES
+
+
+def test_tiers_share_client_with_different_model_names(cascade):
+    assert [llm.model_name for llm in cascade.llms] == ["small", "large"]
+    assert cascade.enabled
+    assert cascade.fingerprint == "small,large"
+    assert cascade.chains(lambda llm: llm.model_name) == ["small", "large"]
+
+    single = ModelCascade(NamedModel(model_name="large"), tiers=["large"])
+    assert not single.enabled
+    assert single.llms[0].model_name == "large"
+
+
+def test_accepted_first_tier_is_not_escalated(cascade):
+    chains = [ScriptedChain(response("자연어처리")), ScriptedChain()]
+
+    result = asyncio.run(cascade.call(chains, {}, "classify", valid))
+
+    assert result.content == "자연어처리"
+    assert chains[1].calls == 0
+    assert cascade.stats()["escalation_rate"] == 0.0
+
+
+def test_validation_failure_escalates(cascade):
+    chains = [ScriptedChain(response("모르는 분야")), ScriptedChain(response("의료/건강"))]
+
+    result = asyncio.run(cascade.call(chains, {}, "classify", valid))
+
+    assert result.content == "의료/건강"
+    stats = cascade.stats()
+    assert (stats["calls_0"], stats["calls_1"], stats["escalations"]) == (1, 1, 1)
+    assert stats["escalation_rate"] == 1.0
+    counters = cascade.metrics.counters
+    assert counters[("patent_llm_cascade_escalations_total", (("op", "classify"),))] == 1
+    assert counters[("patent_llm_cascade_calls_total", (("op", "classify"), ("tier", "large")))] == 1
+
+
+def test_low_logprob_margin_escalates(cascade):
+    chains = [
+        ScriptedChain(response("자연어처리", -0.6, -0.8)),  # 1·2순위 차이 0.2
+        ScriptedChain(response("의료/건강", -0.1, -3.0)),
+    ]
+
+    def accept(result) -> bool:
+        return valid(result) and is_confident(result, min_margin=1.0)
+
+    result = asyncio.run(cascade.call(chains, {}, "classify", accept))
+
+    assert result.content == "의료/건강"
+    assert cascade.escalations == 1
+
+
+def test_margin_check_is_skipped_without_logprobs():
+    assert logprob_margin(response("자연어처리")) is None
+    assert logprob_margin(response("자연어처리", -0.1)) is None
+    assert logprob_margin(response("자연어처리", -2.0, -0.5)) == pytest.approx(1.5)
+    assert is_confident(response("자연어처리"), min_margin=1.0)
+    assert is_confident(response("자연어처리", -0.6, -0.8), min_margin=0)
+    assert not is_confident(response("자연어처리", -0.6, -0.8), min_margin=1.0)
+
+
+def test_error_from_earlier_tier_escalates(cascade):
+    chains = [ScriptedChain(ValueError("응답 형식 오류")), ScriptedChain(response("기타"))]
+
+    result = asyncio.run(cascade.call(chains, {}, "classify", valid))
+
+    assert result.content == "기타"
+    assert cascade.escalations == 1
+
+
+def test_error_from_last_tier_is_raised(cascade):
+    chains = [ScriptedChain(response("모르는 분야")), ScriptedChain(ValueError("서버 오류"))]
+
+    with pytest.raises(ValueError):
+        asyncio.run(cascade.call(chains, {}, "classify", valid))
+
+
+def test_last_tier_answer_is_returned_as_is(cascade):
+    chains = [ScriptedChain(response("모르는 분야")), ScriptedChain(response("역시 모르는 분야"))]
+
+    result = asyncio.run(cascade.call(chains, {}, "classify", valid))
+
+    # 마지막 단계는 검증하지 않으므로 목록에 없는 카테고리도 그대로 (호출한 쪽이 '기타'로 처리)
+    assert result.content == "역시 모르는 분야"
+    assert cascade.escalations == 1
+
+
+def test_batch_retries_start_at_later_tier(cascade):
+    batch = [ScriptedChain(response("{}")), ScriptedChain()]
+    single = [ScriptedChain(), ScriptedChain(response("자연어처리"), response("기타"))]
+
+    async def run():
+        # 배치 호출 1건에 특허 4건, 그중 2건이 검증에 실패하여 다음 단계에서 건별로 다시 분류
+        await cascade.call(batch[:1], {}, "classify_batch", valid, items=4)
+        cascade.escalate("classify_batch", 2)
+        for _ in range(2):
+            await cascade.call(single, {}, "classify", valid, start=1)
+
+    asyncio.run(run())
+
+    stats = cascade.stats()
+    assert single[0].calls == 0
+    assert stats["requests"] == 4
+    assert stats["escalation_rate"] == 0.5
+    assert "상승 2건" in cascade.describe()
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from benchmark import FakeChatModel
+from checkpoint import ItemCheckpoint, open_checkpointer
+from state import PatentState
+from workflow import create_patent_workflow
+
+RUN_ID = "run"
+CONFIG = {"configurable": {"thread_id": RUN_ID}}
+
+
+def interrupt_organizer(agents) -> None:
+    """분류 노드에서 실행이 중단되도록 함 (요약 노드까지는 끝난 상태)"""
+
+    async def interrupted(state):
+        raise RuntimeError("분류 중 중단")
+
+    agents.organizer.organize_patents = interrupted
+
+
+def test_item_checkpoint_round_trip(tmp_path):
+    checkpoint = ItemCheckpoint(str(tmp_path / "items.sqlite3"))
+    checkpoint.save(RUN_ID, "summarize", {0: "요약 0", 2: "요약 2"})
+    checkpoint.save(RUN_ID, "summarize", {2: "다시 요약 2"})
+    checkpoint.save("other", "summarize", {0: "다른 실행"})
+    checkpoint.save(RUN_ID, "analyze", {0: ["요약", "의료/건강"]})
+
+    assert checkpoint.load(RUN_ID, "summarize") == {0: "요약 0", 2: "다시 요약 2"}
+    assert checkpoint.load(RUN_ID, "analyze") == {0: ["요약", "의료/건강"]}
+
+    checkpoint.clear(RUN_ID)
+
+    assert checkpoint.load(RUN_ID, "summarize") == {}
+    assert checkpoint.load("other", "summarize") == {0: "다른 실행"}
+    checkpoint.close()
+
+
+def test_resume_continues_from_interrupted_node(make_agents, fake_llm, tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    interrupted = make_agents(fake_llm, "first")
+    interrupt_organizer(interrupted)
+
+    async def first_run() -> None:
+        async with open_checkpointer(path) as checkpointer:
+            app = create_patent_workflow(
+                fake_llm, mode="staged", incremental=False, checkpointer=checkpointer, agents=interrupted
+            )
+            await app.ainvoke(PatentState(run_id=RUN_ID), CONFIG)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(first_run())
+    assert fake_llm.stats["calls_summarize"] > 0
+
+    # main.py --resume와 같이 마지막 노드 경계의 상태에서 이어서 실행 (요약은 다시 하지 않음)
+    resumed_llm = FakeChatModel(latency=0)
+    agents = make_agents(resumed_llm, "resumed")
+
+    async def resume() -> tuple:
+        async with open_checkpointer(path) as checkpointer:
+            app = create_patent_workflow(
+                resumed_llm, mode="staged", incremental=False, checkpointer=checkpointer, agents=agents
+            )
+            snapshot = await app.aget_state(CONFIG)
+            return snapshot.next, await app.ainvoke(None, CONFIG)
+
+    pending, final = asyncio.run(resume())
+
+    assert pending == ("organize",)
+    assert "calls_summarize" not in resumed_llm.stats
+    assert resumed_llm.stats["calls_classify_batch"] > 0
+    assert sum(len(numbers) for numbers in final["categorized_patents"].values()) == len(
+        final["summarized_patents"]
+    )
+    assert final["report_files"]
+
+
+def test_resume_restores_finished_items(make_agents, fake_llm):
+    interrupted = make_agents(fake_llm, "first")
+    interrupt_organizer(interrupted)
+    app = create_patent_workflow(fake_llm, mode="staged", incremental=False, agents=interrupted)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(app.ainvoke(PatentState(run_id=RUN_ID)))
+    summarized = fake_llm.stats["calls_summarize"]
+
+    # 노드 경계 기록 없이 같은 실행 ID로 다시 실행해도 요약이 끝난 특허는 항목 체크포인트에서 복원
+    resumed_llm = FakeChatModel(latency=0)
+    agents = make_agents(resumed_llm, "resumed")
+    agents.item_checkpoint.close()
+    agents.item_checkpoint = interrupted.item_checkpoint
+    app = create_patent_workflow(resumed_llm, mode="staged", incremental=False, agents=agents)
+    final = asyncio.run(app.ainvoke(PatentState(run_id=RUN_ID)))
+
+    assert summarized > 0
+    assert "calls_summarize" not in resumed_llm.stats
+    assert all(patent.ai_summary for patent in final["summarized_patents"])
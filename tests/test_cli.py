@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+import cli
+import main as main_module
+from config import Config
+from patent_store import PatentStore
+
+
+@pytest.fixture
+def stages(make_agents, fake_llm, tmp_path, monkeypatch):
+    """실제 CLI처럼 명령마다 에이전트 모음을 새로 만들되 모두 같은 임시 저장소/캐시를 쓰도록 설정"""
+    created = []
+
+    def create_agents(args, use_llm):
+        created.append(make_agents(fake_llm if use_llm else None))
+        return created[-1]
+
+    monkeypatch.setattr(cli, "_create_agents", create_agents)
+    # search는 기본 경로로 저장소를 여는데 기본 경로는 모듈을 불러올 때 정해지므로 같은 저장소로 바꿈
+    monkeypatch.setattr(PatentStore.__init__, "__defaults__", (str(tmp_path / "run" / "patents.sqlite3"),))
+    # report --formats/--shard는 Config를 바꾸므로 테스트가 끝나면 되돌림
+    monkeypatch.setattr(Config, "REPORT_FORMATS", Config.REPORT_FORMATS)
+    monkeypatch.setattr(Config, "REPORT_SHARDED", Config.REPORT_SHARDED)
+    return created
+
+
+def test_parse_args_for_each_command():
+    args = cli.parse_args(["collect", "--cpc-codes", "G06N,G06T", "--pages", "2"])
+    assert (args.command, args.cpc_codes, args.pages, args.rows) == ("collect", "G06N,G06T", 2, Config.NUM_OF_ROWS)
+    assert args.fake_llm == 0.0
+
+    args = cli.parse_args(["summarize", "--displayed", "--limit", "5", "--fake-llm", "0.01"])
+    assert (args.displayed, args.limit, args.fake_llm) == (True, 5, 0.01)
+
+    args = cli.parse_args(["classify", "--unsummarized"])
+    assert args.unsummarized and args.limit is None
+
+    # run 뒤의 인자는 main.py에 그대로 전달
+    assert cli.parse_args(["run", "--resume", "20250101_120000"]).main_args == ["--resume", "20250101_120000"]
+    assert cli.parse_args(["--import-times", "run", "--fake-llm", "0.1"]).main_args == ["--fake-llm", "0.1"]
+    assert cli.parse_args(["search", "run", "--limit", "3"]).query == ["run"]
+
+    with pytest.raises(SystemExit):
+        cli.parse_args([])
+
+
+def test_stage_commands_share_the_store(stages, fake_llm, monkeypatch):
+    monkeypatch.setattr(Config, "PATENT_PER_CATEGORY", 5)
+    cli.main(["collect", "--pages", "2", "--rows", "50"])
+    assert stages[-1].store.count() == 100
+    assert fake_llm.stats == {}
+
+    # 먼저 분류하고 보고서에 표시될 특허만 요약
+    cli.main(["classify", "--unsummarized"])
+    assert sum(stages[-1].store.category_counts().values()) == 100
+    assert "calls_summarize" not in fake_llm.stats
+
+    cli.main(["summarize", "--displayed"])
+    summarized = len(stages[-1].store.read_records(summarized=True))
+    assert summarized == fake_llm.stats["calls_summarize"] <= 5 * len(Config.PATENT_CATEGORIES)
+
+    cli.main(["report", "--formats", "md,json"])
+    reports = sorted(name for name in os.listdir(Config.OUTPUT_DIR) if name.startswith("patent_report"))
+    assert [os.path.splitext(name)[1] for name in reports] == [".json", ".md"]
+    assert fake_llm.stats["calls_summarize"] == summarized
+
+
+def test_search_uses_the_store(stages, capsys):
+    cli.main(["collect", "--pages", "1", "--rows", "50"])
+    capsys.readouterr()
+
+    cli.main(["search", "의료", "영상", "--limit", "3"])
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("검색 결과 3건")
+    assert all("[미분류]" in line for line in lines[1:4])
+
+
+def test_value_errors_exit_with_status_2(stages, capsys):
+    with pytest.raises(SystemExit) as exited:
+        cli.main(["search"])
+
+    assert exited.value.code == 2
+    assert "검색어를 입력해주세요" in capsys.readouterr().out
+
+
+def test_run_forwards_arguments_to_main(monkeypatch):
+    forwarded = []
+
+    async def fake_main(argv):
+        forwarded.append(argv)
+
+    monkeypatch.setattr(main_module, "main", fake_main)
+
+    cli.main(["run", "--resume", "20250101_120000"])
+
+    assert forwarded == [["--resume", "20250101_120000"]]
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+import kipris_stub
+from agents.collector import PatentCollectorAgent
+from config import Config
+from kipris_stub import start_stub_server
+from patent_store import PatentStore
+from scheduler import TokenBucket
+
+
+class ScriptedRolls:
+    """스텁 서버의 오류 판정 난수를 정해진 순서로 돌려줌 (다 쓰면 항상 성공)"""
+
+    def __init__(self, *rolls: float):
+        self.rolls = list(rolls)
+
+    def random(self) -> float:
+        return self.rolls.pop(0) if self.rolls else 0.99
+
+
+@pytest.fixture
+def stub():
+    server, _ = start_stub_server(total=75)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """수집기의 백오프 대기 시간을 기록하고 실제로는 기다리지 않음"""
+    delays: list[float] = []
+    original = asyncio.sleep
+
+    async def sleep(delay, *args, **kwargs):
+        delays.append(delay)
+        await original(0)
+
+    monkeypatch.setattr("agents.collector.asyncio.sleep", sleep)
+    return delays
+
+
+@pytest.fixture
+def collector(stub, store_path, monkeypatch):
+    monkeypatch.setenv("KIPRIS_API_KEY", "stub")
+    agent = PatentCollectorAgent(
+        store=PatentStore(store_path),
+        limits=(asyncio.Semaphore(Config.KIPRIS_MAX_CONCURRENCY), TokenBucket(0, 1)),
+    )
+    agent.url = stub.url
+    yield agent
+    agent.store.close()
+
+
+def test_stops_at_total_count(stub, collector):
+    patents = asyncio.run(collector.collect_from_api("G06N", total_pages=10, num_of_rows=30))
+
+    assert len(patents) == 75
+    assert len({p.ApplicationNumber for p in patents}) == 75
+    # 첫 페이지의 totalCount(75)로 필요한 3페이지만 요청
+    assert stub.requests == 3
+    assert collector.failed_pages == []
+
+
+def test_stream_stops_at_total_count(stub, collector):
+    async def run() -> list:
+        queue: asyncio.Queue = asyncio.Queue()
+        await collector.stream_from_api(queue, "G06N", total_pages=10, num_of_rows=30)
+        return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    patents = asyncio.run(run())
+
+    assert len(patents) == 75
+    assert stub.requests == 3
+
+
+def test_retries_with_exponential_backoff(stub, collector, sleeps):
+    stub.rate_limit_rate = 0.5
+    stub.rng = ScriptedRolls(0.0, 0.0)  # 첫 두 요청은 429
+
+    patents = asyncio.run(collector.collect_from_api("G06N", total_pages=1, num_of_rows=30))
+
+    assert len(patents) == 30
+    assert stub.requests == 3
+    assert sleeps == [0.5, 1.0]
+    assert collector.metrics.counters[("patent_kipris_retries_total", ())] == 2
+    assert collector.page_stats[0]["attempts"] == 3
+
+
+def test_server_errors_are_retried(stub, collector, sleeps):
+    stub.error_rate = 0.5
+    stub.rng = ScriptedRolls(0.0)  # 첫 요청은 500
+
+    patents = asyncio.run(collector.collect_from_api("G06N", total_pages=1, num_of_rows=30))
+
+    assert len(patents) == 30
+    assert sleeps == [0.5]
+    assert collector.metrics.counters[("patent_kipris_errors_total", (("error", "HTTP500"),))] == 1
+
+
+def test_gives_up_after_max_retries(stub, collector, sleeps):
+    stub.rate_limit_rate = 1.0  # 모든 요청이 429
+
+    patents = asyncio.run(collector.collect_from_api("G06N", total_pages=5, num_of_rows=30))
+
+    assert patents == []
+    assert stub.requests == Config.KIPRIS_MAX_RETRIES + 1
+    assert sleeps == [0.5 * 2**attempt for attempt in range(Config.KIPRIS_MAX_RETRIES)]
+    # 전체 건수를 모르면 실패한 첫 페이지 이후는 요청하지 않음
+    assert collector.failed_pages == [("G06N", 1)]
+
+
+@pytest.fixture
+def unnumbered(monkeypatch):
+    """스텁 서버가 5건마다 출원번호 없이('N/A') 응답하도록 함"""
+    original = kipris_stub.make_patent
+
+    def make_patent(cpc_number, index, *args):
+        patent = original(cpc_number, index, *args)
+        if index % 5 == 0:
+            patent["ApplicationNumber"] = "N/A"
+        return patent
+
+    monkeypatch.setattr(kipris_stub, "make_patent", make_patent)
+
+
+def test_records_without_application_number_are_not_merged(stub, collector, unnumbered):
+    patents = asyncio.run(collector.collect_from_api(["G06N", "G06F"], total_pages=3, num_of_rows=30))
+
+    # 코드마다 75건 중 15건이 'N/A'이지만 서로 다른 특허로 유지
+    assert len(patents) == 150
+    missing = [patent for patent in patents if patent.ApplicationNumber == "N/A"]
+    assert len(missing) == 30
+    assert all(len(patent.CPCCodes) == 1 for patent in missing)
+
+
+def test_stream_keeps_records_without_application_number(stub, collector, unnumbered):
+    async def run() -> tuple[int, list]:
+        queue: asyncio.Queue = asyncio.Queue()
+        count = await collector.stream_from_api(queue, ["G06N", "G06F"], total_pages=3, num_of_rows=30)
+        return count, [queue.get_nowait() for _ in range(queue.qsize())]
+
+    count, patents = asyncio.run(run())
+
+    assert count == len(patents) == 150
+    assert sum(patent.ApplicationNumber == "N/A" for patent in patents) == 30
@@ -0,0 +1,190 @@
+import asyncio
+import random
+
+import numpy as np
+
+from agents.deduplicator import PatentDedupAgent
+from dedup import MinHasher, NearDuplicateIndex, find_duplicates, lsh_params, normalize
+from patent_store import PatentStore
+from records import PatentRecord
+from state import PatentState
+
+
+def abstract(seed: int, length: int = 1500) -> str:
+    """한글 음절로 만든 임의 초록 (같은 seed면 같은 문장)"""
+    rng = random.Random(seed)
+    return "".join(
+        " " if rng.random() < 0.15 else chr(rng.randrange(0xAC00, 0xD7A4)) for _ in range(length)
+    )
+
+
+def edited(text: str, count: int, seed: int = 0) -> str:
+    """text의 count개 위치를 다른 음절로 바꾼 초록 (분할/계속 출원의 작은 수정)"""
+    rng = random.Random(seed)
+    chars = list(text)
+    for position in rng.sample(range(len(chars)), count):
+        chars[position] = chr(rng.randrange(0xAC00, 0xD7A4))
+    return "".join(chars)
+
+
+def patent(number: str, text: str, content_hash=None) -> PatentRecord:
+    return PatentRecord(ApplicationNumber=number, Abstract=text, content_hash=content_hash)
+
+
+def test_normalize_ignores_case_spaces_and_punctuation():
+    assert normalize("Deep  Learning,\n(신경망)_모델!") == "deeplearning신경망모델"
+    assert normalize(None) == ""
+
+
+def test_lsh_params_match_threshold():
+    for threshold in (0.5, 0.7, 0.85, 0.95):
+        bands, rows = lsh_params(threshold, 64)
+        assert bands * rows <= 64
+        assert abs((1 / bands) ** (1 / rows) - threshold) < 0.1
+
+
+def test_signatures_do_not_depend_on_batch():
+    hasher = MinHasher(num_perm=64, shingle_size=4)
+    texts = [normalize(abstract(seed)) for seed in range(3)]
+
+    batched = hasher.signatures(texts)
+    single = np.vstack([hasher.signatures([text]) for text in texts])
+
+    # 이어 붙인 초록의 경계를 넘는 n-gram은 서명에 들어가지 않음
+    assert np.array_equal(batched, single)
+
+
+def test_similarity_estimates_jaccard():
+    hasher = MinHasher(num_perm=64, shingle_size=4)
+    base = normalize(abstract(1))
+    same, near, other = hasher.signatures([base, normalize(edited(abstract(1), 3)), normalize(abstract(2))])
+
+    assert hasher.similarity(same, same) == 1.0
+    assert hasher.similarity(same, near) > 0.9
+    assert hasher.similarity(same, other) < 0.1
+
+
+def test_near_duplicates_link_to_first_patent():
+    text = abstract(1)
+    patents = [
+        patent("A", text),
+        patent("B", abstract(2)),
+        patent("C", edited(text, 3)),
+        patent("D", text.replace(" ", "\n")),  # 공백 차이만 있는 초록
+    ]
+
+    assert find_duplicates(patents) == {"C": "A", "D": "A"}
+
+
+def test_threshold_controls_grouping():
+    text = abstract(1)
+    # 절반을 다른 문장으로 바꾼 초록 (자카드 유사도 약 0.3)
+    half = text[:750] + abstract(2)[750:]
+    patents = [patent("A", text), patent("B", half)]
+
+    assert find_duplicates(patents, NearDuplicateIndex(threshold=0.85)) == {}
+    assert find_duplicates(patents, NearDuplicateIndex(threshold=0.2)) == {"B": "A"}
+
+
+def test_short_abstracts_are_not_compared():
+    patents = [patent("A", "짧은 초록"), patent("B", "짧은 초록")]
+
+    assert find_duplicates(patents) == {}
+
+
+def test_content_hash_links_without_signature():
+    index = NearDuplicateIndex()
+    text = abstract(1)
+
+    first = index.add_many(["A", "B"], [text, abstract(2)], ["h1", "h2"])
+    # 해시가 같으면 초록을 비교하지 않고 먼저 본 특허의 대표에 연결
+    second = index.add_many(["C", "D"], [abstract(3), edited(text, 3)], ["h1", None])
+
+    assert first == [None, None]
+    assert second == ["A", "A"]
+    assert len(index.keys) == 2
+    assert index.duplicates == 2
+
+
+def test_streaming_add_matches_batch():
+    texts = [abstract(1), abstract(2), edited(abstract(1), 3), edited(abstract(2), 3)]
+    index = NearDuplicateIndex()
+
+    streamed = [index.add(key, text) for key, text in zip("ABCD", texts)]
+
+    assert streamed == [None, None, "A", "B"]
+    assert find_duplicates(patent(key, text) for key, text in zip("ABCD", texts)) == {"C": "A", "D": "B"}
+
+
+def test_given_signatures_are_not_recomputed(monkeypatch):
+    patents = [patent("A", abstract(1)), patent("B", abstract(2)), patent("C", edited(abstract(1), 3))]
+    signatures: dict = {}
+    assert find_duplicates(patents, signatures=signatures) == {"C": "A"}
+    assert set(signatures) == {"A", "B", "C"}
+
+    signed = []
+    original = MinHasher.signatures
+    monkeypatch.setattr(MinHasher, "signatures", lambda self, texts: signed.extend(texts) or original(self, texts))
+
+    assert find_duplicates(patents, signatures=signatures) == {"C": "A"}
+    assert signed == []
+
+
+def test_incremental_runs_only_sign_new_patents(store_path):
+    store = PatentStore(store_path)
+    known = [patent(str(i), abstract(i)) for i in range(5)]
+    store.upsert(known)
+    agent = PatentDedupAgent(store=store)
+
+    asyncio.run(agent.cluster_patents(PatentState(known_patents=known)))
+    assert (agent.signed, agent.reused) == (5, 0)
+
+    # 다음 실행: 이전 특허는 저장된 서명을 쓰고 새 특허만 서명 계산
+    new = [patent("5", abstract(5)), patent("6", edited(abstract(1), 3))]
+    store.upsert(new)
+    state = asyncio.run(agent.cluster_patents(PatentState(known_patents=known, raw_patents=new)))
+
+    assert (agent.signed, agent.reused) == (2, 5)
+    assert state.duplicate_of == {"6": "1"}
+
+    # 초록이 바뀐 특허는 저장된 서명을 버리고 다시 계산
+    store.upsert([patent("0", abstract(10))])
+    asyncio.run(agent.cluster_patents(PatentState(known_patents=store.read_records())))
+    assert (agent.signed, agent.reused) == (1, 6)
+    store.close()
+
+
+def test_copy_results_fills_stored_duplicates_once():
+    # 저장소에서 다시 불러온 특허처럼 중복 특허에도 이전 분류가 남아 있음
+    representative = PatentRecord(ApplicationNumber="1", Abstract=abstract(1), ai_summary="새 요약", category="자연어처리")
+    duplicate = PatentRecord(ApplicationNumber="2", Abstract=edited(abstract(1), 3), category="의료/건강")
+    state = PatentState(
+        raw_patents=[representative],
+        summarized_patents=[representative],
+        duplicate_patents=[duplicate],
+        duplicate_of={"2": "1"},
+    )
+    agent = PatentDedupAgent()
+
+    assert agent.copy_results(state) == 1
+    assert (duplicate.ai_summary, duplicate.category) == ("새 요약", "자연어처리")
+
+    # 다시 호출해도 결과 목록에 두 번 넣지 않음
+    assert agent.copy_results(state) == 0
+    assert [patent.ApplicationNumber for patent in state.summarized_patents] == ["1", "2"]
+
+
+def test_copy_results_uses_summarized_records_after_resume():
+    # 체크포인트에서 복원한 상태는 raw_patents와 summarized_patents가 서로 다른 레코드
+    raw = PatentRecord(ApplicationNumber="1", Abstract=abstract(1))
+    summarized = PatentRecord(ApplicationNumber="1", Abstract=abstract(1), ai_summary="요약", category="자연어처리")
+    duplicate = PatentRecord(ApplicationNumber="2", Abstract=edited(abstract(1), 3))
+    state = PatentState(
+        raw_patents=[raw],
+        summarized_patents=[summarized],
+        duplicate_patents=[duplicate],
+        duplicate_of={"2": "1"},
+    )
+
+    assert PatentDedupAgent().copy_results(state) == 1
+    assert (duplicate.ai_summary, duplicate.category) == ("요약", "자연어처리")
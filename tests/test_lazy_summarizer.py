@@ -0,0 +1,43 @@
+import asyncio
+
+from benchmark import FakeChatModel
+from agents.lazy_summarizer import LazySummaryAgent
+from dedup import patent_key
+from state import PatentState
+from workflow import create_patent_workflow
+
+
+def run(agents, mode: str) -> PatentState:
+    app = create_patent_workflow(agents.llm, mode=mode, incremental=False, agents=agents)
+    return PatentState(**asyncio.run(app.ainvoke(PatentState(run_id=mode))))
+
+
+def test_duplicates_are_not_summarized_again(make_agents, fake_llm):
+    agents = make_agents(fake_llm)
+
+    state = run(agents, "lazy")
+
+    displayed = LazySummaryAgent.displayed(state.categorized_records(), agents.lazy_summarizer.per_category)
+    # 표시 특허마다 (근사 중복이면 대표 특허를) 한 번만 요약
+    representatives = {state.duplicate_of.get(patent_key(patent), patent_key(patent)) for patent in displayed}
+    assert state.duplicate_patents
+    assert fake_llm.stats["calls_summarize"] == len(representatives)
+    assert all(patent.ai_summary for patent in displayed)
+
+    shown = [patent_key(patent) for patent in displayed if patent_key(patent) in state.duplicate_of]
+    assert shown
+    stored = agents.store.read(["ai_summary"], application_numbers=shown)
+    assert all(row["ai_summary"] for row in stored)
+
+
+def test_lazy_mode_never_summarizes_more_than_staged(make_agents, fake_llm):
+    staged_llm = FakeChatModel(latency=0)
+    staged = run(make_agents(staged_llm, "staged"), "staged")
+
+    agents = make_agents(fake_llm, "lazy")
+    agents.lazy_summarizer.per_category = None  # 모든 특허를 표시하면 staged 모드와 같은 특허를 요약
+    lazy = run(agents, "lazy")
+
+    assert len(lazy.duplicate_patents) == len(staged.duplicate_patents) > 0
+    assert fake_llm.stats["calls_summarize"] == staged_llm.stats["calls_summarize"] == len(staged.raw_patents)
+    assert len(lazy.summarized_patents) == len(staged.summarized_patents)
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from agents.organizer import PatentOrganizerAgent
+from benchmark import FakeChatModel
+from records import PatentRecord
+from scheduler import AdaptiveScheduler
+
+
+class BatchReply(FakeChatModel):
+    """배치 분류 호출에는 정해진 응답을, 단건 분류 호출에는 발명명 키워드로 고른 카테고리를 돌려주는 가짜 모델"""
+
+    reply: str = ""
+
+    def _respond(self, system: str, human: str) -> tuple[str, str]:
+        kind, content = super()._respond(system, human)
+        return (kind, self.reply) if kind == "classify_batch" else (kind, content)
+
+
+PATENTS = [
+    PatentRecord(ApplicationNumber="1", InventionName="질병 진단 장치", ai_summary="요약 1"),
+    PatentRecord(ApplicationNumber="2", InventionName="자율주행 로봇", ai_summary="요약 2"),
+    PatentRecord(ApplicationNumber="3", InventionName="영상 객체 검출", ai_summary="요약 3"),
+]
+
+
+def classify(reply: str) -> tuple[list, FakeChatModel]:
+    llm = BatchReply(latency=0, reply=reply)
+    scheduler = AdaptiveScheduler(rate_limit=0, hedge_min_samples=10**6)
+    organizer = PatentOrganizerAgent(llm, scheduler=scheduler)
+    results = asyncio.run(organizer.categorize_batch(PATENTS))
+    return [(category, patent.ApplicationNumber) for category, patent in results], llm
+
+
+def test_batch_reply_in_code_block_is_parsed():
+    reply = '```json\n{"1": "의료/건강", "2": "자율주행/로보틱스", "3": " 이미지처리/비전 "}\n```'
+
+    results, llm = classify(reply)
+
+    assert results == [("의료/건강", "1"), ("자율주행/로보틱스", "2"), ("이미지처리/비전", "3")]
+    assert llm.stats["calls_classify_batch"] == 1
+    assert "calls_classify" not in llm.stats
+
+
+def test_missing_and_unknown_items_are_retried_one_by_one():
+    # 2번은 응답에서 빠지고 3번은 목록에 없는 카테고리
+    results, llm = classify('{"1": "의료/건강", "3": "컴퓨터 비전"}')
+
+    assert results == [("의료/건강", "1"), ("자율주행/로보틱스", "2"), ("이미지처리/비전", "3")]
+    assert llm.stats["calls_classify"] == 2
+
+
+@pytest.mark.parametrize("reply", ["분류할 수 없습니다", '["의료/건강"]', '{"1": '])
+def test_unparseable_reply_retries_every_item(reply):
+    results, llm = classify(reply)
+
+    assert [number for _, number in results] == ["1", "2", "3"]
+    assert results[0][0] == "의료/건강"
+    assert llm.stats["calls_classify"] == 3
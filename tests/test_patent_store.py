@@ -0,0 +1,117 @@
+import pytest
+
+from patent_store import PatentStore
+from records import PatentRecord
+
+
+@pytest.fixture
+def store(store_path):
+    store = PatentStore(store_path)
+    yield store
+    store.close()
+
+
+def record(number: str, abstract: str = "초록", **fields) -> PatentRecord:
+    return PatentRecord(ApplicationNumber=number, InventionName=f"발명 {number}", Abstract=abstract, **fields)
+
+
+def classify(store: PatentStore, *numbers: str, category: str = "자연어처리") -> None:
+    store.record_results({category: [record(number, ai_summary=f"요약 {number}") for number in numbers]})
+
+
+def test_upsert_inserts_and_reads_back(store):
+    store.upsert([record("1"), record("2", CPCCodes=("G06N",))])
+
+    assert store.count() == 2
+    assert [patent.ApplicationNumber for patent in store.read_records()] == ["1", "2"]
+    assert store.read_records(application_numbers=["2"])[0].CPCCodes == ("G06N",)
+    assert store.read(["ApplicationNumber", "Abstract"], application_numbers=["1"]) == [
+        {"ApplicationNumber": "1", "Abstract": "초록"}
+    ]
+
+
+def test_unknown_columns_are_rejected(store):
+    with pytest.raises(ValueError):
+        store.read(["ApplicationNumber", "password"])
+
+
+def test_same_content_keeps_results(store):
+    store.upsert([record("1")])
+    classify(store, "1")
+    first_seen = store.read(["first_seen"])[0]["first_seen"]
+
+    # 태그/공백만 다른 초록은 같은 내용으로 봄
+    store.upsert([record("1", abstract="  <p>초록</p> ")])
+
+    row = store.read(["ai_summary", "category", "first_seen", "last_seen"])[0]
+    assert row["ai_summary"] == "요약 1"
+    assert row["category"] == "자연어처리"
+    assert row["first_seen"] == first_seen <= row["last_seen"]
+    assert store.pending_numbers(["1"]) == set()
+
+
+def test_changed_content_discards_results(store):
+    store.upsert([record("1"), record("2")])
+    classify(store, "1", "2")
+
+    store.upsert([record("1", abstract="정정된 초록"), record("2")])
+
+    assert store.pending_numbers(["1", "2"]) == {"1"}
+    assert store.read(["ai_summary", "category"], application_numbers=["1"]) == [
+        {"ai_summary": None, "category": None}
+    ]
+    assert store.category_counts() == {"자연어처리": 1}
+
+
+def test_cpc_codes_are_merged_across_collections(store):
+    store.upsert([record("1", CPCCodes=("G06N",)), record("2", CPCCodes=("H04L",))])
+    store.upsert([record("1", CPCCodes=("G06F", "G06N")), record("2")])
+
+    assert store.read_records(application_numbers=["1"])[0].CPCCodes == ("G06N", "G06F")
+    # CPCCodes가 없는 특허(CSV 등에서 읽은 특허)는 저장된 코드를 유지
+    assert store.read_records(application_numbers=["2"])[0].CPCCodes == ("H04L",)
+    assert [p.ApplicationNumber for p in store.read_records(cpc_codes=["G06F"])] == ["1"]
+    assert store.read_records(cpc_codes=["G06"]) == []
+    assert store.read_records(cpc_codes=[]) == []
+
+
+def test_record_summaries_and_result_filters(store):
+    store.upsert([record("1"), record("2"), record("3")])
+    store.record_summaries([record("1", ai_summary="요약 1"), record("2")])
+    classify(store, "3", category="의료/건강")
+
+    assert [p.ApplicationNumber for p in store.read_records(summarized=True)] == ["1", "3"]
+    assert [p.ApplicationNumber for p in store.read_records(processed=False)] == ["1", "2"]
+    assert [p.ApplicationNumber for p in store.read_records(categories=["의료/건강"])] == ["3"]
+    assert [p.ApplicationNumber for p in store.iter_records(limit=2)] == ["1", "2"]
+
+
+def test_search_index_follows_upserts(store):
+    store.upsert([record("1", abstract="라이다 센서")])
+    assert [r["ApplicationNumber"] for r in store.search("라이다")] == ["1"]
+
+    # 초록이 바뀌면 이전 내용은 색인에서 지우고 새 내용을 색인
+    store.upsert([record("1", abstract="레이더 센서")])
+
+    assert store.search("라이다") == []
+    assert [r["ApplicationNumber"] for r in store.search("레이더")] == ["1"]
+    assert store.search_index.count() == 1
+
+
+def test_old_hashes_are_recomputed_on_open(store_path):
+    store = PatentStore(store_path)
+    store.upsert([record("1")])
+    classify(store, "1")
+    current = store.read(["content_hash"])[0]["content_hash"]
+    store.conn.execute("UPDATE patents SET content_hash = 'raw'")
+    store.conn.execute("PRAGMA user_version = 0")
+    store.conn.commit()
+    store.close()
+
+    store = PatentStore(store_path)
+
+    # 해시 방식이 바뀌어도 요약/분류 결과는 유지하고 해시만 다시 계산
+    assert store.read(["content_hash", "category"]) == [{"content_hash": current, "category": "자연어처리"}]
+    store.upsert([record("1")])
+    assert store.pending_numbers(["1"]) == set()
+    store.close()
@@ -0,0 +1,56 @@
+import asyncio
+
+from benchmark import FakeChatModel
+from agents.pipeline import item_key
+from records import PatentRecord
+from state import PatentState
+from workflow import create_patent_workflow
+
+
+def run(agents, run_id: str = "stream") -> PatentState:
+    app = create_patent_workflow(agents.llm, mode="stream", incremental=False, agents=agents)
+    return PatentState(**asyncio.run(app.ainvoke(PatentState(run_id=run_id))))
+
+
+def test_item_key_follows_application_number():
+    first = PatentRecord(ApplicationNumber="1", Abstract="라이다 센서")
+    changed = PatentRecord(ApplicationNumber="1", Abstract="레이더 센서")
+
+    assert item_key(first) == item_key(changed)
+    assert item_key(first) != item_key(PatentRecord(ApplicationNumber="2", Abstract="라이다 센서"))
+
+
+def test_records_without_application_number_get_distinct_keys():
+    first = PatentRecord(ApplicationNumber="N/A", InventionName="센서", Abstract="라이다 센서")
+    second = PatentRecord(ApplicationNumber="N/A", InventionName="센서", Abstract="레이더 센서")
+    empty = PatentRecord(ApplicationNumber="", InventionName="센서", Abstract="라이다 센서")
+
+    assert item_key(first) != item_key(second)
+    # 번호가 비어 있어도 내용이 같으면 같은 항목 (태그/공백만 다른 내용 포함)
+    assert item_key(first) == item_key(empty)
+    assert item_key(first) == item_key(PatentRecord(InventionName="센서", Abstract="<p>라이다  센서</p>"))
+    hashed = PatentRecord(ApplicationNumber="N/A", content_hash="abc")
+    assert item_key(hashed) == item_key(PatentRecord(content_hash="abc"))
+
+
+def test_resumed_stream_restores_checkpointed_items(make_agents, fake_llm):
+    interrupted = make_agents(fake_llm, "first")
+    # 근사 중복의 대표는 도착 순서에 따라 달라지므로 중복 묶기 없이 비교
+    interrupted.dedup = None
+    first = run(interrupted)
+    assert fake_llm.stats["calls_summarize"] > 0
+
+    # 요약 캐시/저장소는 새로 만들고 항목 체크포인트만 이어받아 같은 실행 ID로 다시 실행
+    resumed_llm = FakeChatModel(latency=0)
+    agents = make_agents(resumed_llm, "resumed")
+    agents.dedup = None
+    agents.item_checkpoint.close()
+    agents.item_checkpoint = interrupted.item_checkpoint
+    resumed = run(agents)
+
+    assert resumed_llm.stats == {}
+    assert len(resumed.summarized_patents) == len(first.summarized_patents)
+    # 스트리밍은 도착 순서가 실행마다 다르므로 카테고리별 특허 집합만 비교
+    assert {category: set(numbers) for category, numbers in resumed.categorized_patents.items()} == {
+        category: set(numbers) for category, numbers in first.categorized_patents.items()
+    }
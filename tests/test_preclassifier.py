@@ -0,0 +1,78 @@
+import numpy as np
+
+from preclassifier import PatentPreClassifier
+from records import PatentRecord
+
+TOPICS = {
+    "의료/건강": "심전도 신호로 부정맥을 판별하는 방법",
+    "자율주행/로보틱스": "차선 변경 경로를 계획하는 주행 제어",
+    "자연어처리": "문장을 토큰으로 나누어 문맥을 파악",
+}
+
+
+def make(tmp_path, name: str = "model.npz", **options) -> PatentPreClassifier:
+    return PatentPreClassifier(model_path=str(tmp_path / name), n_features=2**10, **options)
+
+
+def labeled(count: int) -> list[tuple[str, PatentRecord]]:
+    """키워드 없이 주제 문장만 다른 학습용 (카테고리, 특허) 목록"""
+    categories = list(TOPICS)
+    return [
+        (
+            category,
+            PatentRecord(ApplicationNumber=str(i), InventionName=f"장치 {i}", Abstract=TOPICS[category]),
+        )
+        for i in range(count)
+        for category in [categories[i % len(categories)]]
+    ]
+
+
+def test_chunked_training_matches_single_updates(tmp_path):
+    results = labeled(1100)  # 학습 청크(512건) 경계를 두 번 넘김
+    chunked = make(tmp_path, "chunked.npz")
+    single = make(tmp_path, "single.npz")
+
+    chunked.learn(results)
+    for result in results:
+        single.learn([result])
+
+    assert chunked.n_docs == single.n_docs == 1100
+    assert np.allclose(chunked.class_sums, single.class_sums)
+    assert np.array_equal(chunked.class_counts, single.class_counts)
+    assert np.array_equal(chunked.doc_freq, single.doc_freq)
+
+
+def test_unknown_categories_are_not_learned(tmp_path):
+    classifier = make(tmp_path)
+
+    classifier.learn([("모르는 분야", PatentRecord(InventionName="장치")), ("컴퓨터 비전", PatentRecord())])
+
+    assert classifier.n_docs == 0
+
+
+def test_split_by_confidence(tmp_path):
+    classifier = make(tmp_path, threshold=0.5)
+    keyword = PatentRecord(ApplicationNumber="1", InventionName="질병 진단 장치")
+    unclear = PatentRecord(ApplicationNumber="2", InventionName="장치", Abstract="일반적인 방법")
+    both = PatentRecord(ApplicationNumber="3", InventionName="의료 영상 장치")
+
+    decided, remaining = classifier.split([keyword, unclear, both])
+
+    # 제목 키워드 하나면 확신도 0.6, 두 카테고리 키워드가 함께 있으면 차이 0
+    assert decided == [("의료/건강", keyword)]
+    assert remaining == [unclear, both]
+    assert classifier.stats()["skip_rate"] == 1 / 3
+
+
+def test_learned_centroids_decide_without_keywords(tmp_path):
+    classifier = make(tmp_path, threshold=0.5)
+    patent = PatentRecord(ApplicationNumber="x", InventionName="장치", Abstract=TOPICS["자연어처리"])
+    assert classifier.split([patent])[0] == []
+
+    classifier.learn(labeled(30))
+    classifier.save()
+
+    # 저장한 모델을 다시 읽으면 학습한 중심 벡터로 바로 분류
+    restored = make(tmp_path, threshold=0.5)
+    assert restored.n_docs == 30
+    assert restored.split([patent])[0] == [("자연어처리", patent)]
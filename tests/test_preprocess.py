@@ -0,0 +1,67 @@
+import asyncio
+
+from agents.preprocessor import PatentPreprocessAgent
+from preprocess import clean_texts, content_hashes
+from records import PatentRecord
+from state import PatentState
+
+
+def test_tags_and_entities_are_removed():
+    assert clean_texts(["H<sub>2</sub>O 분자", "&lt;b&gt;굵게&lt;/b&gt;", "첫 줄<br/>둘째 줄", "a&amp;b"]) == [
+        "H2O 분자",
+        "굵게",
+        "첫 줄 둘째 줄",
+        "a&b",
+    ]
+
+
+def test_whitespace_and_control_chars_are_normalized():
+    assert clean_texts(["  여러   공백\n줄 ", "x\u200by\x07", "탭\t구분"]) == ["여러 공백 줄", "xy", "탭 구분"]
+
+
+def test_unicode_is_normalized_without_touching_compatibility_jamo():
+    # 조합형 한글은 완성형으로, 전각 ASCII는 반각으로 (호환 자모 'ㄱ'은 그대로)
+    assert clean_texts(["\u1100\u1161\u1102\u1161", "ＡＢＣ１２３", "ㄱ자형"]) == ["가나", "ABC123", "ㄱ자형"]
+
+
+def test_placeholders_become_empty_only_when_requested():
+    texts = [" n/a ", "없음", "NULL", None, "N/A 기반 장치"]
+
+    assert clean_texts(texts) == ["", "", "", "", "N/A 기반 장치"]
+    assert clean_texts(texts, blank_placeholders=False) == ["n/a", "없음", "NULL", "", "N/A 기반 장치"]
+
+
+def test_separator_inside_text_keeps_columns_aligned():
+    assert clean_texts(["a\x00b", "c"]) == ["ab", "c"]
+    assert clean_texts([]) == []
+
+
+def test_content_hash_ignores_formatting_only_changes():
+    base = {"RegistrationNumber": "N/A", "InventionName": "센서", "Abstract": "라이다 센서"}
+    formatted = {"RegistrationNumber": None, "InventionName": " 센서 ", "Abstract": "<p>라이다  센서</p>"}
+    changed = {**base, "Abstract": "레이더 센서"}
+
+    hashes = content_hashes([base, formatted, changed])
+
+    assert hashes[0] == hashes[1]
+    assert hashes[0] != hashes[2]
+
+
+def test_agent_cleans_records_and_counts_abstracts():
+    patents = [
+        PatentRecord(ApplicationNumber="1", InventionName="N/A", Abstract="<p>" + "가" * 60 + "</p>"),
+        PatentRecord(ApplicationNumber="2", InventionName="센서", Abstract="해당 없음"),
+        PatentRecord(ApplicationNumber="3", InventionName="장치", Abstract="짧은 초록"),
+    ]
+    agent = PatentPreprocessAgent(min_abstract_length=50)
+
+    state = asyncio.run(agent.preprocess_patents(PatentState(raw_patents=patents)))
+
+    cleaned = state.raw_patents
+    # 발명명의 자리표시 값은 보고서 제목으로 쓰이므로 그대로 둠
+    assert [patent.InventionName for patent in cleaned] == ["N/A", "센서", "장치"]
+    assert [patent.Abstract for patent in cleaned] == ["가" * 60, "", "짧은 초록"]
+    assert cleaned[0].content_hash == content_hashes([patents[0]])[0]
+    stats = agent.stats()
+    assert (stats["patents"], stats["empty_abstracts"], stats["short_abstracts"]) == (3, 1, 1)
+    assert stats["chars_after"] < stats["chars_before"]
@@ -0,0 +1,90 @@
+import json
+import os
+
+import pytest
+
+from records import PatentRecord
+from report_writer import REPORT_TITLE, ReportWriter
+
+PATENTS = {
+    "의료/건강": [
+        PatentRecord(ApplicationNumber=str(i), InventionName=f"진단 장치 {i}", ai_summary=f"요약 {i}")
+        for i in range(3)
+    ],
+    "자연어처리": [
+        PatentRecord(ApplicationNumber="10", InventionName="<질의> 응답 & 번역", Abstract="요약 없는 초록"),
+    ],
+}
+COUNTS = {category: len(patents) for category, patents in PATENTS.items()}
+
+
+def write(tmp_path, **options) -> list[str]:
+    writer = ReportWriter(output_dir=str(tmp_path), **options)
+    return writer.write([("처리 특허", "4건")], COUNTS, lambda category: iter(PATENTS[category]), ["오류 1"])
+
+
+def read(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_single_file_reports_in_every_format(tmp_path):
+    files = write(tmp_path, formats=["md", "json", "html"], sharded=False, per_category=2)
+
+    assert [os.path.splitext(path)[1] for path in files] == [".md", ".json", ".html"]
+
+    markdown = read(files[0])
+    assert markdown.startswith(f"# {REPORT_TITLE}")
+    assert "| 의료/건강 | 3건 | 75.0% |" in markdown
+    assert "### 의료/건강 (3건)" in markdown
+    # 카테고리마다 per_category건만 표시
+    assert "진단 장치 1" in markdown and "진단 장치 2" not in markdown
+    assert "- **요약**: 요약 없는 초록" in markdown
+    assert "- 오류 1" in markdown
+
+    report = json.loads(read(files[1]))
+    assert report["info"] == {"처리 특허": "4건"}
+    assert [row["category"] for row in report["stats"]] == ["의료/건강", "자연어처리"]
+    medical, language = report["categories"]
+    assert (medical["count"], [patent["number"] for patent in medical["patents"]]) == (3, [1, 2])
+    assert language["patents"][0]["InventionName"] == "<질의> 응답 & 번역"
+    assert report["errors"] == ["오류 1"]
+    assert report["notes"]
+
+    page = read(files[2])
+    assert page.rstrip().endswith("</html>")
+    assert "&lt;질의&gt; 응답 &amp; 번역" in page
+    assert "<질의>" not in page
+
+
+def test_sharded_report_links_category_files(tmp_path):
+    files = write(tmp_path, formats=["md", "json"], sharded=True)
+
+    directory = os.path.dirname(files[0])
+    assert [os.path.basename(path) for path in files] == [
+        "index.md",
+        "index.json",
+        "03_의료_건강.md",
+        "03_의료_건강.json",
+        "05_자연어처리.md",
+        "05_자연어처리.json",
+    ]
+    assert all(os.path.dirname(path) == directory for path in files)
+
+    index = json.loads(read(files[1]))
+    assert [(entry["category"], entry["file"]) for entry in index["categories"]] == [
+        ("의료/건강", "03_의료_건강.json"),
+        ("자연어처리", "05_자연어처리.json"),
+    ]
+    assert "[의료/건강 (3건)](03_의료_건강.md)" in read(files[0])
+
+    # 분할하면 카테고리 파일에 모든 특허를 기록하고 목차로 돌아가는 링크를 둠
+    shard = json.loads(read(files[3]))
+    assert shard["index"] == "index.json"
+    assert len(shard["categories"][0]["patents"]) == 3
+    assert "[← 목차](index.md)" in read(files[2])
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ReportWriter(output_dir=str(tmp_path), formats=["md", "pdf"])
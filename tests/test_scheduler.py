@@ -0,0 +1,295 @@
+import asyncio
+
+import pytest
+
+from scheduler import AdaptiveScheduler
+
+
+class RateLimitError(Exception):
+    """openai.RateLimitError처럼 이름으로 429를 판별하는 오류"""
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """재시도 백오프 대기 시간을 기록하고 실제로는 기다리지 않음"""
+    delays: list[float] = []
+    original = asyncio.sleep
+
+    async def sleep(delay, *args, **kwargs):
+        delays.append(delay)
+        await original(0)
+
+    monkeypatch.setattr("scheduler.asyncio.sleep", sleep)
+    return delays
+
+
+def make_scheduler(**kwargs) -> AdaptiveScheduler:
+    options = dict(
+        initial_concurrency=4,
+        min_concurrency=1,
+        max_concurrency=16,
+        rate_limit=0,
+        burst=1,
+        max_retries=3,
+        call_timeout=0,
+        hedge_min_samples=10**6,  # 헤지 시점을 계산하지 않음
+    )
+    options.update(kwargs)
+    return AdaptiveScheduler(**options)
+
+
+def scripted(*outcomes):
+    """호출마다 outcomes를 순서대로 돌려주는 요청 (예외면 발생시킴, 다 쓰면 "ok")"""
+    outcomes = list(outcomes)
+
+    async def request():
+        outcome = outcomes.pop(0) if outcomes else "ok"
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    return request
+
+
+def test_success_increases_concurrency_additively():
+    scheduler = make_scheduler()
+
+    async def run():
+        for _ in range(4):
+            await scheduler.call(scripted("ok"))
+
+    asyncio.run(run())
+
+    # 현재 동시성(4)만큼 성공하면 약 1 증가
+    assert 4.9 < scheduler.limit < 5.0
+    assert scheduler.stats()["concurrency"] == 4
+
+
+def test_concurrency_never_exceeds_max():
+    scheduler = make_scheduler(initial_concurrency=16, max_concurrency=16)
+
+    async def run():
+        for _ in range(50):
+            await scheduler.call(scripted("ok"))
+
+    asyncio.run(run())
+
+    assert scheduler.limit == 16
+
+
+def test_rate_limit_halves_concurrency_and_retries(sleeps):
+    scheduler = make_scheduler(initial_concurrency=8)
+
+    result = asyncio.run(scheduler.call(scripted(RateLimitError(), RateLimitError(), "ok")))
+
+    assert result == "ok"
+    # 8 → 4 → 2로 줄어든 뒤 성공 1회만큼 증가
+    assert scheduler.limit == pytest.approx(2.5)
+    assert scheduler.rate_limited == 2
+    assert sleeps == [1, 2]
+    assert scheduler.metrics.counters[("patent_llm_retries_total", (("op", "llm"),))] == 2
+
+
+def test_timeout_counts_as_overload(sleeps):
+    scheduler = make_scheduler(initial_concurrency=2)
+
+    result = asyncio.run(scheduler.call(scripted(asyncio.TimeoutError(), "ok")))
+
+    assert result == "ok"
+    assert scheduler.timeouts == 1
+    assert scheduler.limit == pytest.approx(2.0)  # 2 → 1 → 성공 1회로 2
+
+
+def test_concurrency_never_drops_below_min(sleeps):
+    scheduler = make_scheduler(initial_concurrency=2, min_concurrency=2)
+
+    asyncio.run(scheduler.call(scripted(RateLimitError(), RateLimitError(), RateLimitError(), "ok")))
+
+    assert scheduler.limit == pytest.approx(2.5)
+
+
+def test_other_errors_are_not_retried(sleeps):
+    scheduler = make_scheduler()
+
+    with pytest.raises(ValueError):
+        asyncio.run(scheduler.call(scripted(ValueError("bad"), "ok")))
+
+    assert sleeps == []
+    assert scheduler.limit == 4
+    assert scheduler.active == 0
+
+
+def test_gives_up_after_max_retries(sleeps):
+    scheduler = make_scheduler(max_retries=2)
+
+    with pytest.raises(RateLimitError):
+        asyncio.run(scheduler.call(scripted(*[RateLimitError()] * 5)))
+
+    assert scheduler.rate_limited == 3
+    assert sleeps == [1, 2]
+    assert scheduler.limit == 1  # 4 → 2 → 1 → 최소값 유지
+    assert scheduler.active == 0
+
+
+def test_map_keeps_active_calls_within_limit():
+    scheduler = make_scheduler(initial_concurrency=3, max_concurrency=3)
+    peak = 0
+
+    async def work(item):
+        async def request():
+            nonlocal peak
+            peak = max(peak, scheduler.active)
+            await asyncio.sleep(0.001)
+            return item * 2
+
+        return await scheduler.call(request)
+
+    results = asyncio.run(scheduler.map(work, range(20)))
+
+    assert results == [item * 2 for item in range(20)]
+    assert peak == 3
+    assert scheduler.completed == 20
+
+
+def test_map_returns_exceptions_in_order():
+    scheduler = make_scheduler()
+
+    async def work(item):
+        if item == 1:
+            raise ValueError(item)
+        return item
+
+    results = asyncio.run(scheduler.map(work, range(3)))
+
+    assert results[0] == 0 and results[2] == 2
+    assert isinstance(results[1], ValueError)
+
+
+def hanging(*outcomes):
+    """outcomes 중 None은 응답 없이 멈춰 있는 호출 (취소되면 cancelled에 기록)"""
+    outcomes = list(outcomes)
+    cancelled: list[bool] = []
+
+    async def request():
+        outcome = outcomes.pop(0) if outcomes else "ok"
+        if outcome is None:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    return request, cancelled
+
+
+async def warm_up(scheduler: AdaptiveScheduler, calls: int = 16) -> None:
+    """빠른 호출로 지연 시간 표본을 채워 헤지 시점을 계산하게 함"""
+    for _ in range(calls):
+        await scheduler.call(scripted("ok"))
+
+
+def test_deadline_times_out_and_retries(sleeps):
+    scheduler = make_scheduler(initial_concurrency=4, call_timeout=0.05)
+    request, cancelled = hanging(None, "ok")
+
+    result = asyncio.run(scheduler.call(request))
+
+    assert result == "ok"
+    assert cancelled  # 기한이 지난 호출은 취소
+    assert scheduler.timeouts == 1
+    assert sleeps == [1]
+    assert scheduler.limit == pytest.approx(2.5)  # 4 → 2 → 성공 1회
+
+
+def test_hedge_sends_second_request_after_observed_quantile():
+    scheduler = make_scheduler(hedge_min_samples=16, hedge_max_ratio=0.5, call_timeout=5)
+
+    async def run():
+        await warm_up(scheduler)
+        assert "llm" in scheduler.hedge_delays
+        request, cancelled = hanging(None, "hedged")
+        return await scheduler.call(request), cancelled
+
+    result, cancelled = asyncio.run(run())
+
+    assert result == "hedged"
+    assert cancelled  # 늦은 원래 요청은 취소
+    assert scheduler.hedged == 1
+    assert scheduler.hedge_wins == 1
+    assert scheduler.timeouts == 0
+    assert scheduler.metrics.counters[("patent_llm_hedge_wins_total", (("op", "llm"),))] == 1
+
+
+def test_hedges_stay_within_ratio():
+    scheduler = make_scheduler(hedge_min_samples=16, hedge_max_ratio=0.1)
+
+    asyncio.run(warm_up(scheduler, calls=64))
+
+    assert scheduler.calls == 64
+    assert scheduler.hedged <= 0.1 * scheduler.calls
+
+
+def test_hedge_ratio_caps_extra_requests(sleeps):
+    scheduler = make_scheduler(hedge_min_samples=16, hedge_max_ratio=0, call_timeout=0.05)
+
+    async def run():
+        await warm_up(scheduler)
+        request, _ = hanging(None, "ok")
+        return await scheduler.call(request)
+
+    # 헤지 비율이 0이면 늦은 요청은 기한 초과 후 재시도로만 처리
+    assert asyncio.run(run()) == "ok"
+    assert scheduler.hedged == 0
+    assert scheduler.timeouts == 1
+
+
+def test_hedge_waits_for_other_request_when_one_fails():
+    scheduler = make_scheduler(hedge_min_samples=16, hedge_max_ratio=0.5, call_timeout=5)
+
+    async def run():
+        await warm_up(scheduler)
+        gate = asyncio.Event()
+        outcomes = ["slow", ValueError("hedge failed")]
+
+        async def request():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, BaseException):
+                gate.set()
+                raise outcome
+            await gate.wait()
+            return outcome
+
+        return await scheduler.call(request)
+
+    # 헤지 요청이 실패해도 원래 요청의 응답을 사용
+    assert asyncio.run(run()) == "slow"
+    assert scheduler.hedged == 1
+    assert scheduler.hedge_wins == 0
+
+
+def test_hedge_raises_first_error_when_both_fail():
+    scheduler = make_scheduler(hedge_min_samples=16, hedge_max_ratio=0.5, call_timeout=5)
+
+    async def run():
+        await warm_up(scheduler)
+        gate = asyncio.Event()
+        outcomes = ["first", "second"]
+
+        async def request():
+            outcome = outcomes.pop(0)
+            if outcome == "first":
+                await gate.wait()
+                await asyncio.sleep(0.01)
+                raise KeyError(outcome)
+            gate.set()
+            raise ValueError(outcome)
+
+        return await scheduler.call(request)
+
+    # 먼저 실패한 헤지 요청의 오류를 전달 (429/타임아웃이 아니므로 재시도하지 않음)
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+    assert scheduler.hedged == 1
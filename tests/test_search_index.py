@@ -0,0 +1,103 @@
+import pytest
+
+from patent_store import PatentStore
+from records import PatentRecord
+from search_index import match_expression, tokenize
+
+
+@pytest.fixture
+def store(store_path):
+    store = PatentStore(store_path)
+    yield store
+    store.close()
+
+
+def numbers(results) -> list[str]:
+    return [result["ApplicationNumber"] for result in results]
+
+
+def test_tokenize_uses_bigrams_for_korean_and_words_for_latin():
+    assert tokenize("영상인식 CNN") == ["영상", "상인", "인식", "cnn"]
+    assert tokenize("AI기반 3D-센서") == ["ai", "기반", "3d", "센서"]
+    assert tokenize("물 분자") == ["물", "분자"]
+    assert tokenize(None) == []
+
+
+def test_match_expression_joins_words_with_and():
+    assert match_expression("영상인식 cnn") == '"영상 상인 인식" "cnn"'
+    # 한 글자 단어는 그 글자로 시작하는 2-gram의 접두어 검색
+    assert match_expression("물") == '"물"*'
+    assert match_expression("  ") is None
+    assert match_expression("!!") is None
+
+
+def test_title_matches_rank_above_abstract_matches(store):
+    store.upsert(
+        [
+            PatentRecord(ApplicationNumber="1", InventionName="배터리 관리 장치", Abstract="영상인식을 보조하는 배터리"),
+            PatentRecord(ApplicationNumber="2", InventionName="영상인식 장치", Abstract="카메라 영상을 분석"),
+            PatentRecord(ApplicationNumber="3", InventionName="음성 합성", Abstract="음성 신호 처리"),
+        ]
+    )
+
+    results = store.search("영상인식")
+
+    # 발명명 가중치(3.0)가 초록(1.0)보다 높음
+    assert numbers(results) == ["2", "1"]
+    assert results[0]["score"] > results[1]["score"] > 0
+
+
+def test_korean_particles_do_not_block_matches(store):
+    store.upsert([PatentRecord(ApplicationNumber="1", InventionName="자율주행차량의 경로 계획")])
+
+    # 띄어쓰기 단위 검색이면 "자율주행차량의"와 "자율주행"이 다른 단어
+    assert numbers(store.search("자율주행")) == ["1"]
+    assert numbers(store.search("경로 계획")) == ["1"]
+    assert store.search("경로 합성") == []
+
+
+def test_placeholders_and_tags_are_not_indexed(store):
+    store.upsert(
+        [
+            PatentRecord(ApplicationNumber="1", InventionName="<p>반도체 <b>소자</b></p>", Abstract="N/A"),
+        ]
+    )
+
+    # 초록/요약의 자리표시 값은 빈 값으로 색인 (발명명은 내용 해시와 같이 그대로 둠)
+    assert store.search("n/a") == []
+    assert store.search("b") == []
+    assert numbers(store.search("반도체 소자")) == ["1"]
+
+
+def test_summary_updates_and_category_filter(store):
+    store.upsert(
+        [
+            PatentRecord(ApplicationNumber="1", InventionName="센서 장치"),
+            PatentRecord(ApplicationNumber="2", InventionName="센서 모듈"),
+        ]
+    )
+    store.record_results(
+        {
+            "하드웨어/센서": [PatentRecord(ApplicationNumber="1", ai_summary="라이다 기반 거리 측정")],
+            "자율주행/로보틱스": [PatentRecord(ApplicationNumber="2", ai_summary="로봇 팔 제어")],
+        }
+    )
+
+    assert numbers(store.search("라이다")) == ["1"]
+    assert numbers(store.search("센서", categories=["자율주행/로보틱스"])) == ["2"]
+    assert sorted(numbers(store.search("센서"))) == ["1", "2"]
+    assert len(store.search("센서", limit=1)) == 1
+
+
+def test_index_is_built_for_existing_store(store_path):
+    store = PatentStore(store_path)
+    store.upsert([PatentRecord(ApplicationNumber="1", InventionName="영상인식 장치")])
+    store.conn.execute("DELETE FROM search_index_info")
+    store.conn.commit()
+    store.close()
+
+    # 색인 버전이 없으면 다시 열 때 저장된 특허 전체를 색인
+    store = PatentStore(store_path)
+    assert store.search_index.count() == 1
+    assert numbers(store.search("영상인식")) == ["1"]
+    store.close()
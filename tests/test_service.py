@@ -0,0 +1,183 @@
+import asyncio
+import contextlib
+import json
+import os
+import sys
+
+import pytest
+
+from checkpoint import open_checkpointer
+from config import Config
+from service import JobOutput, PatentService
+
+JOB = {"pages": 1, "rows": 50, "mode": "staged", "incremental": True, "formats": ["md"]}
+
+
+@pytest.fixture
+def create_service(make_agents, fake_llm):
+    """공유 구성 요소(저장소/캐시/체크포인트/스케줄러)를 임시 디렉토리에 둔 서비스 생성 (이벤트 루프 안에서 호출)"""
+
+    def create(max_jobs: int = 2) -> PatentService:
+        service = PatentService(fake_llm, max_jobs)
+        service.shared = make_agents(fake_llm, "service", metrics=service.metrics)
+        return service
+
+    return create
+
+
+@contextlib.asynccontextmanager
+async def serving(service: PatentService, checkpoint_path: str):
+    """serve()와 같이 체크포인터, HTTP 서버, 작업 워커를 띄우고 (호스트, 포트)를 돌려줌"""
+    async with open_checkpointer(checkpoint_path) as checkpointer:
+        service.checkpointer = checkpointer
+        server = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+        workers = [asyncio.create_task(service.worker()) for _ in range(service.max_jobs)]
+        try:
+            yield server.sockets[0].getsockname()[:2]
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            server.close()
+            await server.wait_closed()
+
+
+async def request(address, method: str, path: str, body=None) -> tuple[int, str]:
+    """HTTP 요청 1건 (서비스는 응답 후 연결을 닫으므로 끝까지 읽음)"""
+    reader, writer = await asyncio.open_connection(*address)
+    data = body.encode("utf-8") if isinstance(body, str) else json.dumps(body or {}).encode("utf-8")
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), payload.decode("utf-8")
+
+
+async def submit(address, body: dict) -> dict:
+    status, payload = await request(address, "POST", "/jobs", body)
+    assert status == 202, payload
+    return json.loads(payload)
+
+
+async def events(address, job_id: str) -> list[dict]:
+    """작업이 끝날 때까지 진행 이벤트를 받음"""
+    status, payload = await request(address, "GET", f"/jobs/{job_id}/events")
+    assert status == 200
+    return [json.loads(line) for line in payload.splitlines()]
+
+
+def read(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_routes_and_job_lifecycle(create_service, kipris, tmp_path, monkeypatch):
+    # main()과 같이 작업 태스크의 print 출력을 진행 로그로 모음
+    monkeypatch.setattr(sys, "stdout", JobOutput(sys.stdout))
+
+    async def scenario():
+        service = create_service()
+        async with serving(service, str(tmp_path / "checkpoints.sqlite3")) as address:
+            status, health = await request(address, "GET", "/health")
+            assert status == 200
+            assert json.loads(health)["max_jobs"] == 2
+
+            status, payload = await request(address, "POST", "/jobs", {"cpc": "G06N"})
+            assert (status, json.loads(payload)["error"].startswith("알 수 없는 작업 옵션")) == (400, True)
+            assert (await request(address, "POST", "/jobs", "[1]"))[0] == 400
+            assert (await request(address, "GET", "/jobs/unknown"))[0] == 404
+            assert (await request(address, "PUT", "/jobs"))[0] == 404
+
+            job = await submit(address, {**JOB, "cpc_codes": "G06N"})
+            assert job["options"]["cpc_codes"] == ["G06N"]
+            progress = await events(address, job["id"])
+
+            status, payload = await request(address, "GET", f"/jobs/{job['id']}")
+            status, listed = await request(address, "GET", "/jobs")
+            metrics = (await request(address, "GET", "/metrics"))[1]
+            return service, job["id"], progress, json.loads(payload), json.loads(listed), metrics
+
+    service, job_id, progress, detail, listed, metrics = asyncio.run(scenario())
+
+    assert [event["state"] for event in progress if event["type"] == "state"] == ["queued", "running", "done"]
+    assert [event["node"] for event in progress if event["type"] == "node"] == [node["node"] for node in detail["nodes"]]
+    assert any(event["type"] == "log" for event in progress)
+    assert (detail["state"], detail["processed"]) == ("done", 50)
+    # 보고서는 작업별 디렉토리에 저장
+    assert detail["report_files"]
+    assert all(path.startswith(os.path.join(Config.OUTPUT_DIR, "jobs", job_id)) for path in detail["report_files"])
+    assert [job["id"] for job in listed] == [job_id]
+    assert 'patent_service_jobs_total{state="done"} 1' in metrics
+    # 끝난 작업의 항목 체크포인트는 서비스의 공유 기록에서 지움
+    assert service.shared.item_checkpoint.load(detail["run_id"], "summarize") == {}
+
+
+def test_cancel_and_resume(create_service, fake_llm, kipris, tmp_path):
+    async def scenario():
+        service = create_service(max_jobs=1)
+        organizing = asyncio.Event()
+        blocked = [True]
+
+        async def block(state):
+            organizing.set()
+            await asyncio.Event().wait()
+
+        # 첫 작업은 분류 노드에서 멈추도록 함 (요약 노드까지는 체크포인트에 기록됨)
+        create_agents = service.agents
+
+        def agents(options, output_dir=None):
+            agents = create_agents(options, output_dir)
+            if blocked.pop() if blocked else False:
+                agents.organizer.organize_patents = block
+            return agents
+
+        service.agents = agents
+        async with serving(service, str(tmp_path / "checkpoints.sqlite3")) as address:
+            running = await submit(address, {**JOB, "cpc_codes": ["G06T"]})
+            queued = await submit(address, {**JOB, "cpc_codes": ["G06T"]})
+            await organizing.wait()
+
+            # 대기 중인 작업은 바로 취소되고 실행되지 않음
+            status, payload = await request(address, "DELETE", f"/jobs/{queued['id']}")
+            assert (status, json.loads(payload)["state"]) == (200, "cancelled")
+
+            await request(address, "DELETE", f"/jobs/{running['id']}")
+            cancelled = (await events(address, running["id"]))[-1]
+            summarized = fake_llm.stats["calls_summarize"]
+
+            # 원래 작업의 옵션으로 마지막 노드 경계부터 이어서 실행
+            resumed = await submit(address, {"resume": running["run_id"]})
+            await events(address, resumed["id"])
+            detail = json.loads((await request(address, "GET", f"/jobs/{resumed['id']}"))[1])
+            return service, queued, cancelled, summarized, resumed, detail
+
+    service, queued, cancelled, summarized, resumed, detail = asyncio.run(scenario())
+
+    assert service.jobs[queued["id"]].started_at is None
+    assert (cancelled["state"], cancelled["resume"]) == ("cancelled", resumed["run_id"])
+    assert resumed["options"]["cpc_codes"] == ["G06T"]
+    assert detail["state"] == "done"
+    assert detail["nodes"][0]["node"] == "organize"
+    assert fake_llm.stats["calls_summarize"] == summarized
+    assert detail["processed"] == 50
+
+
+def test_jobs_only_process_their_cpc_codes(create_service, kipris, tmp_path):
+    async def scenario():
+        service = create_service()
+        async with serving(service, str(tmp_path / "checkpoints.sqlite3")) as address:
+            jobs = [await submit(address, {**JOB, "cpc_codes": [code]}) for code in ("G06N", "G06T")]
+            for job in jobs:
+                await events(address, job["id"])
+            # 저장소에서 불러오는 작업도 자기 CPC 코드로 검색된 특허만 처리
+            stored = await submit(address, {**JOB, "cpc_codes": ["G06T"], "incremental": False})
+            await events(address, stored["id"])
+            return service, [service.jobs[job["id"]] for job in [*jobs, stored]]
+
+    service, jobs = asyncio.run(scenario())
+
+    assert service.shared.store.count() == 100
+    assert [(job.state, job.processed) for job in jobs] == [("done", 50)] * 3
+    report = read(jobs[2].report_files[0])
+    assert "(G06T-" in report and "(G06N-" not in report
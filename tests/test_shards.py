@@ -0,0 +1,118 @@
+import os
+
+import pytest
+
+import shards
+from patent_store import PatentStore
+from records import PatentRecord
+
+
+@pytest.fixture
+def source(store_path):
+    """특허 40건 중 앞 10건은 이미 요약/분류된 저장소"""
+    store = PatentStore(store_path)
+    store.upsert(
+        PatentRecord(ApplicationNumber=f"10{i:05d}", InventionName=f"발명 {i}", Abstract=f"초록 {i}")
+        for i in range(40)
+    )
+    store.record_results({"의료/건강": [PatentRecord(ApplicationNumber=f"10{i:05d}", ai_summary="요약") for i in range(10)]})
+    store.close()
+    return store_path
+
+
+def shard_numbers(root: str, index: int) -> list[str]:
+    store = PatentStore(os.path.join(shards.shard_dir(root, index), "patents.sqlite3"))
+    numbers = [row["ApplicationNumber"] for row in store.read(["ApplicationNumber"])]
+    store.close()
+    return numbers
+
+
+def test_shard_of_is_stable_and_in_range():
+    assert shards.shard_of("1020150000001", 8) == shards.shard_of(1020150000001, 8)
+    assert {shards.shard_of(str(n), 4) for n in range(200)} == {0, 1, 2, 3}
+
+
+def test_split_partitions_pending_patents(source, tmp_path):
+    root = str(tmp_path / "shards")
+
+    manifest = shards.split(root, 3, source)
+
+    assigned = [shard_numbers(root, index) for index in range(3)]
+    numbers = [number for shard in assigned for number in shard]
+    # 이미 처리된 10건을 뺀 30건이 샤드 하나에만 들어감
+    assert sorted(numbers) == [f"10{i:05d}" for i in range(10, 40)]
+    assert manifest["patents"] == [len(shard) for shard in assigned]
+    assert all(shards.shard_of(number, 3) == index for index, shard in enumerate(assigned) for number in shard)
+    assert shards.read_manifest(root)["source_store"] == os.path.abspath(source)
+
+    with pytest.raises(ValueError):
+        shards.split(root, 3, source)
+
+
+def test_split_all_includes_processed(source, tmp_path):
+    manifest = shards.split(str(tmp_path / "shards"), 2, source, include_processed=True)
+
+    assert sum(manifest["patents"]) == 40
+
+
+def test_claim_is_exclusive_until_released(source, tmp_path):
+    root = str(tmp_path / "shards")
+    shards.split(root, 2, source)
+
+    assert shards.claim(root, 0)
+    assert not shards.claim(root, 0)
+    assert shards.claim(root, 1)
+
+    shards.release(root, 0)
+    assert shards.claim(root, 0)
+
+
+def test_reduce_merges_finished_shards(source, tmp_path):
+    root = str(tmp_path / "shards")
+    shards.split(root, 2, source)
+    # 워커가 샤드 저장소에 결과를 기록하고 상태를 done으로 남긴 것처럼 준비
+    for index in range(2):
+        store = PatentStore(os.path.join(shards.shard_dir(root, index), "patents.sqlite3"))
+        store.record_results({"자연어처리": [PatentRecord(**row, ai_summary="샤드 요약") for row in store.read(["ApplicationNumber"])]})
+        store.close()
+
+    shards._write_json(os.path.join(shards.shard_dir(root, 0), shards.STATUS), {"state": "done"})
+    with pytest.raises(ValueError):
+        shards.reduce(root)
+
+    shards._write_json(os.path.join(shards.shard_dir(root, 1), shards.STATUS), {"state": "done"})
+    report_files = shards.reduce(root)
+
+    store = PatentStore(source)
+    assert store.category_counts() == {"의료/건강": 10, "자연어처리": 30}
+    assert store.pending_numbers(f"10{i:05d}" for i in range(40)) == set()
+    store.close()
+    assert all(os.path.exists(path) for path in report_files)
+
+
+def test_reduce_partial_merges_only_given_results(source, tmp_path):
+    root = str(tmp_path / "shards")
+    shards.split(root, 2, source)
+
+    shards.reduce(root, partial=True)
+
+    store = PatentStore(source)
+    assert store.category_counts() == {"의료/건강": 10}
+    store.close()
+
+
+def test_run_processes_every_shard_in_workers(source, tmp_path):
+    root = str(tmp_path / "shards")
+    shards.split(root, 2, source)
+
+    results = shards.run(root, workers=2, fake_llm=0.001)
+
+    assert sorted((result["shard"], result["state"]) for result in results) == [(0, "done"), (1, "done")]
+    assert sum(result["processed"] for result in results) == 30
+    # 끝난 샤드는 다시 실행하지 않음
+    assert shards.run(root, workers=2, fake_llm=0.001) == []
+
+    shards.reduce(root)
+    store = PatentStore(source)
+    assert sum(store.category_counts().values()) == 40
+    store.close()
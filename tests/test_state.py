@@ -0,0 +1,60 @@
+from records import PatentRecord
+from state import PatentState
+
+
+def classified(number: str, category: str, **fields) -> PatentRecord:
+    return PatentRecord(ApplicationNumber=number, category=category, **fields)
+
+
+def test_categorize_keeps_application_numbers_in_order():
+    state = PatentState()
+    state.categorize([classified("2", "의료/건강"), classified("1", "의료/건강")])
+    state.categorize([classified("3", "자연어처리")])
+
+    assert state.categorized_patents == {"의료/건강": ["2", "1"], "자연어처리": ["3"]}
+
+
+def test_records_resolve_in_category_order():
+    patents = [classified("1", "의료/건강"), classified("2", "자연어처리"), classified("3", "의료/건강")]
+    state = PatentState(raw_patents=patents, summarized_patents=patents)
+    state.categorize([patents[2], patents[0], patents[1]])
+
+    records = state.categorized_records()
+
+    assert records == {"의료/건강": [patents[2], patents[0]], "자연어처리": [patents[1]]}
+    assert state.error_log == []
+
+
+def test_records_without_application_number_stay_distinct():
+    first = classified("N/A", "의료/건강", InventionName="첫째")
+    second = classified("N/A", "자연어처리", InventionName="둘째")
+    third = classified("N/A", "의료/건강", InventionName="셋째")
+    state = PatentState(raw_patents=[first, second, third])
+    # 번호가 같아도 카테고리 순서가 레코드 목록 순서와 달라도 각자의 레코드를 찾음
+    state.categorize([second, third, first])
+
+    records = state.categorized_records()
+
+    assert records["자연어처리"] == [second]
+    assert [patent.InventionName for patent in records["의료/건강"]] == ["첫째", "셋째"]
+
+
+def test_restored_copies_are_not_returned_twice():
+    summarized = classified("1", "의료/건강", ai_summary="요약")
+    # 체크포인트에서 복원하면 같은 특허가 목록마다 다른 객체
+    raw = classified("1", "의료/건강")
+    state = PatentState(raw_patents=[raw], summarized_patents=[summarized])
+    state.categorize([summarized])
+
+    assert state.categorized_records() == {"의료/건강": [summarized]}
+
+
+def test_unresolved_numbers_are_skipped_and_logged():
+    known = classified("1", "의료/건강")
+    state = PatentState(known_patents=[known], categorized_patents={"의료/건강": ["1", "2"], "기타": ["3"]})
+
+    records = state.categorized_records()
+
+    assert records == {"의료/건강": [known], "기타": []}
+    assert len(state.error_log) == 1
+    assert "2건" in state.error_log[0]
@@ -1,6 +1,11 @@
 from datetime import datetime, timedelta
 import re
 
+# 정규표현식은 모듈을 불러올 때 한 번만 컴파일 (preprocess.py의 열 단위 정리에서도 사용)
+# 태그 이름으로 시작하는 <...>만 태그로 보고, 여러 초록을 이어 붙인 구분자(\x00)는 넘지 않음
+HTML_TAG = re.compile(r"<[!/?]?[A-Za-z][^<>\x00]*>")
+WHITESPACE = re.compile(r"\s+")
+
 
 def clean_html(html_text: str) -> str:
     """HTML 태그 제거"""
@@ -8,9 +13,9 @@ def clean_html(html_text: str) -> str:
         return ""
 
     # ① 정규표현식으로 HTML 태그 제거: <태그명>내용</태그명> 패턴 매칭
-    clean_text = re.sub("<.*?>", "", html_text)
+    clean_text = HTML_TAG.sub("", html_text)
     # ② 연속된 공백(스페이스, 탭, 줄바꿈)을 하나의 공백으로 정리
-    clean_text = re.sub("\s+", " ", clean_text).strip()
+    clean_text = WHITESPACE.sub(" ", clean_text).strip()
     return clean_text
 
 
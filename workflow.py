@@ -1,37 +1,328 @@
-from langchain_openai import ChatOpenAI
-from langgraph.graph import StateGraph, END
+from functools import cached_property, partial
+from typing import TYPE_CHECKING, Optional
 
-from state import PatentState
-from agents.collector import PatentCollectorAgent
-from agents.summarizer import PatentSummarizerAgent
-from agents.organizer import PatentOrganizerAgent
-from agents.reporter import ReportGeneratorAgent
+from config import Config
+from metrics import MetricsRegistry
 
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+    from langgraph.checkpoint.base import BaseCheckpointSaver
+    from langgraph.graph import StateGraph
+    from cache import SummaryCache
+    from patent_store import PatentStore
+    from checkpoint import ItemCheckpoint
+    from scheduler import AdaptiveScheduler
+    from preclassifier import PatentPreClassifier
+    from budget import TokenBudgetPlanner
+    from cascade import ModelCascade
+    from agents.collector import PatentCollectorAgent
+    from agents.summarizer import PatentSummarizerAgent
+    from agents.organizer import PatentOrganizerAgent
+    from agents.analyzer import PatentAnalyzerAgent
+    from agents.pipeline import StreamingPipelineAgent
+    from agents.indexer import PatentIndexAgent
+    from agents.planner import BudgetPlannerAgent
+    from agents.deduplicator import PatentDedupAgent
+    from agents.preprocessor import PatentPreprocessAgent
+    from agents.lazy_summarizer import LazySummaryAgent
+    from agents.reporter import ReportGeneratorAgent
 
-def create_patent_workflow(llm: ChatOpenAI = None) -> StateGraph:
-    """특허 처리 워크플로우 생성 - 특허 수집 → AI 요약 → 카테고리 분류 → 보고서 생성"""
 
-    # ① 각 작업을 담당할 4개의 전문 에이전트 인스턴스 생성
-    collector = PatentCollectorAgent()  # KIPRIS API/CSV 특허 수집 전담
-    summarizer = PatentSummarizerAgent(llm)  # AI 요약 생성 전담
-    organizer = PatentOrganizerAgent(llm)  # 카테고리 분류 전담
-    reporter = ReportGeneratorAgent()  # 보고서 작성 전담
+class PatentAgents:
+    """워크플로우 노드와 CLI 단계가 쓰는 에이전트/구성 요소 모음
+
+    구성 요소는 처음 사용할 때 모듈을 불러와 만들므로, 보고서 재생성이나 수집처럼 일부 단계만 실행하면
+    LLM 클라이언트, LangGraph, pandas 등 그 단계에 필요 없는 모듈을 불러오지 않습니다.
+    자체 통계를 가진 구성 요소는 만들 때 metrics에 등록되어 지표 기록 시점의 값이 함께 저장됩니다.
+    """
+
+    def __init__(
+        self,
+        llm: "ChatOpenAI" = None,
+        metrics: Optional[MetricsRegistry] = None,
+        incremental: bool = False,
+        shard: bool = False,
+    ):
+        self.llm = llm
+        self.metrics = metrics or MetricsRegistry()  # 실행 지표 (노드/호출 지연 시간, 토큰, 재시도, 오류)
+        self.incremental = incremental
+        self.shard = shard
+
+    @cached_property
+    def store(self) -> "PatentStore":
+        from patent_store import PatentStore
+
+        return PatentStore()  # 원본/요약/분류 결과 저장소
+
+    @cached_property
+    def collector(self) -> "PatentCollectorAgent":
+        from agents.collector import PatentCollectorAgent
+
+        # KIPRIS API/저장소 특허 수집 전담
+        return PatentCollectorAgent(
+            use_stored=not self.incremental,
+            store=self.store,
+            metrics=self.metrics,
+            pending_only=self.shard,
+        )
+
+    @cached_property
+    def cache(self) -> Optional["SummaryCache"]:
+        if not Config.CACHE_ENABLED:
+            return None
+        from cache import SummaryCache
+
+        cache = SummaryCache()  # 요약 결과 영속 캐시
+        self.metrics.add_source("summary_cache", cache.stats)
+        return cache
+
+    @cached_property
+    def scheduler(self) -> "AdaptiveScheduler":
+        from scheduler import AdaptiveScheduler
+
+        scheduler = AdaptiveScheduler(metrics=self.metrics)  # 요약/분류가 공유하는 동시성·레이트 리미터
+        self.metrics.add_source("scheduler", scheduler.stats)
+        return scheduler
+
+    @cached_property
+    def cascade(self) -> "ModelCascade":
+        from cascade import ModelCascade
+
+        # 요약/분류가 공유하는 모델 단계 (싼 모델 → 강한 모델)
+        cascade = ModelCascade(self.llm, scheduler=self.scheduler, metrics=self.metrics)
+        self.metrics.add_source("cascade", cascade.stats)  # 단계별 호출 수와 상승 비율
+        return cascade
+
+    @cached_property
+    def item_checkpoint(self) -> Optional["ItemCheckpoint"]:
+        if not Config.CHECKPOINT_ENABLED:
+            return None
+        from checkpoint import ItemCheckpoint
+
+        return ItemCheckpoint()  # 항목 단위 진행 기록
+
+    @cached_property
+    def planner(self) -> "TokenBudgetPlanner":
+        from budget import TokenBudgetPlanner
+
+        # 토큰 수 기준 입력 자르기 + 실행 단위 토큰/비용 예산
+        planner = TokenBudgetPlanner(metrics=self.metrics)
+        self.metrics.add_source("budget", planner.stats)  # 예상 토큰/비용과 실제 사용량 비교
+        return planner
+
+    @cached_property
+    def summarizer(self) -> "PatentSummarizerAgent":
+        from agents.summarizer import PatentSummarizerAgent
+
+        # AI 요약 생성 전담
+        return PatentSummarizerAgent(
+            self.llm, self.cache, self.scheduler, self.item_checkpoint, self.planner, self.cascade
+        )
+
+    @cached_property
+    def preclassifier(self) -> Optional["PatentPreClassifier"]:
+        if not Config.PRECLASSIFY_ENABLED:
+            return None
+        from preclassifier import PatentPreClassifier
+
+        preclassifier = PatentPreClassifier()
+        self.metrics.add_source("preclassifier", preclassifier.stats)
+        return preclassifier
+
+    @cached_property
+    def organizer(self) -> "PatentOrganizerAgent":
+        from agents.organizer import PatentOrganizerAgent
+
+        # 카테고리 분류 전담
+        return PatentOrganizerAgent(
+            self.llm, self.scheduler, self.preclassifier, self.item_checkpoint, self.planner, self.cascade
+        )
+
+    @cached_property
+    def analyzer(self) -> "PatentAnalyzerAgent":
+        from agents.analyzer import PatentAnalyzerAgent
+
+        # 요약+분류 통합 호출 (파싱 실패 시 요약/분류 에이전트로 처리)
+        return PatentAnalyzerAgent(self.llm, self.summarizer, self.organizer, self.scheduler)
+
+    @cached_property
+    def lazy_summarizer(self) -> "LazySummaryAgent":
+        from agents.lazy_summarizer import LazySummaryAgent
+
+        # 분류 후 보고서에 표시될 특허만 요약 (표시 개수는 보고서 작성기 설정을 따름)
+        return LazySummaryAgent(
+            self.summarizer, self.planner, self.store, self.reporter.writer.per_category, self.dedup
+        )
+
+    @cached_property
+    def reporter(self) -> "ReportGeneratorAgent":
+        from agents.reporter import ReportGeneratorAgent
+
+        return ReportGeneratorAgent()  # 보고서 작성 전담
+
+    @cached_property
+    def preprocessor(self) -> Optional["PatentPreprocessAgent"]:
+        if not Config.PREPROCESS_ENABLED:
+            return None
+        from agents.preprocessor import PatentPreprocessAgent
+
+        preprocessor = PatentPreprocessAgent()  # HTML/공백/유니코드 정리, 내용 해시 계산
+        self.metrics.add_source("preprocess", preprocessor.stats)
+        return preprocessor
+
+    @cached_property
+    def dedup(self) -> Optional["PatentDedupAgent"]:
+        if not Config.DEDUP_ENABLED:
+            return None
+        from agents.deduplicator import PatentDedupAgent
+
+        dedup = PatentDedupAgent(store=self.store)  # 근사 중복 특허 묶기 (서명은 저장소에 보관)
+        self.metrics.add_source("dedup", dedup.stats)
+        return dedup
+
+    @cached_property
+    def indexer(self) -> "PatentIndexAgent":
+        from agents.indexer import PatentIndexAgent
+
+        return PatentIndexAgent(self.store)  # 결과 저장, 증분 수집 변경분 선택/병합
+
+    def budget(self, mode: str = "staged") -> "BudgetPlannerAgent":
+        """특허 1건이 거치는 LLM 호출 단계의 추정 함수로 토큰 예산 에이전트 생성"""
+        from agents.planner import BudgetPlannerAgent
+
+        if mode == "fused":
+            return BudgetPlannerAgent(self.planner, [self.analyzer.estimate_tokens])
+        if mode == "lazy":
+            # 분류는 원본 초록으로 하고, 요약은 표시될 특허만 요약 노드에서 따로 예약
+            return BudgetPlannerAgent(
+                self.planner, [partial(self.organizer.estimate_tokens, summarized=False)]
+            )
+        return BudgetPlannerAgent(
+            self.planner, [self.summarizer.estimate_tokens, self.organizer.estimate_tokens]
+        )
+
+    @cached_property
+    def pipeline(self) -> "StreamingPipelineAgent":
+        from agents.pipeline import StreamingPipelineAgent
+
+        return StreamingPipelineAgent(
+            self.collector,
+            self.summarizer,
+            self.organizer,
+            self.budget(),
+            self.dedup,
+            self.preprocessor,
+        )
+
+
+def create_patent_workflow(
+    llm: "ChatOpenAI" = None,
+    mode: str = Config.WORKFLOW_MODE,
+    incremental: bool = Config.INCREMENTAL_ENABLED,
+    checkpointer: "BaseCheckpointSaver" = None,
+    metrics: MetricsRegistry = None,
+    shard: bool = False,
+    agents: Optional[PatentAgents] = None,
+) -> "StateGraph":
+    """특허 처리 워크플로우 생성 - 특허 수집 → AI 요약 → 카테고리 분류 → 보고서 생성
+
+    mode="fused"이면 요약과 분류를 한 번의 LLM 호출로 처리하는 analyze 노드를,
+    mode="stream"이면 수집/요약/분류를 큐로 연결해 겹쳐 실행하는 pipeline 노드를 사용합니다.
+    mode="lazy"이면 발명명 + 원본 초록으로 먼저 분류하고, 결과 저장 후 보고서에 표시될 특허만 요약합니다.
+    Config.PREPROCESS_ENABLED이면 수집 직후 preprocess 노드가 발명명/초록 열을 한 번에 정리하고 내용 해시를 계산합니다.
+    요약/분류 전에 plan 노드(stream 모드는 파이프라인 안)에서 토큰/비용을 추정하고 예산을 넘는 특허는 보류합니다.
+    Config.DEDUP_ENABLED이면 수집 직후 dedup 노드가 초록이 거의 같은 특허를 묶어 대표만 요약/분류하고,
+    expand 노드가 대표의 결과를 나머지 특허에 채웁니다.
+    incremental=True이면 수집 후 신규/변경 특허만 처리하고 이전 결과를 합쳐 보고서를 만듭니다.
+    checkpointer를 주면 노드 경계마다 상태를 저장하여 같은 thread_id로 중단된 실행을 재개할 수 있습니다.
+    metrics를 주면 노드 실행 시간, LLM/KIPRIS 호출 지연 시간과 토큰 수 등을 그 레지스트리에 기록합니다.
+    shard=True이면 (shards.py 워커용) 저장소의 미처리 특허만 처리하고 보고서 노드 없이 끝냅니다.
+    agents를 주면 그 에이전트 모음으로 노드를 만듭니다 (service.py가 LLM 클라이언트, 스케줄러, 캐시를 작업 간에 공유).
+    """
+    if mode not in ("staged", "fused", "stream", "lazy"):
+        raise ValueError(f"지원하지 않는 워크플로우 모드입니다: {mode}")
+    if incremental and mode == "stream":
+        raise ValueError("증분 수집은 stream 모드와 함께 사용할 수 없습니다.")
+    if incremental and shard:
+        raise ValueError("샤드 실행은 저장소에 나눠 둔 특허만 처리하므로 증분 수집과 함께 사용할 수 없습니다.")
+    if mode == "lazy" and shard:
+        raise ValueError("샤드 실행은 보고서를 reduce 단계에서 만들므로 lazy 모드와 함께 사용할 수 없습니다.")
+
+    from langgraph.graph import StateGraph, END
+    from state import PatentState
+
+    # ① 에이전트는 이 모드의 노드로 등록할 때 처음 만들어짐 (쓰지 않는 에이전트는 만들지 않음)
+    if agents is None:
+        agents = PatentAgents(llm, metrics, incremental, shard)
+    metrics = agents.metrics
 
     # ② PatentState를 state객체로 사용하는 워크플로우 그래프 생성
     workflow = StateGraph(PatentState)
 
-    # ③ 각 에이전트의 메서드를 워크플로우 노드로 등록
-    workflow.add_node("collect", collector.collect_patents)
-    workflow.add_node("summarize", summarizer.summarize_patents)
-    workflow.add_node("organize", organizer.organize_patents)
-    workflow.add_node("report", reporter.generate_report)
+    def add_node(name: str, func) -> None:
+        # 모든 노드의 실행 시간을 기록하도록 감싸서 등록
+        workflow.add_node(name, metrics.wrap_node(name, func))
+
+    # ③ 각 에이전트의 메서드를 워크플로우 노드로 등록 (샤드 실행은 보고서를 reduce 단계에서 한 번만 생성)
+    reported = END
+    if not shard:
+        add_node("report", agents.reporter.generate_report)
+        workflow.add_edge("report", END)  # 보고서 → 종료
+        reported = "report"
 
     # ④ 워크플로우 실행 순서 정의 (순차적 파이프라인)
+    if mode == "stream":
+        add_node("pipeline", agents.pipeline.run_pipeline)
+        workflow.set_entry_point("pipeline")  # 수집+요약+분류 동시 진행
+        workflow.add_edge("pipeline", reported)  # 파이프라인 → 보고서
+        return workflow.compile(checkpointer=checkpointer)
+
+    if mode == "lazy":
+        add_node("summarize", agents.lazy_summarizer.summarize_displayed)
+        workflow.add_edge("summarize", reported)  # 표시될 특허만 요약 → 보고서
+        reported = "summarize"
+
+    add_node("collect", agents.collector.collect_patents)
     workflow.set_entry_point("collect")  # 시작점 설정
-    workflow.add_edge("collect", "summarize")  # 수집 → 요약
-    workflow.add_edge("summarize", "organize")  # 요약 → 분류
-    workflow.add_edge("organize", "report")  # 분류 → 보고서
-    workflow.add_edge("report", END)  # 보고서 → 종료
+    if incremental:
+        add_node("delta", agents.indexer.select_delta)
+        add_node("merge", agents.indexer.merge_results)
+        workflow.add_edge("collect", "delta")  # 수집 → 신규/변경분 선택
+        workflow.add_edge("merge", reported)  # 결과 저장 + 이전 결과 병합 → 보고서
+        collected, finished = "delta", "merge"
+    else:
+        add_node("save", agents.indexer.save_results)
+        workflow.add_edge("save", reported)  # 결과 저장 → 보고서
+        collected, finished = "collect", "save"
+
+    if agents.preprocessor is not None:
+        add_node("preprocess", agents.preprocessor.preprocess_patents)
+        workflow.add_edge(collected, "preprocess")  # 수집 → 열 단위 정리
+        collected = "preprocess"
+
+    if agents.dedup is not None:
+        add_node("dedup", agents.dedup.cluster_patents)
+        add_node("expand", agents.dedup.expand_duplicates)
+        workflow.add_edge(collected, "dedup")  # 수집 → 근사 중복 묶기
+        workflow.add_edge("expand", finished)  # 중복 특허에 대표 결과 채우기 → 저장
+        collected, finished = "dedup", "expand"
+
+    if mode == "fused":
+        add_node("analyze", agents.analyzer.analyze_patents)
+        workflow.add_edge("plan", "analyze")  # 예산 확인 → 요약+분류
+        workflow.add_edge("analyze", finished)  # 요약+분류 → 보고서
+    elif mode == "lazy":
+        add_node("organize", agents.organizer.organize_patents)
+        workflow.add_edge("plan", "organize")  # 예산 확인 → 발명명 + 원본 초록으로 분류
+        workflow.add_edge("organize", finished)  # 분류 → 저장 (요약은 저장 후 표시 특허만)
+    else:
+        add_node("summarize", agents.summarizer.summarize_patents)
+        add_node("organize", agents.organizer.organize_patents)
+        workflow.add_edge("plan", "summarize")  # 예산 확인 → 요약
+        workflow.add_edge("summarize", "organize")  # 요약 → 분류
+        workflow.add_edge("organize", finished)  # 분류 → 보고서
+    add_node("plan", agents.budget(mode).plan_patents)
+    workflow.add_edge(collected, "plan")  # 수집 → 토큰 예산 확인
 
     # ⑤ 실행 가능한 워크플로우 객체로 컴파일하여 반환
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)